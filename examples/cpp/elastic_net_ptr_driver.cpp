@@ -185,14 +185,16 @@ double ElasticNet(const std::vector<T>&A, const std::vector<T>&b, const std::vec
   int sourceDev=0; //index of first GPU to own data
   const char ord='r'; // normal C-order
   // only need train weight
-  //  extern int makePtr_dense<T>(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, const char ord,
+  //  extern int makePtr_dense<T>(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, const char ord, int intercept,
   //                           const T *data, const T *datay, const T *vdata, const T *vdatay, const T *weight,
   //                           void **_data, void **_datay, void **_vdata, void **_vdatay, void **_weight);
-  h2o4gpu::makePtr_dense(sharedA, sourceme, sourceDev, mTrain, n, mValid, ord, trainX.data(), trainY.data(), validX.data(), validY.data(), trainW.data(), &aa, &bb, &cc, &dd, &ee); // //static_cast<T*>(NULL)
+  // splitData already appended the intercept column, so don't have makePtr_dense add another
+  h2o4gpu::makePtr_dense(sharedA, sourceme, sourceDev, mTrain, n, mValid, ord, 0, trainX.data(), trainY.data(), validX.data(), validY.data(), trainW.data(), &aa, &bb, &cc, &dd, &ee); // //static_cast<T*>(NULL)
 
 
   int datatype = 1;
   int givefullpath=0;
+  int givetelemetry=0;
   T *Xvsalphalambda=NULL;
   T *Xvsalpha=NULL;
   T *validPredsvsalphalambda=NULL;
@@ -208,12 +210,21 @@ double ElasticNet(const std::vector<T>&A, const std::vector<T>&b, const std::vec
   int glmstopearly=1;
   double glmstopearlyrmsefraction=1.0;
   int maxiterations=5000;
+  double maxruntime=0; // no time limit
   int verbose=0;
+  int screening=0;
+  int solver=0;
+  int lockstep=0;
+  int anderson_mem=0;
+  int lambdasearch=0;
+  double racemargin=-1.0;
+  int warmstartfit=0;
+  int blasThreads=0; // each thread's share of the cores
   T *alphas = NULL;
   T *lambdas = NULL;
   int gpu_id = 0;
   int totalnGPUs = nGPUs; // not really right TODO: Should have elasticNetptr figure out total number of GPUs
-  double time = h2o4gpu::ElasticNetptr<T>(family, dopredict, sourceDev, datatype, sharedA, nThreads, gpu_id, nGPUs, totalnGPUs, ord, mTrain, n, mValid, intercept, standardize, lambda_max, lambda_min_ratio, nLambdas, nFolds, nAlphas, alpha_min, alpha_max, alphas, lambdas, tol, tolseekfactor, lambdastopearly, glmstopearly, glmstopearlyrmsefraction, maxiterations, verbose, aa, bb, cc, dd, ee, givefullpath, &Xvsalphalambda, &Xvsalpha, &validPredsvsalphalambda, &validPredsvsalpha, &countfull, &countshort, &countmore);
+  double time = h2o4gpu::ElasticNetptr<T>(family, dopredict, sourceDev, datatype, sharedA, nThreads, blasThreads, gpu_id, nGPUs, totalnGPUs, ord, mTrain, n, mValid, intercept, standardize, lambda_max, lambda_min_ratio, nLambdas, nFolds, nAlphas, alpha_min, alpha_max, alphas, lambdas, tol, tolseekfactor, lambdastopearly, glmstopearly, glmstopearlyrmsefraction, maxiterations, maxruntime, verbose, screening, solver, lockstep, anderson_mem, lambdasearch, racemargin, warmstartfit, (T*)NULL, (T*)NULL, 1, (T*)NULL, (T*)NULL, aa, bb, cc, dd, ee, givefullpath, givetelemetry, NULL, NULL, &Xvsalphalambda, &Xvsalpha, &validPredsvsalphalambda, &validPredsvsalpha, &countfull, &countshort, &countmore, NULL, NULL, NULL);
 
   // print out some things about Xvsalphalambda and Xvsalpha
   printf("countfull=%d countshort=%d countmore=%d\n",countfull,countshort,countmore); fflush(stdout);
@@ -3,9 +3,15 @@
  * License   Apache License Version 2.0 (see LICENSE for details)
  */
 #include "elastic_net_ptr.h"
+#include "glm_cd.h"
 #include <float.h>
 #include "../include/util.h"
 #include <sys/stat.h>
+#include <memory>
+#include <deque>
+#include <map>
+#include <mutex>
+#include <numeric>
 
 #ifdef HAVECUDA
 #define TEXTARCH "GPU"
@@ -121,6 +127,13 @@ const std::string HARDWARE = SOCKETS + "x" + CPUTYPE;
 
 #define RELAXEARLYSTOP 0
 
+// thread count setters of the BLAS libraries the library may be linked with (NULL if not)
+extern "C" {
+int mkl_set_num_threads_local(int nthreads) __attribute__((weak));
+void openblas_set_num_threads(int nthreads) __attribute__((weak));
+int openblas_get_num_threads(void) __attribute__((weak));
+}
+
 namespace h2o4gpu {
 
 volatile sig_atomic_t flag = 0;
@@ -129,6 +142,45 @@ inline void my_function(int sig) { // can be called asynchronously
 	flag = 1; // set flag
 }
 
+// Splits the cores between the nThreads outer (fold x alpha) threads and the BLAS calls and nested
+// OpenMP loops each of them makes, blasThreads each (if 0, its share of the cores), so nested
+// parallelism doesn't oversubscribe the machine.  Made before the outer parallel region, where it
+// sets OpenBLAS's thread count (which is for the whole process) until destroyed; each outer thread
+// then holds an Inner for its own settings.
+class ThreadBudget {
+public:
+	ThreadBudget(int cores, int nThreads, int blasThreads)
+			: _inner(blasThreads > 0 ? blasThreads : std::max(1, cores / std::max(nThreads, 1))), _openblas(0) {
+		if (!mkl_set_num_threads_local && openblas_set_num_threads && openblas_get_num_threads) {
+			_openblas = openblas_get_num_threads();
+			openblas_set_num_threads(_inner);
+		}
+	}
+	~ThreadBudget() {
+		if (_openblas > 0)
+			openblas_set_num_threads(_openblas);
+	}
+	int inner() const { return _inner; }
+
+	class Inner {
+	public:
+		explicit Inner(const ThreadBudget &budget) {
+#ifdef _OPENMP
+			omp_set_num_threads(budget.inner()); // this thread's nested regions, also an OpenMP BLAS's
+#endif
+			if (mkl_set_num_threads_local)
+				mkl_set_num_threads_local(budget.inner()); // this thread's
+		}
+		~Inner() {
+			if (mkl_set_num_threads_local)
+				mkl_set_num_threads_local(0); // back to the global setting
+		}
+	};
+
+private:
+	int _inner, _openblas;
+};
+
 bool stopEarly(vector<double> val, int k, double tolerance, bool moreIsBetter,
 			   bool verbose, double norm, double *jump) {
 	if (val.size() - 1 < 2 * k)
@@ -236,21 +288,26 @@ bool fileExists(const std::string& filename)
 
 #define NUMError 3 // train, hold-out CV, valid
 #define NUMOTHER 3 // for lambda, alpha, tol
+#define NUMTELEMETRY 12 // per solve: fold, alpha index, lambda index, refit, alpha, lambda, iterations, rho,
+						// primal and dual residual, time, dof
 
 template<typename T>
 double ElasticNetptr(
 		const char family, int dopredict, int sourceDev, int datatype, int sharedA,
-		int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain, size_t n,
+		int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain, size_t n,
 		size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max,
 		T *alphas, T *lambdas,
 		double tol, double tolseekfactor,
-		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, int verbose,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, double maxruntime, int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, T *warmX, T *warmRho, int nTargets, T *targetY, T *targetValidY,
 		T *trainXptr, T *trainYptr, T *validXptr, T *validYptr,
-		T *weightptr, int givefullpath, T **Xvsalphalambda, T **Xvsalpha,
+		T *weightptr, int givefullpath, int givetelemetry,
+		void (*pathcallback)(void *, int, int, int, const T *, size_t, const T *, size_t),
+		void *pathdata, T **Xvsalphalambda, T **Xvsalpha,
 		T **validPredsvsalphalambda, T **validPredsvsalpha, size_t *countfull,
-		size_t *countshort, size_t *countmore) {
+		size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry) {
 
 	if(0){ // DEBUG
 		if(alphas!=NULL){
@@ -269,27 +326,27 @@ double ElasticNetptr(
 	}
 
 	if (dopredict == 0) {
-		return ElasticNetptr_fit(family, sourceDev, datatype, sharedA, nThreads, gpu_id, nGPUs, totalnGPUs,
+		return ElasticNetptr_fit(family, sourceDev, datatype, sharedA, nThreads, blasThreads, gpu_id, nGPUs, totalnGPUs,
 								 ord, mTrain, n, mValid, intercept, standardize,
 								 lambda_max, lambda_min_ratio, nLambdas, nFolds,
 								 nAlphas, alpha_min, alpha_max,
 								 alphas, lambdas,
 								 tol, tolseekfactor,
-								 lambdastopearly, glmstopearly, stopearlyerrorfraction, max_iterations, verbose, trainXptr,
-								 trainYptr, validXptr, validYptr, weightptr, givefullpath,
+								 lambdastopearly, glmstopearly, stopearlyerrorfraction, max_iterations, maxruntime, verbose, screening, solver, lockstep, anderson_mem, lambdasearch, racemargin, warmstart, warmX, warmRho, nTargets, targetY, targetValidY, trainXptr,
+								 trainYptr, validXptr, validYptr, weightptr, givefullpath, givetelemetry, pathcallback, pathdata,
 								 Xvsalphalambda, Xvsalpha, validPredsvsalphalambda,
-								 validPredsvsalpha, countfull, countshort, countmore);
+								 validPredsvsalpha, countfull, countshort, countmore, timedout, telemetry, counttelemetry);
 	} else {
-		return ElasticNetptr_predict(family, sourceDev, datatype, sharedA, nThreads, gpu_id, nGPUs, totalnGPUs,
+		return ElasticNetptr_predict(family, sourceDev, datatype, sharedA, nThreads, blasThreads, gpu_id, nGPUs, totalnGPUs,
 									 ord, mTrain, n, mValid, intercept, standardize,
 									 lambda_max, lambda_min_ratio, nLambdas, nFolds,
 									 nAlphas, alpha_min, alpha_max,
 									 alphas, lambdas,
 									 tol, tolseekfactor,
-									 lambdastopearly, glmstopearly, stopearlyerrorfraction, max_iterations, verbose, trainXptr,
-									 trainYptr, validXptr, validYptr, weightptr, givefullpath,
+									 lambdastopearly, glmstopearly, stopearlyerrorfraction, max_iterations, maxruntime, verbose, screening, solver, lockstep, anderson_mem, lambdasearch, racemargin, warmstart, warmX, warmRho, nTargets, targetY, targetValidY, trainXptr,
+									 trainYptr, validXptr, validYptr, weightptr, givefullpath, givetelemetry, pathcallback, pathdata,
 									 Xvsalphalambda, Xvsalpha, validPredsvsalphalambda,
-									 validPredsvsalpha, countfull, countshort, countmore);
+									 validPredsvsalpha, countfull, countshort, countmore, timedout, telemetry, counttelemetry);
 	}
 
 }
@@ -300,8 +357,389 @@ double ElasticNetptr(
 #define MAPPREDALL(i,a,which, m) (which + a*m + i*m*nAlphas)
 #define MAPPREDBEST(a,which, m) (which + a*m)
 
+// Fit each cross-validation fold on its own training rows instead of
+// down-weighting the held-out rows to 1E-13, so the solver never touches
+// held-out rows.  Not done for GPU builds, where dense matrices are not freed
+// until exit and rebuilding one per fold would keep piling up device memory.
+#ifdef HAVECUDA
+#define FOLDSUBSET 0
+#else
+#define FOLDSUBSET 1
+#endif
+
+// Coordinate descent keeps the gradient up to date through cached Gram
+// columns (covariance updates) for gaussian fits with at most this many
+// columns, otherwise the residual (naive updates), as glmnet does.
+#define CDCOVARIANCEMAXN 500
+
+// Whether training row j is held out from fold fi of nfolds non-overlapping contiguous folds (integer
+// bounds, so each row is held out by exactly one fold)
+inline bool heldOut(size_t j, int fi, int nfolds, size_t mTrain) {
+	return nfolds > 1 && j >= fi * mTrain / nfolds && j < (fi + 1) * mTrain / nfolds;
+}
+
+// Split training rows into those fitting fold fi and those held out from it
+void foldRows(size_t mTrain, int fi, int nfolds, std::vector<size_t> &trainrows,
+			  std::vector<size_t> &holdrows) {
+	trainrows.clear();
+	holdrows.clear();
+	for (size_t j = 0; j < mTrain; ++j) {
+		if (heldOut(j, fi, nfolds, mTrain))
+			holdrows.push_back(j);
+		else
+			trainrows.push_back(j);
+	}
+}
+
+// Gather rows of the m x n matrix X (row or column major) into Xrows
+template<typename T>
+void gatherRows(const char ord, size_t m, size_t n, const T *X,
+				const std::vector<size_t> &rows, T *Xrows) {
+	size_t mrows = rows.size();
+	if (ord == 'r' || ord == 'R') {
+		for (size_t k = 0; k < mrows; ++k)
+			memcpy(&Xrows[k * n], &X[rows[k] * n], n * sizeof(T));
+	} else {
+		for (size_t j = 0; j < n; ++j)
+			for (size_t k = 0; k < mrows; ++k)
+				Xrows[j * mrows + k] = X[j * m + rows[k]];
+	}
+}
+
+// Linear predictor for rows of the m x n matrix X (row or column major)
+template<typename T>
+void predictRows(const char ord, size_t m, size_t n, const T *X,
+				 const std::vector<size_t> &rows, const T *x, T *preds) {
+	size_t mrows = rows.size();
+	if (ord == 'r' || ord == 'R') {
+		for (size_t k = 0; k < mrows; ++k) {
+			const T *row = &X[rows[k] * n];
+			T pred = 0;
+			for (size_t j = 0; j < n; ++j)
+				pred += row[j] * x[j];
+			preds[k] = pred;
+		}
+	} else {
+		for (size_t k = 0; k < mrows; ++k)
+			preds[k] = 0;
+		for (size_t j = 0; j < n; ++j)
+			for (size_t k = 0; k < mrows; ++k)
+				preds[k] += X[j * m + rows[k]] * x[j];
+	}
+}
+
+// Gather columns cols of the m x n matrix X (row or column major) into Xcols,
+// restricted to rows (all m rows if rows is NULL)
+template<typename T>
+void gatherCols(const char ord, size_t m, size_t n, const T *X,
+				const std::vector<size_t> *rows, const std::vector<size_t> &cols,
+				T *Xcols) {
+	size_t mrows = (rows ? rows->size() : m);
+	size_t ncols = cols.size();
+	if (ord == 'r' || ord == 'R') {
+		for (size_t k = 0; k < mrows; ++k) {
+			const T *row = &X[(rows ? (*rows)[k] : k) * n];
+			for (size_t c = 0; c < ncols; ++c)
+				Xcols[k * ncols + c] = row[cols[c]];
+		}
+	} else {
+		for (size_t c = 0; c < ncols; ++c) {
+			const T *col = &X[cols[c] * m];
+			for (size_t k = 0; k < mrows; ++k)
+				Xcols[c * mrows + k] = col[rows ? (*rows)[k] : k];
+		}
+	}
+}
+
+// Loss derivative w*(mu-y) at the linear predictors preds (mu = inverse link of preds)
+template<typename T>
+void lossResidual(const char family, size_t mrows, const T *w, const T *y,
+				  const T *preds, T *r) {
+	for (size_t k = 0; k < mrows; ++k) {
+		T mu = (family == 'l' ? 1.0 / (1.0 + std::exp(-preds[k])) : preds[k]);
+		r[k] = w[k] * (mu - y[k]);
+	}
+}
+
+// Multinomial logloss of the nclass classes' linear predictors eta against their indicators y (both
+// class-major, len rows each), weighted by w as getError's, or by 1-w if heldout as its offset variant's
+template<typename T>
+T multinomialError(size_t len, int nclass, const T *w, const T *eta, const T *y, int heldout) {
+	double weightsum = 0, logloss = 0;
+	for (size_t k = 0; k < len; ++k) {
+		double wk = (heldout ? 1.0 - w[k] : w[k]);
+		double etamax = -std::numeric_limits<double>::max();
+		for (int c = 0; c < nclass; ++c)
+			etamax = std::max(etamax, static_cast<double>(eta[c * len + k]));
+		double sum = 0;
+		for (int c = 0; c < nclass; ++c)
+			sum += std::exp(eta[c * len + k] - etamax);
+		for (int c = 0; c < nclass; ++c) {
+			if (y[c * len + k] != 0) {
+				double p = std::max(1e-15, std::exp(eta[c * len + k] - etamax) / sum);
+				logloss -= wk * y[c * len + k] * std::log(p);
+			}
+		}
+		weightsum += wk;
+	}
+	return static_cast<T>(weightsum > 0 ? logloss / weightsum : 0);
+}
+
+// Gradient X^T r of the loss over all n columns, where r is the loss
+// derivative w*(mu-y) for rows of the m x n matrix X (all m rows if rows is NULL),
+// divided by colscale[j] if given (the gradient for the standardized columns)
+template<typename T>
+void gradCols(const char ord, size_t m, size_t n, const T *X,
+			  const std::vector<size_t> *rows, const T *r, T *grad,
+			  const T *colscale = NULL) {
+	size_t mrows = (rows ? rows->size() : m);
+	if (ord == 'r' || ord == 'R') {
+		for (size_t j = 0; j < n; ++j)
+			grad[j] = 0;
+		for (size_t k = 0; k < mrows; ++k) {
+			const T *row = &X[(rows ? (*rows)[k] : k) * n];
+			for (size_t j = 0; j < n; ++j)
+				grad[j] += row[j] * r[k];
+		}
+	} else {
+		for (size_t j = 0; j < n; ++j) {
+			const T *col = &X[j * m];
+			T sum = 0;
+			for (size_t k = 0; k < mrows; ++k)
+				sum += col[rows ? (*rows)[k] : k] * r[k];
+			grad[j] = sum;
+		}
+	}
+	if (colscale) {
+		for (size_t j = 0; j < n; ++j)
+			grad[j] /= colscale[j];
+	}
+}
+
+// lambda_max, as MatrixDense::Stats gives it for one response, of each of the nTargets responses Y
+// (target-major, m rows each): max_j |x_j^T W (y - intercept*mean(y))| / penalty[j] over the non-intercept
+// columns, with the products of all targets accumulated in a single pass over X
+template<typename T>
+void targetLambdaMax(const char ord, size_t m, size_t n, int intercept, const T *X, const T *w,
+					 int nTargets, const T *Y, const T *penalty, T *lambdamax) {
+	size_t k = nTargets;
+	std::vector<T> r(m * k); // row-major, so a row of X meets every target's residual at once
+	for (size_t t = 0; t < k; ++t) {
+		const T *y = &Y[t * m];
+		T mean = std::accumulate(y, y + m, T(0)) / m;
+		for (size_t i = 0; i < m; ++i)
+			r[i * k + t] = (w ? w[i] : 1) * (y[i] - intercept * mean);
+	}
+	size_t ncols = n - intercept;
+	std::vector<T> u(ncols * k, 0);
+	if (ord == 'r' || ord == 'R') {
+		for (size_t i = 0; i < m; ++i) {
+			const T *row = &X[i * n], *ri = &r[i * k];
+			for (size_t j = 0; j < ncols; ++j) {
+				T *uj = &u[j * k];
+				for (size_t t = 0; t < k; ++t)
+					uj[t] += row[j] * ri[t];
+			}
+		}
+	} else {
+		for (size_t j = 0; j < ncols; ++j) {
+			const T *col = &X[j * m];
+			T *uj = &u[j * k];
+			for (size_t i = 0; i < m; ++i) {
+				const T *ri = &r[i * k];
+				for (size_t t = 0; t < k; ++t)
+					uj[t] += col[i] * ri[t];
+			}
+		}
+	}
+	for (size_t t = 0; t < k; ++t) {
+		T lmax = 0;
+		for (size_t j = 0; j < ncols; ++j)
+			lmax = std::max(lmax, static_cast<T>(std::abs(u[j * k + t] / (penalty ? penalty[j] : 1))));
+		if (lmax == 0.0 || !std::isfinite(lmax)) {
+			fprintf(stderr, "Failure to compute lambda_max0 of target %zu\n", t);
+			fflush(stderr);
+			exit(1);
+		}
+		lambdamax[t] = lmax;
+	}
+}
+
+// mean and (len-1 normalized) standard deviation of y, as MatrixDense::Stats gives them
+template<typename T>
+void meanSd(size_t len, const T *y, double *mean, double *sd) {
+	*mean = *sd = 0;
+	if (len == 0)
+		return;
+	T mu = std::accumulate(y, y + len, T(0)) / len;
+	double var = 0;
+	for (size_t i = 0; i < len; ++i)
+		var += (y[i] - mu) * (y[i] - mu);
+	*mean = mu;
+	*sd = std::sqrt(var / (len - 1));
+}
+
+// Linear predictor for the m x n sparse matrix X given as CSR (ord 'r') or
+// CSC (ord 'c') arrays data, indices and indptr
+template<typename T>
+void sparsePredict(const char ord, size_t m, size_t n, const T *data,
+				   const int *indices, const int *indptr, const T *x, T *preds) {
+	if (ord == 'r' || ord == 'R') {
+		for (size_t k = 0; k < m; ++k) {
+			T pred = 0;
+			for (int p = indptr[k]; p < indptr[k + 1]; ++p)
+				pred += data[p] * x[indices[p]];
+			preds[k] = pred;
+		}
+	} else {
+		for (size_t k = 0; k < m; ++k)
+			preds[k] = 0;
+		for (size_t j = 0; j < n; ++j) {
+			if (x[j] == 0)
+				continue;
+			for (int p = indptr[j]; p < indptr[j + 1]; ++p)
+				preds[indices[p]] += data[p] * x[j];
+		}
+	}
+}
+
+// Stats (and column sds) of the uploaded data of a recent fit, and what identifies that data
+template<typename T>
+struct DataStats {
+	size_t generations[5]; // of trainX, trainY, validX, validY, weight (0 if NULL), see uploadGeneration
+	size_t mTrain, n, mValid;
+	char ord;
+	int intercept, standardize, sourceDev;
+	bool moments;
+	T min[2], max[2], mean[2], var[2], sd[2], skew[2], kurt[2];
+	T lambdamax0;
+	std::vector<T> colsd;
+};
+
+static const size_t kStatsCacheSize = 8;
+// guards the uploads and the stats caches, as fits may run at once from several (Python) threads
+static std::mutex statsCacheMutex;
+// generation of each live upload, and the last one given
+static std::map<const void *, size_t> uploads;
+static size_t lastUploadGeneration = 0;
+
+template<typename T>
+std::deque<DataStats<T> > &statsCache() {
+	static std::deque<DataStats<T> > cache;
+	return cache;
+}
+
+void registerUpload(const void *ptr) {
+	if (ptr == NULL)
+		return;
+	std::lock_guard<std::mutex> lock(statsCacheMutex);
+	uploads[ptr] = ++lastUploadGeneration;
+}
+
+// the upload's stats are dropped with it, as its generation can't come back
+template<typename T>
+void dropStats(size_t generation) {
+	std::deque<DataStats<T> > &cache = statsCache<T>();
+	for (size_t k = cache.size(); k-- > 0;) {
+		const size_t *g = cache[k].generations;
+		if (std::find(g, g + 5, generation) != g + 5)
+			cache.erase(cache.begin() + k);
+	}
+}
+
+void unregisterUpload(const void *ptr) {
+	std::lock_guard<std::mutex> lock(statsCacheMutex);
+	std::map<const void *, size_t>::iterator it = uploads.find(ptr);
+	if (it == uploads.end())
+		return;
+	dropStats<float>(it->second);
+	dropStats<double>(it->second);
+	uploads.erase(it);
+}
+
+size_t uploadGeneration(const void *ptr) {
+	std::lock_guard<std::mutex> lock(statsCacheMutex);
+	std::map<const void *, size_t>::const_iterator it = uploads.find(ptr);
+	return (it == uploads.end() ? 0 : it->second);
+}
+
+// Stats() of A and, if standardize, its column sds, taken from the last fits of the same uploads (by generation,
+// so not of a later upload at the same address) and shape, so refits and parameter sweeps on the same data skip
+// the passes over it.  Buffers not made by makePtr_dense (e.g. foreign pointers given to fit_ptr) may change under
+// the same address at any time, so their stats are never cached.  Skewness and kurtosis are only computed if
+// moments.
+template<typename T>
+void cachedStats(h2o4gpu::MatrixDense<T> &A, const void *ptrs[5], size_t mTrain, size_t n, size_t mValid,
+				 char ord, int intercept, int standardize, int sourceDev, bool moments, DataStats<T> *stats) {
+	DataStats<T> &s = *stats;
+	bool cacheable = true;
+	for (int k = 0; k < 5; ++k) {
+		s.generations[k] = (ptrs[k] == NULL ? 0 : uploadGeneration(ptrs[k]));
+		if (ptrs[k] != NULL && s.generations[k] == 0)
+			cacheable = false;
+	}
+	if (cacheable) {
+		std::lock_guard<std::mutex> lock(statsCacheMutex);
+		std::deque<DataStats<T> > &cache = statsCache<T>();
+		for (size_t k = 0; k < cache.size(); ++k) {
+			const DataStats<T> &c = cache[k];
+			if (std::equal(s.generations, s.generations + 5, c.generations) && c.mTrain == mTrain && c.n == n
+					&& c.mValid == mValid && c.ord == ord && c.intercept == intercept
+					&& c.standardize == standardize && c.sourceDev == sourceDev && (c.moments || !moments)) {
+				*stats = c;
+				return;
+			}
+		}
+	}
+
+	s.mTrain = mTrain;
+	s.n = n;
+	s.mValid = mValid;
+	s.ord = ord;
+	s.intercept = intercept;
+	s.standardize = standardize;
+	s.sourceDev = sourceDev;
+	s.moments = moments;
+	// standardizing the columns (about their mean if intercept) is the same as weighting each coefficient's
+	// penalty by its column's sd, so the data is left as is and the sds scale the penalties and lambda_max
+	s.colsd.assign(n, static_cast<T>(1));
+	if (standardize)
+		A.ColSd(intercept, &s.colsd[0]);
+	A.Stats(intercept, s.min, s.max, s.mean, s.var, s.sd, s.skew, s.kurt, s.lambdamax0,
+			(standardize ? &s.colsd[0] : NULL), moments);
+	if (!cacheable)
+		return;
+
+	std::lock_guard<std::mutex> lock(statsCacheMutex);
+	std::deque<DataStats<T> > &cache = statsCache<T>();
+	cache.push_front(s);
+	if (cache.size() > kStatsCacheSize)
+		cache.pop_back();
+}
+
+// X^T r for the m x n sparse matrix X given as CSR (ord 'r') or CSC (ord 'c') arrays
+template<typename T>
+void sparseGrad(const char ord, size_t m, size_t n, const T *data,
+				const int *indices, const int *indptr, const T *r, T *grad) {
+	if (ord == 'r' || ord == 'R') {
+		for (size_t j = 0; j < n; ++j)
+			grad[j] = 0;
+		for (size_t k = 0; k < m; ++k) {
+			for (int p = indptr[k]; p < indptr[k + 1]; ++p)
+				grad[indices[p]] += data[p] * r[k];
+		}
+	} else {
+		for (size_t j = 0; j < n; ++j) {
+			T sum = 0;
+			for (int p = indptr[j]; p < indptr[j + 1]; ++p)
+				sum += data[p] * r[indices[p]];
+			grad[j] = sum;
+		}
+	}
+}
+
 template<typename T>
-double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sharedA, int nThreads,
+double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sharedA, int nThreads, int blasThreads,
 						 int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain, size_t n, size_t mValid,
 						 int intercept, int standardize,
 						 double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
@@ -309,11 +747,14 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 						 T *alphas, T *lambdas,
 						 double tol, double tolseekfactor,
 						 int lambdastopearly, int glmstopearly, double stopearlyerrorfraction,
-						 int max_iterations, int verbose, T *trainXptr, T *trainYptr,
-						 T *validXptr, T *validYptr, T *weightptr, int givefullpath,
+						 int max_iterations, double maxruntime, int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, T *warmX, T *warmRho, int nTargets, T *targetY, T *targetValidY, T *trainXptr, T *trainYptr,
+						 T *validXptr, T *validYptr, T *weightptr, int givefullpath, int givetelemetry,
+						 void (*pathcallback)(void *, int, int, int, const T *, size_t, const T *, size_t),
+						 void *pathdata,
 						 T **Xvsalphalambda, T **Xvsalpha, T **validPredsvsalphalambda,
 						 T **validPredsvsalpha, size_t *countfull, size_t *countshort,
-						 size_t *countmore) {
+						 size_t *countmore, int *timedout,
+						 double **telemetry, size_t *counttelemetry) {
 
 	if (0) {
 		std::default_random_engine generator;
@@ -347,6 +788,18 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 	nAlphas = std::max(nAlphas,0); // At least zero alphas
 	nLambdas = std::max(nLambdas,0); // At least zero Lambdas
 
+	// several responses fit against the same matrix (targetY holds them target-major): target t is fit as
+	// "alphas" t*nAlphaValues..(t+1)*nAlphaValues-1, so every thread's solver, with its equilibrated matrix
+	// and factorization, is shared by all targets, and the results come back target-major in the alpha axis
+	if (targetY == NULL || (mValid > 0 && targetValidY == NULL))
+		nTargets = 1;
+	nTargets = std::max(nTargets, 1);
+	const int nAlphaValues = nAlphas;
+	nAlphas *= nTargets;
+	// multinomial: the targets are the classes' indicators, fit together (see GLMCD) as the lanes of one job,
+	// so the jobs run over the alphas only and the classes come back target-major as above
+	const int nclass = (family == 'm' ? nTargets : 1);
+
 
 
 	signal(SIGINT, my_function);
@@ -373,10 +826,54 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 		DEBUG_FPRINTF(stderr, "NOTE: Number of alpha's not evenly divisible by number of Threads, so not efficint load balancing: %d\n",0);
 	}
 #endif
+	// the cores each thread's BLAS calls and nested loops may use
+#ifdef _OPENMP
+	ThreadBudget budget(omt, nThreads, blasThreads);
+#else
+	ThreadBudget budget(1, 1, blasThreads);
+#endif
+	if (verbose) {
+		cout << "BLAS threads per thread=" << budget.inner() << endl;
+	}
 
 	// report fold setup
 	size_t realfolds = (nFolds == 0 ? 1 : nFolds);
 	size_t totalfolds = nFolds * (nFolds > 1 ? 2 : 1);
+	// folds would each copy most of the training set per thread, which is what sharedA avoids
+	int foldsubset = (FOLDSUBSET && realfolds > 1 && sharedA == 0);
+	// strong-rule screening builds a new solver whenever the active set grows, which GPU builds can't free (see FOLDSUBSET)
+	screening = (FOLDSUBSET && screening);
+	// coordinate descent (solver 1) works on host copies of the data and cycles its own active set; solver 2
+	// is the same but solves l2-only gaussian fits exactly (see GLMCD); multinomial fits are only done by
+	// coordinate descent, so on the host in GPU builds too
+#ifdef HAVECUDA
+	int cd = (family == 'm');
+#else
+	int cd = (family == 'm' || solver == 1 || solver == 2);
+#endif
+	if (cd)
+		screening = 0;
+	// lock step: a thread fits up to lockstep alphas of a target at once, with their ADMM iterations advanced
+	// together so the products with the data are matrix-matrix ones (dense ADMM on CPU; screening fits each
+	// alpha on its own columns)
+#ifdef HAVECUDA
+	lockstep = 1;
+#else
+	lockstep = (cd || screening ? 1 : std::max(std::min(lockstep, nAlphaValues), 1));
+#endif
+	const int alphaBlocksPerTarget = (nAlphaValues + lockstep - 1) / lockstep;
+	// adaptive lambda search: walk a coarse path, then refine only around each alpha's best coarse lambda
+	// (screening's strong rule follows the path one lambda after the other)
+	lambdasearch = (lambdasearch && !screening);
+	// alpha racing: fit the path a segment at a time over all folds and alphas, and after each segment stop
+	// fitting the alphas whose fold-averaged error is worse than their target's best by more than racemargin
+	// (needs a held-out error; paths resume from their last solution, which screening and the adaptive search
+	// don't follow)
+	const int racing = (racemargin >= 0 && nAlphaValues > 1 && (mValid > 0 || realfolds > 1)
+			&& !screening && !lambdasearch);
+	const int nAlphaBlocks = (nclass > 1 ? 1 : nTargets) * alphaBlocksPerTarget;
+	// warm start needs somewhere to keep the state between fits
+	warmstart = (warmstart && warmX != NULL && warmRho != NULL && nTargets == 1);
 	DEBUG_FPRINTF(stderr, "Set folds=%d realfolds=%zu Total Folds=%zu\n",
 				  nFolds, realfolds, totalfolds);
 
@@ -411,7 +908,8 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 		fflush(stderr);
 	}
 	int sourceme = sourceDev;
-	h2o4gpu::MatrixDense<T> Asource_(sharedA, sourceme, sourceDev, datatype,
+	// if sharedA, wrap the uploaded buffers in place (sharedA<0: no equilibration yet, since Stats needs the raw data)
+	h2o4gpu::MatrixDense<T> Asource_((sharedA != 0 ? -1 : 0), sourceme, sourceDev, datatype,
 									 ord, mTrain, n, mValid, reinterpret_cast<T *>(trainXptr),
 									 reinterpret_cast<T *>(trainYptr), reinterpret_cast<T *>(validXptr),
 									 reinterpret_cast<T *>(validYptr), reinterpret_cast<T *>(weightptr));
@@ -420,11 +918,20 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 		fflush(stderr);
 	}
 	// now can always access A_(sourceDev) to get pointer from within other MatrixDense calls
-	T min[2], max[2], mean[2], var[2], sd[2], skew[2], kurt[2];
-	T lambdamax0;
-	Asource_.Stats(intercept, min, max, mean, var, sd, skew, kurt, lambdamax0);
+	const void *dataptrs[5] = { trainXptr, trainYptr, validXptr, validYptr, weightptr };
+	DataStats<T> stats;
+	cachedStats(Asource_, dataptrs, mTrain, n, mValid, ord, intercept, standardize, sourceDev,
+				verbose || VERBOSEANIM || VERBOSEENET, &stats);
+	const std::vector<T> &colsd = stats.colsd;
+	const T *colscale = (standardize ? &colsd[0] : NULL);
+	const T *min = stats.min, *max = stats.max, *mean = stats.mean, *var = stats.var, *sd = stats.sd;
+	const T *skew = stats.skew, *kurt = stats.kurt;
+	T lambdamax0 = stats.lambdamax0;
 	double sdTrainY = (double) sd[0], meanTrainY = (double) mean[0];
 	double sdValidY = (double) sd[1], meanValidY = (double) mean[1];
+	// the targets' own lambda_max unless the user set one for all
+	const bool lambdamaxset = (lambda_max >= 0.0);
+	std::vector<T> lambdamaxes(nTargets, (lambdamaxset ? static_cast<T>(lambda_max) : lambdamax0));
 	if(lambda_max<0.0){ // set if user didn't set
 		lambda_max = (double) lambdamax0;
 	}else if(lambda_max >= 0.0){
@@ -494,25 +1001,58 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 	T *validX = NULL;
 	T *validY = NULL;
 	T *trainW = NULL;
-	if (OLDPRED)
+	// folds gather their rows from (and score held-out rows against) trainX, screening gathers its columns,
+	// coordinate descent reads trainX and validX directly, and warm start (like a resumed race) rebuilds the
+	// dual from trainX (and several targets' lambda_max are taken from trainX)
+	int needX = (OLDPRED || foldsubset || screening || cd || warmstart || racing || nTargets > 1);
+	if (needX)
 		trainX = (T *) malloc(sizeof(T) * mTrain * n);
-	trainY = (T *) malloc(sizeof(T) * mTrain);
-	if (OLDPRED)
+	trainY = (T *) malloc(sizeof(T) * mTrain * nTargets);
+	if (needX)
 		validX = (T *) malloc(sizeof(T) * mValid * n);
-	validY = (T *) malloc(sizeof(T) * mValid);
+	validY = (T *) malloc(sizeof(T) * mValid * nTargets);
 	trainW = (T *) malloc(sizeof(T) * mTrain);
 
-	if (OLDPRED)
+	if (needX)
 		Asource_.GetTrainX(datatype, mTrain * n, &trainX);
-	Asource_.GetTrainY(datatype, mTrain, &trainY);
-	if (OLDPRED)
+	if (needX)
 		Asource_.GetValidX(datatype, mValid * n, &validX);
-	Asource_.GetValidY(datatype, mValid, &validY);
 	Asource_.GetWeight(datatype, mTrain, &trainW);
+	// each target's response (all on the host), with the mean and sd its error is normalized by
+	std::vector<double> sdTrainYs(nTargets, sdTrainY), sdValidYs(nTargets, sdValidY);
+	if (nTargets > 1) {
+		memcpy(trainY, targetY, sizeof(T) * mTrain * nTargets);
+		if (mValid > 0)
+			memcpy(validY, targetValidY, sizeof(T) * mValid * nTargets);
+		double ymean;
+		for (int t = 0; t < nTargets; ++t) {
+			meanSd(mTrain, &trainY[t * mTrain], &ymean, &sdTrainYs[t]);
+			meanSd(mValid, &validY[t * mValid], &ymean, &sdValidYs[t]);
+		}
+		if (!lambdamaxset)
+			targetLambdaMax(ord, mTrain, n, intercept, trainX, trainW, nTargets, trainY, colscale, &lambdamaxes[0]);
+		// the classes share one path, from where the first of them leaves the null model
+		if (nclass > 1)
+			lambdamaxes[0] = *std::max_element(lambdamaxes.begin(), lambdamaxes.end());
+	} else {
+		Asource_.GetTrainY(datatype, mTrain, &trainY);
+		Asource_.GetValidY(datatype, mValid, &validY);
+	}
+	if (sharedA != 0) {
+		// equilibrate once here (after trainX is copied out raw); every thread's solver then reads this one matrix and its _de.
+		// A copy, as later fits and predictions reuse the caller's buffer
+		Asource_.CopyData();
+		Asource_.Init();
+		Asource_.Equil(1);
+	}
+
+	// this fit's high-lambda solution and rho per alpha, copied to warmX/warmRho once all threads are done
+	std::vector<T> warmXnext(warmstart ? nAlphas * n : 0), warmRhonext(warmstart ? nAlphas : 0);
 
-	T alphaarray[realfolds * 2][nAlphas]; // shared memory space for storing alpha for various folds and alphas
-	T lambdaarray[realfolds * 2][nAlphas]; // shared memory space for storing lambda for various folds and alphas
-	T tolarray[realfolds * 2][nAlphas]; // shared memory space for storing tolerance for various folds and alphas
+	// on the heap, not the stack, so large realfolds*nAlphas can't overflow it
+	std::vector<std::vector<T> > alphaarray(realfolds * 2, std::vector<T>(nAlphas)); // shared memory space for storing alpha for various folds and alphas
+	std::vector<std::vector<T> > lambdaarray(realfolds * 2, std::vector<T>(nAlphas)); // shared memory space for storing lambda for various folds and alphas
+	std::vector<std::vector<T> > tolarray(realfolds * 2, std::vector<T>(nAlphas)); // shared memory space for storing tolerance for various folds and alphas
 	// which error to use for final check of which model is best (keep validation fractional data for purely reporting)
 	int owhicherror;
 	if (mValid > 0) {
@@ -540,11 +1080,53 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 			iwhicherror = 1;
 	}
 #define ErrorLOOP(ri) for(int ri=0;ri<NUMError;ri++)
-	T errorarray[NUMError][realfolds * 2][nAlphas]; // shared memory space for storing error for various folds and alphas
+	std::vector<std::vector<std::vector<T> > > errorarray(NUMError,
+			std::vector<std::vector<T> >(realfolds * 2, std::vector<T>(nAlphas))); // shared memory space for storing error for various folds and alphas
 #define MAX(a,b) ((a)>(b) ? (a) : (b))
+	// an alpha of a fold/alpha job and how far along its lambda path it is
+	struct Lane {
+		int a = 0;
+		T alpha = 0;
+		vector<double> scoring_history;
+		int gotX0 = 0;
+		double jump = DBL_MAX;
+		int skiplambdaamount = 0;
+		int nexti = 0; // next lambda index to solve at (past any it skips)
+		int stopped = 0; // stopped early
+		double tolnew = 0;
+		double tbestalpha = -1, tbestlambda = -1, tbesttol = std::numeric_limits<double>::max();
+		std::vector<double> tbesterror = std::vector<double>(NUMError, std::numeric_limits<double>::max());
+		// adaptive lambda search: solution (and dual) at the last coarse lambda and at the coarse lambda
+		// refining starts from, the best solution, the best coarse lambda's place in the visits and
+		// the fine lambdas refined
+		std::vector<T> coarsex, coarsel, refinex, refinel, bestx;
+		int bestc = -1;
+		int lo = 0, hi = -1;
+		// alpha racing: last solution (empty if none to resume from) and rho, for the next segment
+		std::vector<T> racex;
+		T racerho = 0;
+	};
+	// alpha racing: lambda index each segment of the path ends at (a quarter of the way along, then doubling up
+	// to half way, as the errors at the highest lambdas favour the smallest alphas), each job's lanes between
+	// segments and the alphas dropped from the race
+	std::vector<int> raceends;
+	if (racing) {
+		for (int iend = std::max(2, nlambda / 4); 2 * iend <= nlambda; iend *= 2)
+			raceends.push_back(iend);
+	}
+	raceends.push_back(nlambda);
+	const int npath = raceends.size();
+	std::vector<std::vector<Lane> > racelanes(racing ? realfolds * nAlphaBlocks : 0);
+	std::vector<char> raceout(nAlphas, 0);
 	// Setup each thread's h2o4gpu
 	double t = timer<double>();
 	double t1me0;
+	// time past which no more lambdas are started and running solves stop where they are (none if 0), and
+	// whether it was reached; then each alpha keeps the best solution found so far
+	const double deadline = (maxruntime > 0 ? t + maxruntime : 0);
+	int timeup = 0;
+	// NUMTELEMETRY values for every solve of every thread, if givetelemetry
+	std::vector<double> telemetryall;
 
 	int verboseanimtriggered=0;
 	FILE *filerror = NULL;
@@ -579,10 +1161,6 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
     {
 #ifdef _OPENMP
 		int me = omp_get_thread_num();
-		//https://software.intel.com/en-us/node/522115
-		int physicalcores=omt;///2; // asssume hyperthreading Intel processor (doens't improve much to ensure physical cores used0
-		// set number of mkl threads per openmp thread so that not oversubscribing cores
-		int mklperthread=MAX(1,(physicalcores % nThreads==0 ? physicalcores/nThreads : physicalcores/nThreads+1));
 		if(verbose){
 		    cerr << "OpenMP: " << me << endl;
 		}
@@ -593,11 +1171,13 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 		}
 #endif
 
+		// don't oversubscribe the cores (see ThreadBudget)
+		ThreadBudget::Inner innerthreads(budget);
 		int blasnumber;
 #ifdef HAVECUDA
 		blasnumber=CUDA_MAJOR;
 #else
-		blasnumber = mklperthread; // roughly accurate for openblas as well
+		blasnumber = budget.inner();
 #endif
 
 		// choose GPU device ID for each thread
@@ -607,6 +1187,8 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 		    cerr << "OpenMP: wDev=" << wDev << endl;
 		}
 
+		// this thread's solves, gathered into telemetryall at the end
+		std::vector<double> telemetryme;
 
 		FILE *fil = NULL;
 		if(VERBOSEANIM){
@@ -629,11 +1211,16 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 		////////////
 		double t0 = timer<double>();
 		DEBUG_FPRINTF(fil, "Moving data to the GPU. Starting at %21.15g\n", t0);
+		// full training set solver, unless folds are fit on their own rows
+		std::unique_ptr<h2o4gpu::MatrixDense<T> > A_;
+		std::unique_ptr<h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixDense<T> > > h2o4gpu_all;
 #pragma omp barrier // not required barrier
-		h2o4gpu::MatrixDense<T> A_(sharedA, me, wDev, Asource_);
+		if (!foldsubset)
+			A_.reset(new h2o4gpu::MatrixDense<T>(sharedA, me, wDev, Asource_));
 #pragma omp barrier // required barrier for wDev=sourceDev so that Asource_._data (etc.) is not overwritten inside h2o4gpu_data(wDev=sourceDev) below before other cores copy data
-		h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixDense<T> > h2o4gpu_data(
-				sharedA, me, wDev, A_);
+		if (!foldsubset)
+			h2o4gpu_all.reset(new h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixDense<T> >(
+					sharedA, me, wDev, *A_));
 #pragma omp barrier // not required barrier
 		double t1 = timer<double>();
 		if (me == 0) { //only thread=0 times entire post-warmup procedure
@@ -647,32 +1234,106 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 		///////////////////////////////////////////////////
 		// BEGIN SVD
 		if (0) {
-			A_.svd1();
+			A_->svd1();
 		}
 
 		////////////////////////////////////////////////
 		// BEGIN GLM
 
 		// Setup constant parameters for all models
-		h2o4gpu_data.SetnDev(1); // set how many cuda devices to use internally in h2o4gpu
-		//    h2o4gpu_data.SetRelTol(1e-4); // set how many cuda devices to use internally in h2o4gpu
-		//    h2o4gpu_data.SetAbsTol(1e-5); // set how many cuda devices to use internally in h2o4gpu
-		//    h2o4gpu_data.SetAdaptiveRho(true);
-		//h2o4gpu_data.SetEquil(false);
-		//      h2o4gpu_data.SetRho(1E-6);
-		//      h2o4gpu_data.SetRho(1E-3);
-		h2o4gpu_data.SetRho(1.0);
-		h2o4gpu_data.SetVerbose(verbose);
-		h2o4gpu_data.SetStopEarly(glmstopearly);
-		h2o4gpu_data.SetStopEarlyErrorFraction(stopearlyerrorfraction);
-		h2o4gpu_data.SetMaxIter(max_iterations);
+		auto setupsolver = [&](h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixDense<T> > &h2o4gpu_data) {
+			h2o4gpu_data.SetnDev(1); // set how many cuda devices to use internally in h2o4gpu
+			//    h2o4gpu_data.SetRelTol(1e-4); // set how many cuda devices to use internally in h2o4gpu
+			//    h2o4gpu_data.SetAbsTol(1e-5); // set how many cuda devices to use internally in h2o4gpu
+			//    h2o4gpu_data.SetAdaptiveRho(true);
+			//h2o4gpu_data.SetEquil(false);
+			//      h2o4gpu_data.SetRho(1E-6);
+			//      h2o4gpu_data.SetRho(1E-3);
+			h2o4gpu_data.SetRho(1.0);
+			h2o4gpu_data.SetVerbose(verbose);
+			h2o4gpu_data.SetStopEarly(glmstopearly);
+			h2o4gpu_data.SetStopEarlyErrorFraction(stopearlyerrorfraction);
+			h2o4gpu_data.SetMaxIter(max_iterations);
+			h2o4gpu_data.SetDeadline(deadline);
+			h2o4gpu_data.SetAndersonMem(anderson_mem);
+		};
+		if (!foldsubset)
+			setupsolver(*h2o4gpu_all);
+
+		// fold (and its solver) currently set up on this thread if foldsubset
+		int foldloaded = -1;
+		std::vector<size_t> foldtrainrows, foldholdrows;
+		std::vector<T> foldX, foldY, foldW, foldholdY, foldholdW;
+		std::unique_ptr<h2o4gpu::MatrixDense<T> > Afold_;
+		std::unique_ptr<h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixDense<T> > > h2o4gpu_fold;
 
 		DEBUG_FPRINTF(fil, "BEGIN SOLVE: %d\n", 0);
-		int fi, a;
+		int fi, ab, a;
 
-		T *X0 = new T[n]();
+		T *X0 = new T[n * nclass](); // all classes of a multinomial fit
 		T *L0 = new T[mTrain]();
 		int gotpreviousX0 = 0;
+		int jobtarget = 0; // target of this thread's last fold/alpha job
+
+		// per-thread work space, allocated once and reused for every fold, alpha and lambda
+		// (heap, not stack, so the number of rows is only limited by memory)
+		std::vector<T> weights(mTrain);
+		std::vector<T> weightsvalid(mValid, 1.0);
+		std::vector<T> trainPreds, validPreds, holdPreds;
+		std::vector<FunctionObj<T> > f;
+		std::vector<std::vector<FunctionObj<T> > > glanes(std::max(lockstep, nclass));
+		f.reserve(mTrain);
+		for (size_t l = 0; l < glanes.size(); ++l)
+			glanes[l].reserve(n);
+
+		std::vector<Lane> lanes;
+		// lanes solved at the current lambda, and the lambda indices in the order they are visited
+		std::vector<size_t> solving;
+		std::vector<int> visit;
+		// lock step: the job's alphas as lanes of one ADMM block over this thread's solver
+		std::unique_ptr<h2o4gpu::H2O4GPUBlock<T> > h2o4gpu_block;
+		std::vector<size_t> blocklanes;
+		std::vector<const std::vector<FunctionObj<T> > *> blockf, blockg;
+
+		// last solution on this thread (whichever solver found it), full length n (for each class of a
+		// multinomial fit) and fitted rows' dual
+		std::vector<T> xlastsol(n * nclass), llastsol;
+		int gotlastsol = 0;
+		// strong-rule screening: loss gradient at the last solution and the lambda it was found at
+		std::vector<T> screengrad, screenres;
+		T screenlambda = 0;
+		int screenedlast = 0; // full solver's own state is not the last solution
+		T rholast = 0;
+		// active-set solver, rebuilt whenever its columns change
+		std::vector<size_t> screencols, keepcols;
+		std::vector<T> screenX, screenvX, xscreen;
+		std::vector<FunctionObj<T> > gscreen;
+		std::unique_ptr<h2o4gpu::MatrixDense<T> > Ascreen_;
+		std::unique_ptr<h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixDense<T> > > h2o4gpu_screen;
+		// coordinate-descent solver and the fold whose rows and weights it holds
+		std::unique_ptr<h2o4gpu::GLMCD<T> > h2o4gpu_cd;
+		int cdloaded = -1, cdtarget = 0;
+		// start its lane l from x (a multinomial job's lanes are the classes, the others keep theirs)
+		auto cdinitx = [&](size_t l, const T *x) {
+			if (nclass > 1)
+				h2o4gpu_cd->SetInitClassX(l, x);
+			else
+				h2o4gpu_cd->SetInitX(x);
+		};
+		// alpha racing: dual of the solution a path resumes from
+		std::vector<T> racel(racing ? mTrain : 0);
+		// all training rows, for rebuilding the warm-start (or resumed) dual when not fitting a fold's rows
+		std::vector<size_t> allrows;
+		if ((warmstart || racing) && !foldsubset) {
+			allrows.resize(mTrain);
+			for (size_t j = 0; j < mTrain; ++j)
+				allrows[j] = j;
+		}
+		if (screening) {
+			llastsol.resize(mTrain);
+			screengrad.resize(n);
+			screenres.resize(mTrain);
+		}
 
 		////////////////////////////
 		//
@@ -682,20 +1343,24 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 #define LAMBDATYPEPATH 0
 #define LAMBDATYPEONE 1
 		// store various model parameters as averaged over folds during lambda-path, so that when do one final model with fixed lambda have model.
-		double alphaarrayofa[nAlphas];
-		double lambdaarrayofa[nAlphas];
-		double tolarrayofa[nAlphas];
-		double errorarrayofa[NUMError][nAlphas];
-		for (int lambdatype = 0; lambdatype <= (realfolds > 1); lambdatype++) {
+		std::vector<double> alphaarrayofa(nAlphas);
+		std::vector<double> lambdaarrayofa(nAlphas);
+		std::vector<double> tolarrayofa(nAlphas);
+		std::vector<std::vector<double> > errorarrayofa(NUMError, std::vector<double>(nAlphas));
+		for (int pass = 0; pass < npath + (realfolds > 1); pass++) {
+			// the path (a segment of it per pass when racing), then a fixed-lambda pass if there are folds
+			const int lambdatype = (pass < npath ? LAMBDATYPEPATH : LAMBDATYPEONE);
 			size_t nlambdalocal;
 
 			// Set Lambda
 			std::vector<T> lambdaslocal(nlambda);
-			if (lambdatype == LAMBDATYPEPATH) {
-				nlambdalocal = nlambda;
+			// path of target lambdatarget, which starts at that target's lambda_max
+			int lambdatarget = -1;
+			auto setlambdas = [&](int t) {
+				lambdatarget = t;
 				const T lambda_min = lambda_min_ratio
-						* static_cast<T>(lambda_max); // like h2o4gpu.R
-				T lambda_max_use = lambda_max; // std::max(static_cast<T>(1e-2), alpha); // same as H2O
+						* lambdamaxes[t]; // like h2o4gpu.R
+				T lambda_max_use = lambdamaxes[t]; // std::max(static_cast<T>(1e-2), alpha); // same as H2O
 				DEBUG_FPRINTF(stderr, "lambda_max: %f\n", lambda_max_use);
 				DEBUG_FPRINTF(stderr, "lambda_min: %f\n", lambda_min);
 				DEBUG_FPRINTF(fil, "lambda_max: %f\n", lambda_max_use);
@@ -717,6 +1382,10 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 						lambdaslocal[i] = lambdas[i];
 					}
 				}
+			};
+			if (lambdatype == LAMBDATYPEPATH) {
+				nlambdalocal = nlambda;
+				setlambdas(0);
 			} else {
 				nlambdalocal = 1;
 			}
@@ -726,52 +1395,156 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 			// LOOP OVER FOLDS AND ALPHAS
 			//
 			///////////////////////////////
+			// fold outermost so consecutive iterations on a thread tend to reuse its fold solver;
+			// a job is a block of up to lockstep alphas of one target, whose lambda paths are fit side by side
 #pragma omp for schedule(dynamic,1) collapse(2)
-			for (a = 0; a < nAlphas; ++a) { //alpha search
-				for (fi = 0; fi < realfolds; ++fi) { //fold
+			for (fi = 0; fi < realfolds; ++fi) { //fold
+				for (ab = 0; ab < nAlphaBlocks; ++ab) { //alpha search
 
 					////////////
-					// SETUP ALPHA
-					T alpha;
-					if(alphas==NULL){
-						if(nAlphas<=1){
-							alpha = (alpha_min + alpha_max)*0.5;
+					// SETUP TARGET
+					int tg = ab / alphaBlocksPerTarget;
+					int ta0 = (ab % alphaBlocksPerTarget) * lockstep;
+					if (tg != jobtarget) {
+						// another target's solution is no warm start for this one
+						gotpreviousX0 = 0;
+						jobtarget = tg;
+					}
+					const T *tY = &trainY[tg * mTrain], *tvY = &validY[tg * mValid];
+
+					////////////
+					// SETUP ALPHAS (a multinomial job's lanes are its classes at one alpha)
+					lanes.assign(nclass > 1 ? nclass : std::min(lockstep, nAlphaValues - ta0), Lane());
+					for (size_t l = 0; l < lanes.size(); ++l) {
+						Lane &lane = lanes[l];
+						int ta = (nclass > 1 ? ta0 : ta0 + l);
+						lane.a = (nclass > 1 ? l : tg) * nAlphaValues + ta;
+						if(alphas==NULL){
+							if(nAlphaValues<=1){
+								lane.alpha = (alpha_min + alpha_max)*0.5;
+							}
+							else{
+								lane.alpha = alpha_min + (alpha_max - alpha_min) * static_cast<T>(ta) / static_cast<T>(nAlphaValues - 1);
+							}
 						}
 						else{
-							alpha = alpha_min + (alpha_max - alpha_min) * static_cast<T>(a) / static_cast<T>(nAlphas - 1);
+							lane.alpha = alphas[ta];
 						}
 					}
-					else{
-						alpha = alphas[a];
+					// Setup Lambda path (when not doing the path, each alpha has its own lambda, see lanelambda)
+					if (lambdatype == LAMBDATYPEPATH && lambdatarget != tg) {
+						setlambdas(tg);
 					}
-					// Setup Lambda in case not doing lambda path
-					if (lambdatype == LAMBDATYPEONE){
-						lambdaslocal[0] = lambdaarrayofa[a];
+					if (racing && lambdatype == LAMBDATYPEPATH && pass > 0) {
+						// carry on where the previous segment left these alphas, unless all are out of the race
+						lanes = racelanes[fi * nAlphaBlocks + ab];
+						size_t nracing = 0;
+						for (size_t l = 0; l < lanes.size(); ++l) {
+							if (raceout[lanes[l].a])
+								lanes[l].stopped = 1;
+							if (!lanes[l].stopped)
+								nracing++;
+						}
+						if (nracing == 0)
+							continue;
 					}
 
 					/////////////
 					//
-					// SETUP FOLD (and weights)
+					// SETUP FOLD (and weights): non-overlapping contiguous folds
 					//
 					////////////
-					// FOLDTYPE: 0 = any portion and can be overlapping
-					// FOLDTYPE: 1 = non-overlapping folds
-#define FOLDTYPE 1
-					T fractrain;
-					if (FOLDTYPE == 0) {
-						fractrain = (realfolds > 1 ? 0.8 : 1.0);
-					} else {
-						fractrain = (
-								realfolds > 1 ?
-								1.0 - 1.0 / ((double) realfolds) : 1.0);
+
+					if (foldsubset && foldloaded != fi) {
+						// drop previous fold's solver before its data is overwritten
+						T rhoprev = rholast;
+						// fixed-lambda pass continues from the last solution rather than the path's high-lambda one
+						std::vector<T> xlast;
+						if (h2o4gpu_fold && lambdatype == LAMBDATYPEONE)
+							xlast = xlastsol;
+						h2o4gpu_block.reset();
+						h2o4gpu_fold.reset();
+						if (Afold_)
+							delete[] Afold_->_de; // not freed by MatrixDense
+						Afold_.reset();
+						h2o4gpu_screen.reset();
+						if (Ascreen_)
+							delete[] Ascreen_->_de;
+						Ascreen_.reset();
+						screencols.clear();
+
+						foldRows(mTrain, fi, realfolds, foldtrainrows, foldholdrows);
+						size_t mFold = foldtrainrows.size();
+						size_t mHold = foldholdrows.size();
+						foldX.resize(mFold * n);
+						foldY.resize(mFold * nTargets);
+						foldW.resize(mFold);
+						foldholdY.resize(mHold * nTargets);
+						foldholdW.resize(mHold);
+						gatherRows(ord, mTrain, n, trainX, foldtrainrows, &foldX[0]);
+						for (size_t j = 0; j < mFold; ++j) {
+							for (int t = 0; t < nTargets; ++t)
+								foldY[t * mFold + j] = trainY[t * mTrain + foldtrainrows[j]];
+							foldW[j] = trainW[foldtrainrows[j]];
+						}
+						for (size_t j = 0; j < mHold; ++j) {
+							for (int t = 0; t < nTargets; ++t)
+								foldholdY[t * mHold + j] = trainY[t * mTrain + foldholdrows[j]];
+							foldholdW[j] = trainW[foldholdrows[j]];
+						}
+
+						// sharedA<0: use fold buffers in place, equilibrated by this thread's solver only
+						Afold_.reset(new h2o4gpu::MatrixDense<T>(-1, me, wDev, ord,
+								mFold, n, mValid, &foldX[0], &foldY[0],
+								(mValid > 0 ? validX : NULL),
+								(mValid > 0 ? validY : NULL), &foldW[0]));
+						h2o4gpu_fold.reset(new h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixDense<T> >(
+								-1, me, wDev, *Afold_));
+						setupsolver(*h2o4gpu_fold);
+						if (rhoprev > 0)
+							h2o4gpu_fold->SetRho(rhoprev);
+						foldloaded = fi;
+						// warm start from previous fold: its dual was for other rows, so rebuild it as loss gradient at A*x
+						const T *xwarm = (xlast.empty() ? X0 : &xlast[0]);
+						if (gotpreviousX0 || !xlast.empty()) {
+							predictRows(ord, mTrain, n, trainX, foldtrainrows, xwarm, L0);
+							for (size_t j = 0; j < mFold; ++j) {
+								T pred = (family == 'l' ? 1.0 / (1.0 + std::exp(-L0[j])) : L0[j]);
+								L0[j] = foldW[j] * (pred - foldY[tg * mFold + j]);
+							}
+							h2o4gpu_fold->SetInitX(xwarm);
+							h2o4gpu_fold->SetInitLambda(L0);
+						}
+						if (screening) {
+							// screened solvers warm start from the same point as the fold solver
+							gotlastsol = (gotpreviousX0 || !xlast.empty());
+							if (gotlastsol) {
+								memcpy(&xlastsol[0], xwarm, n * sizeof(T));
+								memcpy(&llastsol[0], L0, mFold * sizeof(T));
+							}
+							screenedlast = 0;
+						}
 					}
-					T fracvalid = 1.0 - fractrain;
-					T weights[mTrain];
-					if (realfolds > 1) {
+					h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixDense<T> > &h2o4gpu_data =
+							(foldsubset ? *h2o4gpu_fold : *h2o4gpu_all);
+					// rows the solver is fit on
+					size_t mFit = (foldsubset ? foldtrainrows.size() : mTrain);
+					const T *fitY = (foldsubset ? &foldY[tg * mFit] : tY);
+					const std::vector<size_t> *fitrows = (foldsubset ? &foldtrainrows : NULL);
+					// lock step: one lane per alpha over this solver, dropped along with it
+					if (lockstep > 1 && !h2o4gpu_block) {
+#ifndef HAVECUDA
+						h2o4gpu_block.reset(new h2o4gpu::H2O4GPUBlock<T>(h2o4gpu_data, lockstep));
+#endif
+					}
+
+					if (foldsubset) {
+						for (size_t j = 0; j < mFit; ++j)
+							weights[j] = foldW[j];
+					} else if (realfolds > 1) {
 						for (unsigned int j = 0; j < mTrain; ++j) {
 							T foldon = 1;
-							int jfold = j - fi * fracvalid * mTrain;
-							if (jfold >= 0 && jfold < fracvalid * mTrain)
+							if (heldOut(j, fi, realfolds, mTrain))
 								foldon = 1E-13;
 
 							weights[j] = foldon * trainW[j];
@@ -784,115 +1557,320 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 
 					// normalize weights before input (method has issue with small typical weights, so avoid normalization and just normalize in error itself only)
 					T sumweight = 0, maxweight = -std::numeric_limits<T>::max();
-					for (unsigned int j = 0; j < mTrain; ++j)
+					for (unsigned int j = 0; j < mFit; ++j)
 						sumweight += weights[j];
-					for (unsigned int j = 0; j < mTrain; ++j) {
+					for (unsigned int j = 0; j < mFit; ++j) {
 						if (maxweight < weights[j])
 							maxweight = weights[j];
 					}
 					if (0) {
 						if (sumweight != 0.0) {
-							for (unsigned int j = 0; j < mTrain; ++j)
+							for (unsigned int j = 0; j < mFit; ++j)
 								weights[j] /= sumweight;
 						} else
 							continue; // skip this fi,a
 						//            fprintf(stderr,"a=%d fold=%d sumweights=%g\n",a,fi,sumweight); fflush(stderr);
 					}
 
+					if (cd && cdloaded != fi) {
+						// copies the fold's weights, so rebuild per fold; the fixed-lambda pass starts from the last solution
+						// (ADMM's fold matrix is never equilibrated in this mode, so foldX is still the raw rows)
+						h2o4gpu_cd.reset(new h2o4gpu::GLMCD<T>(family, ord, mFit, n, mValid,
+								(foldsubset ? &foldX[0] : trainX), fitY, &weights[0],
+								(mValid > 0 ? validX : NULL), intercept,
+								family == 'e' && n <= CDCOVARIANCEMAXN, solver == 2, nclass));
+						h2o4gpu_cd->SetMaxIter(max_iterations);
+						h2o4gpu_cd->SetDeadline(deadline);
+						if (standardize)
+							h2o4gpu_cd->SetPenaltyFactor(&colsd[0]);
+						h2o4gpu_cd->SetInitX(lambdatype == LAMBDATYPEONE ? &xlastsol[0] : X0);
+						cdloaded = fi;
+						cdtarget = tg;
+					} else if (cd && cdtarget != tg) {
+						// same rows and weights, so keep the solver (and its Gram columns) for this response
+						h2o4gpu_cd->SetY(fitY);
+						cdtarget = tg;
+					}
+
+					if (racing && lambdatype == LAMBDATYPEPATH && pass > 0) {
+						// resume each alpha's path from its last solution (whichever thread fit the previous segment),
+						// with the dual rebuilt as the loss gradient there
+						for (size_t l = 0; l < lanes.size(); ++l) {
+							Lane &lane = lanes[l];
+							if (lane.stopped)
+								continue;
+							if (lane.racex.empty()) {
+								if (cd)
+									h2o4gpu_cd->ResetX();
+								else if (h2o4gpu_block)
+									h2o4gpu_block->ResetX(l);
+								else
+									h2o4gpu_data.ResetX();
+								continue;
+							}
+							if (cd) {
+								cdinitx(l, &lane.racex[0]);
+								continue;
+							}
+							predictRows(ord, mTrain, n, trainX, (foldsubset ? foldtrainrows : allrows), &lane.racex[0], &racel[0]);
+							lossResidual(family, mFit, &weights[0], fitY, &racel[0], &racel[0]);
+							if (h2o4gpu_block) {
+								h2o4gpu_block->SetInitX(l, &lane.racex[0]);
+								h2o4gpu_block->SetInitLambda(l, &racel[0]);
+								h2o4gpu_block->SetRho(l, lane.racerho);
+							} else {
+								h2o4gpu_data.SetInitX(&lane.racex[0]);
+								h2o4gpu_data.SetInitLambda(&racel[0]);
+								h2o4gpu_data.SetRho(lane.racerho);
+							}
+						}
+					}
+
 					////////////////////////////
 					//
 					// LOOP OVER LAMBDA
 					//
 					///////////////////////////////
-					vector<double> scoring_history;
-					int gotX0 = 0;
-					double jump = DBL_MAX;
-					double norm = (mValid == 0 ? sdTrainY : sdValidY);
-					int skiplambdaamount = 0;
+					double norm = (mValid == 0 ? sdTrainYs[tg] : sdValidYs[tg]);
 					int i;
 					double trainError = -1;
 					double ivalidError = -1;
 					double validError = -1;
 					//double tol = 1E-2; // highest acceptable tolerance (USER parameter)  Too high and won't go below standard deviation.
-					double tolnew = tol;
-					T lambda = -1;
-					double tbestalpha = -1, tbestlambda = -1, tbesttol =
-							std::numeric_limits<double>::max(),
-							tbesterror[NUMError];
-					ErrorLOOP(ri)
-						tbesterror[ri] = std::numeric_limits<double>::max();
+					for (size_t l = 0; l < lanes.size(); ++l)
+						lanes[l].tolnew = tol;
+					// alpha's lambda at lambda index i
+					auto lanelambda = [&](const Lane &lane) -> T {
+						return (lambdatype == LAMBDATYPEONE ? static_cast<T>(lambdaarrayofa[lane.a]) : lambdaslocal[i]);
+					};
+					// tolerances of the solver alpha's lane l is solved by
+					auto settol = [&](size_t l, T reltol, T abstol) {
+						if (h2o4gpu_block) {
+							h2o4gpu_block->SetRelTol(l, reltol);
+							h2o4gpu_block->SetAbsTol(l, abstol);
+						} else {
+							h2o4gpu_data.SetRelTol(reltol);
+							h2o4gpu_data.SetAbsTol(abstol);
+						}
+					};
+
+					// setup f (the same for all alphas and lambdas)
+					f.clear();
+
+					/*
+					Start logic for type of `family` argument passed in
+					*/
+					if(family == 'e'){ //elasticnet
+						// minimize ||Ax-b||_2^2 + \alpha\lambda||x||_1 + (1/2)(1-alpha)*lambda x^2
+						for (unsigned int j = 0; j < mFit; ++j) f.emplace_back(kSquare, 1.0, fitY[j], weights[j]); // h2o4gpu.R
+					}else if(family == 'l'){ //logistic
+						// minimize \sum_i -d_i y_i + log(1 + e ^ y_i) + \lambda ||x||_1
+						for (unsigned int j = 0; j < mFit; ++j) f.emplace_back(kLogistic, 1.0, 0.0, weights[j], -weights[j]*fitY[j]); // h2o4gpu.R
+					}else if(family == 'm'){ //multinomial
+						// only fit by coordinate descent, which has no use for f
+						// }else if(family == 's'){ //svm
+						// 	// minimize (1/2) ||w||_2^2 + \lambda \sum (a_i^T * [w; b] + 1)_+.
+						// 	for (unsigned int j = 0; j < mTrain; ++j) f.emplace_back(kMaxPos0, 1.0, -1.0, weights[j]*lambda); // h2o4gpu.R}
+						// 	for (unsigned int j = 0; j < n - intercept; ++j) g.emplace_back(kSquare);
+						// 	if (intercept) g.emplace_back(kZero);
+					}else{
+						//throw error
+						throw "Wrong family type selected. Should be either elasticnet, logistic or multinomial";
+					}
+
 
+					// lambda indices in the order visited: the whole path (this pass's segment of it when racing),
+					// or in adaptive search every coarsestep-th lambda (and the last) first, then the ones between
+					// each alpha's best coarse lambda and its neighbours, appended once the coarse path is done
+					visit.clear();
+					const int adaptive = (lambdasearch && lambdatype == LAMBDATYPEPATH && nlambdalocal > 3);
+					const int coarsestep = (adaptive ? std::max(2, (int) std::sqrt((double) nlambdalocal)) : 1);
+					const int segment = (racing && lambdatype == LAMBDATYPEPATH);
+					const int ibegin = (segment && pass > 0 ? raceends[pass - 1] : 0);
+					const int iend = (segment ? raceends[pass] : (int) nlambdalocal);
+					for (int ii = ibegin; ii < iend; ii += coarsestep)
+						visit.push_back(ii);
+					if (adaptive && visit.back() != (int) nlambdalocal - 1)
+						visit.push_back(nlambdalocal - 1);
+					const size_t ncoarse = visit.size();
+					int refine = 0;
+					auto startrefine = [&]() {
+						refine = 1;
+						std::vector<char> coarse(nlambdalocal, 0), fine(nlambdalocal, 0);
+						for (size_t c = 0; c < ncoarse; ++c)
+							coarse[visit[c]] = 1;
+						for (size_t l = 0; l < lanes.size(); ++l) {
+							Lane &lane = lanes[l];
+							lane.stopped = 0;
+							if (lane.bestc < 0)
+								continue;
+							int c = lane.bestc;
+							lane.lo = (c > 0 ? visit[c - 1] : visit[c]) + 1;
+							lane.hi = (c + 1 < (int) ncoarse ? visit[c + 1] : visit[c]) - 1;
+							lane.nexti = lane.lo;
+							for (int ii = lane.lo; ii <= lane.hi; ++ii)
+								fine[ii] = !coarse[ii];
+							// continue the path from the coarse solution just above the refined lambdas
+							if (cd) {
+								cdinitx(l, &lane.refinex[0]);
+							} else if (h2o4gpu_block) {
+								h2o4gpu_block->SetInitX(l, &lane.refinex[0]);
+								h2o4gpu_block->SetInitLambda(l, &lane.refinel[0]);
+							} else {
+								h2o4gpu_data.SetInitX(&lane.refinex[0]);
+								h2o4gpu_data.SetInitLambda(&lane.refinel[0]);
+							}
+						}
+						for (int ii = 0; ii < (int) nlambdalocal; ++ii)
+							if (fine[ii])
+								visit.push_back(ii);
+					};
 
 					////////////////////////////////
 					// LOOP over lambda
-					for (i = 0; i < nlambdalocal; ++i) {
+					for (size_t p = 0;; ++p) {
+						if (adaptive && p == ncoarse && !refine)
+							startrefine();
+						if (p >= visit.size())
+							break;
+						i = visit[p];
 						if (flag) {
 							continue;
 						}
+						if (deadline > 0 && timer<double>() > deadline) {
+#pragma omp atomic write
+							timeup = 1;
+							continue;
+						}
 
-						// Set Lambda
-						lambda = lambdaslocal[i];
-						DEBUG_FPRINTF(fil, "lambda %d = %f\n", i, lambda);
+						// alphas solved at this lambda: those neither stopped early nor skipping past it (nor, when
+						// refining, past their refined lambdas)
+						solving.clear();
+						size_t nstopped = 0;
+						for (size_t l = 0; l < lanes.size(); ++l) {
+							if (lanes[l].stopped)
+								nstopped++;
+							else if (lanes[l].nexti <= i && (!refine || i <= lanes[l].hi))
+								solving.push_back(l);
+						}
+						if (nstopped == lanes.size()) {
+							if (adaptive && !refine) {
+								p = ncoarse - 1; // on to refining
+								continue;
+							}
+							break;
+						}
 
-						//////////////
-						//
-						// if lambda path, control how go along path
-						//
-						//////////////
-						if (lambdatype == LAMBDATYPEPATH) {
+						for (size_t s = 0; s < solving.size(); ++s) {
+							size_t l = solving[s];
+							Lane &lane = lanes[l];
+							a = lane.a;
+							T alpha = lane.alpha;
 
-							// Reset Solution if starting fresh for this alpha
-							if (i == 0) {
-								// see if have previous solution for new alpha for better warmstart
-								if (gotpreviousX0) {
-									//              DEBUG_FPRINTF(stderr,"m=%d a=%d i=%d Using old alpha solution\n",me,a,i);
-									//              for(unsigned int ll=0;ll<n;ll++) DEBUG_FPRINTF(stderr,"X0[%d]=%g\n",ll,X0[ll]);
-									h2o4gpu_data.SetInitX(X0);
-									h2o4gpu_data.SetInitLambda(L0);
-								} else {
-									h2o4gpu_data.ResetX(); // reset X if new alpha if expect much different solution
-								}
-							}
+							// Set Lambda
+							T lambda = lanelambda(lane);
+							DEBUG_FPRINTF(fil, "lambda %d = %f\n", i, lambda);
 
-							///////////////////////
+							//////////////
 							//
-							// Set tolerances more automatically
-							// (NOTE: that this competes with stopEarly() below in a good way so that it doesn't stop overly early just because errors are flat due to poor tolerance).
-							// Note currently using jump or jumpuse.  Only using scoring vs. standard deviation.
-							// To check total iteration count, e.g., : grep -a "Iter  :" output.txt|sort -nk 3|awk '{print $3}' | paste -sd+ | bc
-							double jumpuse = DBL_MAX;
-							//h2o4gpu_data.SetRho(maxweight); // can't trust warm start for rho, because if adaptive rho is working hard to get primary or dual residuals below eps, can drive rho out of control even though residuals and objective don't change in error, but then wouldn't be good to start with that rho and won't find solution for any other latter lambda or alpha.  Use maxweight to scale rho, because weight and lambda should scale the same way.
-							tolnew = tol; //*lambda/lambdaslocal[0]; // as lambda gets smaller, so must attempt at relative tolerance, in order to capture affect of lambda regularization on primary term (that is otherwise order unity unless weights are not unity).
-							h2o4gpu_data.SetRelTol(tolnew);
-							h2o4gpu_data.SetAbsTol(
-									1.0 * std::numeric_limits<T>::epsilon()); // way code written, has 1+rho and other things where catastrophic cancellation occur for very small weights or rho, so can't go below certain absolute tolerance.  This affects adaptive rho and how warm-start on rho would work.
-							// see if getting below stddev, if so decrease tolerance
-							if (scoring_history.size() >= 1) {
-								double ratio = (norm - scoring_history.back())
-										/ norm;
+							// if lambda path, control how go along path
+							//
+							//////////////
+							if (lambdatype == LAMBDATYPEPATH) {
+
+								// warm start: begin this alpha's path where the previous fit's did, with the dual
+								// rebuilt as the loss gradient on the rows fit now (the data may have changed)
+								if (i == 0 && warmstart && warmRho[a] > 0) {
+									memcpy(X0, &warmX[a * n], n * sizeof(T));
+									predictRows(ord, mTrain, n, trainX, (foldsubset ? foldtrainrows : allrows), X0, L0);
+									lossResidual(family, mFit, &weights[0], fitY, L0, L0);
+									gotpreviousX0 = 1;
+									rholast = warmRho[a];
+									if (h2o4gpu_block)
+										h2o4gpu_block->SetRho(l, warmRho[a]);
+									else
+										h2o4gpu_data.SetRho(warmRho[a]);
+								}
 
-								if (ratio > 0.0) {
-									double factor = 0.05; // rate factor (USER parameter)
-									double tollow = tolseekfactor * tol; //*lambda/lambdaslocal[0]; //lowest allowed tolerance (USER parameter)
-									tolnew = tol * pow(2.0, -ratio / factor); //*lambda/lambdaslocal[0]
-									if (tolnew < tollow)
-										tolnew = tollow;
+								// Reset Solution if starting fresh for this alpha (when screening, only once the full solver is actually used)
+								if (i == 0 && !screening) {
+									// see if have previous solution for new alpha for better warmstart
+									if (gotpreviousX0) {
+										//              DEBUG_FPRINTF(stderr,"m=%d a=%d i=%d Using old alpha solution\n",me,a,i);
+										//              for(unsigned int ll=0;ll<n;ll++) DEBUG_FPRINTF(stderr,"X0[%d]=%g\n",ll,X0[ll]);
+										if (cd) {
+											h2o4gpu_cd->SetInitX(X0);
+										} else if (h2o4gpu_block) {
+											h2o4gpu_block->SetInitX(l, X0);
+											h2o4gpu_block->SetInitLambda(l, L0);
+										} else {
+											h2o4gpu_data.SetInitX(X0);
+											h2o4gpu_data.SetInitLambda(L0);
+										}
+									} else if (cd) {
+										h2o4gpu_cd->ResetX();
+									} else if (h2o4gpu_block) {
+										h2o4gpu_block->ResetX(l);
+									} else {
+										h2o4gpu_data.ResetX(); // reset X if new alpha if expect much different solution
+									}
+								}
 
-									h2o4gpu_data.SetRelTol(tolnew);
-									h2o4gpu_data.SetAbsTol(
-											1.0
-													* std::numeric_limits<T>::epsilon()); // way code written, has 1+rho and other things where catastrophic cancellation occur for very small weights or rho, so can't go below certain absolute tolerance.
-									jumpuse = jump;
+								///////////////////////
+								//
+								// Set tolerances more automatically
+								// (NOTE: that this competes with stopEarly() below in a good way so that it doesn't stop overly early just because errors are flat due to poor tolerance).
+								// Note currently using jump or jumpuse.  Only using scoring vs. standard deviation.
+								// To check total iteration count, e.g., : grep -a "Iter  :" output.txt|sort -nk 3|awk '{print $3}' | paste -sd+ | bc
+								double jumpuse = DBL_MAX;
+								//h2o4gpu_data.SetRho(maxweight); // can't trust warm start for rho, because if adaptive rho is working hard to get primary or dual residuals below eps, can drive rho out of control even though residuals and objective don't change in error, but then wouldn't be good to start with that rho and won't find solution for any other latter lambda or alpha.  Use maxweight to scale rho, because weight and lambda should scale the same way.
+								lane.tolnew = tol; //*lambda/lambdaslocal[0]; // as lambda gets smaller, so must attempt at relative tolerance, in order to capture affect of lambda regularization on primary term (that is otherwise order unity unless weights are not unity).
+								settol(l, lane.tolnew,
+										1.0 * std::numeric_limits<T>::epsilon()); // way code written, has 1+rho and other things where catastrophic cancellation occur for very small weights or rho, so can't go below certain absolute tolerance.  This affects adaptive rho and how warm-start on rho would work.
+								// see if getting below stddev, if so decrease tolerance
+								if (lane.scoring_history.size() >= 1) {
+									double ratio = (norm - lane.scoring_history.back())
+											/ norm;
+
+									if (ratio > 0.0) {
+										double factor = 0.05; // rate factor (USER parameter)
+										double tollow = tolseekfactor * tol; //*lambda/lambdaslocal[0]; //lowest allowed tolerance (USER parameter)
+										lane.tolnew = tol * pow(2.0, -ratio / factor); //*lambda/lambdaslocal[0]
+										if (lane.tolnew < tollow)
+											lane.tolnew = tollow;
+
+										settol(l, lane.tolnew,
+												1.0
+														* std::numeric_limits<T>::epsilon()); // way code written, has 1+rho and other things where catastrophic cancellation occur for very small weights or rho, so can't go below certain absolute tolerance.
+										jumpuse = lane.jump;
+									}
+									//              fprintf(stderr,"me=%d a=%d i=%d jump=%g jumpuse=%g ratio=%g tolnew=%g norm=%g score=%g\n",me,a,i,lane.jump,jumpuse,ratio,lane.tolnew,norm,lane.scoring_history.back());
 								}
-								//              fprintf(stderr,"me=%d a=%d i=%d jump=%g jumpuse=%g ratio=%g tolnew=%g norm=%g score=%g\n",me,a,i,jump,jumpuse,ratio,tolnew,norm,scoring_history.back());
+							} else { // single lambda
+								// assume warm-start value of X and other internal variables
+								//                fprintf(stderr,"tolnew to use for last alpha=%g lambda=%g is %g\n",alphaarrayofa[a],lambdaarrayofa[a],tolarrayofa[a]); fflush(stderr);
+								lane.tolnew = tolarrayofa[a];
+								settol(l, lane.tolnew,
+										10.0 * std::numeric_limits<T>::epsilon()); // way code written, has 1+rho and other things where catastrophic cancellation occur for very small weights or rho, so can't go below certain absolute tolerance.
+							}
+
+							// setup g as a function of alpha
+							std::vector<FunctionObj<T> > &g = glanes[l];
+							g.clear();
+							for (unsigned int j = 0; j < n - intercept; ++j) g.emplace_back(kAbs);
+							if (intercept) g.emplace_back(kZero);
+							T penalty_factor = static_cast<T>(1.0); // like h2o4gpu.R
+							// assign lambda (no penalty for intercept, the last coeff, if present)
+							for (unsigned int j = 0; j < n - intercept; ++j) {
+								g[j].c = static_cast<T>(alpha * lambda
+										* penalty_factor * colsd[j]); //for L1
+								g[j].e = static_cast<T>((1.0 - alpha) * lambda
+										* penalty_factor * colsd[j] * colsd[j]); //for L2
+							}
+							if (intercept) {
+								g[n - 1].c = 0;
+								g[n - 1].e = 0;
 							}
-						} else { // single lambda
-							// assume warm-start value of X and other internal variables
-							//                fprintf(stderr,"tolnew to use for last alpha=%g lambda=%g is %g\n",alphaarrayofa[a],lambdaarrayofa[a],tolarrayofa[a]); fflush(stderr);
-							tolnew = tolarrayofa[a];
-							h2o4gpu_data.SetRelTol(tolnew);
-							h2o4gpu_data.SetAbsTol(
-									10.0 * std::numeric_limits<T>::epsilon()); // way code written, has 1+rho and other things where catastrophic cancellation occur for very small weights or rho, so can't go below certain absolute tolerance.
 						}
 
 						////////////////////
@@ -900,358 +1878,618 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 						// Solve
 						//
 						////////////////////
-						// setup f,g as functions of alpha
-						std::vector<FunctionObj<T>> f;
-						std::vector<FunctionObj<T>> g;
-						f.reserve(mTrain);
-						g.reserve(n);
-
-						/*
-						Start logic for type of `family` argument passed in
-						*/
-						if(family == 'e'){ //elasticnet
-							// minimize ||Ax-b||_2^2 + \alpha\lambda||x||_1 + (1/2)(1-alpha)*lambda x^2
-							for (unsigned int j = 0; j < mTrain; ++j) f.emplace_back(kSquare, 1.0, trainY[j], weights[j]); // h2o4gpu.R
-							for (unsigned int j = 0; j < n - intercept; ++j) g.emplace_back(kAbs);
-							if (intercept) g.emplace_back(kZero);
-						}else if(family == 'l'){ //logistic
-							// minimize \sum_i -d_i y_i + log(1 + e ^ y_i) + \lambda ||x||_1
-							for (unsigned int j = 0; j < mTrain; ++j) f.emplace_back(kLogistic, 1.0, 0.0, weights[j], -weights[j]*trainY[j]); // h2o4gpu.R
-							for (unsigned int j = 0; j < n - intercept; ++j) g.emplace_back(kAbs);
-							if (intercept) g.emplace_back(kZero);
-							// }else if(family == 's'){ //svm
-							// 	// minimize (1/2) ||w||_2^2 + \lambda \sum (a_i^T * [w; b] + 1)_+.
-							// 	for (unsigned int j = 0; j < mTrain; ++j) f.emplace_back(kMaxPos0, 1.0, -1.0, weights[j]*lambda); // h2o4gpu.R}
-							// 	for (unsigned int j = 0; j < n - intercept; ++j) g.emplace_back(kSquare);
-							// 	if (intercept) g.emplace_back(kZero);
-						}else{
-							//throw error
-							throw "Wrong family type selected. Should be either elasticnet or logistic";
-						}
-						T penalty_factor = static_cast<T>(1.0); // like h2o4gpu.R
-						// assign lambda (no penalty for intercept, the last coeff, if present)
-						for (unsigned int j = 0; j < n - intercept; ++j) {
-							g[j].c = static_cast<T>(alpha * lambda
-									* penalty_factor); //for L1
-							g[j].e = static_cast<T>((1.0 - alpha) * lambda
-									* penalty_factor); //for L2
-						}
-						if (intercept) {
-							g[n - 1].c = 0;
-							g[n - 1].e = 0;
-						}
-						// Solve
-						h2o4gpu_data.Solve(f, g);
-
-						int doskiplambda = 0;
-						if (lambdatype == LAMBDATYPEPATH) {
-							/////////////////
-							//
-							// Check if getting solution was too easy and was 0 iterations.  If so, overhead is not worth it, so try skipping by 1.
-							//
-							/////////////////
-							if (h2o4gpu_data.GetFinalIter() == 0) {
-								doskiplambda = 1;
-								skiplambdaamount++;
-							} else {
-								// reset if not 0 iterations
-								skiplambdaamount = 0;
+						double tsolve = (givetelemetry ? timer<double>() : 0);
+						h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixDense<T> > *solved = &h2o4gpu_data;
+						if (h2o4gpu_block) {
+							// solve alphas solving[s0..s1) together
+							auto solvelanes = [&](size_t s0, size_t s1) {
+								blocklanes.assign(solving.begin() + s0, solving.begin() + s1);
+								blockf.assign(blocklanes.size(), &f);
+								blockg.clear();
+								for (size_t b = 0; b < blocklanes.size(); ++b)
+									blockg.push_back(&glanes[blocklanes[b]]);
+#ifndef HAVECUDA
+								h2o4gpu_block->Solve(blocklanes, blockf, blockg);
+#endif
+							};
+							size_t first = 0;
+							if (lambdatype == LAMBDATYPEPATH && i == 0 && !gotpreviousX0 && solving.size() > 1) {
+								// nothing to start the paths from: solve the first alpha alone and start the others
+								// from its solution, as one alpha at a time would
+								solvelanes(0, 1);
+								first = 1;
+								size_t l0 = solving[0];
+								if (h2o4gpu_block->GetFinalIter(l0) < h2o4gpu_block->GetMaxIter()) {
+									for (size_t s = 1; s < solving.size(); ++s) {
+										h2o4gpu_block->SetInitX(solving[s], h2o4gpu_block->GetX(l0));
+										h2o4gpu_block->SetInitLambda(solving[s], h2o4gpu_block->GetLambda(l0));
+										h2o4gpu_block->SetRho(solving[s], h2o4gpu_block->GetRho(l0));
+									}
+								}
 							}
+							solvelanes(first, solving.size());
+						} else if (!solving.empty()) {
+							a = lanes[0].a;
+							T alpha = lanes[0].alpha;
+							T lambda = lanelambda(lanes[0]);
+							std::vector<FunctionObj<T> > &g = glanes[0];
+							if (cd) {
+								// same objective as f,g above, with the tolerance chosen for ADMM
+								h2o4gpu_cd->SetRelTol(h2o4gpu_data.GetRelTol());
+								h2o4gpu_cd->Solve(static_cast<T>(alpha), lambda);
+							} else if (!screening) {
+								h2o4gpu_data.Solve(f, g);
+							} else {
+								// sequential strong rule: solve only on columns that can't be discarded at this lambda,
+								// then add back any discarded column violating the KKT condition |grad_j| <= alpha*lambda and re-solve
+								const T *xwarm = NULL, *lwarm = NULL;
+								if (lambdatype == LAMBDATYPEPATH && i == 0) {
+									if (gotpreviousX0) {
+										xwarm = X0;
+										lwarm = L0;
+									}
+								} else if (gotlastsol) {
+									xwarm = &xlastsol[0];
+									lwarm = &llastsol[0];
+								}
+								if (lambdatype == LAMBDATYPEONE || i == 0) {
+									// start from the intercept-only model, which is the solution for any lambda above screenlambda
+									T sumweightY = 0;
+									for (size_t j = 0; j < mFit; ++j)
+										sumweightY += weights[j] * fitY[j];
+									T mu0 = (intercept && sumweight > 0 ? sumweightY / sumweight : (family == 'l' ? 0.5 : 0.0));
+									for (size_t j = 0; j < mFit; ++j)
+										screenres[j] = weights[j] * (mu0 - fitY[j]);
+									gradCols(ord, mTrain, n, trainX, fitrows, &screenres[0], &screengrad[0], colscale);
+									T gradmax = 0;
+									for (size_t j = 0; j < n - intercept; ++j)
+										gradmax = std::max(gradmax, static_cast<T>(std::abs(screengrad[j])));
+									screenlambda = (alpha > 0 ? gradmax / alpha : 0);
+									screencols.clear(); // different starting point, so rebuild
+								}
+								T strong = alpha * (lambda - std::abs(lambda - screenlambda));
+								keepcols.clear();
+								for (size_t j = 0; j < n; ++j) {
+									if ((intercept && j == n - 1) || std::abs(screengrad[j]) >= strong
+											|| (xwarm != NULL && std::abs(xwarm[j]) > 1e-8))
+										keepcols.push_back(j);
+								}
 
-							////////////////////////////////////////////
-							//
-							// Check if solution was found
-							//
-							////////////////////////////////////////////
-							int maxedout = 0;
-							if (h2o4gpu_data.GetFinalIter()
-									== h2o4gpu_data.GetMaxIter())
-								maxedout = 1;
-							else
-								maxedout = 0;
+								for (;;) {
+									if (alpha * lambda <= 0 || keepcols.size() >= n) {
+										// nothing left to screen out
+										if (screenedlast || (lambdatype == LAMBDATYPEPATH && i == 0)) {
+											if (xwarm != NULL) {
+												h2o4gpu_data.SetInitX(xwarm);
+												h2o4gpu_data.SetInitLambda(lwarm);
+											} else {
+												h2o4gpu_data.ResetX();
+											}
+										}
+										h2o4gpu_data.Solve(f, g);
+										solved = &h2o4gpu_data;
+										screenedlast = 0;
+										screencols.clear();
+										break;
+									}
 
-							if (maxedout)
-								h2o4gpu_data.ResetX(); // reset X if bad solution so don't start next lambda with bad solution
-							// store good high-lambda solution to start next alpha with (better than starting with low-lambda solution)
-							if (gotX0 == 0 && maxedout == 0) {
-								gotX0 = 1;
-								// TODO: FIXME: Need to get (and have solver set) best solution or return all, because last is not best.
-								gotpreviousX0 = 1;
-								memcpy(X0, &h2o4gpu_data.GetX()[0],
-									   n * sizeof(T));
-								memcpy(L0, &h2o4gpu_data.GetLambda()[0],
-									   mTrain * sizeof(T));
+									if (keepcols != screencols) {
+										// (re)build the active-set solver on the kept columns
+										h2o4gpu_screen.reset();
+										if (Ascreen_)
+											delete[] Ascreen_->_de;
+										Ascreen_.reset();
+										screencols = keepcols;
+										size_t nscreen = screencols.size();
+										screenX.resize(mFit * nscreen);
+										gatherCols(ord, mTrain, n, trainX, fitrows, screencols, &screenX[0]);
+										if (mValid > 0) {
+											screenvX.resize(mValid * nscreen);
+											gatherCols(ord, mValid, n, validX, NULL,
+													   screencols, &screenvX[0]);
+										}
+										Ascreen_.reset(new h2o4gpu::MatrixDense<T>(-1, me, wDev, ord,
+												mFit, nscreen, mValid, &screenX[0], const_cast<T *>(fitY),
+												(mValid > 0 ? &screenvX[0] : NULL),
+												(mValid > 0 ? tvY : NULL), &weights[0]));
+										h2o4gpu_screen.reset(new h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixDense<T> >(
+												-1, me, wDev, *Ascreen_));
+										setupsolver(*h2o4gpu_screen);
+										if (rholast > 0)
+											h2o4gpu_screen->SetRho(rholast);
+										if (xwarm != NULL) {
+											xscreen.resize(nscreen);
+											for (size_t c = 0; c < nscreen; ++c)
+												xscreen[c] = xwarm[screencols[c]];
+											h2o4gpu_screen->SetInitX(&xscreen[0]);
+											h2o4gpu_screen->SetInitLambda(lwarm);
+										}
+									}
+									h2o4gpu_screen->SetRelTol(h2o4gpu_data.GetRelTol());
+									h2o4gpu_screen->SetAbsTol(h2o4gpu_data.GetAbsTol());
+									gscreen.clear();
+									for (size_t c = 0; c < screencols.size(); ++c)
+										gscreen.push_back(g[screencols[c]]);
+									h2o4gpu_screen->Solve(f, gscreen);
+									solved = h2o4gpu_screen.get();
+									screenedlast = 1;
+
+									std::fill(xlastsol.begin(), xlastsol.end(), static_cast<T>(0));
+									for (size_t c = 0; c < screencols.size(); ++c)
+										xlastsol[screencols[c]] = solved->GetX()[c];
+									memcpy(&llastsol[0], &solved->GetLambda()[0], mFit * sizeof(T));
+									gotlastsol = 1;
+									xwarm = &xlastsol[0];
+									lwarm = &llastsol[0];
+
+									// KKT check of the discarded columns at this solution
+									lossResidual(family, mFit, &weights[0], fitY, &solved->GettrainPreds()[0], &screenres[0]);
+									gradCols(ord, mTrain, n, trainX, fitrows, &screenres[0], &screengrad[0], colscale);
+									size_t nkeep = keepcols.size();
+									for (size_t j = 0, c = 0; j < n; ++j) {
+										if (c < nkeep && screencols[c] == j)
+											c++;
+										else if (std::abs(screengrad[j]) > alpha * lambda)
+											keepcols.push_back(j);
+									}
+									if (keepcols.size() == nkeep)
+										break;
+									std::sort(keepcols.begin(), keepcols.end());
+									DEBUG_FPRINTF(fil, "KKT violations: %zu\n", keepcols.size() - nkeep);
+								}
+								screenlambda = lambda;
 							}
-
 						}
 
-						if (intercept) {
-							DEBUG_FPRINTF(fil, "intercept: %g\n",
-										  h2o4gpu_data.GetX()[n - 1]);
-							DEBUG_FPRINTF(stdout, "intercept: %g\n",
-										  h2o4gpu_data.GetX()[n - 1]);
+						if (givetelemetry)
+							tsolve = timer<double>() - tsolve; // shared by the alphas solved together
+
+						// multinomial: the classes' errors are those of the model they make up together (each lane's)
+						T classerror[NUMError] = { -1, -1, -1 };
+						if (nclass > 1 && !solving.empty()) {
+							const T *xall = h2o4gpu_cd->GetX();
+							classerror[0] = multinomialError(mFit, nclass, &weights[0], h2o4gpu_cd->GettrainPreds(),
+															 fitY, 0);
+							if (foldsubset) {
+								size_t mHold = foldholdrows.size();
+								holdPreds.resize(mHold * nclass);
+								for (int c = 0; c < nclass; ++c)
+									predictRows(ord, mTrain, n, trainX, foldholdrows, &xall[c * n], &holdPreds[c * mHold]);
+								classerror[1] = multinomialError(mHold, nclass, &foldholdW[0], &holdPreds[0],
+																 &foldholdY[0], 0);
+							} else if (realfolds > 1) {
+								classerror[1] = multinomialError(mTrain, nclass, &weights[0], h2o4gpu_cd->GettrainPreds(),
+																 tY, 1);
+							}
+							if (mValid > 0)
+								classerror[2] = multinomialError(mValid, nclass, &weightsvalid[0],
+																 h2o4gpu_cd->GetvalidPreds(), tvY, 0);
+							if (verbose)
+								std::cout << "Training Logloss = " << classerror[0] << " for lambda = " << lanelambda(lanes[solving[0]])
+										  << " and alpha = " << lanes[solving[0]].alpha << std::endl;
 						}
 
-						////////////////////////////////////////
-						//
-						// Get predictions for training and validation
-						//
-						//////////////////////////////////////////
-
-						// Degrees of freedom
-						size_t dof = 0;
-						{
-							for (size_t i = 0; i < n - intercept; ++i) {
-								if (std::abs(h2o4gpu_data.GetX()[i]) > 1e-8) {
-									dof++;
+						for (size_t s = 0; s < solving.size(); ++s) {
+							size_t l = solving[s];
+							Lane &lane = lanes[l];
+							a = lane.a;
+							T alpha = lane.alpha;
+							T lambda = lanelambda(lane);
+							const size_t c = (nclass > 1 ? l : 0); // class of a multinomial lane
+
+							// results of whichever solver ran
+							const T *solvedlambda, *solvedtrainPreds, *solvedvalidPreds;
+							unsigned int finaliter, maxiter;
+							// ADMM's rho and primal and dual residuals (coordinate descent has none)
+							double solvedrho = std::numeric_limits<double>::quiet_NaN();
+							double primalres = solvedrho, dualres = solvedrho;
+							if (h2o4gpu_block) {
+								memcpy(&xlastsol[0], h2o4gpu_block->GetX(l), n * sizeof(T));
+								rholast = h2o4gpu_block->GetRho(l);
+								solvedlambda = h2o4gpu_block->GetLambda(l);
+								solvedtrainPreds = h2o4gpu_block->GettrainPreds(l);
+								solvedvalidPreds = h2o4gpu_block->GetvalidPreds(l);
+								finaliter = h2o4gpu_block->GetFinalIter(l);
+								maxiter = h2o4gpu_block->GetMaxIter();
+								solvedrho = rholast;
+								primalres = h2o4gpu_block->GetPrimalResidual(l);
+								dualres = h2o4gpu_block->GetDualResidual(l);
+							} else if (cd) {
+								memcpy(&xlastsol[c * n], h2o4gpu_cd->GetX() + c * n, n * sizeof(T));
+								solvedlambda = h2o4gpu_cd->GetLambda() + c * mFit;
+								solvedtrainPreds = h2o4gpu_cd->GettrainPreds() + c * mFit;
+								solvedvalidPreds = (mValid > 0 ? h2o4gpu_cd->GetvalidPreds() + c * mValid : NULL);
+								finaliter = h2o4gpu_cd->GetFinalIter();
+								maxiter = h2o4gpu_cd->GetMaxIter();
+							} else {
+								if (solved == &h2o4gpu_data) {
+									memcpy(&xlastsol[0], &h2o4gpu_data.GetX()[0], n * sizeof(T));
+									if (screening) {
+										memcpy(&llastsol[0], &h2o4gpu_data.GetLambda()[0], mFit * sizeof(T));
+										gotlastsol = 1;
+										// gradient at this solution for the next lambda's strong rule
+										lossResidual(family, mFit, &weights[0], fitY, &h2o4gpu_data.GettrainPreds()[0], &screenres[0]);
+										gradCols(ord, mTrain, n, trainX, fitrows, &screenres[0], &screengrad[0], colscale);
+									}
 								}
+								rholast = solved->GetRho();
+								solvedlambda = solved->GetLambda();
+								solvedtrainPreds = solved->GettrainPreds();
+								solvedvalidPreds = solved->GetvalidPreds();
+								finaliter = solved->GetFinalIter();
+								maxiter = solved->GetMaxIter();
+								solvedrho = rholast;
+								primalres = solved->GetPrimalResidual();
+								dualres = solved->GetDualResidual();
 							}
-						}
+							T *xsol = &xlastsol[c * n];
+
+							int doskiplambda = 0;
+							if (lambdatype == LAMBDATYPEPATH) {
+								/////////////////
+								//
+								// Check if getting solution was too easy and was 0 iterations.  If so, overhead is not worth it, so try skipping by 1.
+								//
+								/////////////////
+								if (finaliter == 0) {
+									doskiplambda = 1;
+									lane.skiplambdaamount++;
+								} else {
+									// reset if not 0 iterations
+									lane.skiplambdaamount = 0;
+								}
 
-						int whichbeta[NUMBETA];
-						T valuebeta[NUMBETA];
-						int whichmax = 1; // 0 : larger  1: largest absolute magnitude
-						h2o4gpu::topkwrap(whichmax, (int) (n - intercept),
-										  (int) (NUMBETA),
-										  const_cast<T*>(&h2o4gpu_data.GetX()[0]),
-										  &whichbeta[0], &valuebeta[0]);
-
-						//              memcpy(X0,&h2o4gpu_data.GetX()[0],n*sizeof(T));
-						if (0) {
-							std::sort(const_cast<T*>(&h2o4gpu_data.GetX()[0]),
-									  const_cast<T*>(&h2o4gpu_data.GetX()[n
-											  - intercept]));
-							for (size_t i = 0; i < n - intercept; ++i) {
-								fprintf(stderr, "BETA: i=%zu beta=%g\n", i,
-										h2o4gpu_data.GetX()[i]);
-								fflush(stderr);
-							}
-						}
+								////////////////////////////////////////////
+								//
+								// Check if solution was found
+								//
+								////////////////////////////////////////////
+								int maxedout = 0;
+								if (finaliter == maxiter)
+									maxedout = 1;
+								else
+									maxedout = 0;
+
+								if (maxedout) {
+									// reset X if bad solution so don't start next lambda with bad solution
+									// (multinomial: once the last class has been read)
+									if (cd) {
+										if (c + 1 == static_cast<size_t>(nclass))
+											h2o4gpu_cd->ResetX();
+									}
+									else if (h2o4gpu_block)
+										h2o4gpu_block->ResetX(l);
+									else
+										solved->ResetX();
+									gotlastsol = 0;
+								}
+								// store good high-lambda solution to start next alpha with (better than starting with low-lambda solution)
+								if (lane.gotX0 == 0 && maxedout == 0) {
+									lane.gotX0 = 1;
+									// TODO: FIXME: Need to get (and have solver set) best solution or return all, because last is not best.
+									gotpreviousX0 = 1;
+									memcpy(&X0[c * n], &xsol[0],
+										   n * sizeof(T));
+									memcpy(L0, &solvedlambda[0],
+										   mFit * sizeof(T));
+									// and the next fit's path (first fold's only)
+									if (warmstart && fi == 0) {
+										memcpy(&warmXnext[a * n], &xsol[0], n * sizeof(T));
+										warmRhonext[a] = (rholast > 0 ? rholast : 1); // coordinate descent has no rho
+									}
+								}
+								// where the next segment resumes this alpha's path (from scratch after a bad solution)
+								if (racing) {
+									if (maxedout) {
+										lane.racex.clear();
+									} else {
+										lane.racex.assign(xsol, xsol + n);
+										lane.racerho = rholast;
+									}
+								}
 
-						// TRAIN PREDS
-#if(OLDPRED)
-						std::vector <T> trainPreds(mTrain);
-						for (size_t i = 0; i < mTrain; ++i) {
-							trainPreds[i] = 0;
-							for (size_t j = 0; j < n; ++j) {
-								trainPreds[i] += h2o4gpu_data.GetX()[j] * trainX[i * n + j]; //add predictions
 							}
-						}
-#else
-						std::vector<T> trainPreds(
-								&h2o4gpu_data.GettrainPreds()[0],
-								&h2o4gpu_data.GettrainPreds()[0] + mTrain);
-						//              for(unsigned int iii=0;iii<mTrain;iii++){
-						//                fprintf(stderr,"trainPreds[%d]=%g\n",iii,trainPreds[iii]);
-						//              }
-#endif
-						//Compute inverse logit of predictions if family == 'logistic' to get actual probabilities.
-						if(family == 'l'){
-							std::transform(trainPreds.begin(), trainPreds.end(), trainPreds.begin(),[](T i) -> T { return 1/(1+exp(-i)); });
-						}
-						// Error: TRAIN
-						trainError = h2o4gpu::getError(weights, mTrain,
-													   &trainPreds[0], trainY, family);
 
-						if(verbose){
-							if(family == 'l'){
-								std::cout << "Training Logloss = " << trainError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
-							} else {
-								std::cout << "Training RMSE = " << trainError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+							if (intercept) {
+								DEBUG_FPRINTF(fil, "intercept: %g\n",
+											  xsol[n - 1]);
+								DEBUG_FPRINTF(stdout, "intercept: %g\n",
+											  xsol[n - 1]);
 							}
-						}
-						if (standardize) {
-							trainError *= sdTrainY;
-							for (size_t i = 0; i < mTrain; ++i) {
-								// reverse standardization
-								trainPreds[i] *= sdTrainY; //scale
-								trainPreds[i] += meanTrainY; //intercept
-								//assert(trainPreds[i] == h2o4gpu_data.GetY()[i]); //FIXME: CHECK
-							}
-						}
 
-						// Error: on fold's held-out training data
-						if (realfolds > 1) {
-							const T offset = 1.0;
-							ivalidError = h2o4gpu::getError(offset, weights,
-															mTrain, &trainPreds[0], trainY, family);
-							if(verbose){
-								if(family == 'l'){
-									std::cout << "Average CV Logloss = " << ivalidError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
-								} else {
-									std::cout << "Average CV RMSE = " << ivalidError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+							////////////////////////////////////////
+							//
+							// Get predictions for training and validation
+							//
+							//////////////////////////////////////////
+
+							// Degrees of freedom
+							size_t dof = 0;
+							{
+								for (size_t i = 0; i < n - intercept; ++i) {
+									if (std::abs(xsol[i]) > 1e-8) {
+										dof++;
+									}
 								}
 							}
-						} else {
-							ivalidError = -1.0;
-						}
-
-						// VALID (preds and error)
-						validError = -1;
-						if (mValid > 0) {
 
-							T weightsvalid[mValid];
-							for (size_t i = 0; i < mValid; ++i) {          //row
-								weightsvalid[i] = 1.0;
+							if (givetelemetry) {
+								const double record[NUMTELEMETRY] = { static_cast<double>(fi), static_cast<double>(a),
+										static_cast<double>(i), static_cast<double>(lambdatype == LAMBDATYPEONE),
+										alpha, lambda, static_cast<double>(finaliter), solvedrho, primalres, dualres, tsolve,
+										static_cast<double>(dof) };
+								telemetryme.insert(telemetryme.end(), record, record + NUMTELEMETRY);
 							}
 
-							// Valid Preds
-#if(OLDPRED)
-							std::vector <T> validPreds(mValid);
-							for (size_t i = 0; i < mValid; ++i) { //row
-								validPreds[i] = 0;
-								for (size_t j = 0; j < n; ++j) { //col
-									validPreds[i] += h2o4gpu_data.GetX()[j] * validX[i * n + j];//add predictions
+							int whichbeta[NUMBETA];
+							T valuebeta[NUMBETA];
+							int whichmax = 1; // 0 : larger  1: largest absolute magnitude
+							h2o4gpu::topkwrap(whichmax, (int) (n - intercept),
+											  (int) (NUMBETA),
+											  xsol,
+											  &whichbeta[0], &valuebeta[0]);
+
+							//              memcpy(X0,&h2o4gpu_data.GetX()[0],n*sizeof(T));
+							if (0) {
+								std::sort(xsol, &xsol[n - intercept]);
+								for (size_t i = 0; i < n - intercept; ++i) {
+									fprintf(stderr, "BETA: i=%zu beta=%g\n", i,
+											xsol[i]);
+									fflush(stderr);
 								}
 							}
-#else
 
-							std::vector<T> validPreds(
-									&h2o4gpu_data.GetvalidPreds()[0],
-									&h2o4gpu_data.GetvalidPreds()[0] + mValid);
-#endif
-							//Compute inverse logit of predictions if family == 'logistic' to get actual probabilities.
-							if(family == 'l'){
-								std::transform(validPreds.begin(), validPreds.end(), validPreds.begin(),[](T i) -> T { return 1/(1+exp(-i)); });
-							}
-							// Error: VALIDs
-							validError = h2o4gpu::getError(weightsvalid, mValid,
-														   &validPreds[0], validY, family);
-
-							if(verbose){
+							if (nclass > 1) {
+								trainError = classerror[0];
+								ivalidError = classerror[1];
+								validError = classerror[2];
+							} else {
+								// TRAIN PREDS
+		#if(OLDPRED)
+								trainPreds.resize(mTrain);
+								for (size_t i = 0; i < mTrain; ++i) {
+									trainPreds[i] = 0;
+									for (size_t j = 0; j < n; ++j) {
+										trainPreds[i] += xsol[j] * trainX[i * n + j]; //add predictions
+									}
+								}
+		#else
+								trainPreds.assign(&solvedtrainPreds[0],
+												  &solvedtrainPreds[0] + mFit);
+								//              for(unsigned int iii=0;iii<mTrain;iii++){
+								//                fprintf(stderr,"trainPreds[%d]=%g\n",iii,trainPreds[iii]);
+								//              }
+		#endif
+								//Compute inverse logit of predictions if family == 'logistic' to get actual probabilities.
 								if(family == 'l'){
-									std::cout << "Validation Logloss = " << validError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+									std::transform(trainPreds.begin(), trainPreds.end(), trainPreds.begin(),[](T i) -> T { return 1/(1+exp(-i)); });
+								}
+								// Error: TRAIN
+								trainError = h2o4gpu::getError(&weights[0], mFit,
+															   &trainPreds[0], fitY, family);
+
+								if(verbose){
+									if(family == 'l'){
+										std::cout << "Training Logloss = " << trainError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+									} else {
+										std::cout << "Training RMSE = " << trainError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+									}
+								}
+
+								// Error: on fold's held-out training data
+								if (foldsubset) {
+									size_t mHold = foldholdrows.size();
+									holdPreds.resize(mHold);
+									predictRows(ord, mTrain, n, trainX, foldholdrows,
+												&xsol[0], &holdPreds[0]);
+									if(family == 'l'){
+										std::transform(holdPreds.begin(), holdPreds.end(), holdPreds.begin(),[](T i) -> T { return 1/(1+exp(-i)); });
+									}
+									ivalidError = h2o4gpu::getError(&foldholdW[0], mHold,
+																	&holdPreds[0], &foldholdY[tg * mHold], family);
+									if(verbose){
+										if(family == 'l'){
+											std::cout << "Average CV Logloss = " << ivalidError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+										} else {
+											std::cout << "Average CV RMSE = " << ivalidError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+										}
+									}
+								} else if (realfolds > 1) {
+									const T offset = 1.0;
+									ivalidError = h2o4gpu::getError(offset, &weights[0],
+																	mTrain, &trainPreds[0], tY, family);
+									if(verbose){
+										if(family == 'l'){
+											std::cout << "Average CV Logloss = " << ivalidError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+										} else {
+											std::cout << "Average CV RMSE = " << ivalidError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+										}
+									}
 								} else {
-									std::cout << "Validation RMSE = " << validError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+									ivalidError = -1.0;
 								}
-							}
 
-							if (standardize) {
-								validError *= sdTrainY;
-								for (size_t i = 0; i < mValid; ++i) { //row
-									// reverse (fitted) standardization
-									validPreds[i] *= sdTrainY; //scale
-									validPreds[i] += meanTrainY; //intercept
+								// VALID (preds and error)
+								validError = -1;
+								if (mValid > 0) {
+
+									// Valid Preds
+		#if(OLDPRED)
+									validPreds.resize(mValid);
+									for (size_t i = 0; i < mValid; ++i) { //row
+										validPreds[i] = 0;
+										for (size_t j = 0; j < n; ++j) { //col
+											validPreds[i] += xsol[j] * validX[i * n + j];//add predictions
+										}
+									}
+		#else
+
+									validPreds.assign(&solvedvalidPreds[0],
+													  &solvedvalidPreds[0] + mValid);
+		#endif
+									//Compute inverse logit of predictions if family == 'logistic' to get actual probabilities.
+									if(family == 'l'){
+										std::transform(validPreds.begin(), validPreds.end(), validPreds.begin(),[](T i) -> T { return 1/(1+exp(-i)); });
+									}
+									// Error: VALIDs
+									validError = h2o4gpu::getError(&weightsvalid[0], mValid,
+																   &validPreds[0], tvY, family);
+
+									if(verbose){
+										if(family == 'l'){
+											std::cout << "Validation Logloss = " << validError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+										} else {
+											std::cout << "Validation RMSE = " << validError << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+										}
+									}
 								}
 							}
-						}
 
-						////////////
-						//
-						// report scores
-						//
-						////////////
-						if (VERBOSEENET)
-								Printmescore(fil);
-#pragma omp critical
-						{
+							////////////
+							//
+							// report scores
+							//
+							////////////
 							if (VERBOSEENET)
-									Printmescore(stdout);
-							if (VERBOSEANIM || verboseanimtriggered==1){
-								Printmescoresimple(filerror);
-								Printmescoresimple2(filvarimp);
+									Printmescore(fil);
+	#pragma omp critical
+							{
+								if (VERBOSEENET)
+										Printmescore(stdout);
+								if (VERBOSEANIM || verboseanimtriggered==1){
+									Printmescoresimple(filerror);
+									Printmescoresimple2(filvarimp);
+								}
 							}
-						}
 
-						T localerror[NUMError];
-						localerror[0] = trainError;
-						localerror[1] = ivalidError;
-						localerror[2] = validError;
-						if (tbesterror[iwhicherror] > localerror[iwhicherror]) {
-							tbestalpha = alpha;
-							tbestlambda = lambda;
-							tbesttol = tolnew;
-							ErrorLOOP(ri)
-								tbesterror[ri] = localerror[ri];
-						}
-
-						// save scores
-						scoring_history.push_back(localerror[iwhicherror]);
+							T localerror[NUMError];
+							localerror[0] = trainError;
+							localerror[1] = ivalidError;
+							localerror[2] = validError;
+							int improved = 0;
+							if (lane.tbesterror[iwhicherror] > localerror[iwhicherror]) {
+								lane.tbestalpha = alpha;
+								lane.tbestlambda = lambda;
+								lane.tbesttol = lane.tolnew;
+								ErrorLOOP(ri)
+									lane.tbesterror[ri] = localerror[ri];
+								improved = 1;
+							}
+							if ((adaptive || racing || deadline > 0) && improved)
+								lane.bestx.assign(xsol, xsol + n);
+							if (adaptive && !refine) {
+								if (improved) {
+									// refine from the coarse lambda above this one, or this one if it is the first
+									lane.bestc = p;
+									lane.refinex = (lane.coarsex.empty() ? lane.bestx : lane.coarsex);
+									if (lane.coarsel.empty())
+										lane.refinel.assign(solvedlambda, solvedlambda + mFit);
+									else
+										lane.refinel = lane.coarsel;
+								}
+								lane.coarsex.assign(xsol, xsol + n);
+								lane.coarsel.assign(solvedlambda, solvedlambda + mFit);
+							}
 
-						if (lambdatype == LAMBDATYPEPATH) {
-							if (fi == 0 && givefullpath) { // only store first fold for user
-								//#define MAPXALL(i,a,which) (which + a*(n+NUMError+NUMOTHER) + i*(n+NUMError+NUMOTHER)*nlambdas)
-								//#define MAPXBEST(a,which) (which + a*(n+NUMError+NUMOTHER))
-								//#define NUMOTHER 3 // for lambda, alpha, tolnew
-								// Save solution to return to user
-								memcpy(&((*Xvsalphalambda)[MAPXALL(i, a, 0)]),
-									   &h2o4gpu_data.GetX()[0],
-									   n * sizeof(T));
+							// save scores
+							lane.scoring_history.push_back(localerror[iwhicherror]);
+
+							if (lambdatype == LAMBDATYPEPATH) {
+								if (fi == 0 && givefullpath) { // only store first fold for user
+									//#define MAPXALL(i,a,which) (which + a*(n+NUMError+NUMOTHER) + i*(n+NUMError+NUMOTHER)*nlambdas)
+									//#define MAPXBEST(a,which) (which + a*(n+NUMError+NUMOTHER))
+									//#define NUMOTHER 3 // for lambda, alpha, tolnew
+									// Save solution to return to user
+									memcpy(&((*Xvsalphalambda)[MAPXALL(i, a, 0)]),
+										   &xsol[0],
+										   n * sizeof(T));
+									// Save error to return to user
+									ErrorLOOP(ri)
+										(*Xvsalphalambda)[MAPXALL(i, a, n + ri)] =
+												localerror[ri];
+									// Save lambda to return to user
+									(*Xvsalphalambda)[MAPXALL(i, a, n+NUMError)] =
+											lambda;
+									// Save alpha to return to user
+									(*Xvsalphalambda)[MAPXALL(i, a, n+NUMError+1)] =
+											alpha;
+									// Save tolnew to return to user
+									(*Xvsalphalambda)[MAPXALL(i, a, n+NUMError+2)] =
+											lane.tolnew;
+								}
+								if (pathcallback != NULL) { // every fold, also without the full path
+									T pathmore[NUMError + NUMOTHER];
+									ErrorLOOP(ri)
+										pathmore[ri] = localerror[ri];
+									pathmore[NUMError] = lambda;
+									pathmore[NUMError+1] = alpha;
+									pathmore[NUMError+2] = lane.tolnew;
+									pathcallback(pathdata, fi, a, i, &xsol[0], n, pathmore,
+												 NUMError + NUMOTHER);
+								}
+							} else {                  // only done if realfolds>1
+								memcpy(&((*Xvsalpha)[MAPXBEST(a, 0)]),
+									   &xsol[0], n * sizeof(T));
 								// Save error to return to user
 								ErrorLOOP(ri)
-									(*Xvsalphalambda)[MAPXALL(i, a, n + ri)] =
+									(*Xvsalpha)[MAPXBEST(a, n + ri)] =
 											localerror[ri];
 								// Save lambda to return to user
-								(*Xvsalphalambda)[MAPXALL(i, a, n+NUMError)] =
-										lambda;
+								(*Xvsalpha)[MAPXBEST(a, n+NUMError)] = lambda;
 								// Save alpha to return to user
-								(*Xvsalphalambda)[MAPXALL(i, a, n+NUMError+1)] =
-										alpha;
+								(*Xvsalpha)[MAPXBEST(a, n+NUMError+1)] = alpha;
 								// Save tolnew to return to user
-								(*Xvsalphalambda)[MAPXALL(i, a, n+NUMError+2)] =
-										tolnew;
+								(*Xvsalpha)[MAPXBEST(a, n+NUMError+2)] = lane.tolnew;
 							}
-						} else {                  // only done if realfolds>1
-							memcpy(&((*Xvsalpha)[MAPXBEST(a, 0)]),
-								   &h2o4gpu_data.GetX()[0], n * sizeof(T));
-							// Save error to return to user
-							ErrorLOOP(ri)
-								(*Xvsalpha)[MAPXBEST(a, n + ri)] =
-										localerror[ri];
-							// Save lambda to return to user
-							(*Xvsalpha)[MAPXBEST(a, n+NUMError)] = lambda;
-							// Save alpha to return to user
-							(*Xvsalpha)[MAPXBEST(a, n+NUMError+1)] = alpha;
-							// Save tolnew to return to user
-							(*Xvsalpha)[MAPXBEST(a, n+NUMError+2)] = tolnew;
-						}
 
-						if (lambdatype == LAMBDATYPEPATH) {
-							if (lambdastopearly>0) {
-								if (scoring_history.size() >= 1) {
-									double ratio = (norm
-											- scoring_history.back()) / norm;
-
-									double fracdof = 0.5; //USER parameter.
-									//                    if((double)dof>fracdof*(double)(n)){ // only consider stopping if explored most degrees of freedom, because at dof~0-1 error can increase due to tolerance in solver.
-									if (RELAXEARLYSTOP
-											|| ratio > 0.0
-													&& (double) dof
-															> fracdof
-																	* (double) (n)) { // only consider stopping if explored most degrees of freedom, because at dof~0-1 error can increase due to tolerance in solver.
-										//                  fprintf(stderr,"ratio=%g dof=%zu fracdof*n=%g\n",ratio,dof,fracdof*n); fflush(stderr);
-										// STOP EARLY CHECK
-										int k = 3; //TODO: ask the user for this parameter
-										double tolerance = 0.0; // stop when not improved over 3 successive lambdas (averaged over window 3) // NOTE: Don't use tolerance=0 because even for simple.txt test this stops way too early when error is quite high
-										bool moreIsBetter = false;
-										bool verbose =
-												static_cast<bool>(VERBOSEENET); // true;
-										if (stopEarly(scoring_history, k,
-													  tolerance, moreIsBetter,
-													  verbose, norm, &jump)) {
-											break;
+							if (lambdatype == LAMBDATYPEPATH && !refine) {
+								if (lambdastopearly>0) {
+									if (lane.scoring_history.size() >= 1) {
+										double ratio = (norm
+												- lane.scoring_history.back()) / norm;
+
+										double fracdof = 0.5; //USER parameter.
+										//                    if((double)dof>fracdof*(double)(n)){ // only consider stopping if explored most degrees of freedom, because at dof~0-1 error can increase due to tolerance in solver.
+										if (RELAXEARLYSTOP
+												|| ratio > 0.0
+														&& (double) dof
+																> fracdof
+																		* (double) (n)) { // only consider stopping if explored most degrees of freedom, because at dof~0-1 error can increase due to tolerance in solver.
+											//                  fprintf(stderr,"ratio=%g dof=%zu fracdof*n=%g\n",ratio,dof,fracdof*n); fflush(stderr);
+											// STOP EARLY CHECK
+											int k = 3; //TODO: ask the user for this parameter
+											double tolerance = 0.0; // stop when not improved over 3 successive lambdas (averaged over window 3) // NOTE: Don't use tolerance=0 because even for simple.txt test this stops way too early when error is quite high
+											bool moreIsBetter = false;
+											bool verbose =
+													static_cast<bool>(VERBOSEENET); // true;
+											if (stopEarly(lane.scoring_history, k,
+														  tolerance, moreIsBetter,
+														  verbose, norm, &lane.jump)) {
+												lane.stopped = 1;
+												continue;
+											}
 										}
 									}
 								}
-							}
 
-							//                fprintf(stderr,"doskiplambda=%d skiplambdaamount=%d\n",doskiplambda,skiplambdaamount);fflush(stderr);
-							// if can skip over lambda, do so, but still print out the score as if constant for new lambda
-							if (doskiplambda) {
-								for (int ii = 0; ii < skiplambdaamount; ++ii) {
-									i++;
-									if (i >= nlambdalocal)
-										break; // don't skip beyond existing lambda
-									lambda = lambdaslocal[i];
-									if (VERBOSEENET)
-											Printmescore(fil);
-#pragma omp critical
-									{
+								//                fprintf(stderr,"doskiplambda=%d skiplambdaamount=%d\n",doskiplambda,skiplambdaamount);fflush(stderr);
+								// if can skip over lambda, do so, but still print out the score as if constant for new lambda
+								if (doskiplambda) {
+									lane.nexti = i + 1 + lane.skiplambdaamount;
+									for (int i = lane.nexti - lane.skiplambdaamount; i < lane.nexti; ++i) {
+										if (i >= nlambdalocal)
+											break; // don't skip beyond existing lambda
+										lambda = lambdaslocal[i];
 										if (VERBOSEENET)
-												Printmescore(stdout);
-										if (VERBOSEANIM || verboseanimtriggered==1){
-											Printmescoresimple(filerror);
-											Printmescoresimple2(filvarimp);
+												Printmescore(fil);
+	#pragma omp critical
+										{
+											if (VERBOSEENET)
+													Printmescore(stdout);
+											if (VERBOSEANIM || verboseanimtriggered==1){
+												Printmescoresimple(filerror);
+												Printmescoresimple2(filvarimp);
+											}
 										}
 									}
 								}
@@ -1260,40 +2498,58 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 
 					} // over lambda(s)
 
-					// store results
-					int pickfi;
-					if (lambdatype == LAMBDATYPEPATH)
-						pickfi = fi; // variable lambda folds
-					else
-						pickfi = realfolds + fi; // fixed-lambda folds
-					// store Error (thread-safe)
-					alphaarray[pickfi][a] = tbestalpha;
-					lambdaarray[pickfi][a] = tbestlambda;
-					tolarray[pickfi][a] = tbesttol;
-					ErrorLOOP(ri)
-						errorarray[ri][pickfi][a] = tbesterror[ri];
-
-					// if not doing folds, store best solution over all lambdas
-					if (lambdatype == LAMBDATYPEPATH && nFolds < 2) {
-						if (fi == 0) { // only store first fold for user
-							memcpy(&((*Xvsalpha)[MAPXBEST(a, 0)]),
-								   &h2o4gpu_data.GetX()[0], n * sizeof(T)); // not quite best, last lambda TODO FIXME
-							//                for(unsigned int iii=0; iii<n;iii++) fprintf(stderr,"Xvsalpha[%d]=%g\n",iii,(*Xvsalpha)[MAPXBEST(a,iii)]); fflush(stderr);
-							// Save error to return to user
-							ErrorLOOP(ri)
-								(*Xvsalpha)[MAPXBEST(a, n + ri)] =
-										tbesterror[ri];
-							// Save lambda to return to user
-							(*Xvsalpha)[MAPXBEST(a, n+NUMError)] = tbestlambda;
-							// Save alpha to return to user
-							(*Xvsalpha)[MAPXBEST(a, n+NUMError+1)] = tbestalpha;
-							// Save tol to return to user
-							(*Xvsalpha)[MAPXBEST(a, n+NUMError+2)] = tbesttol;
+					for (size_t l = 0; l < lanes.size(); ++l) {
+						Lane &lane = lanes[l];
+						a = lane.a;
+						// store results
+						int pickfi;
+						if (lambdatype == LAMBDATYPEPATH)
+							pickfi = fi; // variable lambda folds
+						else
+							pickfi = realfolds + fi; // fixed-lambda folds
+						// out of time before its first lambda: nothing solved, so no error, lambda or tol (NaN, which
+						// never wins the comparisons over alphas below)
+						const bool unsolved = (deadline > 0 && lane.bestx.empty());
+						const double nan = std::numeric_limits<double>::quiet_NaN();
+						const double storealpha = (unsolved ? static_cast<double>(lane.alpha) : lane.tbestalpha);
+						const double storelambda = (unsolved ? nan : lane.tbestlambda);
+						const double storetol = (unsolved ? nan : lane.tbesttol);
+						// store Error (thread-safe)
+						alphaarray[pickfi][a] = storealpha;
+						lambdaarray[pickfi][a] = storelambda;
+						tolarray[pickfi][a] = storetol;
+						ErrorLOOP(ri)
+							errorarray[ri][pickfi][a] = (unsolved ? nan : lane.tbesterror[ri]);
+
+						// if not doing folds, store best solution over all lambdas (with a deadline also the first
+						// fold's, the best so far in case the fixed-lambda folds don't get to replace it)
+						if (lambdatype == LAMBDATYPEPATH && (nFolds < 2 || deadline > 0)) {
+							if (fi == 0) { // only store first fold for user
+								if (unsolved)
+									std::fill_n(&((*Xvsalpha)[MAPXBEST(a, 0)]), n, static_cast<T>(0));
+								else
+									memcpy(&((*Xvsalpha)[MAPXBEST(a, 0)]),
+										   (!lane.bestx.empty() ? &lane.bestx[0] : h2o4gpu_block ? h2o4gpu_block->GetX(l) : &xlastsol[(nclass > 1 ? l : 0) * n]),
+										   n * sizeof(T)); // not quite best, last lambda TODO FIXME (best when searching adaptively, racing or with a deadline)
+								//                for(unsigned int iii=0; iii<n;iii++) fprintf(stderr,"Xvsalpha[%d]=%g\n",iii,(*Xvsalpha)[MAPXBEST(a,iii)]); fflush(stderr);
+								// Save error to return to user
+								ErrorLOOP(ri)
+									(*Xvsalpha)[MAPXBEST(a, n + ri)] =
+											errorarray[ri][pickfi][a];
+								// Save lambda to return to user
+								(*Xvsalpha)[MAPXBEST(a, n+NUMError)] = storelambda;
+								// Save alpha to return to user
+								(*Xvsalpha)[MAPXBEST(a, n+NUMError+1)] = storealpha;
+								// Save tol to return to user
+								(*Xvsalpha)[MAPXBEST(a, n+NUMError+2)] = storetol;
+							}
 						}
 					}
+					if (racing && lambdatype == LAMBDATYPEPATH)
+						racelanes[fi * nAlphaBlocks + ab] = lanes; // for the next segment
 
-				}                // over folds
-			}                // over alpha
+				}                // over alpha
+			}                // over folds
 
 #pragma omp barrier // barrier so alphaarray, lambdaarray, errorarray are filled and ready to be read by all threads
 			int fistart;
@@ -1349,16 +2605,61 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 			if (me == 0 && VERBOSEENET)
 					PrintmescoresimpleCV(stdout,lambdatype,bestalpha,bestlambda,besterror[0],besterror[1],besterror[2]);
 
+			// alpha racing: drop the alphas whose fold-averaged error so far is worse than their target's best
+			// by more than racemargin (the barrier ending single also keeps the next segment from overwriting
+			// errors another thread is still averaging)
+			if (racing && pass < npath - 1) {
+#pragma omp single
+				{
+					int nracing = 0;
+					for (int tg = 0; tg < nTargets; ++tg) {
+						double lead = std::numeric_limits<double>::max();
+						for (int a = tg * nAlphaValues; a < (tg + 1) * nAlphaValues; ++a) {
+							if (!raceout[a])
+								lead = std::min(lead, errorarrayofa[owhicherror][a]);
+						}
+						for (int a = tg * nAlphaValues; a < (tg + 1) * nAlphaValues; ++a) {
+							if (!raceout[a] && errorarrayofa[owhicherror][a] > lead * (1.0 + racemargin))
+								raceout[a] = 1;
+							if (!raceout[a])
+								nracing++;
+						}
+					}
+					if (verbose) {
+						cout << "Alpha racing: " << nracing << " of " << nAlphas << " alphas left after lambda "
+								<< raceends[pass] << endl;
+					}
+				}
+			}
+
 		} // over lambdatype
 
 		if (X0)
 			delete[] X0;
 		if (L0)
 			delete[] L0;
+		h2o4gpu_block.reset();
+		h2o4gpu_fold.reset();
+		if (Afold_)
+			delete[] Afold_->_de;
+		h2o4gpu_screen.reset();
+		if (Ascreen_)
+			delete[] Ascreen_->_de;
 		if (fil != NULL)
 			fclose(fil);
+#pragma omp critical
+		telemetryall.insert(telemetryall.end(), telemetryme.begin(), telemetryme.end());
 	} // end parallel region
 
+	if (warmstart) {
+		for (int a = 0; a < nAlphas; ++a) {
+			if (warmRhonext[a] > 0) {
+				memcpy(&warmX[a * n], &warmXnext[a * n], n * sizeof(T));
+				warmRho[a] = warmRhonext[a];
+			}
+		}
+	}
+
 	///////////////////////
 	//
 	// report over all folds, cross-validated model, and over alphas
@@ -1380,11 +2681,11 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 	}
 
 	// free any malloc's
-	if (trainX && OLDPRED)
+	if (trainX)
 		free(trainX);
 	if (trainY)
 		free(trainY);
-	if (validX && OLDPRED)
+	if (validX)
 		free(validX);
 	if (validY)
 		free(validY);
@@ -1405,22 +2706,54 @@ double ElasticNetptr_fit(const char family, int sourceDev, int datatype, int sha
 		fflush(stderr);
 		flag = 0; // set flag
 	}
+	if (timeup && verbose) {
+		fprintf(stderr, "Time limit of %g sec reached. Terminated early.\n", maxruntime);
+		fflush(stderr);
+	}
+	if (timedout != NULL)
+		*timedout = timeup;
+	// every solve's telemetry, by refit, fold, alpha and lambda (and otherwise in the order solved)
+	if (telemetry != NULL) {
+		size_t nrecords = telemetryall.size() / NUMTELEMETRY;
+		std::vector<size_t> order(nrecords);
+		std::iota(order.begin(), order.end(), 0);
+		std::stable_sort(order.begin(), order.end(), [&](size_t r1, size_t r2) {
+			for (int k : {3, 0, 1, 2}) {
+				double v1 = telemetryall[r1 * NUMTELEMETRY + k], v2 = telemetryall[r2 * NUMTELEMETRY + k];
+				if (v1 != v2)
+					return v1 < v2;
+			}
+			return false;
+		});
+		*telemetry = (nrecords > 0 ? (double *) malloc(nrecords * NUMTELEMETRY * sizeof(double)) : NULL);
+		for (size_t r = 0; r < nrecords; ++r)
+			memcpy(&(*telemetry)[r * NUMTELEMETRY], &telemetryall[order[r] * NUMTELEMETRY],
+				   NUMTELEMETRY * sizeof(double));
+		if (counttelemetry != NULL)
+			*counttelemetry = nrecords * NUMTELEMETRY;
+	}
+#ifdef _OPENMP
+	omp_set_num_threads(omt); // so the next fit's ThreadBudget sees the cores this one did
+#endif
 	return tf - t;
 }
 
 template<typename T>
 double ElasticNetptr_predict(const char family, int sourceDev, int datatype, int sharedA,
-							 int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain, size_t n,
+							 int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain, size_t n,
 							 size_t mValid, int intercept, int standardize,
 							 double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 							 int nAlphas, double alpha_min, double alpha_max,
 							 T *alphas, T *lambdas,
 							 double tol, double tol_seek_factor,
-							 int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, int verbose,
+							 int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, double maxruntime, int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, T *warmX, T *warmRho, int nTargets, T *targetY, T *targetValidY,
 							 T *trainXptr, T *trainYptr, T *validXptr, T *validYptr,
-							 T *weightptr, int givefullpath, T **Xvsalphalambda, T **Xvsalpha,
+							 T *weightptr, int givefullpath, int givetelemetry,
+		void (*pathcallback)(void *, int, int, int, const T *, size_t, const T *, size_t),
+		void *pathdata, T **Xvsalphalambda, T **Xvsalpha,
 							 T **validPredsvsalphalambda, T **validPredsvsalpha, size_t *countfull,
-							 size_t *countshort, size_t *countmore) {
+							 size_t *countshort, size_t *countmore, int *timedout,
+							 double **telemetry, size_t *counttelemetry) {
 
 
 	// Adjust any parameters for user friendliness
@@ -1464,6 +2797,15 @@ double ElasticNetptr_predict(const char family, int sourceDev, int datatype, int
 		DEBUG_FPRINTF(stderr, "NOTE: Number of alpha's not evenly divisible by number of Threads, so not efficint load balancing: %d\n",0);
 	}
 #endif
+	// the cores each thread's BLAS calls and nested loops may use
+#ifdef _OPENMP
+	ThreadBudget budget(omt, nThreads, blasThreads);
+#else
+	ThreadBudget budget(1, 1, blasThreads);
+#endif
+	if (verbose) {
+		cout << "BLAS threads per thread=" << budget.inner() << endl;
+	}
 
 	if (VERBOSEENET) {
 		fprintf(stderr, "Before malloc validPreds\n");
@@ -1494,7 +2836,8 @@ double ElasticNetptr_predict(const char family, int sourceDev, int datatype, int
 		fprintf(stderr, "Before Asource\n");
 		fflush(stderr);
 	}
-	h2o4gpu::MatrixDense<T> Asource_(sharedA, sourceme, sourceDev, datatype,
+	// if sharedA, threads read the uploaded buffers in place; prediction never needs them equilibrated
+	h2o4gpu::MatrixDense<T> Asource_((sharedA != 0 ? -1 : 0), sourceme, sourceDev, datatype,
 			ord, mTrain, n, mValid, reinterpret_cast<T *>(trainXptr),
 			reinterpret_cast<T *>(trainYptr), reinterpret_cast<T *>(validXptr),
 			reinterpret_cast<T *>(validYptr), reinterpret_cast<T *>(weightptr));
@@ -1517,19 +2860,17 @@ double ElasticNetptr_predict(const char family, int sourceDev, int datatype, int
     {
 #ifdef _OPENMP
 		int me = omp_get_thread_num();
-		//https://software.intel.com/en-us/node/522115
-		int physicalcores=omt;///2; // asssume hyperthreading Intel processor (doens't improve much to ensure physical cores used0
-		// set number of mkl threads per openmp thread so that not oversubscribing cores
-		int mklperthread=MAX(1,(physicalcores % nThreads==0 ? physicalcores/nThreads : physicalcores/nThreads+1));
 #else
 		int me = 0;
 #endif
 
+		// don't oversubscribe the cores (see ThreadBudget)
+		ThreadBudget::Inner innerthreads(budget);
 		int blasnumber;
 #ifdef HAVECUDA
 		blasnumber=CUDA_MAJOR;
 #else
-		blasnumber = mklperthread; // roughly accurate for openblas as well
+		blasnumber = budget.inner();
 #endif
 
 		// choose GPU device ID for each thread
@@ -1579,6 +2920,8 @@ double ElasticNetptr_predict(const char family, int sourceDev, int datatype, int
 
 		int a, i;
 
+		std::vector<T> weightsvalid(mValid, 1.0);
+
 		//////////////////////////////
 		// LOOP OVER ALPHAS
 		///////////////////////////////
@@ -1621,17 +2964,6 @@ double ElasticNetptr_predict(const char family, int sourceDev, int datatype, int
 					std::transform(validPreds.begin(), validPreds.end(), validPreds.begin(),[](T i) -> T { return 1/(1+exp(-i)); });
 				}
 
-				T sdTrainY = 1.0; // TODO FIXME not impliemented yet
-				T meanTrainY = 1.0; // TODO FIXME not impliemented yet
-				// correct validPreds
-				if (standardize) {
-					for (size_t i = 0; i < mValid; ++i) { //row
-						// reverse (fitted) standardization
-						validPreds[i] *= sdTrainY; //scale
-						validPreds[i] += meanTrainY; //intercept
-					}
-				}
-
 				// save preds (exclusive set, unlike X)
 				if (givefullpath) { // save all preds
 					memcpy(&((*validPredsvsalphalambda)[MAPPREDALL(i, a, 0, mValid)]),
@@ -1647,18 +2979,11 @@ double ElasticNetptr_predict(const char family, int sourceDev, int datatype, int
 				T *validY = new T[mValid];
 				int validYerror = Asource_.GetValidY(datatype, mValid, &validY);
 
-				// Compute Error for predictions
-				if (validYerror == 0) {
-
-					T weightsvalid[mValid];
-					for (size_t i = 0; i < mValid; ++i) { //row
-						weightsvalid[i] = 1.0;
-					}
+				// Compute Error for predictions (a multinomial model's needs all its classes, see the fit)
+				if (validYerror == 0 && family != 'm') {
 
-					T validError = h2o4gpu::getError(weightsvalid, mValid,
+					T validError = h2o4gpu::getError(&weightsvalid[0], mValid,
 							&validPreds[0], validY, family);
-					if (standardize)
-						validError *= sdTrainY;
 
 					if (givefullpath) {
 						// Save error to return to user
@@ -1720,92 +3045,556 @@ double ElasticNetptr_predict(const char family, int sourceDev, int datatype, int
 		fflush(stderr);
 		flag = 0; // set flag
 	}
+	if (timedout != NULL)
+		*timedout = 0;
+	if (telemetry != NULL)
+		*telemetry = NULL;
+	if (counttelemetry != NULL)
+		*counttelemetry = 0;
+#ifdef _OPENMP
+	omp_set_num_threads(omt); // so the next fit's ThreadBudget sees the cores this one did
+#endif
+	return tf - t;
+}
+
+// Fit from a sparse training matrix (CSR if ord is 'r', CSC if 'c', int32
+// indices as scipy.sparse keeps them) and optional sparse validation matrix
+// in the same format, without ever forming the dense matrix.  Each thread's
+// solver holds its own copy of the nonzeros (and their transpose) and uses
+// the CGLS (indirect) projector, since the direct projector needs the dense
+// Gram matrix.  Cross-validation folds down-weight the held-out rows instead
+// of fitting on a copy of the fold's rows, and screening, coordinate descent,
+// warm start and standardize are not supported.  Outputs are laid out as by
+// ElasticNetptr_fit.
+template<typename T>
+double ElasticNetSparseptr_fit(const char family, int nThreads, int gpu_id, int nGPUs, int totalnGPUs,
+							   const char ord, size_t mTrain, size_t n, size_t mValid, int intercept,
+							   double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
+							   int nAlphas, double alpha_min, double alpha_max,
+							   T *alphas, T *lambdas,
+							   double tol, double tolseekfactor,
+							   int lambdastopearly, int glmstopearly, double stopearlyerrorfraction,
+							   int max_iterations, int verbose,
+							   size_t trainnnz, T *trainXdata, int *trainXindices, int *trainXindptr, T *trainY,
+							   size_t validnnz, T *validXdata, int *validXindices, int *validXindptr, T *validY,
+							   T *weight, int givefullpath, T **Xvsalphalambda, T **Xvsalpha,
+							   size_t *countfull, size_t *countshort, size_t *countmore) {
+
+	// Adjust any parameters for user friendliness
+	nAlphas = std::max(nAlphas,0); // At least zero alphas
+	nLambdas = std::max(nLambdas,0); // At least zero Lambdas
+
+	signal(SIGINT, my_function);
+	signal(SIGTERM, my_function);
+	int nlambda = nLambdas;
+
+#ifdef _OPENMP
+	int omt=omp_get_max_threads();
+	omp_set_num_threads(nThreads);
+	omp_set_dynamic(0);
+#endif
+
+	size_t realfolds = (nFolds == 0 ? 1 : nFolds);
+
+	// setup storage for returning results back to user
+	*countmore = NUMError + NUMOTHER;
+	if (givefullpath) {
+		*countfull = nLambdas * nAlphas * (n + *countmore);
+		*Xvsalphalambda = (T*) calloc(*countfull, sizeof(T));
+	} else {
+		*countfull = 0;
+		*Xvsalphalambda = NULL;
+	}
+	*countshort = nAlphas * (n + *countmore);
+	*Xvsalpha = (T*) calloc(*countshort, sizeof(T));
+
+	std::vector<T> trainW(mTrain, static_cast<T>(1.0));
+	if (weight != NULL)
+		memcpy(&trainW[0], weight, mTrain * sizeof(T));
+
+	// response statistics and lambda_max as MatrixDense::Stats computes them
+	double meanTrainY = 0, sdTrainY = 0, meanValidY = 0, sdValidY = 0;
+	for (size_t j = 0; j < mTrain; ++j)
+		meanTrainY += trainY[j];
+	meanTrainY /= mTrain;
+	for (size_t j = 0; j < mTrain; ++j)
+		sdTrainY += (trainY[j] - meanTrainY) * (trainY[j] - meanTrainY);
+	sdTrainY = std::sqrt(sdTrainY / mTrain);
+	if (mValid > 0) {
+		for (size_t j = 0; j < mValid; ++j)
+			meanValidY += validY[j];
+		meanValidY /= mValid;
+		for (size_t j = 0; j < mValid; ++j)
+			sdValidY += (validY[j] - meanValidY) * (validY[j] - meanValidY);
+		sdValidY = std::sqrt(sdValidY / mValid);
+	}
+	if (lambda_max < 0.0) { // set if user didn't set
+		std::vector<T> r(mTrain), u(n);
+		for (size_t j = 0; j < mTrain; ++j)
+			r[j] = trainW[j] * (trainY[j] - intercept * meanTrainY);
+		sparseGrad(ord, mTrain, n, trainXdata, trainXindices, trainXindptr, &r[0], &u[0]);
+		lambda_max = 0;
+		for (size_t j = 0; j < n - intercept; ++j)
+			lambda_max = std::max(lambda_max, static_cast<double>(std::abs(u[j])));
+		if (lambda_max == 0.0 || !std::isfinite(lambda_max)) {
+			fprintf(stderr, "Failure to compute lambda_max0\n");
+			fflush(stderr);
+			exit(1);
+		}
+	}
+
+	// the solvers' matrices are copied from this one, which only points at the caller's arrays
+	h2o4gpu::MatrixSparse<T> Asource_(0, 0, gpu_id, ord, mTrain, n, trainnnz,
+									  trainXdata, trainXindptr, trainXindices);
+
+	std::vector<std::vector<T> > alphaarray(realfolds * 2, std::vector<T>(nAlphas));
+	std::vector<std::vector<T> > lambdaarray(realfolds * 2, std::vector<T>(nAlphas));
+	std::vector<std::vector<T> > tolarray(realfolds * 2, std::vector<T>(nAlphas));
+	// which error picks the best model (across alphas) and the best lambda along the path
+	int owhicherror = (mValid > 0 ? 2 : (realfolds <= 1 ? 0 : 1));
+	int iwhicherror = (mValid > 0 && realfolds <= 1 ? 2 : (realfolds <= 1 ? 0 : 1));
+	std::vector<std::vector<std::vector<T> > > errorarray(NUMError,
+			std::vector<std::vector<T> >(realfolds * 2, std::vector<T>(nAlphas)));
+	double t = timer<double>();
+
+#pragma omp parallel
+	{
+#ifdef _OPENMP
+		int me = omp_get_thread_num();
+#else
+		int me = 0;
+#endif
+		int wDev = gpu_id + (nGPUs > 0 ? me % nGPUs : 0);
+		wDev = wDev % totalnGPUs;
+
+		h2o4gpu::H2O4GPUIndirect<T, h2o4gpu::MatrixSparse<T> > h2o4gpu_data(0, me, wDev, Asource_);
+		h2o4gpu_data.SetnDev(1);
+		h2o4gpu_data.SetRho(1.0);
+		h2o4gpu_data.SetVerbose(verbose);
+		h2o4gpu_data.SetStopEarly(glmstopearly);
+		h2o4gpu_data.SetStopEarlyErrorFraction(stopearlyerrorfraction);
+		h2o4gpu_data.SetMaxIter(max_iterations);
+
+		int fi, a;
+		std::vector<T> X0(n), L0(mTrain), xlastsol(n);
+		int gotpreviousX0 = 0;
+		std::vector<T> weights(mTrain);
+		std::vector<T> weightsvalid(mValid, 1.0);
+		std::vector<T> trainPreds(mTrain), validPreds(mValid);
+		std::vector<FunctionObj<T> > f, g;
+		f.reserve(mTrain);
+		g.reserve(n);
+
+		std::vector<double> alphaarrayofa(nAlphas);
+		std::vector<double> lambdaarrayofa(nAlphas);
+		std::vector<double> tolarrayofa(nAlphas);
+		std::vector<std::vector<double> > errorarrayofa(NUMError, std::vector<double>(nAlphas));
+		for (int lambdatype = 0; lambdatype <= (realfolds > 1); lambdatype++) {
+			size_t nlambdalocal;
+
+			// Set Lambda
+			std::vector<T> lambdaslocal(nlambda);
+			if (lambdatype == LAMBDATYPEPATH) {
+				nlambdalocal = nlambda;
+				if (lambdas == NULL) {
+					// geometric series from lambda_max to lambda_min_ratio*lambda_max
+					if (nlambdalocal > 1) {
+						double dec = std::pow(lambda_min_ratio, 1.0 / (nlambdalocal - 1.));
+						lambdaslocal[0] = lambda_max;
+						for (int i = 1; i < nlambdalocal; ++i)
+							lambdaslocal[i] = lambdaslocal[i - 1] * dec;
+					} else {
+						lambdaslocal[0] = lambda_min_ratio * lambda_max;
+					}
+				} else {
+					for (int i = 0; i < nlambdalocal; ++i)
+						lambdaslocal[i] = lambdas[i];
+				}
+			} else {
+				nlambdalocal = 1;
+			}
+
+#pragma omp for schedule(dynamic,1) collapse(2)
+			for (fi = 0; fi < realfolds; ++fi) { //fold
+				for (a = 0; a < nAlphas; ++a) { //alpha search
+					T alpha;
+					if (alphas == NULL) {
+						if (nAlphas <= 1)
+							alpha = (alpha_min + alpha_max) * 0.5;
+						else
+							alpha = alpha_min + (alpha_max - alpha_min) * static_cast<T>(a) / static_cast<T>(nAlphas - 1);
+					} else {
+						alpha = alphas[a];
+					}
+					if (lambdatype == LAMBDATYPEONE)
+						lambdaslocal[0] = lambdaarrayofa[a];
+
+					// held-out rows of non-overlapping contiguous folds are down-weighted to (almost) nothing
+					for (size_t j = 0; j < mTrain; ++j) {
+						T foldon = 1;
+						if (heldOut(j, fi, realfolds, mTrain))
+							foldon = 1E-13;
+						weights[j] = foldon * trainW[j];
+					}
+
+					vector<double> scoring_history;
+					int gotX0 = 0;
+					double jump = DBL_MAX;
+					double norm = (mValid == 0 ? sdTrainY : sdValidY);
+					int skiplambdaamount = 0;
+					int i;
+					double trainError = -1;
+					double ivalidError = -1;
+					double validError = -1;
+					double tolnew = tol;
+					T lambda = -1;
+					double tbestalpha = -1, tbestlambda = -1, tbesttol =
+							std::numeric_limits<double>::max(),
+							tbesterror[NUMError];
+					ErrorLOOP(ri)
+						tbesterror[ri] = std::numeric_limits<double>::max();
+
+					for (i = 0; i < nlambdalocal; ++i) {
+						if (flag) {
+							continue;
+						}
+						lambda = lambdaslocal[i];
+
+						if (lambdatype == LAMBDATYPEPATH) {
+							if (i == 0) {
+								// start each alpha from the previous alpha's high-lambda solution
+								if (gotpreviousX0) {
+									h2o4gpu_data.SetInitX(&X0[0]);
+									h2o4gpu_data.SetInitLambda(&L0[0]);
+								} else {
+									h2o4gpu_data.ResetX();
+								}
+							}
+							// tighten the tolerance as the error drops below the response's standard deviation
+							tolnew = tol;
+							h2o4gpu_data.SetRelTol(tolnew);
+							h2o4gpu_data.SetAbsTol(1.0 * std::numeric_limits<T>::epsilon());
+							if (scoring_history.size() >= 1) {
+								double ratio = (norm - scoring_history.back()) / norm;
+								if (ratio > 0.0) {
+									double factor = 0.05; // rate factor (USER parameter)
+									double tollow = tolseekfactor * tol;
+									tolnew = tol * pow(2.0, -ratio / factor);
+									if (tolnew < tollow)
+										tolnew = tollow;
+									h2o4gpu_data.SetRelTol(tolnew);
+								}
+							}
+						} else { // single lambda, warm started from the path
+							tolnew = tolarrayofa[a];
+							h2o4gpu_data.SetRelTol(tolnew);
+							h2o4gpu_data.SetAbsTol(10.0 * std::numeric_limits<T>::epsilon());
+						}
+
+						// setup f,g as functions of alpha
+						f.clear();
+						g.clear();
+						if (family == 'e') {
+							for (unsigned int j = 0; j < mTrain; ++j) f.emplace_back(kSquare, 1.0, trainY[j], weights[j]);
+						} else if (family == 'l') {
+							for (unsigned int j = 0; j < mTrain; ++j) f.emplace_back(kLogistic, 1.0, 0.0, weights[j], -weights[j]*trainY[j]);
+						} else {
+							throw "Wrong family type selected. Should be either elasticnet or logistic";
+						}
+						for (unsigned int j = 0; j < n - intercept; ++j) g.emplace_back(kAbs);
+						if (intercept) g.emplace_back(kZero);
+						for (unsigned int j = 0; j < n - intercept; ++j) {
+							g[j].c = static_cast<T>(alpha * lambda); //for L1
+							g[j].e = static_cast<T>((1.0 - alpha) * lambda); //for L2
+						}
+						if (intercept) {
+							g[n - 1].c = 0;
+							g[n - 1].e = 0;
+						}
+						h2o4gpu_data.Solve(f, g);
+						memcpy(&xlastsol[0], &h2o4gpu_data.GetX()[0], n * sizeof(T));
+						T *xsol = &xlastsol[0];
+
+						int doskiplambda = 0;
+						if (lambdatype == LAMBDATYPEPATH) {
+							// a 0-iteration solve isn't worth the overhead, so skip ahead along the path
+							if (h2o4gpu_data.GetFinalIter() == 0) {
+								doskiplambda = 1;
+								skiplambdaamount++;
+							} else {
+								skiplambdaamount = 0;
+							}
+							int maxedout = (h2o4gpu_data.GetFinalIter() == h2o4gpu_data.GetMaxIter());
+							if (maxedout)
+								h2o4gpu_data.ResetX(); // don't start the next lambda from a bad solution
+							if (gotX0 == 0 && maxedout == 0) {
+								gotX0 = 1;
+								gotpreviousX0 = 1;
+								memcpy(&X0[0], xsol, n * sizeof(T));
+								memcpy(&L0[0], &h2o4gpu_data.GetLambda()[0], mTrain * sizeof(T));
+							}
+						}
+
+						size_t dof = 0;
+						for (size_t j = 0; j < n - intercept; ++j) {
+							if (std::abs(xsol[j]) > 1e-8)
+								dof++;
+						}
+
+						// Error: TRAIN (and on the held-out rows of this fold)
+						trainPreds.assign(&h2o4gpu_data.GettrainPreds()[0],
+										  &h2o4gpu_data.GettrainPreds()[0] + mTrain);
+						if (family == 'l') {
+							std::transform(trainPreds.begin(), trainPreds.end(), trainPreds.begin(),[](T i) -> T { return 1/(1+exp(-i)); });
+						}
+						trainError = h2o4gpu::getError(&weights[0], mTrain, &trainPreds[0], trainY, family);
+						if (realfolds > 1) {
+							const T offset = 1.0;
+							ivalidError = h2o4gpu::getError(offset, &weights[0], mTrain, &trainPreds[0], trainY, family);
+						} else {
+							ivalidError = -1.0;
+						}
+
+						// Error: VALID
+						validError = -1;
+						if (mValid > 0) {
+							sparsePredict(ord, mValid, n, validXdata, validXindices, validXindptr, xsol, &validPreds[0]);
+							if (family == 'l') {
+								std::transform(validPreds.begin(), validPreds.end(), validPreds.begin(),[](T i) -> T { return 1/(1+exp(-i)); });
+							}
+							validError = h2o4gpu::getError(&weightsvalid[0], mValid, &validPreds[0], validY, family);
+						}
+						if (verbose) {
+							std::cout << (family == 'l' ? "Logloss" : "RMSE") << " train = " << trainError
+									  << " CV = " << ivalidError << " valid = " << validError
+									  << " for lambda = " << lambda << " and alpha = " << alpha << std::endl;
+						}
+
+						T localerror[NUMError];
+						localerror[0] = trainError;
+						localerror[1] = ivalidError;
+						localerror[2] = validError;
+						if (tbesterror[iwhicherror] > localerror[iwhicherror]) {
+							tbestalpha = alpha;
+							tbestlambda = lambda;
+							tbesttol = tolnew;
+							ErrorLOOP(ri)
+								tbesterror[ri] = localerror[ri];
+						}
+						scoring_history.push_back(localerror[iwhicherror]);
+
+						if (lambdatype == LAMBDATYPEPATH) {
+							if (fi == 0 && givefullpath) { // only store first fold for user
+								memcpy(&((*Xvsalphalambda)[MAPXALL(i, a, 0)]), xsol, n * sizeof(T));
+								ErrorLOOP(ri)
+									(*Xvsalphalambda)[MAPXALL(i, a, n + ri)] = localerror[ri];
+								(*Xvsalphalambda)[MAPXALL(i, a, n+NUMError)] = lambda;
+								(*Xvsalphalambda)[MAPXALL(i, a, n+NUMError+1)] = alpha;
+								(*Xvsalphalambda)[MAPXALL(i, a, n+NUMError+2)] = tolnew;
+							}
+						} else { // only done if realfolds>1
+							memcpy(&((*Xvsalpha)[MAPXBEST(a, 0)]), xsol, n * sizeof(T));
+							ErrorLOOP(ri)
+								(*Xvsalpha)[MAPXBEST(a, n + ri)] = localerror[ri];
+							(*Xvsalpha)[MAPXBEST(a, n+NUMError)] = lambda;
+							(*Xvsalpha)[MAPXBEST(a, n+NUMError+1)] = alpha;
+							(*Xvsalpha)[MAPXBEST(a, n+NUMError+2)] = tolnew;
+						}
+
+						if (lambdatype == LAMBDATYPEPATH) {
+							if (lambdastopearly > 0 && scoring_history.size() >= 1) {
+								double ratio = (norm - scoring_history.back()) / norm;
+								double fracdof = 0.5; //USER parameter.
+								// only consider stopping once most degrees of freedom are explored
+								if (RELAXEARLYSTOP || ratio > 0.0 && (double) dof > fracdof * (double) (n)) {
+									int k = 3;
+									double tolerance = 0.0;
+									bool moreIsBetter = false;
+									if (stopEarly(scoring_history, k, tolerance, moreIsBetter,
+												  static_cast<bool>(VERBOSEENET), norm, &jump)) {
+										break;
+									}
+								}
+							}
+							if (doskiplambda) {
+								for (int ii = 0; ii < skiplambdaamount; ++ii) {
+									i++;
+									if (i >= nlambdalocal)
+										break; // don't skip beyond existing lambda
+								}
+							}
+						}
+					} // over lambda(s)
+
+					int pickfi = (lambdatype == LAMBDATYPEPATH ? fi : realfolds + fi);
+					alphaarray[pickfi][a] = tbestalpha;
+					lambdaarray[pickfi][a] = tbestlambda;
+					tolarray[pickfi][a] = tbesttol;
+					ErrorLOOP(ri)
+						errorarray[ri][pickfi][a] = tbesterror[ri];
+
+					// if not doing folds, store best solution over all lambdas
+					if (lambdatype == LAMBDATYPEPATH && nFolds < 2 && fi == 0) {
+						memcpy(&((*Xvsalpha)[MAPXBEST(a, 0)]), &xlastsol[0], n * sizeof(T)); // last lambda, as for dense input
+						ErrorLOOP(ri)
+							(*Xvsalpha)[MAPXBEST(a, n + ri)] = tbesterror[ri];
+						(*Xvsalpha)[MAPXBEST(a, n+NUMError)] = tbestlambda;
+						(*Xvsalpha)[MAPXBEST(a, n+NUMError+1)] = tbestalpha;
+						(*Xvsalpha)[MAPXBEST(a, n+NUMError+2)] = tbesttol;
+					}
+				} // over alpha
+			} // over folds
+
+#pragma omp barrier // alphaarray, lambdaarray, errorarray are filled and ready to be read by all threads
+			int fistart = (lambdatype == LAMBDATYPEPATH ? 0 : realfolds);
+			for (size_t a = 0; a < nAlphas; ++a) {
+				alphaarrayofa[a] = 0.0;
+				lambdaarrayofa[a] = 0.0;
+				tolarrayofa[a] = std::numeric_limits<double>::max();
+				ErrorLOOP(ri)
+					errorarrayofa[ri][a] = 0.0;
+				for (size_t fi = fistart; fi < fistart + realfolds; ++fi) {
+					alphaarrayofa[a] += alphaarray[fi][a];
+					lambdaarrayofa[a] += lambdaarray[fi][a];
+					tolarrayofa[a] = MIN(tolarrayofa[a], tolarray[fi][a]); // choose common min tolerance
+					ErrorLOOP(ri)
+						errorarrayofa[ri][a] += errorarray[ri][fi][a];
+				}
+				alphaarrayofa[a] /= ((double) (realfolds));
+				lambdaarrayofa[a] /= ((double) (realfolds));
+				ErrorLOOP(ri)
+					errorarrayofa[ri][a] /= ((double) (realfolds));
+			}
+		} // over lambdatype
+	} // end parallel region
+
+	double tf = timer<double>();
+	if (flag) {
+		fprintf(stderr, "Signal caught. Terminated early.\n");
+		fflush(stderr);
+		flag = 0; // set flag
+	}
+#ifdef _OPENMP
+	omp_set_num_threads(omt); // so the next fit's ThreadBudget sees the cores this one did
+#endif
 	return tf - t;
 }
 
 template double ElasticNetptr<double>(
 		const char family, int dopredict, int sourceDev,
-		int datatype, int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord,
+		int datatype, int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord,
 		size_t mTrain, size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max,
 		double *alphas, double *lambdas,
 		double tol,  double tolseekfactor,
-		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations,
-		int verbose, double *trainXptr, double *trainYptr, double *validXptr,
-		double *validYptr, double *weightptr, int givefullpath,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, double maxruntime,
+		int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, double *warmX, double *warmRho, int nTargets, double *targetY, double *targetValidY, double *trainXptr, double *trainYptr, double *validXptr,
+		double *validYptr, double *weightptr, int givefullpath, int givetelemetry, path_callback_double pathcallback, void *pathdata,
 		double **Xvsalphalambda, double **Xvsalpha,
 		double **validPredsvsalphalambda, double **validPredsvsalpha,
-		size_t *countfull, size_t *countshort, size_t *countmore);
+		size_t *countfull, size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry);
 
 template double ElasticNetptr<float>(const char family, int dopredict, int sourceDev, int datatype,
-		int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
+		int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
 		size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max,
 		float *alphas, float *lambdas,
 		double tol,  double tolseekfactor,
-		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations,
-		int verbose, float *trainXptr, float *trainYptr, float *validXptr,
-		float *validYptr, float *weightptr, int givefullpath,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, double maxruntime,
+		int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, float *warmX, float *warmRho, int nTargets, float *targetY, float *targetValidY, float *trainXptr, float *trainYptr, float *validXptr,
+		float *validYptr, float *weightptr, int givefullpath, int givetelemetry, path_callback_float pathcallback, void *pathdata,
 		float **Xvsalphalambda, float **Xvsalpha,
 		float **validPredsvsalphalambda, float **validPredsvsalpha,
-		size_t *countfull, size_t *countshort, size_t *countmore);
+		size_t *countfull, size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry);
 
 template double ElasticNetptr_fit<double>(const char family, int sourceDev, int datatype,
-		int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
+		int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
 		size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max,
 		double *alphas, double *lambdas,
 		double tol,  double tolseekfactor,
-		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations,
-		int verbose, double *trainXptr, double *trainYptr, double *validXptr,
-		double *validYptr, double *weightptr, int givefullpath,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, double maxruntime,
+		int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, double *warmX, double *warmRho, int nTargets, double *targetY, double *targetValidY, double *trainXptr, double *trainYptr, double *validXptr,
+		double *validYptr, double *weightptr, int givefullpath, int givetelemetry, path_callback_double pathcallback, void *pathdata,
 		double **Xvsalphalambda, double **Xvsalpha,
 		double **validPredsvsalphalambda, double **validPredsvsalpha,
-		size_t *countfull, size_t *countshort, size_t *countmore);
+		size_t *countfull, size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry);
 
 template double ElasticNetptr_fit<float>(const char family, int sourceDev, int datatype,
-		int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
+		int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
 		size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max,
 		float *alphas, float *lambdas,
 		double tol,  double tolseekfactor,
-		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations,
-		int verbose, float *trainXptr, float *trainYptr, float *validXptr,
-		float *validYptr, float *weightptr, int givefullpath,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, double maxruntime,
+		int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, float *warmX, float *warmRho, int nTargets, float *targetY, float *targetValidY, float *trainXptr, float *trainYptr, float *validXptr,
+		float *validYptr, float *weightptr, int givefullpath, int givetelemetry, path_callback_float pathcallback, void *pathdata,
 		float **Xvsalphalambda, float **Xvsalpha,
 		float **validPredsvsalphalambda, float **validPredsvsalpha,
-		size_t *countfull, size_t *countshort, size_t *countmore);
+		size_t *countfull, size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry);
 
 template double ElasticNetptr_predict<double>(const char family, int sourceDev, int datatype,
-		int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
+		int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
 		size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max,
 		double *alphas, double *lambdas,
 		double tol,  double tolseekfactor,
-		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations,
-		int verbose, double *trainXptr, double *trainYptr, double *validXptr,
-		double *validYptr, double *weightptr, int givefullpath,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, double maxruntime,
+		int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, double *warmX, double *warmRho, int nTargets, double *targetY, double *targetValidY, double *trainXptr, double *trainYptr, double *validXptr,
+		double *validYptr, double *weightptr, int givefullpath, int givetelemetry, path_callback_double pathcallback, void *pathdata,
 		double **Xvsalphalambda, double **Xvsalpha,
 		double **validPredsvsalphalambda, double **validPredsvsalpha,
-		size_t *countfull, size_t *countshort, size_t *countmore);
+		size_t *countfull, size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry);
 
 template double ElasticNetptr_predict<float>(const char family, int sourceDev, int datatype,
-		int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
+		int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
 		size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max,
 		float *alphas, float *lambdas,
 		double tol,  double tolseekfactor,
-		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations,
-		int verbose, float *trainXptr, float *trainYptr, float *validXptr,
-		float *validYptr, float *weightptr, int givefullpath,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, double maxruntime,
+		int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, float *warmX, float *warmRho, int nTargets, float *targetY, float *targetValidY, float *trainXptr, float *trainYptr, float *validXptr,
+		float *validYptr, float *weightptr, int givefullpath, int givetelemetry, path_callback_float pathcallback, void *pathdata,
 		float **Xvsalphalambda, float **Xvsalpha,
 		float **validPredsvsalphalambda, float **validPredsvsalpha,
+		size_t *countfull, size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry);
+
+template double ElasticNetSparseptr_fit<double>(const char family, int nThreads, int gpu_id, int nGPUs, int totalnGPUs,
+		const char ord, size_t mTrain, size_t n, size_t mValid, int intercept,
+		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
+		int nAlphas, double alpha_min, double alpha_max,
+		double *alphas, double *lambdas,
+		double tol, double tolseekfactor,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction,
+		int max_iterations, int verbose,
+		size_t trainnnz, double *trainXdata, int *trainXindices, int *trainXindptr, double *trainY,
+		size_t validnnz, double *validXdata, int *validXindices, int *validXindptr, double *validY,
+		double *weight, int givefullpath, double **Xvsalphalambda, double **Xvsalpha,
+		size_t *countfull, size_t *countshort, size_t *countmore);
+
+template double ElasticNetSparseptr_fit<float>(const char family, int nThreads, int gpu_id, int nGPUs, int totalnGPUs,
+		const char ord, size_t mTrain, size_t n, size_t mValid, int intercept,
+		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
+		int nAlphas, double alpha_min, double alpha_max,
+		float *alphas, float *lambdas,
+		double tol, double tolseekfactor,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction,
+		int max_iterations, int verbose,
+		size_t trainnnz, float *trainXdata, int *trainXindices, int *trainXindptr, float *trainY,
+		size_t validnnz, float *validXdata, int *validXindices, int *validXindptr, float *validY,
+		float *weight, int givefullpath, float **Xvsalphalambda, float **Xvsalpha,
 		size_t *countfull, size_t *countshort, size_t *countmore);
 
 template<typename T>
@@ -1818,52 +3607,103 @@ template int modelFree2<float>(float *aptr);
 template int modelFree2<double>(double *aptr);
 
 double elastic_net_ptr_double(const char family, int dopredict, int sourceDev, int datatype,
-		int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
+		int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
 		size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max,
 		double *alphas, double *lambdas,
 		double tol,  double tolseekfactor,
-		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations,
-		int verbose, double *trainXptr, double *trainYptr, double *validXptr,
-		double *validYptr, double *weightptr, int givefullpath,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, double maxruntime,
+		int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, double *warmX, double *warmRho, int nTargets, double *targetY, double *targetValidY, double *trainXptr, double *trainYptr, double *validXptr,
+		double *validYptr, double *weightptr, int givefullpath, int givetelemetry, path_callback_double pathcallback, void *pathdata,
 		double **Xvsalphalambda, double **Xvsalpha,
 		double **validPredsvsalphalambda, double **validPredsvsalpha,
-		size_t *countfull, size_t *countshort, size_t *countmore) {
+		size_t *countfull, size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry) {
 	return ElasticNetptr<double>(family, dopredict, sourceDev, datatype, sharedA,
-			nThreads, gpu_id, nGPUs, totalnGPUs, ord, mTrain, n, mValid, intercept, standardize,
+			nThreads, blasThreads, gpu_id, nGPUs, totalnGPUs, ord, mTrain, n, mValid, intercept, standardize,
 			lambda_max, lambda_min_ratio, nLambdas, nFolds,
 			nAlphas, alpha_min, alpha_max,
 			alphas, lambdas,
 			tol, tolseekfactor,
-			lambdastopearly, glmstopearly, stopearlyerrorfraction, max_iterations, verbose, trainXptr,
-			trainYptr, validXptr, validYptr, weightptr, givefullpath,
+			lambdastopearly, glmstopearly, stopearlyerrorfraction, max_iterations, maxruntime, verbose, screening, solver, lockstep, anderson_mem, lambdasearch, racemargin, warmstart, warmX, warmRho, nTargets, targetY, targetValidY, trainXptr,
+			trainYptr, validXptr, validYptr, weightptr, givefullpath, givetelemetry, pathcallback, pathdata,
 			Xvsalphalambda, Xvsalpha, validPredsvsalphalambda,
-			validPredsvsalpha, countfull, countshort, countmore);
+			validPredsvsalpha, countfull, countshort, countmore, timedout, telemetry, counttelemetry);
 }
 double elastic_net_ptr_float(const char family, int dopredict, int sourceDev, int datatype,
-		int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
+		int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
 		size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max,
 		float *alphas, float *lambdas,
 		double tol,  double tolseekfactor,
-		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations,
-		int verbose, float *trainXptr, float *trainYptr, float *validXptr,
-		float *validYptr, float *weightptr, int givefullpath,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction, int max_iterations, double maxruntime,
+		int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, float *warmX, float *warmRho, int nTargets, float *targetY, float *targetValidY, float *trainXptr, float *trainYptr, float *validXptr,
+		float *validYptr, float *weightptr, int givefullpath, int givetelemetry, path_callback_float pathcallback, void *pathdata,
 		float **Xvsalphalambda, float **Xvsalpha,
 		float **validPredsvsalphalambda, float **validPredsvsalpha,
-		size_t *countfull, size_t *countshort, size_t *countmore) {
+		size_t *countfull, size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry) {
 	return ElasticNetptr<float>(family, dopredict, sourceDev, datatype, sharedA,
-			nThreads, gpu_id, nGPUs, totalnGPUs, ord, mTrain, n, mValid, intercept, standardize,
+			nThreads, blasThreads, gpu_id, nGPUs, totalnGPUs, ord, mTrain, n, mValid, intercept, standardize,
 			lambda_max, lambda_min_ratio, nLambdas, nFolds,
 			nAlphas, alpha_min, alpha_max,
 			alphas, lambdas,
 			tol, tolseekfactor,
-			lambdastopearly, glmstopearly, stopearlyerrorfraction, max_iterations, verbose, trainXptr,
-			trainYptr, validXptr, validYptr, weightptr, givefullpath,
+			lambdastopearly, glmstopearly, stopearlyerrorfraction, max_iterations, maxruntime, verbose, screening, solver, lockstep, anderson_mem, lambdasearch, racemargin, warmstart, warmX, warmRho, nTargets, targetY, targetValidY, trainXptr,
+			trainYptr, validXptr, validYptr, weightptr, givefullpath, givetelemetry, pathcallback, pathdata,
 			Xvsalphalambda, Xvsalpha, validPredsvsalphalambda,
-			validPredsvsalpha, countfull, countshort, countmore);
+			validPredsvsalpha, countfull, countshort, countmore, timedout, telemetry, counttelemetry);
+}
+
+double elastic_net_sparse_ptr_double(const char family, int nThreads, int gpu_id, int nGPUs, int totalnGPUs,
+		const char ord, size_t mTrain, size_t n, size_t mValid, int intercept,
+		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
+		int nAlphas, double alpha_min, double alpha_max,
+		double *alphas, double *lambdas,
+		double tol, double tolseekfactor,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction,
+		int max_iterations, int verbose,
+		size_t trainnnz, double *trainXdata, int *trainXindices, int *trainXindptr, double *trainY,
+		size_t validnnz, double *validXdata, int *validXindices, int *validXindptr, double *validY,
+		double *weight, int givefullpath, double **Xvsalphalambda, double **Xvsalpha,
+		size_t *countfull, size_t *countshort, size_t *countmore) {
+	return ElasticNetSparseptr_fit<double>(family, nThreads, gpu_id, nGPUs, totalnGPUs,
+			ord, mTrain, n, mValid, intercept,
+			lambda_max, lambda_min_ratio, nLambdas, nFolds,
+			nAlphas, alpha_min, alpha_max,
+			alphas, lambdas,
+			tol, tolseekfactor,
+			lambdastopearly, glmstopearly, stopearlyerrorfraction, max_iterations, verbose,
+			trainnnz, trainXdata, trainXindices, trainXindptr, trainY,
+			validnnz, validXdata, validXindices, validXindptr, validY,
+			weight, givefullpath, Xvsalphalambda, Xvsalpha,
+			countfull, countshort, countmore);
+}
+double elastic_net_sparse_ptr_float(const char family, int nThreads, int gpu_id, int nGPUs, int totalnGPUs,
+		const char ord, size_t mTrain, size_t n, size_t mValid, int intercept,
+		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
+		int nAlphas, double alpha_min, double alpha_max,
+		float *alphas, float *lambdas,
+		double tol, double tolseekfactor,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction,
+		int max_iterations, int verbose,
+		size_t trainnnz, float *trainXdata, int *trainXindices, int *trainXindptr, float *trainY,
+		size_t validnnz, float *validXdata, int *validXindices, int *validXindptr, float *validY,
+		float *weight, int givefullpath, float **Xvsalphalambda, float **Xvsalpha,
+		size_t *countfull, size_t *countshort, size_t *countmore) {
+	return ElasticNetSparseptr_fit<float>(family, nThreads, gpu_id, nGPUs, totalnGPUs,
+			ord, mTrain, n, mValid, intercept,
+			lambda_max, lambda_min_ratio, nLambdas, nFolds,
+			nAlphas, alpha_min, alpha_max,
+			alphas, lambdas,
+			tol, tolseekfactor,
+			lambdastopearly, glmstopearly, stopearlyerrorfraction, max_iterations, verbose,
+			trainnnz, trainXdata, trainXindices, trainXindptr, trainY,
+			validnnz, validXdata, validXindices, validXindptr, validY,
+			weight, givefullpath, Xvsalphalambda, Xvsalpha,
+			countfull, countshort, countmore);
 }
 
 
@@ -12,6 +12,7 @@
 #include <random>
 
 #include "matrix/matrix_dense.h"
+#include "matrix/matrix_sparse.h"
 #include "solver/glm.h"
 #include "timer.h"
 #include <omp.h>
@@ -270,6 +271,17 @@ int topkwrap(int whichmax, mysize_t n, mysize_t k, T arr[], mysize_t *whichbeta,
 	return (0);
 }
 
+// Streams the lambda path: with pathcallback set, every solution of the path
+// (every fold, alpha and lambda, also with givefullpath=0) is handed to
+// pathcallback(pathdata, fold, alpha index, lambda index, x, n, more, nmore)
+// as soon as it is found, from whichever thread found it.  more holds the
+// NUMError errors, lambda, alpha and tolerance as stored in Xvsalphalambda.
+// x and more are only valid during the call.
+typedef void (*path_callback_double)(void *data, int fold, int a, int i,
+		const double *x, size_t n, const double *more, size_t nmore);
+typedef void (*path_callback_float)(void *data, int fold, int a, int i,
+		const float *x, size_t n, const float *more, size_t nmore);
+
 // Elastic Net
 //   minimize    (1/2) ||Ax - b||_2^2 + \lambda \alpha ||x||_1 + \lambda 1-\alpha ||x||_2
 //
@@ -279,67 +291,117 @@ int topkwrap(int whichmax, mysize_t n, mysize_t k, T arr[], mysize_t *whichbeta,
 
 template<typename T>
 double ElasticNetptr(const char family, int dopredict, int sourceDev,
-		int datatype, int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord,
+		int datatype, int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord,
 		size_t mTrain, size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max, T *alphas, T *lambdas,
 		double tol, double tolseekfactor, int lambdastopearly, int glmstopearly,
-		double glmstopearlyerrorfraction, int max_iterations, int verbose,
+		double glmstopearlyerrorfraction, int max_iterations, double maxruntime, int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, T *warmX, T *warmRho, int nTargets, T *targetY, T *targetValidY,
 		T *trainXptr, T *trainYptr, T *validXptr, T *validYptr,
-		T *weightptr, int givefullpath, T **Xvsalphalambda, T **Xvsalpha,
+		T *weightptr, int givefullpath, int givetelemetry,
+		void (*pathcallback)(void *, int, int, int, const T *, size_t, const T *, size_t),
+		void *pathdata, T **Xvsalphalambda, T **Xvsalpha,
 		T **validPredsvsalphalambda, T **validPredsvsalpha, size_t *countfull,
-		size_t *countshort, size_t *countmore);
+		size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry);
 template<typename T>
 double ElasticNetptr_fit(const char family, int sourceDev, int datatype,
-		int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
+		int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
 		size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max, T *alphas, T *lambdas,
 		double tol, double tolseekfactor, int lambdastopearly, int glmstopearly,
-		double glmstopearlyerrorfraction, int max_iterations, int verbose,
+		double glmstopearlyerrorfraction, int max_iterations, double maxruntime, int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, T *warmX, T *warmRho, int nTargets, T *targetY, T *targetValidY,
 		T *trainXptr, T *trainYptr, T *validXptr, T *validYptr,
-		T *weightptr, int givefullpath, T **Xvsalphalambda, T **Xvsalpha,
+		T *weightptr, int givefullpath, int givetelemetry,
+		void (*pathcallback)(void *, int, int, int, const T *, size_t, const T *, size_t),
+		void *pathdata, T **Xvsalphalambda, T **Xvsalpha,
 		T **validPredsvsalphalambda, T **validPredsvsalpha, size_t *countfull,
-		size_t *countshort, size_t *countmore);
+		size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry);
 template<typename T>
 double ElasticNetptr_predict(const char family, int sourceDev, int datatype,
-		int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
+		int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord, size_t mTrain,
 		size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max, T *alphas, T *lambdas,
 		double tol, double tolseekfactor, int lambdastopearly, int glmstopearly,
-		double glmstopearlyerrorfraction, int max_iterations, int verbose,
+		double glmstopearlyerrorfraction, int max_iterations, double maxruntime, int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, T *warmX, T *warmRho, int nTargets, T *targetY, T *targetValidY,
 		T *trainXptr, T *trainYptr, T *validXptr, T *validYptr,
-		T *weightptr, int givefullpath, T **Xvsalphalambda, T **Xvsalpha,
+		T *weightptr, int givefullpath, int givetelemetry,
+		void (*pathcallback)(void *, int, int, int, const T *, size_t, const T *, size_t),
+		void *pathdata, T **Xvsalphalambda, T **Xvsalpha,
 		T **validPredsvsalphalambda, T **validPredsvsalpha, size_t *countfull,
-		size_t *countshort, size_t *countmore);
+		size_t *countshort, size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry);
+template<typename T>
+double ElasticNetSparseptr_fit(const char family, int nThreads, int gpu_id, int nGPUs, int totalnGPUs,
+		const char ord, size_t mTrain, size_t n, size_t mValid, int intercept,
+		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
+		int nAlphas, double alpha_min, double alpha_max,
+		T *alphas, T *lambdas,
+		double tol, double tolseekfactor,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction,
+		int max_iterations, int verbose,
+		size_t trainnnz, T *trainXdata, int *trainXindices, int *trainXindptr, T *trainY,
+		size_t validnnz, T *validXdata, int *validXindices, int *validXindptr, T *validY,
+		T *weight, int givefullpath, T **Xvsalphalambda, T **Xvsalpha,
+		size_t *countfull, size_t *countshort, size_t *countmore);
 
 template<typename T>
 int modelFree2(T *aptr);
 
 double elastic_net_ptr_double(const char family, int dopredict, int sourceDev,
-		int datatype, int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord,
+		int datatype, int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord,
 		size_t mTrain, size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max, double *alphas,
 		double *lambdas, double tol, double tolseekfactor, int lambdastopearly, int glmstopearly,
-		double glmstopearlyerrorfraction, int max_iterations, int verbose,
+		double glmstopearlyerrorfraction, int max_iterations, double maxruntime, int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, double *warmX, double *warmRho, int nTargets, double *targetY, double *targetValidY,
 		double *trainXptr, double *trainYptr, double *validXptr, double *validYptr,
-		double *weightptr, int givefullpath, double **Xvsalphalambda,
+		double *weightptr, int givefullpath, int givetelemetry, path_callback_double pathcallback,
+		void *pathdata, double **Xvsalphalambda,
 		double **Xvsalpha, double **validPredsvsalphalambda,
 		double **validPredsvsalpha, size_t *countfull, size_t *countshort,
-		size_t *countmore);
+		size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry);
 double elastic_net_ptr_float(const char family, int dopredict, int sourceDev,
-		int datatype, int sharedA, int nThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord,
+		int datatype, int sharedA, int nThreads, int blasThreads, int gpu_id, int nGPUs, int totalnGPUs, const char ord,
 		size_t mTrain, size_t n, size_t mValid, int intercept, int standardize,
 		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
 		int nAlphas, double alpha_min, double alpha_max, float *alphas,
 		float *lambdas, double tol, double tolseekfactor, int lambdastopearly, int glmstopearly,
-		double glmstopearlyerrorfraction, int max_iterations, int verbose,
+		double glmstopearlyerrorfraction, int max_iterations, double maxruntime, int verbose, int screening, int solver, int lockstep, int anderson_mem, int lambdasearch, double racemargin, int warmstart, float *warmX, float *warmRho, int nTargets, float *targetY, float *targetValidY,
 		float *trainXptr, float *trainYptr, float *validXptr, float *validYptr,
-		float *weightptr, int givefullpath, float **Xvsalphalambda,
+		float *weightptr, int givefullpath, int givetelemetry, path_callback_float pathcallback,
+		void *pathdata, float **Xvsalphalambda,
 		float **Xvsalpha, float **validPredsvsalphalambda,
 		float **validPredsvsalpha, size_t *countfull, size_t *countshort,
-		size_t *countmore);
+		size_t *countmore, int *timedout,
+		double **telemetry, size_t *counttelemetry);
+double elastic_net_sparse_ptr_double(const char family, int nThreads, int gpu_id, int nGPUs, int totalnGPUs,
+		const char ord, size_t mTrain, size_t n, size_t mValid, int intercept,
+		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
+		int nAlphas, double alpha_min, double alpha_max,
+		double *alphas, double *lambdas,
+		double tol, double tolseekfactor,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction,
+		int max_iterations, int verbose,
+		size_t trainnnz, double *trainXdata, int *trainXindices, int *trainXindptr, double *trainY,
+		size_t validnnz, double *validXdata, int *validXindices, int *validXindptr, double *validY,
+		double *weight, int givefullpath, double **Xvsalphalambda, double **Xvsalpha,
+		size_t *countfull, size_t *countshort, size_t *countmore);
+double elastic_net_sparse_ptr_float(const char family, int nThreads, int gpu_id, int nGPUs, int totalnGPUs,
+		const char ord, size_t mTrain, size_t n, size_t mValid, int intercept,
+		double lambda_max, double lambda_min_ratio, int nLambdas, int nFolds,
+		int nAlphas, double alpha_min, double alpha_max,
+		float *alphas, float *lambdas,
+		double tol, double tolseekfactor,
+		int lambdastopearly, int glmstopearly, double stopearlyerrorfraction,
+		int max_iterations, int verbose,
+		size_t trainnnz, float *trainXdata, int *trainXindices, int *trainXindptr, float *trainY,
+		size_t validnnz, float *validXdata, int *validXindices, int *validXindptr, float *validY,
+		float *weight, int givefullpath, float **Xvsalphalambda, float **Xvsalpha,
+		size_t *countfull, size_t *countshort, size_t *countmore);
 
 }
@@ -0,0 +1,768 @@
+/*!
+ * Copyright 2017-2018 H2O.ai, Inc.
+ * License   Apache License Version 2.0 (see LICENSE for details)
+ */
+#include <algorithm>
+#include <cmath>
+#include <cstring>
+#include <limits>
+
+#include "gsl/gsl_linalg.h"
+#include "glm_cd.h"
+
+namespace h2o4gpu {
+
+namespace {
+
+template<typename T>
+T SoftThreshold(T u, T l) {
+	if (u > l)
+		return u - l;
+	if (u < -l)
+		return u + l;
+	return static_cast<T>(0);
+}
+
+// C += A^T A for the k x n column-major A (upper triangle of C)
+void SyrkUpper(size_t n, size_t k, const double *A, size_t lda, double *C) {
+	cblas_dsyrk(CblasColMajor, CblasUpper, CblasTrans, static_cast<int>(n),
+			static_cast<int>(k), 1.0, A, static_cast<int>(lda), 1.0, C,
+			static_cast<int>(n));
+}
+
+void SyrkUpper(size_t n, size_t k, const float *A, size_t lda, float *C) {
+	cblas_ssyrk(CblasColMajor, CblasUpper, CblasTrans, static_cast<int>(n),
+			static_cast<int>(k), 1.0f, A, static_cast<int>(lda), 1.0f, C,
+			static_cast<int>(n));
+}
+
+// Eigendecomposition of the symmetric n x n V (row-major, overwritten by
+// the eigenvectors as columns, eigenvalues into d): Householder
+// tridiagonalization and implicit QL, as in EISPACK's tred2 and tql2.
+void SymmetricEigen(size_t n, double *V, double *d) {
+	std::vector<double> e(n);
+	for (size_t j = 0; j < n; ++j)
+		d[j] = V[(n - 1) * n + j];
+	for (size_t i = n - 1; i > 0; --i) {
+		double scale = 0, h = 0;
+		for (size_t k = 0; k < i; ++k)
+			scale += std::abs(d[k]);
+		if (scale == 0) {
+			e[i] = d[i - 1];
+			for (size_t j = 0; j < i; ++j) {
+				d[j] = V[(i - 1) * n + j];
+				V[i * n + j] = 0;
+				V[j * n + i] = 0;
+			}
+		} else {
+			for (size_t k = 0; k < i; ++k) {
+				d[k] /= scale;
+				h += d[k] * d[k];
+			}
+			double f = d[i - 1];
+			double g = std::sqrt(h);
+			if (f > 0)
+				g = -g;
+			e[i] = scale * g;
+			h -= f * g;
+			d[i - 1] = f - g;
+			for (size_t j = 0; j < i; ++j)
+				e[j] = 0;
+			for (size_t j = 0; j < i; ++j) {
+				f = d[j];
+				V[j * n + i] = f;
+				g = e[j] + V[j * n + j] * f;
+				for (size_t k = j + 1; k < i; ++k) {
+					g += V[k * n + j] * d[k];
+					e[k] += V[k * n + j] * f;
+				}
+				e[j] = g;
+			}
+			f = 0;
+			for (size_t j = 0; j < i; ++j) {
+				e[j] /= h;
+				f += e[j] * d[j];
+			}
+			double hh = f / (h + h);
+			for (size_t j = 0; j < i; ++j)
+				e[j] -= hh * d[j];
+			for (size_t j = 0; j < i; ++j) {
+				f = d[j];
+				g = e[j];
+				for (size_t k = j; k < i; ++k)
+					V[k * n + j] -= (f * e[k] + g * d[k]);
+				d[j] = V[(i - 1) * n + j];
+				V[i * n + j] = 0;
+			}
+		}
+		d[i] = h;
+	}
+	// accumulate the transformations
+	for (size_t i = 0; i + 1 < n; ++i) {
+		V[(n - 1) * n + i] = V[i * n + i];
+		V[i * n + i] = 1;
+		double h = d[i + 1];
+		if (h != 0) {
+			for (size_t k = 0; k <= i; ++k)
+				d[k] = V[k * n + i + 1] / h;
+			for (size_t j = 0; j <= i; ++j) {
+				double g = 0;
+				for (size_t k = 0; k <= i; ++k)
+					g += V[k * n + i + 1] * V[k * n + j];
+				for (size_t k = 0; k <= i; ++k)
+					V[k * n + j] -= g * d[k];
+			}
+		}
+		for (size_t k = 0; k <= i; ++k)
+			V[k * n + i + 1] = 0;
+	}
+	for (size_t j = 0; j < n; ++j) {
+		d[j] = V[(n - 1) * n + j];
+		V[(n - 1) * n + j] = 0;
+	}
+	V[(n - 1) * n + n - 1] = 1;
+	e[0] = 0;
+
+	// implicit QL on the tridiagonal d, e
+	for (size_t i = 1; i < n; ++i)
+		e[i - 1] = e[i];
+	e[n - 1] = 0;
+	double f = 0, tst1 = 0;
+	const double eps = std::numeric_limits<double>::epsilon();
+	for (size_t l = 0; l < n; ++l) {
+		tst1 = std::max(tst1, std::abs(d[l]) + std::abs(e[l]));
+		size_t m = l;
+		while (m < n - 1 && std::abs(e[m]) > eps * tst1)
+			++m;
+		if (m > l) {
+			do {
+				double g = d[l];
+				double p = (d[l + 1] - g) / (2 * e[l]);
+				double r = std::hypot(p, 1.0);
+				if (p < 0)
+					r = -r;
+				d[l] = e[l] / (p + r);
+				d[l + 1] = e[l] * (p + r);
+				double dl1 = d[l + 1];
+				double h = g - d[l];
+				for (size_t i = l + 2; i < n; ++i)
+					d[i] -= h;
+				f += h;
+				p = d[m];
+				double c = 1, c2 = 1, c3 = 1, el1 = e[l + 1], s = 0, s2 = 0;
+				for (size_t ii = m; ii > l; --ii) {
+					size_t i = ii - 1;
+					c3 = c2;
+					c2 = c;
+					s2 = s;
+					g = c * e[i];
+					h = c * p;
+					r = std::hypot(p, e[i]);
+					e[i + 1] = s * r;
+					s = e[i] / r;
+					c = p / r;
+					p = c * d[i] - s * g;
+					d[i + 1] = h + s * (c * g + s * d[i]);
+					for (size_t k = 0; k < n; ++k) {
+						h = V[k * n + i + 1];
+						V[k * n + i + 1] = s * V[k * n + i] + c * h;
+						V[k * n + i] = c * V[k * n + i] - s * h;
+					}
+				}
+				p = -s * s2 * c3 * el1 * e[l] / dl1;
+				e[l] = s * p;
+				d[l] = c * p;
+			} while (std::abs(e[l]) > eps * tst1);
+		}
+		d[l] += f;
+		e[l] = 0;
+	}
+}
+
+}  // namespace
+
+template<typename T>
+GLMCD<T>::GLMCD(char family, char ord, size_t m, size_t n, size_t mvalid,
+		const T *X, const T *y, const T *w, const T *validX, int intercept,
+		bool covariance, bool direct, int nclass) :
+		_family(family), _m(m), _n(n), _mvalid(mvalid),
+		_nclass(family == 'm' ? std::max(nclass, 1) : 1), _intercept(intercept),
+		_covariance(covariance && family == 'e'), _X(X), _y(y), _w(w, w + m),
+		_ord(ord), _validX(validX), _x(n), _trainPreds(m * _nclass),
+		_validPreds(mvalid * _nclass), _lambda(m * _nclass), _xv(n),
+		_state_ok(false), _nulldev(0), _rel_tol(static_cast<T>(kRelTol)),
+		_max_iter(kMaxIter), _final_iter(0), _deadline(0), _direct(direct && family == 'e'),
+		_dybar(0), _dsolves(0) {
+	// coordinate updates read whole columns, so keep the training data column-major
+	if (ord == 'r' || ord == 'R') {
+		_Xcol.resize(m * n);
+		for (size_t i = 0; i < m; ++i)
+			for (size_t j = 0; j < n; ++j)
+				_Xcol[j * m + i] = X[i * n + j];
+		_X = &_Xcol[0];
+	}
+	if (_covariance) {
+		_grad.resize(n);
+		_gram.resize(n);
+	} else {
+		_r.resize(m);
+	}
+
+	SetY(y);
+
+	if (family == 'm')
+		_xall.resize(n * _nclass);
+	if (intercept)
+		_xm.resize(n);
+	if (family == 'e')
+		_ColNorms(&_w[0]);
+}
+
+template<typename T>
+void GLMCD<T>::SetY(const T *y) {
+	_y = y;
+	// convergence is judged against the weighted total sum of squares about the null model
+	// (summed over the classes' indicators of a multinomial fit)
+	T sumw = 0;
+	for (size_t i = 0; i < _m; ++i)
+		sumw += _w[i];
+	_nulldev = 0;
+	for (size_t c = 0; c < _nclass; ++c) {
+		const T *yc = &y[c * _m];
+		T sumwy = 0;
+		for (size_t i = 0; i < _m; ++i)
+			sumwy += _w[i] * yc[i];
+		T ybar = (_intercept && sumw > 0 ? sumwy / sumw : 0);
+		for (size_t i = 0; i < _m; ++i)
+			_nulldev += _w[i] * (yc[i] - ybar) * (yc[i] - ybar);
+	}
+	if (_nulldev <= 0)
+		_nulldev = (sumw > 0 ? sumw : 1);
+	_state_ok = false;
+	_dxty.clear();
+}
+
+// Weighted squared norm of each column under row weights ww, about the
+// weighted column mean (the updates center the columns) when there is an intercept
+template<typename T>
+void GLMCD<T>::_ColNorms(const T *ww) {
+	T sumw = 0;
+	if (!_xm.empty()) {
+		for (size_t i = 0; i < _m; ++i)
+			sumw += ww[i];
+	}
+	for (size_t j = 0; j < _n; ++j) {
+		const T *xj = &_X[j * _m];
+		T xm = 0;
+		if (!_xm.empty() && j != _n - 1 && sumw > 0) {
+			for (size_t i = 0; i < _m; ++i)
+				xm += ww[i] * xj[i];
+			xm /= sumw;
+			_xm[j] = xm;
+		}
+		T xv = 0;
+		for (size_t i = 0; i < _m; ++i)
+			xv += ww[i] * (xj[i] - xm) * (xj[i] - xm);
+		_xv[j] = xv;
+	}
+}
+
+template<typename T>
+void GLMCD<T>::SetInitX(const T *x) {
+	if (_family == 'm')
+		memcpy(&_xall[0], x, _n * _nclass * sizeof(T));
+	else
+		memcpy(&_x[0], x, _n * sizeof(T));
+	_state_ok = false;
+}
+
+template<typename T>
+void GLMCD<T>::SetInitClassX(size_t k, const T *x) {
+	memcpy(&_xall[k * _n], x, _n * sizeof(T));
+	_state_ok = false;
+}
+
+template<typename T>
+void GLMCD<T>::ResetX(void) {
+	std::fill(_x.begin(), _x.end(), static_cast<T>(0));
+	std::fill(_xall.begin(), _xall.end(), static_cast<T>(0));
+	_state_ok = false;
+}
+
+template<typename T>
+void GLMCD<T>::SetPenaltyFactor(const T *pf) {
+	_pf.assign(pf, pf + _n);
+	// the direct solve works in coordinates scaled by the penalty factors
+	_dgram.clear();
+	_dxty.clear();
+	_deigval.clear();
+	_dsolves = 0;
+}
+
+// Linear predictor X x of the training rows
+template<typename T>
+void GLMCD<T>::_Predict(const T *x, T *preds) const {
+	std::fill(preds, preds + _m, static_cast<T>(0));
+	for (size_t j = 0; j < _n; ++j) {
+		if (x[j] == 0)
+			continue;
+		const T *xj = &_X[j * _m];
+		for (size_t i = 0; i < _m; ++i)
+			preds[i] += xj[i] * x[j];
+	}
+}
+
+// Linear predictor (every class's) and the residual (naive) or gradient (covariance) for the current x
+template<typename T>
+void GLMCD<T>::_Prepare() {
+	if (_family == 'm') {
+		for (size_t c = 0; c < _nclass; ++c)
+			_Predict(&_xall[c * _n], &_trainPreds[c * _m]);
+	} else {
+		_Predict(&_x[0], &_trainPreds[0]);
+	}
+	if (_family == 'e') {
+		if (_covariance) {
+			for (size_t j = 0; j < _n; ++j) {
+				const T *xj = &_X[j * _m];
+				T g = 0;
+				for (size_t i = 0; i < _m; ++i)
+					g += _w[i] * xj[i] * (_y[i] - _trainPreds[i]);
+				_grad[j] = g;
+			}
+		} else {
+			for (size_t i = 0; i < _m; ++i)
+				_r[i] = _y[i] - _trainPreds[i];
+		}
+	}
+	_state_ok = true;
+}
+
+// Gram column j, sum_i w_i x_ik x_ij for all k, computed the first time x_j moves
+template<typename T>
+const std::vector<T> &GLMCD<T>::_Gram(size_t j) {
+	std::vector<T> &G = _gram[j];
+	if (G.empty()) {
+		G.resize(_n);
+		const T *xj = &_X[j * _m];
+		for (size_t k = 0; k < _n; ++k) {
+			const T *xk = &_X[k * _m];
+			T s = 0;
+			for (size_t i = 0; i < _m; ++i)
+				s += _w[i] * xk[i] * xj[i];
+			G[k] = s;
+		}
+	}
+	return G;
+}
+
+// One pass of coordinate updates over all columns or the active set, with
+// row weights ww; returns the largest weighted squared change in a coefficient
+template<typename T>
+T GLMCD<T>::_Pass(bool all, T l1, T l2, const T *ww) {
+	T dlx = 0;
+	// centered updates need the weighted residual sum (the intercept's gradient),
+	// which only intercept updates change
+	bool center = !_xm.empty();
+	T sumwr = 0;
+	if (center && !_covariance) {
+		for (size_t i = 0; i < _m; ++i)
+			sumwr += ww[i] * _r[i];
+	}
+	size_t count = (all ? _n : _active.size());
+	for (size_t k = 0; k < count; ++k) {
+		size_t j = (all ? k : _active[k]);
+		if (_xv[j] <= 0)
+			continue; // all-zero column never enters
+		const T *xj = &_X[j * _m];
+		bool penalized = !(_intercept && j == _n - 1);
+		T g;
+		if (_covariance) {
+			g = _grad[j];
+			if (center && penalized)
+				g -= _xm[j] * _grad[_n - 1];
+		} else {
+			g = 0;
+			for (size_t i = 0; i < _m; ++i)
+				g += ww[i] * xj[i] * _r[i];
+			if (center && penalized)
+				g -= _xm[j] * sumwr;
+		}
+		T pf = (_pf.empty() ? static_cast<T>(1) : _pf[j]);
+		T xnew = SoftThreshold(g + _xv[j] * _x[j], penalized ? l1 * pf : 0)
+				/ (_xv[j] + (penalized ? l2 * pf * pf : 0));
+		T d = xnew - _x[j];
+		if (d == 0)
+			continue;
+		_x[j] = xnew;
+		if (_covariance && center && penalized) {
+			const std::vector<T> &G = _Gram(j);
+			const std::vector<T> &Gi = _Gram(_n - 1);
+			T xm = _xm[j];
+			for (size_t kk = 0; kk < _n; ++kk)
+				_grad[kk] -= d * (G[kk] - xm * Gi[kk]);
+			_x[_n - 1] -= d * xm;
+		} else if (_covariance) {
+			const std::vector<T> &G = _Gram(j);
+			for (size_t kk = 0; kk < _n; ++kk)
+				_grad[kk] -= d * G[kk];
+		} else if (center && penalized) {
+			// moving the intercept by -mean*d leaves the weighted residual sum unchanged
+			T xm = _xm[j];
+			for (size_t i = 0; i < _m; ++i)
+				_r[i] -= d * (xj[i] - xm);
+			_x[_n - 1] -= d * xm;
+		} else {
+			for (size_t i = 0; i < _m; ++i)
+				_r[i] -= d * xj[i];
+			if (center)
+				sumwr -= d * _xv[j];
+		}
+		dlx = std::max(dlx, _xv[j] * d * d);
+	}
+	return dlx;
+}
+
+// Full pass, then cycle the active set until converged, until a full pass
+// changes nothing by more than thr or the deadline passes.  Returns whether
+// it converged.
+template<typename T>
+bool GLMCD<T>::_Cycle(T l1, T l2, const T *ww, T thr,
+		unsigned int maxpasses, unsigned int *passes, T *dlxfirst) {
+	*passes = 0;
+	*dlxfirst = 0;
+	while (*passes < maxpasses && !_TimeUp()) {
+		T dlx = _Pass(true, l1, l2, ww);
+		if (*passes == 0)
+			*dlxfirst = dlx;
+		(*passes)++;
+		if (dlx < thr)
+			return true;
+		_active.clear();
+		for (size_t j = 0; j < _n; ++j) {
+			if (_x[j] != 0)
+				_active.push_back(j);
+		}
+		while (*passes < maxpasses && !_TimeUp()) {
+			dlx = _Pass(false, l1, l2, ww);
+			(*passes)++;
+			if (dlx < thr)
+				break;
+		}
+	}
+	return false;
+}
+
+template<typename T>
+H2O4GPUStatus GLMCD<T>::Solve(T alpha, T lambda) {
+	if (_direct && alpha == 0) {
+		_DirectSolve(lambda);
+		_final_iter = 1;
+		_Finish();
+		_state_ok = false; // the CD state (residual or gradient) wasn't kept up
+		return H2O4GPU_SUCCESS;
+	}
+	T l1 = alpha * lambda;
+	T l2 = (1 - alpha) * lambda;
+	// changes are in squared (deviance) units, so square the relative tolerance
+	T thr = _rel_tol * _rel_tol * _nulldev;
+	if (!_state_ok)
+		_Prepare();
+
+	unsigned int passes = 0;
+	bool converged = false;
+	if (_family == 'e') {
+		T dlx;
+		converged = _Cycle(l1, l2, &_w[0], thr, _max_iter, &passes, &dlx);
+	} else if (_family == 'm') {
+		converged = _MultinomialCycle(l1, l2, thr, &passes);
+	} else {
+		// IRLS: weighted least squares about the working response z = eta + (y-p)/(p(1-p))
+		const T pmin = static_cast<T>(1e-5);
+		std::vector<T> ww(_m), z(_m);
+		_r.resize(_m);
+		while (passes < _max_iter && !_TimeUp()) {
+			for (size_t i = 0; i < _m; ++i) {
+				T p = 1 / (1 + std::exp(-_trainPreds[i]));
+				p = std::min(std::max(p, pmin), 1 - pmin);
+				T v = p * (1 - p);
+				ww[i] = _w[i] * v;
+				_r[i] = (_y[i] - p) / v;
+				z[i] = _trainPreds[i] + _r[i];
+			}
+			_ColNorms(&ww[0]);
+			unsigned int inner;
+			T dlx;
+			bool innerconverged = _Cycle(l1, l2, &ww[0], thr,
+					_max_iter - passes, &inner, &dlx);
+			passes += inner;
+			for (size_t i = 0; i < _m; ++i)
+				_trainPreds[i] = z[i] - _r[i];
+			if (dlx < thr) { // quadratic approximation didn't move x
+				converged = innerconverged;
+				break;
+			}
+		}
+	}
+	// the pass (multinomial: one per class) confirming convergence doesn't count, so an already-solved
+	// problem takes 0 iterations; stopped by the deadline, the passes made so far (so the caller
+	// keeps the partial solution rather than taking it as maxed out)
+	bool timeup = !converged && _TimeUp();
+	_final_iter = (converged ? passes - _nclass : timeup ? std::min(passes, _max_iter - 1) : _max_iter);
+	_Finish();
+	return converged ? H2O4GPU_SUCCESS : timeup ? H2O4GPU_TIME_LIMIT : H2O4GPU_MAX_ITER;
+}
+
+// Sweeps over the classes of a multinomial fit, each an IRLS step of its logistic regression with
+// the other classes as an offset, until a sweep moves no class.  Returns whether it converged.
+template<typename T>
+bool GLMCD<T>::_MultinomialCycle(T l1, T l2, T thr, unsigned int *passes) {
+	const T pmin = static_cast<T>(1e-5);
+	std::vector<T> ww(_m), z(_m), offset(_m);
+	while (*passes < _max_iter && !_TimeUp()) {
+		bool moved = false;
+		for (size_t k = 0; k < _nclass && *passes < _max_iter; ++k) {
+			// log of the other classes' summed exp(eta), shifted by their largest for range
+			for (size_t i = 0; i < _m; ++i) {
+				T etamax = -std::numeric_limits<T>::max();
+				for (size_t c = 0; c < _nclass; ++c)
+					if (c != k)
+						etamax = std::max(etamax, _trainPreds[c * _m + i]);
+				T sum = 0;
+				for (size_t c = 0; c < _nclass; ++c)
+					if (c != k)
+						sum += std::exp(_trainPreds[c * _m + i] - etamax);
+				offset[i] = etamax + std::log(sum);
+			}
+			T *eta = &_trainPreds[k * _m];
+			const T *y = &_y[k * _m];
+			for (size_t i = 0; i < _m; ++i) {
+				T p = 1 / (1 + std::exp(offset[i] - eta[i]));
+				p = std::min(std::max(p, pmin), 1 - pmin);
+				T v = p * (1 - p);
+				ww[i] = _w[i] * v;
+				_r[i] = (y[i] - p) / v;
+				z[i] = eta[i] + _r[i];
+			}
+			memcpy(&_x[0], &_xall[k * _n], _n * sizeof(T));
+			_ColNorms(&ww[0]);
+			unsigned int inner;
+			T dlx;
+			_Cycle(l1, l2, &ww[0], thr, _max_iter - *passes, &inner, &dlx);
+			*passes += inner;
+			for (size_t i = 0; i < _m; ++i)
+				eta[i] = z[i] - _r[i];
+			memcpy(&_xall[k * _n], &_x[0], _n * sizeof(T));
+			if (dlx >= thr)
+				moved = true;
+		}
+		// the softmax doesn't change when every class's intercept moves together, so keep their
+		// mean at zero; otherwise they drift and the sweeps never settle
+		if (_intercept) {
+			T mean = 0;
+			for (size_t c = 0; c < _nclass; ++c)
+				mean += _xall[c * _n + _n - 1];
+			mean /= _nclass;
+			for (size_t c = 0; c < _nclass; ++c) {
+				_xall[c * _n + _n - 1] -= mean;
+				for (size_t i = 0; i < _m; ++i)
+					_trainPreds[c * _m + i] -= mean;
+			}
+		}
+		// (a class cut short by the deadline moves nothing either)
+		if (!moved)
+			return !_TimeUp();
+	}
+	return false;
+}
+
+// Predictions and loss derivative at the solution
+template<typename T>
+void GLMCD<T>::_Finish() {
+	if (_family == 'm') {
+		for (size_t c = 0; c < _nclass; ++c)
+			_Predict(&_xall[c * _n], &_trainPreds[c * _m]);
+		// softmax, shifted by each row's largest eta for range
+		for (size_t i = 0; i < _m; ++i) {
+			T etamax = -std::numeric_limits<T>::max();
+			for (size_t c = 0; c < _nclass; ++c)
+				etamax = std::max(etamax, _trainPreds[c * _m + i]);
+			T sum = 0;
+			for (size_t c = 0; c < _nclass; ++c)
+				sum += std::exp(_trainPreds[c * _m + i] - etamax);
+			for (size_t c = 0; c < _nclass; ++c) {
+				T mu = std::exp(_trainPreds[c * _m + i] - etamax) / sum;
+				_lambda[c * _m + i] = _w[i] * (mu - _y[c * _m + i]);
+			}
+		}
+	} else {
+		_Predict(&_x[0], &_trainPreds[0]);
+		for (size_t i = 0; i < _m; ++i) {
+			T mu = (_family == 'l' ? 1 / (1 + std::exp(-_trainPreds[i])) : _trainPreds[i]);
+			_lambda[i] = _w[i] * (mu - _y[i]);
+		}
+	}
+	if (_family == 'e' && !_covariance) {
+		for (size_t i = 0; i < _m; ++i)
+			_r[i] = _y[i] - _trainPreds[i];
+	}
+	if (_mvalid > 0) {
+		const T *x = GetX();
+		for (size_t c = 0; c < _nclass; ++c) {
+			const T *xc = &x[c * _n];
+			for (size_t i = 0; i < _mvalid; ++i) {
+				T pred = 0;
+				for (size_t j = 0; j < _n; ++j) {
+					T vx = (_ord == 'r' || _ord == 'R' ? _validX[i * _n + j] : _validX[j * _mvalid + i]);
+					pred += vx * xc[j];
+				}
+				_validPreds[c * _mvalid + i] = pred;
+			}
+		}
+	}
+}
+
+// Weighted Gram matrix of the penalized columns (centered, with an
+// intercept), in blocks of rows so each block is one syrk, scaled by 1/pf
+template<typename T>
+void GLMCD<T>::_DirectGram() {
+	const size_t p = _n - (_intercept ? 1 : 0);
+	const size_t blockrows = 1024;
+	_dgram.assign(p * p, static_cast<T>(0));
+	std::vector<T> block(blockrows * p), sqrtw(blockrows);
+	for (size_t i0 = 0; i0 < _m; i0 += blockrows) {
+		size_t rows = std::min(blockrows, _m - i0);
+		for (size_t r = 0; r < rows; ++r)
+			sqrtw[r] = std::sqrt(_w[i0 + r]);
+		for (size_t j = 0; j < p; ++j) {
+			const T *xj = &_X[j * _m + i0];
+			T xm = (_intercept ? _xm[j] : static_cast<T>(0));
+			for (size_t r = 0; r < rows; ++r)
+				block[j * rows + r] = sqrtw[r] * (xj[r] - xm);
+		}
+		SyrkUpper(p, rows, &block[0], rows, &_dgram[0]);
+	}
+	for (size_t j = 0; j < p; ++j) {
+		for (size_t k = 0; k <= j; ++k) {
+			T pf = (_pf.empty() ? static_cast<T>(1) : _pf[j] * _pf[k]);
+			_dgram[k + j * p] /= pf;
+			_dgram[j + k * p] = _dgram[k + j * p];
+		}
+	}
+	_deigval.clear();
+	_dsolves = 0;
+}
+
+// X^T W (y - ybar) of the penalized columns (centered, with an intercept), scaled by 1/pf
+template<typename T>
+void GLMCD<T>::_DirectRhs() {
+	const size_t p = _n - (_intercept ? 1 : 0);
+	T sumw = 0, sumwy = 0;
+	for (size_t i = 0; i < _m; ++i) {
+		sumw += _w[i];
+		sumwy += _w[i] * _y[i];
+	}
+	_dybar = (_intercept && sumw > 0 ? sumwy / sumw : 0);
+	_dxty.resize(p);
+	for (size_t j = 0; j < p; ++j) {
+		const T *xj = &_X[j * _m];
+		T xm = (_intercept ? _xm[j] : static_cast<T>(0));
+		T s = 0;
+		for (size_t i = 0; i < _m; ++i)
+			s += _w[i] * (xj[i] - xm) * (_y[i] - _dybar);
+		_dxty[j] = s / (_pf.empty() ? static_cast<T>(1) : _pf[j]);
+	}
+	_dvtxty.clear();
+}
+
+// Solve (G + lambda I) z = X^T W y by Cholesky; false if the system is too
+// ill-conditioned for it
+template<typename T>
+bool GLMCD<T>::_DirectCholesky(T lambda, T *z) {
+	const size_t p = _n - (_intercept ? 1 : 0);
+	std::vector<double> L(p * p);
+	double maxdiag = 0;
+	for (size_t j = 0; j < p; ++j) {
+		for (size_t k = 0; k <= j; ++k)
+			L[j * p + k] = _dgram[j * p + k] + (j == k ? lambda : 0);
+		maxdiag = std::max(maxdiag, L[j * p + j]);
+	}
+	gsl::matrix<double, CblasRowMajor> Lm =
+			gsl::matrix_view_array<double, CblasRowMajor>(&L[0], p, p);
+	gsl::linalg_cholesky_decomp(&Lm);
+	// pivots lost to rounding of the largest diagonal (or a NaN) mean a (near) singular system
+	const double tiny = static_cast<double>(p) * std::numeric_limits<T>::epsilon() * maxdiag;
+	for (size_t j = 0; j < p; ++j) {
+		if (!(L[j * p + j] * L[j * p + j] > tiny))
+			return false;
+	}
+	std::vector<double> v(_dxty.begin(), _dxty.end());
+	gsl::vector<double> vv = gsl::vector_view_array(&v[0], p);
+	gsl::linalg_cholesky_svx(&Lm, &vv);
+	for (size_t j = 0; j < p; ++j)
+		z[j] = static_cast<T>(v[j]);
+	return true;
+}
+
+// Solve (G + lambda I) z = X^T W y from the eigendecomposition G = V D V^T
+// (computed the first time), dropping the directions with (near) zero
+// d + lambda, so a singular system gets the minimum norm solution
+template<typename T>
+void GLMCD<T>::_DirectEigen(T lambda, T *z) {
+	const size_t p = _n - (_intercept ? 1 : 0);
+	if (_deigval.empty()) {
+		_deigvec.assign(_dgram.begin(), _dgram.end());
+		_deigval.resize(p);
+		SymmetricEigen(p, &_deigvec[0], &_deigval[0]);
+		_dvtxty.clear();
+	}
+	if (_dvtxty.empty()) {
+		_dvtxty.assign(p, 0.0);
+		for (size_t i = 0; i < p; ++i)
+			for (size_t k = 0; k < p; ++k)
+				_dvtxty[k] += _deigvec[i * p + k] * _dxty[i];
+	}
+	double maxeig = 0;
+	for (size_t k = 0; k < p; ++k)
+		maxeig = std::max(maxeig, _deigval[k] + lambda);
+	const double tiny = static_cast<double>(p) * std::numeric_limits<T>::epsilon() * maxeig;
+	std::vector<double> c(p);
+	for (size_t k = 0; k < p; ++k) {
+		double dk = _deigval[k] + lambda;
+		c[k] = (dk > tiny ? _dvtxty[k] / dk : 0);
+	}
+	for (size_t i = 0; i < p; ++i) {
+		double s = 0;
+		for (size_t k = 0; k < p; ++k)
+			s += _deigvec[i * p + k] * c[k];
+		z[i] = static_cast<T>(s);
+	}
+}
+
+// Exact l2-only solution for lambda: Cholesky for the first lambda, the
+// (reused) eigendecomposition for later ones or if Cholesky gives out
+template<typename T>
+void GLMCD<T>::_DirectSolve(T lambda) {
+	const size_t p = _n - (_intercept ? 1 : 0);
+	if (_dgram.empty())
+		_DirectGram();
+	if (_dxty.empty())
+		_DirectRhs();
+	std::vector<T> z(p);
+	if (_dsolves > 0 || !_deigval.empty() || !_DirectCholesky(lambda, &z[0]))
+		_DirectEigen(lambda, &z[0]);
+	_dsolves++;
+	T icpt = _dybar;
+	for (size_t j = 0; j < p; ++j) {
+		_x[j] = z[j] / (_pf.empty() ? static_cast<T>(1) : _pf[j]);
+		if (_intercept)
+			icpt -= _xm[j] * _x[j];
+	}
+	if (_intercept)
+		_x[_n - 1] = icpt;
+}
+
+template class GLMCD<double>;
+template class GLMCD<float>;
+
+}  // namespace h2o4gpu
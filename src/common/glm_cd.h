@@ -0,0 +1,160 @@
+/*!
+ * Copyright 2017-2018 H2O.ai, Inc.
+ * License   Apache License Version 2.0 (see LICENSE for details)
+ */
+#pragma once
+#include <stddef.h>
+#include <vector>
+
+#include "solver/glm.h"
+
+namespace h2o4gpu {
+
+// Cyclic coordinate descent for the elastic net (glmnet style), solving
+//   minimize  sum_i w_i loss(y_i, a_i^T x) + lambda*alpha*||x||_1 + lambda*(1-alpha)/2*||x||_2^2
+// for family 'e' (squared loss, 1/2 scaled) or 'l' (logistic loss, by IRLS), the same
+// objective the ADMM solver is given in ElasticNetptr_fit, or 'm' (multinomial loss over
+// nclass classes, each with its own coefficients, all penalized alike).  Works on host memory only.
+//
+// Each Solve() continues from the current solution, so calling it down a lambda
+// path warm starts every point from the previous one.  A full pass over all
+// columns picks the active set, which is then cycled until converged, and a
+// further full pass confirms nothing else enters.
+//
+// Gaussian fits can use covariance updates (gradient kept up to date through
+// cached Gram columns of the active columns, cheap per update when n is small)
+// instead of naive updates (residual kept up to date, O(m) per update).
+// Logistic fits always use naive updates since the IRLS weights keep changing.
+// With an intercept, each update moves the intercept along with the column
+// so the column is in effect centered, which keeps CD from crawling when
+// uncentered columns are nearly collinear with the intercept.
+//
+// With direct, l2-only gaussian fits (alpha=0) are instead solved exactly
+// from the weighted (with an intercept, centered) Gram matrix, built once
+// with blocked syrk: the first lambda by Cholesky, falling back to an
+// eigendecomposition of the Gram matrix if that is (near) singular, and any
+// further lambda from that one eigendecomposition at O(n^2) each.  Singular
+// systems get the minimum norm solution.  Other fits still use CD.
+//
+// Multinomial fits (as glmnet's) cycle over the classes, each updated by an
+// IRLS step of the logistic regression of its indicator with the log of the
+// other classes' summed exp(eta) as an offset, which makes its probability the
+// softmax; the intercepts, which the loss only sees up to a common shift, are
+// then centered.  y, the predictions and the loss derivative are class-major.
+template<typename T>
+class GLMCD {
+private:
+	char _family;
+	size_t _m, _n, _mvalid;
+	size_t _nclass; // multinomial: number of classes, else 1
+	int _intercept; // last column is the unpenalized intercept
+	bool _covariance;
+
+	// training data by column, weights, and (any order) validation data
+	const T *_X;
+	std::vector<T> _Xcol; // column-major copy if not given column-major
+	const T *_y;
+	std::vector<T> _w;
+	char _ord;
+	const T *_validX;
+
+	// solution and state kept in step with it
+	std::vector<T> _x, _trainPreds, _validPreds, _lambda;
+	std::vector<T> _xall;                // multinomial: all classes' coefficients (_x is the class updated)
+	std::vector<T> _xv;                  // weighted squared norm of each (centered) column
+	std::vector<T> _xm;                  // with intercept: weighted column means
+	std::vector<T> _r;                   // naive: (working) residual
+	std::vector<T> _grad;                // covariance: X^T W (y - X x)
+	std::vector<std::vector<T> > _gram;  // covariance: cached Gram columns
+	std::vector<size_t> _active;
+	std::vector<T> _pf;                  // per-column penalty factors (empty: all ones)
+	bool _state_ok;
+	T _nulldev;
+
+	T _rel_tol;
+	unsigned int _max_iter, _final_iter;
+	double _deadline; // timer<double>() past which Solve stops where it is, none if 0
+
+	// direct: Gram matrix and X^T W y of the penalized columns, both scaled
+	// by 1/penalty factor, and the Gram matrix's eigendecomposition
+	bool _direct;
+	std::vector<T> _dgram, _dxty;
+	std::vector<double> _deigvec, _deigval, _dvtxty;
+	T _dybar;
+	unsigned int _dsolves;
+
+	void _Predict(const T *x, T *preds) const;
+	void _Prepare();
+	void _ColNorms(const T *ww);
+	T _Pass(bool all, T l1, T l2, const T *ww);
+	bool _Cycle(T l1, T l2, const T *ww, T thr, unsigned int maxpasses,
+			unsigned int *passes, T *dlxfirst);
+	bool _MultinomialCycle(T l1, T l2, T thr, unsigned int *passes);
+	bool _TimeUp() const {
+		return _deadline > 0 && timer<double>() > _deadline;
+	}
+	const std::vector<T> &_Gram(size_t j);
+	void _Finish();
+	void _DirectGram();
+	void _DirectRhs();
+	bool _DirectCholesky(T lambda, T *z);
+	void _DirectEigen(T lambda, T *z);
+	void _DirectSolve(T lambda);
+
+public:
+	GLMCD(char family, char ord, size_t m, size_t n, size_t mvalid, const T *X,
+		  const T *y, const T *w, const T *validX, int intercept, bool covariance,
+		  bool direct, int nclass);
+
+	H2O4GPUStatus Solve(T alpha, T lambda);
+	void SetInitX(const T *x);
+	// multinomial: start class k from x (the other classes keep theirs)
+	void SetInitClassX(size_t k, const T *x);
+	void ResetX(void);
+	// fit another response with the same data and weights (keeps the cached Gram columns)
+	void SetY(const T *y);
+	// weight column j's penalty by pf[j] (l1) and pf[j]^2 (l2), as for coefficients of standardized columns
+	// (pf[j] > 0)
+	void SetPenaltyFactor(const T *pf);
+
+	const T* GetX() const {
+		return (_family == 'm' ? &_xall[0] : &_x[0]);
+	}
+	// loss derivative w*(mu-y) at the solution (ADMM's dual variable)
+	const T* GetLambda() const {
+		return &_lambda[0];
+	}
+	const T* GettrainPreds() const {
+		return &_trainPreds[0];
+	}
+	const T* GetvalidPreds() const {
+		return _mvalid > 0 ? &_validPreds[0] : NULL;
+	}
+	unsigned int GetFinalIter() const {
+		return _final_iter;
+	}
+	unsigned int GetMaxIter() const {
+		return _max_iter;
+	}
+	double GetDeadline() const {
+		return _deadline;
+	}
+	T GetRelTol() const {
+		return _rel_tol;
+	}
+	bool GetCovariance() const {
+		return _covariance;
+	}
+
+	void SetRelTol(T rel_tol) {
+		_rel_tol = rel_tol;
+	}
+	void SetMaxIter(unsigned int max_iter) {
+		_max_iter = max_iter;
+	}
+	void SetDeadline(double deadline) {
+		_deadline = deadline;
+	}
+};
+
+}  // namespace h2o4gpu
@@ -42,6 +42,283 @@ struct ApplyOp: std::binary_function<FunctionObj<T>, FunctionObj<T>, T> {
 	}
 };
 
+// Recent primal and dual residuals, for stopping once they no longer improve
+// on average
+template<typename T>
+struct ResidualHistory {
+	static const unsigned int QUEUELENGTH = 10;
+	std::deque<T> nrm_r_deque;
+	std::deque<T> nrm_s_deque;
+	std::deque<T> nrm_r_avg;
+	std::deque<T> nrm_s_avg;
+	std::deque<T> nrm_r_error;
+	std::deque<T> nrm_s_error;
+
+	// Record iteration k's residuals, true if they have stopped improving
+	bool Push(unsigned int k, T nrm_r, T nrm_s) {
+		bool stopearly = false;
+		nrm_r_deque.push_back(nrm_r);
+		nrm_s_deque.push_back(nrm_s);
+
+		nrm_r_avg.push_back(
+				std::accumulate(nrm_r_deque.begin(), nrm_r_deque.end(), 0.0)
+						/ static_cast<T>(nrm_r_deque.size()));
+		nrm_s_avg.push_back(
+				std::accumulate(nrm_s_deque.begin(), nrm_s_deque.end(), 0.0)
+						/ static_cast<T>(nrm_s_deque.size()));
+		if (nrm_r_deque.size() >= QUEUELENGTH
+				&& nrm_r_avg.size() >= QUEUELENGTH) {
+			T errorlocal_r = 0;
+			T errorlocal_s = 0;
+			for (unsigned int ii = 0; ii < QUEUELENGTH; ii++) {
+				errorlocal_r += std::abs(nrm_r_avg[ii] - nrm_r_deque[ii]);
+				errorlocal_s += std::abs(nrm_s_avg[ii] - nrm_s_deque[ii]);
+			}
+			nrm_r_error.push_back(errorlocal_r / static_cast<T>(QUEUELENGTH));
+			nrm_s_error.push_back(errorlocal_s / static_cast<T>(QUEUELENGTH));
+		}
+
+		if (k > QUEUELENGTH && nrm_r_deque.size() >= QUEUELENGTH
+				&& nrm_r_avg.size() >= QUEUELENGTH
+				&& nrm_s_deque.size() >= QUEUELENGTH
+				&& nrm_s_avg.size() >= QUEUELENGTH && nrm_r_error.size() >= 1
+				&& nrm_s_error.size() >= 1
+				&& std::abs(nrm_r_avg.back() - nrm_r_avg.front())
+						< nrm_r_error.back()
+				&& std::abs(nrm_s_avg.back() - nrm_s_avg.front())
+						< nrm_s_error.back()) {
+			Printf("Stopped Early at iteration=%d: %g %g %g : %g %g %g\n",
+					k, nrm_r_avg.back(), nrm_r_avg.front(),
+					nrm_r_error.back(), nrm_s_avg.back(), nrm_s_avg.front(),
+					nrm_s_error.back());
+			fflush(stdout);
+			stopearly = true;
+		}
+
+		if (nrm_r_deque.size() >= QUEUELENGTH) {
+			nrm_r_deque.pop_front();
+		}
+		if (nrm_s_deque.size() >= QUEUELENGTH) {
+			nrm_s_deque.pop_front();
+		}
+		if (nrm_r_avg.size() >= QUEUELENGTH) {
+			nrm_r_avg.pop_front();
+		}
+		if (nrm_s_avg.size() >= QUEUELENGTH) {
+			nrm_s_avg.pop_front();
+		}
+		if (nrm_r_error.size() >= QUEUELENGTH) {
+			nrm_r_error.pop_front();
+		}
+		if (nrm_s_error.size() >= QUEUELENGTH) {
+			nrm_s_error.pop_front();
+		}
+		return stopearly;
+	}
+};
+
+// Adaptive rho: grow rho while the primal residual lags the dual one and
+// shrink it in the opposite case (rescaling the scaled dual variable zt with
+// it), in steps growing by kGamma while they keep going the same way
+template<typename T>
+struct RhoAdapter {
+	T delta, xi;
+	unsigned int kd, ku;
+	RhoAdapter() :
+			delta(static_cast<T>(1.05)), xi(static_cast<T>(1.0)), kd(0u), ku(0u) {
+	}
+
+	void Update(unsigned int k, T nrm_r, T nrm_s, T eps_pri, T eps_dua,
+			unsigned int verbose, T *rho, gsl::vector<T> *zt) {
+		const T kDeltaMin = static_cast<T>(1.05);
+		const T kGamma = static_cast<T>(1.01);
+		const T kTau = static_cast<T>(0.8);
+		const T kKappa = static_cast<T>(0.4);
+		// TODO: Need to give scale to these
+		//  const T kRhoMin     = static_cast<T>(1e-4); // lower range for adaptive rho
+		//  const T kRhoMax     = static_cast<T>(1e4); // upper range for adaptive rho
+		const T kRhoMin = static_cast<T>(std::numeric_limits<T>::epsilon()); // lower range for adaptive rho
+		const T kRhoMax = static_cast<T>(1.0 / kRhoMin); // upper range for adaptive rho
+
+		if (nrm_s < xi * eps_dua && nrm_r > xi * eps_pri
+				&& kTau * static_cast<T>(k) > static_cast<T>(kd)) {
+			if (*rho < kRhoMax) {
+				*rho *= delta;
+				gsl::blas_scal(1 / delta, zt);
+				delta = kGamma * delta;
+				ku = k;
+				if (verbose > 3)
+					Printf("+ rho %e\n", *rho);
+			}
+		} else if (nrm_s > xi * eps_dua && nrm_r < xi * eps_pri
+				&& kTau * static_cast<T>(k) > static_cast<T>(ku)) {
+			if (*rho > kRhoMin) {
+				*rho /= delta;
+				gsl::blas_scal(delta, zt);
+				delta = kGamma * delta;
+				kd = k;
+				if (verbose > 3)
+					Printf("- rho %e\n", *rho);
+			}
+		} else if (nrm_s < xi * eps_dua && nrm_r < xi * eps_pri) {
+			xi *= kKappa;
+		} else {
+			delta = kDeltaMin;
+		}
+	}
+};
+
+// Type-II Anderson acceleration of the ADMM step (z, zt) -> (z, zt): the next
+// point is the combination of the last mem steps' outputs whose residuals
+// (input - output) best cancel, found by regularized least squares on their
+// differences.  Safeguarded: an extrapolated point whose residual comes out
+// larger than the one of the plain step it replaced is dropped for that step,
+// and so is one with an outsized combination, starting the memory over.
+// mem = 0 leaves the iterates alone.
+template<typename T>
+struct AndersonAccelerator {
+	size_t mn;
+	unsigned int mem, cols, head, rejected;
+	std::vector<T> w, f, g, fprev, gprev, fsafe, DF, DG, gram;
+	bool have_w, have_prev, accelerated;
+	T nrm_g_safe;
+
+	AndersonAccelerator(size_t mn = 0, unsigned int mem = 0) :
+			mn(mn), mem(mem), cols(0u), head(0u), rejected(0u), w(mem ? 2 * mn : 0), f(
+					w.size()), g(w.size()), fprev(w.size()), gprev(w.size()), fsafe(
+					w.size()), DF(mem * w.size()), DG(mem * w.size()), gram(
+					mem * mem), have_w(false), have_prev(false), accelerated(false), nrm_g_safe(
+					0) {
+	}
+
+	// Forget the past steps, e.g. once rho (and with it the step) changed
+	void Reset() {
+		cols = head = 0u;
+		have_w = have_prev = accelerated = false;
+	}
+
+	// (z, zt) holds the step's output for the last point handed out (any
+	// point, right after Reset); replace it with the next point to step from
+	void Step(T *z, T *zt) {
+		if (mem == 0)
+			return;
+		const T kSafeguard = static_cast<T>(1.0);
+		size_t len = w.size();
+		memcpy(&f[0], z, mn * sizeof(T));
+		memcpy(&f[mn], zt, mn * sizeof(T));
+		if (!have_w) {
+			w = f;
+			have_w = true;
+			return;
+		}
+		for (size_t i = 0; i < len; ++i)
+			g[i] = w[i] - f[i];
+		gsl::vector<T> gv = gsl::vector_view_array(&g[0], len);
+		T nrm_g = gsl::blas_nrm2(&gv);
+
+		if (accelerated && !(nrm_g <= kSafeguard * nrm_g_safe)) {
+			// the extrapolation did worse than its plain step: take that instead
+			Reset();
+			have_w = true;
+			w = fsafe;
+			++rejected;
+		} else {
+			accelerated = false;
+			if (have_prev)
+				_Push();
+			fprev.swap(f);
+			gprev.swap(g);
+			have_prev = true;
+			w = fprev;
+			if (_Extrapolate()) {
+				accelerated = true;
+				fsafe = fprev;
+				nrm_g_safe = nrm_g;
+			}
+		}
+		memcpy(z, &w[0], mn * sizeof(T));
+		memcpy(zt, &w[mn], mn * sizeof(T));
+	}
+
+private:
+	// Store the differences of the outputs and residuals of the last two steps
+	// (f, g and fprev, gprev) over the oldest ones, with their Gram row
+	void _Push() {
+		size_t len = w.size();
+		T *df = &DF[head * len];
+		T *dg = &DG[head * len];
+		for (size_t i = 0; i < len; ++i) {
+			df[i] = f[i] - fprev[i];
+			dg[i] = g[i] - gprev[i];
+		}
+		cols = std::min(cols + 1, mem);
+		gsl::vector<T> dgv = gsl::vector_view_array(dg, len);
+		for (unsigned int j = 0; j < cols; ++j) {
+			gsl::vector<T> dgj = gsl::vector_view_array(&DG[j * len], len);
+			T dot;
+			gsl::blas_dot(&dgv, &dgj, &dot);
+			gram[head * mem + j] = gram[j * mem + head] = dot;
+		}
+		head = (head + 1) % mem;
+	}
+
+	// w = fprev - DF gamma for gamma = argmin |gprev - DG gamma|, false (and w
+	// left alone) if there is nothing to combine or no sane gamma
+	bool _Extrapolate() {
+		const T kRegularization = static_cast<T>(1e-10);
+		const T kMaxWeight = static_cast<T>(1e4);
+		if (cols == 0)
+			return false;
+		size_t len = w.size();
+		size_t c = cols;
+		std::vector<T> L(c * c), gamma(c);
+		gsl::vector<T> gv = gsl::vector_view_array(&gprev[0], len);
+		T trace = 0;
+		for (size_t j = 0; j < c; ++j) {
+			gsl::vector<T> dgj = gsl::vector_view_array(&DG[j * len], len);
+			gsl::blas_dot(&dgj, &gv, &gamma[j]);
+			trace += gram[j * mem + j];
+		}
+		T reg = kRegularization * trace;
+
+		// Cholesky factor of the regularized Gram matrix, then two solves
+		for (size_t j = 0; j < c; ++j) {
+			for (size_t i = j; i < c; ++i) {
+				T s = gram[i * mem + j] + (i == j ? reg : 0);
+				for (size_t k = 0; k < j; ++k)
+					s -= L[i * c + k] * L[j * c + k];
+				if (i == j) {
+					if (!(s > 0))
+						return false;
+					L[j * c + j] = std::sqrt(s);
+				} else {
+					L[i * c + j] = s / L[j * c + j];
+				}
+			}
+		}
+		for (size_t i = 0; i < c; ++i) {
+			for (size_t k = 0; k < i; ++k)
+				gamma[i] -= L[i * c + k] * gamma[k];
+			gamma[i] /= L[i * c + i];
+		}
+		for (size_t i = c; i-- > 0;) {
+			for (size_t k = i + 1; k < c; ++k)
+				gamma[i] -= L[k * c + i] * gamma[k];
+			gamma[i] /= L[i * c + i];
+		}
+		for (size_t j = 0; j < c; ++j)
+			if (!(std::abs(gamma[j]) <= kMaxWeight))
+				return false;
+
+		for (size_t j = 0; j < c; ++j) {
+			const T *df = &DF[j * len];
+			for (size_t i = 0; i < len; ++i)
+				w[i] -= gamma[j] * df[i];
+		}
+		return true;
+	}
+};
+
 }  // namespace
 
 template<typename T, typename M, typename P>
@@ -52,9 +329,9 @@ H2O4GPU<T, M, P>::H2O4GPU(int sharedA, int me, int wDev, const M &A) :
 				static_cast<T>(0.)), _trainPreds(0), _validPreds(0), _xp(0), _trainPredsp(
 				0), _validPredsp(0), _trainerror(0), _validerror(0), _trainmean(
 				0), _validmean(0), _trainstddev(0), _validstddev(0), _final_iter(
-				0), _abs_tol(static_cast<T>(kAbsTol)), _rel_tol(
+				0), _nrm_r(0), _nrm_s(0), _abs_tol(static_cast<T>(kAbsTol)), _rel_tol(
 				static_cast<T>(kRelTol)), _max_iter(kMaxIter), _stop_early(1), _stop_early_error_fraction(
-				1.0), _init_iter(kInitIter), _verbose(kVerbose), _adaptive_rho(
+				1.0), _deadline(0), _init_iter(kInitIter), _verbose(kVerbose), _anderson_mem(kAndersonMem), _adaptive_rho(
 				kAdaptiveRho), _equil(kEquil), _gap_stop(kGapStop), _init_x(
 				false), _init_lambda(false), _nDev(0), _wDev(wDev) {
 
@@ -74,9 +351,9 @@ H2O4GPU<T, M, P>::H2O4GPU(const M &A) :
 				static_cast<T>(0.)), _trainPreds(0), _validPreds(0), _xp(0), _trainPredsp(
 				0), _validPredsp(0), _trainerror(0), _validerror(0), _trainmean(
 				0), _validmean(0), _trainstddev(0), _validstddev(0), _final_iter(
-				0), _abs_tol(static_cast<T>(kAbsTol)), _rel_tol(
+				0), _nrm_r(0), _nrm_s(0), _abs_tol(static_cast<T>(kAbsTol)), _rel_tol(
 				static_cast<T>(kRelTol)), _max_iter(kMaxIter), _stop_early(1), _stop_early_error_fraction(
-				1.0), _init_iter(kInitIter), _verbose(kVerbose), _adaptive_rho(
+				1.0), _deadline(0), _init_iter(kInitIter), _verbose(kVerbose), _anderson_mem(kAndersonMem), _adaptive_rho(
 				kAdaptiveRho), _equil(kEquil), _gap_stop(kGapStop), _init_x(
 				false), _init_lambda(false), _nDev(0), _wDev(_A._wDev) {
 
@@ -116,12 +393,8 @@ template<typename T, typename M, typename P>
 H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 		const std::vector<FunctionObj<T> > &g) {
 	double t0 = timer<double>();
-	// Constants for adaptive-rho and over-relaxation.
-	const T kDeltaMin = static_cast<T>(1.05);
-	const T kGamma = static_cast<T>(1.01);
-	const T kTau = static_cast<T>(0.8);
+	// Constants for over-relaxation (adaptive rho's are in RhoAdapter).
 	const T kAlpha = static_cast<T>(1.7);
-	const T kKappa = static_cast<T>(0.4);
 	const T kOne = static_cast<T>(1.0);
 	const T kZero = static_cast<T>(0.0);
 	const T kProjTolMax = static_cast<T>(1e-8);
@@ -167,12 +440,6 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 	std::transform(g_cpu.begin(), g_cpu.end(), e.data, g_cpu.begin(),
 			ApplyOp<T, std::multiplies<T> >(std::multiplies<T>()));
 
-	// TODO: Need to give scale to these
-	//  const T kRhoMin     = static_cast<T>(1e-4); // lower range for adaptive rho
-	//  const T kRhoMax     = static_cast<T>(1e4); // upper range for adaptive rho
-	const T kRhoMin = static_cast<T>(std::numeric_limits<T>::epsilon()); // lower range for adaptive rho
-	const T kRhoMax = static_cast<T>(1.0 / kRhoMin); // upper range for adaptive rho
-
 	// Initialize (x, lambda) from (x0, lambda0).
 	if (_init_x) {
 		gsl::vector_memcpy(&xtemp, _x);
@@ -236,19 +503,14 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 	T sqrtn_atol = std::sqrt(static_cast<T>(n)) * _abs_tol;
 	T sqrtm_atol = std::sqrt(static_cast<T>(m)) * _abs_tol;
 	T sqrtmn_atol = std::sqrt(static_cast<T>(m + n)) * _abs_tol;
-	T delta = kDeltaMin, xi = static_cast<T>(1.0);
-	unsigned int k = 0u, kd = 0u, ku = 0u;
-	bool converged = false;
+	RhoAdapter<T> rho_adapter;
+	unsigned int k = 0u;
+	bool converged = false, timeup = false;
 	T nrm_r, nrm_s, gap, eps_gap, eps_pri, eps_dua;
 
 	// Stop early setup
-	unsigned int QUEUELENGTH = 10;
-	std::deque<T> nrm_r_deque;
-	std::deque<T> nrm_s_deque;
-	std::deque<T> nrm_r_avg;
-	std::deque<T> nrm_s_avg;
-	std::deque<T> nrm_r_error;
-	std::deque<T> nrm_s_error;
+	ResidualHistory<T> history;
+	AndersonAccelerator<T> anderson(m + n, _anderson_mem);
 
 	for (;; ++k) {
 		gsl::vector_memcpy(&zprev, &z);
@@ -304,64 +566,8 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 
 		// STOP EARLY CHECK
 		bool stopearly = false;
-		if (_stop_early) {
-			nrm_r_deque.push_back(nrm_r);
-			nrm_s_deque.push_back(nrm_s);
-
-			nrm_r_avg.push_back(
-					std::accumulate(nrm_r_deque.begin(), nrm_r_deque.end(), 0.0)
-							/ static_cast<T>(nrm_r_deque.size()));
-			nrm_s_avg.push_back(
-					std::accumulate(nrm_s_deque.begin(), nrm_s_deque.end(), 0.0)
-							/ static_cast<T>(nrm_s_deque.size()));
-			if (nrm_r_deque.size() >= QUEUELENGTH
-					&& nrm_r_avg.size() >= QUEUELENGTH) {
-				T errorlocal_r = 0;
-				T errorlocal_s = 0;
-				for (unsigned int ii = 0; ii < QUEUELENGTH; ii++) {
-					errorlocal_r += std::abs(nrm_r_avg[ii] - nrm_r_deque[ii]);
-					errorlocal_s += std::abs(nrm_s_avg[ii] - nrm_s_deque[ii]);
-				}
-				nrm_r_error.push_back(errorlocal_r / static_cast<T>(QUEUELENGTH));
-				nrm_s_error.push_back(errorlocal_s / static_cast<T>(QUEUELENGTH));
-			}
-
-			if (k > QUEUELENGTH && nrm_r_deque.size() >= QUEUELENGTH
-					&& nrm_r_avg.size() >= QUEUELENGTH
-					&& nrm_s_deque.size() >= QUEUELENGTH
-					&& nrm_s_avg.size() >= QUEUELENGTH && nrm_r_error.size() >= 1
-					&& nrm_s_error.size() >= 1
-					&& std::abs(nrm_r_avg.back() - nrm_r_avg.front())
-							< nrm_r_error.back()
-					&& std::abs(nrm_s_avg.back() - nrm_s_avg.front())
-							< nrm_s_error.back()) {
-				Printf("Stopped Early at iteration=%d: %g %g %g : %g %g %g\n",
-						k, nrm_r_avg.back(), nrm_r_avg.front(),
-						nrm_r_error.back(), nrm_s_avg.back(), nrm_s_avg.front(),
-						nrm_s_error.back());
-				fflush(stdout);
-				stopearly = true;
-			}
-
-			if (nrm_r_deque.size() >= QUEUELENGTH) {
-				nrm_r_deque.pop_front();
-			}
-			if (nrm_s_deque.size() >= QUEUELENGTH) {
-				nrm_s_deque.pop_front();
-			}
-			if (nrm_r_avg.size() >= QUEUELENGTH) {
-				nrm_r_avg.pop_front();
-			}
-			if (nrm_s_avg.size() >= QUEUELENGTH) {
-				nrm_s_avg.pop_front();
-			}
-			if (nrm_r_error.size() >= QUEUELENGTH) {
-				nrm_r_error.pop_front();
-			}
-			if (nrm_s_error.size() >= QUEUELENGTH) {
-				nrm_s_error.pop_front();
-			}
-		}
+		if (_stop_early)
+			stopearly = history.Push(k, nrm_r, nrm_s);
 
 		// Evaluate stopping criteria.
 		converged = stopearly
@@ -374,8 +580,9 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 					eps_pri, nrm_s, eps_dua, gap, eps_gap, optval);
 		}
 
-		// Break if converged or there are nans
-		if (converged || k == _max_iter - 1) {
+		// Break if converged, out of time or there are nans
+		timeup = _deadline > 0 && timer<double>() > _deadline;
+		if (converged || timeup || k == _max_iter - 1) {
 			_final_iter = k;
 			break;
 		}
@@ -387,32 +594,15 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 
 		// Rescale rho.
 		if (_adaptive_rho) {
-			if (nrm_s < xi * eps_dua && nrm_r > xi * eps_pri
-					&& kTau * static_cast<T>(k) > static_cast<T>(kd)) {
-				if (_rho < kRhoMax) {
-					_rho *= delta;
-					gsl::blas_scal(1 / delta, &zt);
-					delta = kGamma * delta;
-					ku = k;
-					if (_verbose > 3)
-						Printf("+ rho %e\n", _rho);
-				}
-			} else if (nrm_s > xi * eps_dua && nrm_r < xi * eps_pri
-					&& kTau * static_cast<T>(k) > static_cast<T>(ku)) {
-				if (_rho > kRhoMin) {
-					_rho /= delta;
-					gsl::blas_scal(delta, &zt);
-					delta = kGamma * delta;
-					kd = k;
-					if (_verbose > 3)
-						Printf("- rho %e\n", _rho);
-				}
-			} else if (nrm_s < xi * eps_dua && nrm_r < xi * eps_pri) {
-				xi *= kKappa;
-			} else {
-				delta = kDeltaMin;
-			}
+			T rho = _rho;
+			rho_adapter.Update(k, nrm_r, nrm_s, eps_pri, eps_dua, _verbose, &_rho,
+					&zt);
+			if (_rho != rho)
+				anderson.Reset();
 		}
+
+		// Extrapolate (z, zt).
+		anderson.Step(z.data, zt.data);
 	}
 
 	// Get optimal value
@@ -420,7 +610,9 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 
 	// Check status
 	H2O4GPUStatus status;
-	if (!converged && k == _max_iter - 1)
+	if (!converged && timeup)
+		status = H2O4GPU_TIME_LIMIT;
+	else if (!converged && k == _max_iter - 1)
 		status = H2O4GPU_MAX_ITER;
 	else if (!converged && k < _max_iter - 1)
 		status = H2O4GPU_NAN_FOUND;
@@ -429,6 +621,8 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 
 	// Get run time
 	_time = static_cast<T>(timer<double>() - t0);
+	_nrm_r = nrm_r;
+	_nrm_s = nrm_s;
 
 	// Print summary
 	if (_verbose > 0) {
@@ -437,6 +631,9 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 		"Timing: Total = %3.2e s, Init = %3.2e s\n"
 		"Iter  : %u\n", H2O4GPUStatusString(status).c_str(), _time, time_init,
 				k);
+		if (_anderson_mem > 0)
+			Printf("Anderson: memory %u, %u extrapolations rejected\n",
+					_anderson_mem, anderson.rejected);
 		Printf(__HBAR__
 		"Error Metrics:\n"
 		"Pri: "
@@ -582,6 +779,289 @@ H2O4GPU<T, M, P>::~H2O4GPU() {
 	_x = _y = _mu = _lambda = _trainPreds = _validPreds = 0;
 }
 
+template<typename T>
+H2O4GPUBlock<T>::H2O4GPUBlock(Solver &solver, size_t lanes) :
+		_solver(solver), _lanes(lanes), _m(solver._A.Rows()), _mvalid(
+				solver._A.ValidRows()), _n(solver._A.Cols()), _z(
+				lanes * (_m + _n)), _zt(lanes * (_m + _n)), _x(lanes * _n), _lambda(
+				lanes * _m), _trainPreds(lanes * _m), _validPreds(
+				lanes * _mvalid), _rho(lanes, solver._rho), _abs_tol(lanes,
+				solver._abs_tol), _rel_tol(lanes, solver._rel_tol), _final_iter(
+				lanes, 0u), _nrm_r(lanes), _nrm_s(lanes), _init_x(lanes, 0), _init_lambda(lanes, 0) {
+}
+
+// Start lane's (z, zt) from its SetInitX/SetInitLambda values as Solve does
+// (f and g already scaled)
+template<typename T>
+void H2O4GPUBlock<T>::_InitLane(size_t lane,
+		const std::vector<FunctionObj<T> > &f,
+		const std::vector<FunctionObj<T> > &g, T *zdata, T *ztdata) {
+	const T kOne = static_cast<T>(1.0);
+	const T kZero = static_cast<T>(0.0);
+	const T kProjTolIni = static_cast<T>(1e-5);
+	if (!_init_x[lane] && !_init_lambda[lane])
+		return;
+
+	size_t m = _m;
+	size_t n = _n;
+	MatrixDense<T> &A = _solver._A;
+	gsl::vector<T> de = gsl::vector_view_array(A._de, m + n);
+	gsl::vector<T> z = gsl::vector_view_array(zdata, m + n);
+	gsl::vector<T> zt = gsl::vector_view_array(ztdata, m + n);
+	gsl::vector<T> zprev = gsl::vector_calloc<T>(m + n);
+	gsl::vector<T> ztemp = gsl::vector_calloc<T>(m + n);
+
+	gsl::vector<T> d = gsl::vector_subvector(&de, 0, m);
+	gsl::vector<T> e = gsl::vector_subvector(&de, m, n);
+	gsl::vector<T> x = gsl::vector_subvector(&z, 0, n);
+	gsl::vector<T> y = gsl::vector_subvector(&z, n, m);
+	gsl::vector<T> xprev = gsl::vector_subvector(&zprev, 0, n);
+	gsl::vector<T> yprev = gsl::vector_subvector(&zprev, n, m);
+	gsl::vector<T> xtemp = gsl::vector_subvector(&ztemp, 0, n);
+	gsl::vector<T> ytemp = gsl::vector_subvector(&ztemp, n, m);
+
+	if (_init_x[lane]) {
+		gsl::vector_memcpy(&xtemp, &_x[lane * n]);
+		gsl::vector_div(&xtemp, &e);
+		A.Mul('n', kOne, xtemp.data, kZero, ytemp.data);
+		gsl::vector_memcpy(&z, &ztemp);
+	}
+	if (_init_lambda[lane]) {
+		gsl::vector_memcpy(&ytemp, &_lambda[lane * m]);
+		gsl::vector_div(&ytemp, &d);
+		A.Mul('t', -kOne, ytemp.data, kZero, xtemp.data);
+		gsl::blas_scal(-kOne / _rho[lane], &ztemp);
+		gsl::vector_memcpy(&zt, &ztemp);
+	}
+	if (_init_x[lane] && !_init_lambda[lane]) {
+		gsl::vector_set_all(&zprev, kZero);
+		for (unsigned int i = 0; i < kInitIter; ++i) {
+			ProjSubgradEval(g, xprev.data, x.data, xtemp.data);
+			ProjSubgradEval(f, yprev.data, y.data, ytemp.data);
+			_solver._P.Project(xtemp.data, ytemp.data, kOne, xprev.data,
+					yprev.data, kProjTolIni);
+			gsl::blas_axpy(-kOne, &ztemp, &zprev);
+			gsl::blas_scal(-kOne, &zprev);
+		}
+		gsl::vector_memcpy(&zt, &zprev);
+		gsl::blas_scal(-kOne / _rho[lane], &zt);
+	}
+	_init_x[lane] = _init_lambda[lane] = 0;
+
+	gsl::vector_free(&zprev);
+	gsl::vector_free(&ztemp);
+}
+
+template<typename T>
+H2O4GPUStatus H2O4GPUBlock<T>::Solve(const std::vector<size_t> &lanes,
+		const std::vector<const std::vector<FunctionObj<T> > *> &f,
+		const std::vector<const std::vector<FunctionObj<T> > *> &g) {
+	// Constants for over-relaxation, as in H2O4GPU::Solve.
+	const T kAlpha = static_cast<T>(1.7);
+	const T kOne = static_cast<T>(1.0);
+
+	if (!_solver._done_init)
+		_solver._Init();
+	MatrixDense<T> &A = _solver._A;
+	ProjectorDirect<T, MatrixDense<T> > &P = _solver._P;
+	size_t m = _m;
+	size_t mvalid = _mvalid;
+	size_t n = _n;
+	size_t mn = m + n;
+	unsigned int max_iter = _solver._max_iter;
+	double deadline = _solver._deadline;
+	unsigned int verbose = _solver._verbose;
+
+	gsl::vector<T> de = gsl::vector_view_array(A._de, mn);
+	gsl::vector<T> d = gsl::vector_subvector(&de, 0, m);
+	gsl::vector<T> e = gsl::vector_subvector(&de, m, n);
+
+	// A lane being solved, whose z, zt, ... are column j of the blocks below
+	// while it is chain j
+	struct Chain {
+		size_t lane;
+		std::vector<FunctionObj<T> > f, g;
+		RhoAdapter<T> rho_adapter;
+		ResidualHistory<T> history;
+		AndersonAccelerator<T> anderson;
+		T nrm_r, nrm_s, gap, eps_gap, eps_pri, eps_dua;
+		bool done;
+	};
+	size_t nchains = lanes.size();
+	std::vector<Chain> chains(nchains);
+	std::vector<T> Z(nchains * mn), ZT(nchains * mn), Zprev(nchains * mn),
+			Ztemp(nchains * mn), Z12(nchains * mn);
+	for (size_t j = 0; j < nchains; ++j) {
+		Chain &c = chains[j];
+		c.lane = lanes[j];
+		// Scale f and g to account for diagonal scaling e and d.
+		c.f = *f[j];
+		c.g = *g[j];
+		std::transform(c.f.begin(), c.f.end(), d.data, c.f.begin(),
+				ApplyOp<T, std::divides<T> >(std::divides<T>()));
+		std::transform(c.g.begin(), c.g.end(), e.data, c.g.begin(),
+				ApplyOp<T, std::multiplies<T> >(std::multiplies<T>()));
+		c.anderson = AndersonAccelerator<T>(mn, _solver._anderson_mem);
+		c.done = false;
+		memcpy(&Z[j * mn], &_z[c.lane * mn], mn * sizeof(T));
+		memcpy(&ZT[j * mn], &_zt[c.lane * mn], mn * sizeof(T));
+		_InitLane(c.lane, c.f, c.g, &Z[j * mn], &ZT[j * mn]);
+	}
+
+	bool converged_all = true, timeup = false;
+	size_t active = nchains;
+	for (unsigned int k = 0u; active > 0; ++k) {
+		timeup = deadline > 0 && timer<double>() > deadline;
+		// Evaluate proximal operators, compute gap and tolerances, and apply
+		// over relaxation, chain by chain.
+		for (size_t j = 0; j < active; ++j) {
+			Chain &c = chains[j];
+			T rho = _rho[c.lane];
+			gsl::vector<T> z = gsl::vector_view_array(&Z[j * mn], mn);
+			gsl::vector<T> zt = gsl::vector_view_array(&ZT[j * mn], mn);
+			gsl::vector<T> zprev = gsl::vector_view_array(&Zprev[j * mn], mn);
+			gsl::vector<T> ztemp = gsl::vector_view_array(&Ztemp[j * mn], mn);
+			gsl::vector<T> z12 = gsl::vector_view_array(&Z12[j * mn], mn);
+			gsl::vector<T> x = gsl::vector_subvector(&z, 0, n);
+			gsl::vector<T> y = gsl::vector_subvector(&z, n, m);
+			gsl::vector<T> x12 = gsl::vector_subvector(&z12, 0, n);
+			gsl::vector<T> y12 = gsl::vector_subvector(&z12, n, m);
+
+			gsl::vector_memcpy(&zprev, &z);
+			gsl::blas_axpy(-kOne, &zt, &z);
+			ProxEval(c.g, rho, x.data, x12.data);
+			ProxEval(c.f, rho, y.data, y12.data);
+
+			gsl::blas_axpy(-kOne, &z12, &z);
+			gsl::blas_dot(&z, &z12, &c.gap);
+			c.gap = std::abs(c.gap);
+			c.eps_gap = std::sqrt(static_cast<T>(m + n)) * _abs_tol[c.lane]
+					+ _rel_tol[c.lane] * gsl::blas_nrm2(&z) * gsl::blas_nrm2(&z12);
+			c.eps_pri = std::sqrt(static_cast<T>(m)) * _abs_tol[c.lane]
+					+ _rel_tol[c.lane] * gsl::blas_nrm2(&y12);
+			c.eps_dua = rho * (std::sqrt(static_cast<T>(n)) * _abs_tol[c.lane]
+					+ _rel_tol[c.lane] * gsl::blas_nrm2(&x));
+
+			gsl::vector_memcpy(&ztemp, &zt);
+			gsl::blas_axpy(kAlpha, &z12, &ztemp);
+			gsl::blas_axpy(kOne - kAlpha, &zprev, &ztemp);
+		}
+
+		// Project onto y = Ax, all chains at once.
+		P.ProjectBlock(&Ztemp[0], &Ztemp[n], kOne, &Z[0], &Z[n], active, mn);
+
+		// Exact residuals |A x12 - y12| and |A'(y12 + yt - yprev) + x12 + xt - xprev|.
+		memcpy(&Ztemp[0], &Z12[0], active * mn * sizeof(T));
+		A.MulBlock('n', kOne, &Z12[0], mn, -kOne, &Ztemp[n], mn, active);
+		for (size_t j = 0; j < active; ++j) {
+			Chain &c = chains[j];
+			gsl::vector<T> ztemp = gsl::vector_view_array(&Ztemp[j * mn], mn);
+			gsl::vector<T> ytemp = gsl::vector_subvector(&ztemp, n, m);
+			c.nrm_r = gsl::blas_nrm2(&ytemp);
+			for (size_t i = 0; i < mn; ++i)
+				ztemp.data[i] = Z12[j * mn + i] + ZT[j * mn + i] - Zprev[j * mn + i];
+		}
+		A.MulBlock('t', kOne, &Ztemp[n], mn, kOne, &Ztemp[0], mn, active);
+
+		for (size_t j = 0; j < active; ++j) {
+			Chain &c = chains[j];
+			size_t lane = c.lane;
+			gsl::vector<T> z = gsl::vector_view_array(&Z[j * mn], mn);
+			gsl::vector<T> zt = gsl::vector_view_array(&ZT[j * mn], mn);
+			gsl::vector<T> zprev = gsl::vector_view_array(&Zprev[j * mn], mn);
+			gsl::vector<T> ztemp = gsl::vector_view_array(&Ztemp[j * mn], mn);
+			gsl::vector<T> z12 = gsl::vector_view_array(&Z12[j * mn], mn);
+			gsl::vector<T> xtemp = gsl::vector_subvector(&ztemp, 0, n);
+			c.nrm_s = _rho[lane] * gsl::blas_nrm2(&xtemp);
+
+			bool stopearly = false;
+			if (_solver._stop_early)
+				stopearly = c.history.Push(k, c.nrm_r, c.nrm_s);
+			bool converged = stopearly
+					|| (c.nrm_r < c.eps_pri && c.nrm_s < c.eps_dua
+							&& (!_solver._gap_stop || c.gap < c.eps_gap));
+			if ((verbose > 2 && k % 10 == 0) || (verbose > 1 && k % 100 == 0)
+					|| (verbose > 1 && converged)) {
+				Printf("%5d lane %zu : %.2e  %.2e  %.2e  %.2e  %.2e  %.2e\n", k,
+						lane, c.nrm_r, c.eps_pri, c.nrm_s, c.eps_dua, c.gap,
+						c.eps_gap);
+			}
+
+			if (!converged && !timeup && k < max_iter - 1) {
+				// Update dual variable.
+				gsl::blas_axpy(kAlpha, &z12, &zt);
+				gsl::blas_axpy(kOne - kAlpha, &zprev, &zt);
+				gsl::blas_axpy(-kOne, &z, &zt);
+
+				// Rescale rho.
+				if (_solver._adaptive_rho) {
+					T rho = _rho[lane];
+					c.rho_adapter.Update(k, c.nrm_r, c.nrm_s, c.eps_pri,
+							c.eps_dua, verbose, &_rho[lane], &zt);
+					if (_rho[lane] != rho)
+						c.anderson.Reset();
+				}
+
+				// Extrapolate (z, zt).
+				c.anderson.Step(z.data, zt.data);
+				continue;
+			}
+
+			// Done: output as Solve's, and the lane keeps (zprev, zt) for next time.
+			c.done = true;
+			converged_all = converged_all && converged;
+			_final_iter[lane] = k;
+			_nrm_r[lane] = c.nrm_r;
+			_nrm_s[lane] = c.nrm_s;
+			if (verbose > 0)
+				Printf("Lane %zu: %s, Iter %u\n", lane,
+						H2O4GPUStatusString(
+								converged ? H2O4GPU_SUCCESS :
+								timeup ? H2O4GPU_TIME_LIMIT : H2O4GPU_MAX_ITER).c_str(),
+						k);
+			gsl::vector<T> x12 = gsl::vector_subvector(&z12, 0, n);
+			gsl::vector<T> ytemp = gsl::vector_subvector(&ztemp, n, m);
+			gsl::vector_memcpy(&ztemp, &zt);
+			gsl::blas_axpy(-kOne, &zprev, &ztemp);
+			gsl::blas_axpy(kOne, &z12, &ztemp);
+			gsl::blas_scal(-_rho[lane], &ztemp);
+			gsl::vector_mul(&ytemp, &d);
+			gsl::vector_memcpy(&_lambda[lane * m], &ytemp);
+
+			T *trainPreds = &_trainPreds[lane * m];
+			A.Mul('n', static_cast<T>(1.0), x12.data, static_cast<T>(0.),
+					trainPreds);
+			for (size_t i = 0; i < m; i++)
+				trainPreds[i] /= d.data[i];
+			gsl::vector_mul(&x12, &e);
+			gsl::vector_memcpy(&_x[lane * n], &x12);
+			if (mvalid > 0)
+				A.Mulvalid('n', static_cast<T>(1.), &_x[lane * n],
+						static_cast<T>(0.), &_validPreds[lane * mvalid]);
+
+			memcpy(&_z[lane * mn], zprev.data, mn * sizeof(T));
+			memcpy(&_zt[lane * mn], zt.data, mn * sizeof(T));
+		}
+
+		// Converged chains leave the block.
+		size_t next = 0;
+		for (size_t j = 0; j < active; ++j) {
+			if (chains[j].done)
+				continue;
+			if (next != j) {
+				std::swap(chains[next], chains[j]);
+				memcpy(&Z[next * mn], &Z[j * mn], mn * sizeof(T));
+				memcpy(&ZT[next * mn], &ZT[j * mn], mn * sizeof(T));
+			}
+			++next;
+		}
+		active = next;
+	}
+
+	return converged_all ? H2O4GPU_SUCCESS :
+			timeup ? H2O4GPU_TIME_LIMIT : H2O4GPU_MAX_ITER;
+}
+
 // Explicit template instantiation.
 #if !defined(H2O4GPU_DOUBLE) || H2O4GPU_DOUBLE==1
 template class H2O4GPU<double, MatrixDense<double>,
@@ -590,6 +1070,7 @@ template class H2O4GPU<double, MatrixDense<double>,
 		ProjectorCgls<double, MatrixDense<double> > > ;
 template class H2O4GPU<double, MatrixSparse<double>,
 		ProjectorCgls<double, MatrixSparse<double> > > ;
+template class H2O4GPUBlock<double> ;
 #endif
 
 #if !defined(H2O4GPU_SINGLE) || H2O4GPU_SINGLE==1
@@ -599,6 +1080,7 @@ template class H2O4GPU<float, MatrixDense<float>,
 		ProjectorCgls<float, MatrixDense<float> > > ;
 template class H2O4GPU<float, MatrixSparse<float>,
 		ProjectorCgls<float, MatrixSparse<float> > > ;
+template class H2O4GPUBlock<float> ;
 #endif
 
 }  // namespace h2o4gpu
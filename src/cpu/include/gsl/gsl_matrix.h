@@ -111,6 +111,25 @@ matrix<T, O> matrix_view_array(T *base, size_t n1, size_t n2) {
   return mat;
 }
 
+// k vectors of length len, vector j at base + j * ld, viewed as the columns
+// of a len x k matrix (CblasColMajor) or the rows of a k x len one
+// (CblasRowMajor), so one gemm or trsm works on all of them
+template <typename T, CBLAS_ORDER O>
+matrix<T, O> matrix_view_vectors(const T *base, size_t len, size_t k,
+                                 size_t ld) {
+  matrix<T, O> mat;
+  if (O == CblasRowMajor) {
+    mat.size1 = k;
+    mat.size2 = len;
+  } else {
+    mat.size1 = len;
+    mat.size2 = k;
+  }
+  mat.tda = ld;
+  mat.data = const_cast<T*>(base);
+  return mat;
+}
+
 template <typename T, CBLAS_ORDER O>
 inline T matrix_get(const matrix<T, O> *A, size_t i, size_t j) {
   if (O == CblasRowMajor)
@@ -397,6 +397,7 @@ MatrixDense<T>::MatrixDense(int sharedA, int me, int wDev, const MatrixDense<T>&
       _vdatay = A._vdatay;
       _weight = A._weight;
       _de = A._de; // now share de as never gets modified after original A was processed
+      this->_done_equil = A._done_equil; // so solvers on other threads don't equilibrate the shared _data again
       //      Init();
       //      this->_done_equil=1;
     }
@@ -465,6 +466,11 @@ MatrixDense<T>::MatrixDense(const MatrixDense<T>& A)
 template <typename T>
 MatrixDense<T>::~MatrixDense() {
 
+  if(_datacopy){
+    delete [] _datacopy;
+    _datacopy = 0;
+  }
+
   if(0){
     CpuData<T> *info = reinterpret_cast<CpuData<T>*>(this->_info);
     CpuData<T> *infoy = reinterpret_cast<CpuData<T>*>(this->_infoy);
@@ -605,6 +611,43 @@ if (_ord == ROW) {
   return 0;
 }
 
+template <typename T>
+int MatrixDense<T>::MulBlock(char trans, T alpha, const T *x, size_t ldx, T beta, T *y, size_t ldy,
+                             size_t k) const {
+  DEBUG_EXPECT(this->_done_init);
+  if (!this->_done_init)
+    return 1;
+  // one vector is faster with a matrix-vector product
+  if (k == 1)
+    return Mul(trans, alpha, x, beta, y);
+
+  bool notrans = (OpToCblasOp(trans) == CblasNoTrans);
+  size_t xlen = (notrans ? this->_n : this->_m);
+  size_t ylen = (notrans ? this->_m : this->_n);
+
+  if (_ord == ROW) {
+    // the vectors are the rows of X and Y, so Y = X op(A)^T
+    const gsl::matrix<T, CblasRowMajor> A =
+        gsl::matrix_view_array<T, CblasRowMajor>(_data, this->_m, this->_n);
+    const gsl::matrix<T, CblasRowMajor> X =
+        gsl::matrix_view_vectors<T, CblasRowMajor>(x, xlen, k, ldx);
+    gsl::matrix<T, CblasRowMajor> Y =
+        gsl::matrix_view_vectors<T, CblasRowMajor>(y, ylen, k, ldy);
+    gsl::blas_gemm(CblasNoTrans, (notrans ? CblasTrans : CblasNoTrans),
+        alpha, &X, &A, beta, &Y);
+  } else {
+    const gsl::matrix<T, CblasColMajor> A =
+        gsl::matrix_view_array<T, CblasColMajor>(_data, this->_m, this->_n);
+    const gsl::matrix<T, CblasColMajor> X =
+        gsl::matrix_view_vectors<T, CblasColMajor>(x, xlen, k, ldx);
+    gsl::matrix<T, CblasColMajor> Y =
+        gsl::matrix_view_vectors<T, CblasColMajor>(y, ylen, k, ldy);
+    gsl::blas_gemm(OpToCblasOp(trans), CblasNoTrans, alpha, &A, &X, beta, &Y);
+  }
+
+  return 0;
+}
+
 template <typename T>
 int MatrixDense<T>::Mulvalid(char trans, T alpha, const T *x, T beta, T *y) const {
   DEBUG_EXPECT(this->_done_init);
@@ -643,6 +686,17 @@ template <typename T>
     return(0); // TODO FIXME nothing yet.
   }
 
+template <typename T>
+int MatrixDense<T>::CopyData() {
+  if(_datacopy || !_data)
+    return 0;
+  _datacopy = new T[this->_m * this->_n];
+  ASSERT(_datacopy != 0);
+  memcpy(_datacopy, _data, this->_m * this->_n * sizeof(T));
+  _data = _datacopy;
+  return 0;
+}
+
 template <typename T>
 int MatrixDense<T>::Equil(bool equillocal) {
   //  fprintf(stderr,"In Equil: done_init=%d done_equil=%d\n",this->_done_init,this->_done_equil); fflush(stderr);
@@ -756,10 +810,25 @@ T getVar(size_t len, T *v, T mean) {
   }
   return static_cast<T>(var / (len - 1));
 }
+
+// skewness and kurtosis as the GPU Stats reduction gives them
+template<typename T>
+void getMoments(size_t len, T *v, T mean, T *skew, T *kurt) {
+  double M2 = 0, M3 = 0, M4 = 0;
+  for (size_t i = 0; i < len; ++i) {
+    double d = v[i] - mean;
+    M2 += d * d;
+    M3 += d * d * d;
+    M4 += d * d * d * d;
+  }
+  *skew = static_cast<T>(M2 > 0 ? std::sqrt((double) len) * M3 / std::pow(M2, 1.5) : 0);
+  *kurt = static_cast<T>(M2 > 0 ? len * M4 / (M2 * M2) : 0);
+}
   
 
 template <typename T>
-int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd, T *skew, T *kurt, T &lambda_max0)
+int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd, T *skew, T *kurt, T &lambda_max0, const T *penalty,
+                          bool moments)
 {
   size_t n=this->_n;
   size_t mTrain=this->_m;
@@ -844,18 +913,21 @@ int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd,
   mean[0] = std::accumulate(_datay, _datay+len, T(0)) / len;
   var[0] = getVar(len,_datay, mean[0]);
   sd[0] = std::sqrt(var[0]);
-  skew[0]=0.0; // not implemented
-  kurt[0]=0.0; // not implemented
+  skew[0]=0.0;
+  kurt[0]=0.0;
+  if(moments) getMoments(len, _datay, mean[0], &skew[0], &kurt[0]);
 
-    // Training mean and stddev
+    // Validation mean and stddev
   len=this->_mvalid;
-  min[1]=*std::min_element(_datay, _datay+len);
-  max[1]=*std::max_element(_datay, _datay+len);
-  mean[1] = std::accumulate(_vdatay, _vdatay+len, T(0)) / len;
-  var[1] = getVar(len,_vdatay, mean[1]);
-  sd[1] = std::sqrt(var[1]);
-  skew[1]=0.0; // not implemented
-  kurt[1]=0.0; // not implemented
+  min[1]=max[1]=mean[1]=var[1]=sd[1]=skew[1]=kurt[1]=0.0;
+  if(_vdatay!=NULL && len>0){
+    min[1]=*std::min_element(_vdatay, _vdatay+len);
+    max[1]=*std::max_element(_vdatay, _vdatay+len);
+    mean[1] = std::accumulate(_vdatay, _vdatay+len, T(0)) / len;
+    var[1] = getVar(len,_vdatay, mean[1]);
+    sd[1] = std::sqrt(var[1]);
+    if(moments) getMoments(len, _vdatay, mean[1], &skew[1], &kurt[1]);
+  }
 
   // set lambda max 0 (i.e. base lambda_max)
   lambda_max0 = static_cast<T>(0.0);
@@ -863,7 +935,7 @@ int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd,
     T u = 0;
     if(_weight!=NULL){
       for (size_t i = 0; i < mTrain; ++i) { //row
-        u += _weight[i] * _data[i * n + j] * (_datay[i] - intercept*mean[0]);
+        u += _weight[i] * _data[_ord == ROW ? i * n + j : j * mTrain + i] * (_datay[i] - intercept*mean[0]);
         if(!std::isfinite(u)){
         	//fprintf(stderr,"i=%d weight=%g data=%g datay=%g intercept=%d mean=%g\n",i,_weight[i], _data[i * n + j],_datay[i],intercept,mean[0]);
         	fprintf(stderr,"Bad product in calculating u\n");
@@ -874,10 +946,11 @@ int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd,
     }
     else{
       for (size_t i = 0; i < mTrain; ++i) { //row
-        u += _data[i * n + j] * (_datay[i] - intercept*mean[0]);
+        u += _data[_ord == ROW ? i * n + j : j * mTrain + i] * (_datay[i] - intercept*mean[0]);
       }
     }
     //fprintf(stderr,"j=%zu lambda_max0: %g u=%g intercept=%d mean=%g\n",j,lambda_max0,u,intercept,mean[0]); fflush(stderr);
+    if(penalty!=NULL) u /= penalty[j];
     lambda_max0 = static_cast<T>(std::max(lambda_max0, std::abs(u)));
   }
   fprintf(stderr,"lambda_max0=%g\n",lambda_max0); fflush(stderr);
@@ -891,6 +964,41 @@ int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd,
   return 0;
 }
 
+template <typename T>
+int MatrixDense<T>::ColSd(int intercept, T *colsd) const
+{
+  size_t n=this->_n;
+  size_t m=this->_m;
+
+  double sumw = 0;
+  for (size_t i = 0; i < m; ++i)
+    sumw += (_weight != NULL ? _weight[i] : 1);
+  if(sumw <= 0) sumw = 1;
+
+#ifdef _OPENMP
+#pragma omp parallel for
+#endif
+  for (size_t j = 0; j < n; ++j) { //col
+    double mean = 0, var = 0;
+    if(intercept){
+      for (size_t i = 0; i < m; ++i) { //row
+        double x = (_ord == ROW ? _data[i * n + j] : _data[j * m + i]);
+        mean += (_weight != NULL ? _weight[i] : 1) * x;
+      }
+      mean /= sumw;
+    }
+    for (size_t i = 0; i < m; ++i) { //row
+      double x = (_ord == ROW ? _data[i * n + j] : _data[j * m + i]) - mean;
+      var += (_weight != NULL ? _weight[i] : 1) * x * x;
+    }
+    var /= sumw;
+    colsd[j] = static_cast<T>(var > 0 ? std::sqrt(var) : 1);
+  }
+  if(intercept) colsd[n - 1] = static_cast<T>(1);
+
+  return 0;
+}
+
   
 
 ////////////////////////////////////////////////////////////////////////////////
@@ -963,21 +1071,35 @@ template class MatrixDense<float>;
 #endif
 
 
+// Copy an m x n matrix into an m x (n+intercept) one, setting the extra last column to ones
 template <typename T>
-int makePtr_dense(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, char ord, const T *data, const T *datay, const T *vdata, const T *vdatay, const T *weight,T **_data, T **_datay, T **_vdata, T **_vdatay, T **_weight){
-
-  if(sharedA!=0){ // can't because _data contents get modified, unless do sharedA case and Equil is processed locally before given to other threads
-    *_data = const_cast<T*>(data);
-    *_datay = const_cast<T*>(datay);
-    *_vdata = const_cast<T*>(vdata);
-    *_vdatay = const_cast<T*>(vdatay);
-    *_weight = const_cast<T*>(weight);
+static void copyAppendOnes(char ord, size_t m, size_t n, int intercept, const T *src, T *dst){
+  if(!intercept){
+    memcpy(dst, src, m * n * sizeof(T));
+  }
+  else if(ord == 'r'){
+    for(size_t i = 0; i < m; ++i){
+      memcpy(dst + i * (n + 1), src + i * n, n * sizeof(T));
+      dst[i * (n + 1) + n] = static_cast<T>(1);
+    }
+  }
+  else{
+    memcpy(dst, src, m * n * sizeof(T));
+    std::fill(dst + m * n, dst + m * (n + 1), static_cast<T>(1));
   }
-  else{ // if sharedA==0, then assume need to make copy of data in case gets modified by Equil
+}
+
+template <typename T>
+int makePtr_dense(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, char ord, int intercept, const T *data, const T *datay, const T *vdata, const T *vdatay, const T *weight,T **_data, T **_datay, T **_vdata, T **_vdatay, T **_weight){
+
+  // Always copy: the caller frees these with modelfree1 (new[] buffers, which MatrixDense never frees), and Equil modifies _data in place.  For sharedA!=0 the fit equilibrates one copy of its own that all threads share, so this one stays raw for later fits and predictions.
+  // With intercept, data and vdata have n columns and the copies get an extra column of ones, so the caller never has to build one.
+  size_t nA = n + (intercept ? 1 : 0);
+  {
     if(data){
-      *_data = new T[m * n];
+      *_data = new T[m * nA];
       ASSERT(*_data != 0);
-      memcpy(*_data, data, m * n * sizeof(T));
+      copyAppendOnes(ord, m, n, intercept, data, *_data);
     }
     else *_data=NULL;
 
@@ -989,9 +1111,9 @@ int makePtr_dense(int sharedA, int me, int wDev, size_t m, size_t n, size_t mVal
     else *_datay=NULL;
 
     if(vdata){
-      *_vdata = new T[mValid * n];
+      *_vdata = new T[mValid * nA];
       ASSERT(*_vdata != 0);
-      memcpy(*_vdata, vdata, mValid * n * sizeof(T));
+      copyAppendOnes(ord, mValid, n, intercept, vdata, *_vdata);
     }
     else *_vdata=NULL;
 
@@ -1013,23 +1135,29 @@ int makePtr_dense(int sharedA, int me, int wDev, size_t m, size_t n, size_t mVal
       std::fill(static_cast<T*>(*_weight), static_cast<T*>(*_weight) + m,1.0); // unity weights by default
     }
   }
+  registerUpload(*_data);
+  registerUpload(*_datay);
+  registerUpload(*_vdata);
+  registerUpload(*_vdatay);
+  registerUpload(*_weight);
   return(0);
 }
 
 
   template
-  int makePtr_dense<double>(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, char ord,
+  int makePtr_dense<double>(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, char ord, int intercept,
                                      const double *data, const double *datay, const double *vdata, const double *vdatay, const double *weight,
                                      double **_data, double **_datay, double **_vdata, double **_vdatay, double **_weight);
   template
-  int makePtr_dense<float>(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, char ord,
+  int makePtr_dense<float>(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, char ord, int intercept,
                                     const float *data, const float *datay, const float *vdata, const float *vdatay, const float *weight,
                                     float **_data, float **_datay, float **_vdata, float **_vdatay, float **_weight);
 
   template <typename T>
   int modelFree1(T *aptr){
     if(aptr!=NULL){
-      //      delete aptr; // for now, freed during ~
+      unregisterUpload(aptr);
+      delete [] aptr; // from makePtr_dense, not freed during ~
     }
     return(0);
   }
@@ -1046,14 +1174,14 @@ int modelfree1_double(double *aptr){
   return h2o4gpu::modelFree1<double>(aptr);
 }
 
-  int make_ptr_double(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord,
+  int make_ptr_double(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord, int intercept,
                       const double* trainX, const double* trainY, const double* validX, const double* validY, const double *weight,
                       double**a, double**b, double**c, double**d, double **e) {
-    return h2o4gpu::makePtr_dense<double>(sharedA, sourceme, sourceDev, mTrain, n, mValid, ord, trainX, trainY, validX, validY, weight, a, b, c, d, e);
+    return h2o4gpu::makePtr_dense<double>(sharedA, sourceme, sourceDev, mTrain, n, mValid, ord, intercept, trainX, trainY, validX, validY, weight, a, b, c, d, e);
   }
-  int make_ptr_float(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord,
+  int make_ptr_float(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord, int intercept,
                      const float* trainX, const float* trainY, const float* validX, const float* validY, const float *weight,
                      float**a, float**b, float**c, float**d, float **e) {
-    return h2o4gpu::makePtr_dense<float>(sharedA, sourceme, sourceDev, mTrain, n, mValid, ord, trainX, trainY, validX, validY, weight, a, b, c, d, e);
+    return h2o4gpu::makePtr_dense<float>(sharedA, sourceme, sourceDev, mTrain, n, mValid, ord, intercept, trainX, trainY, validX, validY, weight, a, b, c, d, e);
   }
 
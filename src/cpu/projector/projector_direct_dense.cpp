@@ -3,6 +3,13 @@
  */
 #include <algorithm>
 #include <cstring>
+#include <list>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <tuple>
+#include <utility>
+#include <vector>
 
 #include "gsl/cblas.h"
 #include "gsl/gsl_blas.h"
@@ -17,12 +24,154 @@ namespace h2o4gpu {
 
 namespace {
 
+// Number of shifts s whose factorization of AA + s*I is kept per matrix.
+const size_t kFactorCacheSize = 4;
+
+// Gram matrix AA of one dense matrix and Cholesky factors of AA + s*I for
+// the most recently used s.  Shared by every projector over the same matrix
+// data (e.g. all threads reading one shared_a matrix), so it is only
+// computed once however many solvers use it.
+template<typename T>
+struct DirectFactors {
+  std::mutex lock;
+  bool done_gram;
+  std::vector<T> AA;
+  std::list<std::pair<T, std::shared_ptr<const std::vector<T> > > > L; // most recently used first
+  DirectFactors() : done_gram(false) { }
+};
+
 template<typename T>
 struct CpuData {
-  T *AA, *L, s;
-  CpuData() : AA(0), L(0), s(static_cast<T>(-1.)) { }
+  std::shared_ptr<DirectFactors<T> > factors;
+  std::shared_ptr<const std::vector<T> > L; // factor for s
+  T s;
+  CpuData() : s(static_cast<T>(-1.)) { }
 };
 
+// Factors for the matrix at data, created on first use and dropped once no
+// projector holds them (so a later matrix reusing the memory starts afresh)
+template<typename T>
+std::shared_ptr<DirectFactors<T> > FactorsFor(const T *data, size_t m,
+                                              size_t n, int ord) {
+  typedef std::tuple<const T*, size_t, size_t, int> Key;
+  static std::mutex registry_lock;
+  static std::map<Key, std::weak_ptr<DirectFactors<T> > > registry;
+
+  std::lock_guard<std::mutex> guard(registry_lock);
+  for (auto it = registry.begin(); it != registry.end();) {
+    if (it->second.expired())
+      it = registry.erase(it);
+    else
+      ++it;
+  }
+  std::weak_ptr<DirectFactors<T> > &entry = registry[Key(data, m, n, ord)];
+  std::shared_ptr<DirectFactors<T> > factors = entry.lock();
+  if (!factors) {
+    factors = std::make_shared<DirectFactors<T> >();
+    entry = factors;
+  }
+  return factors;
+}
+
+// L := chol(AA + s*I), lower triangle
+template <typename T, CBLAS_ORDER O>
+void FactorShifted(const T *AA_data, T s, size_t min_dim, T *L_data) {
+  const gsl::matrix<T, O> AA = gsl::matrix_view_array<T, O>
+      (AA_data, min_dim, min_dim);
+  gsl::matrix<T, O> L = gsl::matrix_view_array<T, O>
+      (L_data, min_dim, min_dim);
+  gsl::matrix_memcpy(&L, &AA); // originally from AA := A*A'
+  gsl::vector<T> diagL = gsl::matrix_diagonal(&L);
+  gsl::vector_add_constant(&diagL, s);
+  gsl::linalg_cholesky_decomp(&L);
+}
+
+// Cached factor of AA + s*I, computed (and the least recently used one
+// dropped) if s is new
+template <typename T>
+std::shared_ptr<const std::vector<T> > FactorFor(DirectFactors<T> *factors,
+                                                 T s, size_t min_dim,
+                                                 bool row_major) {
+  std::lock_guard<std::mutex> guard(factors->lock);
+  for (auto it = factors->L.begin(); it != factors->L.end(); ++it) {
+    if (it->first == s) {
+      factors->L.splice(factors->L.begin(), factors->L, it);
+      return it->second;
+    }
+  }
+  std::shared_ptr<std::vector<T> > L =
+      std::make_shared<std::vector<T> >(min_dim * min_dim);
+  if (row_major)
+    FactorShifted<T, CblasRowMajor>(&factors->AA[0], s, min_dim, &(*L)[0]);
+  else
+    FactorShifted<T, CblasColMajor>(&factors->AA[0], s, min_dim, &(*L)[0]);
+  factors->L.push_front(std::make_pair(s,
+      std::shared_ptr<const std::vector<T> >(L)));
+  if (factors->L.size() > kFactorCacheSize)
+    factors->L.pop_back();
+  return L;
+}
+
+// W := alpha*op(A)*V + beta*W for the vectors of V and W (views from
+// matrix_view_vectors), which are rows if row major, so W^T := V^T op(A)^T
+template <typename T, CBLAS_ORDER O>
+void MulVectors(CBLAS_TRANSPOSE_t op, T alpha, const gsl::matrix<T, O> *A,
+                const gsl::matrix<T, O> *V, T beta, gsl::matrix<T, O> *W) {
+  if (O == CblasRowMajor)
+    gsl::blas_gemm(CblasNoTrans, (op == CblasNoTrans ? CblasTrans : CblasNoTrans),
+        alpha, V, A, beta, W);
+  else
+    gsl::blas_gemm(op, CblasNoTrans, alpha, A, V, beta, W);
+}
+
+// Solve L*L^T*v = b for every vector of B in place
+template <typename T, CBLAS_ORDER O>
+void CholeskySolveVectors(const gsl::matrix<T, O> *L, gsl::matrix<T, O> *B) {
+  if (O == CblasRowMajor) {
+    // B^T := B^T (L L^T)^-1 = B^T L^-T L^-1
+    gsl::blas_trsm(CblasRight, CblasLower, CblasTrans, CblasNonUnit,
+        static_cast<T>(1.), L, B);
+    gsl::blas_trsm(CblasRight, CblasLower, CblasNoTrans, CblasNonUnit,
+        static_cast<T>(1.), L, B);
+  } else {
+    gsl::blas_trsm(CblasLeft, CblasLower, CblasNoTrans, CblasNonUnit,
+        static_cast<T>(1.), L, B);
+    gsl::blas_trsm(CblasLeft, CblasLower, CblasTrans, CblasNonUnit,
+        static_cast<T>(1.), L, B);
+  }
+}
+
+// Project's steps for k pairs ld apart (x, y already holding x0, y0)
+template <typename T, CBLAS_ORDER O>
+void ProjectVectors(const T *A_data, size_t m, size_t n, const T *L_data,
+                    const T *y0, T *x, T *y, size_t k, size_t ld) {
+  size_t min_dim = std::min(m, n);
+  const gsl::matrix<T, O> A = gsl::matrix_view_array<T, O>(A_data, m, n);
+  const gsl::matrix<T, O> L =
+      gsl::matrix_view_array<T, O>(L_data, min_dim, min_dim);
+  gsl::matrix<T, O> X = gsl::matrix_view_vectors<T, O>(x, n, k, ld);
+  gsl::matrix<T, O> Y = gsl::matrix_view_vectors<T, O>(y, m, k, ld);
+
+  if (m > n) {
+    // 1*A'*y + 1*x -> x, solve, 1*A*x + 0*y -> y
+    MulVectors(CblasTrans, static_cast<T>(1.), &A, &Y, static_cast<T>(1.), &X);
+    CholeskySolveVectors(&L, &X);
+    MulVectors(CblasNoTrans, static_cast<T>(1.), &A, &X, static_cast<T>(0.),
+        &Y);
+  } else {
+    MulVectors(CblasNoTrans, static_cast<T>(1.), &A, &X, static_cast<T>(-1.),
+        &Y);
+    CholeskySolveVectors(&L, &Y);
+    MulVectors(CblasTrans, static_cast<T>(-1.), &A, &Y, static_cast<T>(1.),
+        &X);
+    for (size_t j = 0; j < k; ++j) {
+      const gsl::vector<T> y0_vec = gsl::vector_view_array(y0 + j * ld, m);
+      gsl::vector<T> y_vec = gsl::vector_view_array(y + j * ld, m);
+      gsl::blas_axpy(static_cast<T>(1.), &y0_vec, &y_vec);
+    }
+  }
+}
+
 }  // namespace
 
 template <typename T, typename M>
@@ -45,16 +194,6 @@ template <typename T, typename M>
 ProjectorDirect<T, M>::~ProjectorDirect() {
   CpuData<T> *info = reinterpret_cast<CpuData<T>*>(this->_info);
 
-  if (info->AA) {
-    delete [] info->AA;
-    info->AA = 0;
-  }
-
-  if (info->L) {
-    delete [] info->L;
-    info->L = 0;
-  }
-
   delete info;
   this->_info = 0;
 }
@@ -70,12 +209,14 @@ int ProjectorDirect<T, M>::Init() {
 
   size_t min_dim = std::min(_A.Rows(), _A.Cols());
 
-  info->AA = new T[min_dim * min_dim];
-  ASSERT(info->AA != 0);
-  info->L = new T[min_dim * min_dim];
-  ASSERT(info->L != 0);
-  memset(info->AA, 0, min_dim * min_dim * sizeof(T));
-  memset(info->L, 0, min_dim * min_dim * sizeof(T));
+  info->factors = FactorsFor(_A.Data(), _A.Rows(), _A.Cols(),
+      static_cast<int>(_A.Order()));
+  // another projector over the same data may already have computed (or be computing) AA
+  std::lock_guard<std::mutex> guard(info->factors->lock);
+  if (info->factors->done_gram)
+    return 0;
+  info->factors->AA.assign(min_dim * min_dim, static_cast<T>(0.));
+  T *AA_data = &info->factors->AA[0];
 
   CBLAS_TRANSPOSE_t op_type = _A.Rows() > _A.Cols() ? CblasTrans : CblasNoTrans;
 
@@ -85,7 +226,7 @@ int ProjectorDirect<T, M>::Init() {
         gsl::matrix_view_array<T, CblasRowMajor>
         (_A.Data(), _A.Rows(), _A.Cols());
     gsl::matrix<T, CblasRowMajor> AA = gsl::matrix_view_array<T, CblasRowMajor>
-        (info->AA, min_dim, min_dim);
+        (AA_data, min_dim, min_dim);
     //C := alpha*A*A' + beta*C
     gsl::blas_syrk(CblasLower, op_type,
         static_cast<T>(1.), &A, static_cast<T>(0.), &AA);
@@ -94,10 +235,11 @@ int ProjectorDirect<T, M>::Init() {
         gsl::matrix_view_array<T, CblasColMajor>
         (_A.Data(), _A.Rows(), _A.Cols());
     gsl::matrix<T, CblasColMajor> AA = gsl::matrix_view_array<T, CblasColMajor>
-        (info->AA, min_dim, min_dim);
+        (AA_data, min_dim, min_dim);
     gsl::blas_syrk(CblasLower, op_type,
         static_cast<T>(1.), &A, static_cast<T>(0.), &AA);
   }
+  info->factors->done_gram = true;
 
   return 0;
 }
@@ -123,21 +265,18 @@ int ProjectorDirect<T, M>::Project(const T *x0, const T *y0, T s, T *x, T *y,
   gsl::vector_memcpy(&x_vec, &x0_vec);
   gsl::vector_memcpy(&y_vec, &y0_vec);
 
+  if (s != info->s || !info->L)
+    info->L = FactorFor(info->factors.get(), s, min_dim,
+        _A.Order() == MatrixDense<T>::ROW);
+  const T *L_data = &(*info->L)[0];
+
   if (_A.Order() == MatrixDense<T>::ROW) {
     const gsl::matrix<T, CblasRowMajor> A =
         gsl::matrix_view_array<T, CblasRowMajor>
         (_A.Data(), _A.Rows(), _A.Cols());
-    gsl::matrix<T, CblasRowMajor> AA = gsl::matrix_view_array<T, CblasRowMajor>
-        (info->AA, min_dim, min_dim);
-    gsl::matrix<T, CblasRowMajor> L = gsl::matrix_view_array<T, CblasRowMajor>
-        (info->L, min_dim, min_dim);
-
-    if (s != info->s) {
-      gsl::matrix_memcpy(&L, &AA); // originally from AA := A*A'
-      gsl::vector<T> diagL = gsl::matrix_diagonal(&L);
-      gsl::vector_add_constant(&diagL, s);
-      gsl::linalg_cholesky_decomp(&L);
-    }
+    const gsl::matrix<T, CblasRowMajor> L =
+        gsl::matrix_view_array<T, CblasRowMajor>(L_data, min_dim, min_dim);
+
     if (_A.Rows() > _A.Cols()) {
       // 1*A*y + 1*x -> x
       gsl::blas_gemv(CblasTrans, static_cast<T>(1.), &A, &y_vec,
@@ -159,17 +298,9 @@ int ProjectorDirect<T, M>::Project(const T *x0, const T *y0, T s, T *x, T *y,
     const gsl::matrix<T, CblasColMajor> A =
         gsl::matrix_view_array<T, CblasColMajor>
         (_A.Data(), _A.Rows(), _A.Cols());
-    gsl::matrix<T, CblasColMajor> AA = gsl::matrix_view_array<T, CblasColMajor>
-        (info->AA, min_dim, min_dim);
-    gsl::matrix<T, CblasColMajor> L = gsl::matrix_view_array<T, CblasColMajor>
-        (info->L, min_dim, min_dim);
-
-    if (s != info->s) {
-      gsl::matrix_memcpy(&L, &AA);
-      gsl::vector<T> diagL = gsl::matrix_diagonal(&L);
-      gsl::vector_add_constant(&diagL, s);
-      gsl::linalg_cholesky_decomp(&L);
-    }
+    const gsl::matrix<T, CblasColMajor> L =
+        gsl::matrix_view_array<T, CblasColMajor>(L_data, min_dim, min_dim);
+
     if (_A.Rows() > _A.Cols()) {
       gsl::blas_gemv(CblasTrans, static_cast<T>(1.), &A, &y_vec,
           static_cast<T>(1.), &x_vec);
@@ -196,6 +327,44 @@ int ProjectorDirect<T, M>::Project(const T *x0, const T *y0, T s, T *x, T *y,
   return 0;
 }
 
+template <typename T, typename M>
+int ProjectorDirect<T, M>::ProjectBlock(const T *x0, const T *y0, T s, T *x,
+                                        T *y, size_t k, size_t ld) {
+  DEBUG_EXPECT(this->_done_init);
+  if (!this->_done_init || s < static_cast<T>(0.))
+    return 1;
+  if (k == 0)
+    return 0;
+  // one vector is faster with matrix-vector products
+  if (k == 1)
+    return Project(x0, y0, s, x, y, static_cast<T>(0.));
+
+  CpuData<T> *info = reinterpret_cast<CpuData<T>*>(this->_info);
+
+  size_t min_dim = std::min(_A.Rows(), _A.Cols());
+
+  // Set (x, y) = (x0, y0).
+  for (size_t j = 0; j < k; ++j) {
+    memcpy(x + j * ld, x0 + j * ld, _A.Cols() * sizeof(T));
+    memcpy(y + j * ld, y0 + j * ld, _A.Rows() * sizeof(T));
+  }
+
+  if (s != info->s || !info->L)
+    info->L = FactorFor(info->factors.get(), s, min_dim,
+        _A.Order() == MatrixDense<T>::ROW);
+  const T *L_data = &(*info->L)[0];
+
+  if (_A.Order() == MatrixDense<T>::ROW)
+    ProjectVectors<T, CblasRowMajor>(_A.Data(), _A.Rows(), _A.Cols(), L_data,
+        y0, x, y, k, ld);
+  else
+    ProjectVectors<T, CblasColMajor>(_A.Data(), _A.Rows(), _A.Cols(), L_data,
+        y0, x, y, k, ld);
+
+  info->s = s;
+  return 0;
+}
+
 #if !defined(H2O4GPU_DOUBLE) || H2O4GPU_DOUBLE==1
 template class ProjectorDirect<double, MatrixDense<double> >;
 #endif
@@ -67,9 +67,9 @@ H2O4GPU<T, M, P>::H2O4GPU(int sharedA, int me, int wDev, const M &A) :
 				static_cast<T>(0.)), _trainPreds(0), _validPreds(0), _xp(0), _trainPredsp(
 				0), _validPredsp(0), _trainerror(0), _validerror(0), _trainmean(
 				0), _validmean(0), _trainstddev(0), _validstddev(0), _final_iter(
-				0), _abs_tol(static_cast<T>(kAbsTol)), _rel_tol(
+				0), _nrm_r(0), _nrm_s(0), _abs_tol(static_cast<T>(kAbsTol)), _rel_tol(
 				static_cast<T>(kRelTol)), _max_iter(kMaxIter), _stop_early(1), _stop_early_error_fraction(
-				1.0), _init_iter(kInitIter), _verbose(kVerbose), _adaptive_rho(
+				1.0), _deadline(0), _init_iter(kInitIter), _verbose(kVerbose), _anderson_mem(kAndersonMem), _adaptive_rho(
 				kAdaptiveRho), _equil(kEquil), _gap_stop(kGapStop), _init_x(
 				false), _init_lambda(false), _nDev(1), //FIXME - allow larger comm groups
 		_wDev(wDev)
@@ -98,9 +98,9 @@ H2O4GPU<T, M, P>::H2O4GPU(const M &A) :
 				static_cast<T>(0.)), _trainPreds(0), _validPreds(0), _xp(0), _trainPredsp(
 				0), _validPredsp(0), _trainerror(0), _validerror(0), _trainmean(
 				0), _validmean(0), _trainstddev(0), _validstddev(0), _final_iter(
-				0), _abs_tol(static_cast<T>(kAbsTol)), _rel_tol(
+				0), _nrm_r(0), _nrm_s(0), _abs_tol(static_cast<T>(kAbsTol)), _rel_tol(
 				static_cast<T>(kRelTol)), _max_iter(kMaxIter), _stop_early(1), _stop_early_error_fraction(
-				1.0), _init_iter(kInitIter), _verbose(kVerbose), _adaptive_rho(
+				1.0), _deadline(0), _init_iter(kInitIter), _verbose(kVerbose), _anderson_mem(kAndersonMem), _adaptive_rho(
 				kAdaptiveRho), _equil(kEquil), _gap_stop(kGapStop), _init_x(
 				false), _init_lambda(false), _nDev(1), //FIXME - allow larger comm groups
 		_wDev(_A._wDev)
@@ -416,7 +416,7 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 	T sqrtmn_atol = std::sqrt(static_cast<T>(m + n)) * _abs_tol;
 	T delta = kDeltaMin, xi = static_cast<T>(1.0);
 	unsigned int k = 0u, kd = 0u, ku = 0u;
-	bool converged = false;
+	bool converged = false, timeup = false;
 	T nrm_r, nrm_s, gap, eps_gap, eps_pri, eps_dua;
 
 	// Stop early setup
@@ -586,8 +586,9 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 			fflush(stdout);
 		}
 
-		// Break if converged or there are nans
-		if (converged || k == _max_iter - 1) { // || cml::vector_any_isnan(&zt))
+		// Break if converged, out of time or there are nans
+		timeup = _deadline > 0 && timer<double>() > _deadline;
+		if (converged || timeup || k == _max_iter - 1) { // || cml::vector_any_isnan(&zt))
 			_final_iter = k;
 #ifdef USE_NVTX
 			POP_RANGE(mystring,Step,1); // pop at end of loop iteration
@@ -699,7 +700,9 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 
 	// Check status
 	H2O4GPUStatus status;
-	if (!converged && k == _max_iter - 1)
+	if (!converged && timeup)
+		status = H2O4GPU_TIME_LIMIT;
+	else if (!converged && k == _max_iter - 1)
 		status = H2O4GPU_MAX_ITER;
 	else if (!converged && k < _max_iter - 1)
 		status = H2O4GPU_NAN_FOUND;
@@ -708,6 +711,8 @@ H2O4GPUStatus H2O4GPU<T, M, P>::Solve(const std::vector<FunctionObj<T> > &f,
 
 	// Get run time
 	_time = static_cast<T>(timer<double>() - t0);
+	_nrm_r = nrm_r;
+	_nrm_s = nrm_s;
 
 	// Print summary
 	if (_verbose > 0) {
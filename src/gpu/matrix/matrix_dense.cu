@@ -29,7 +29,11 @@
 #include <thrust/advance.h>
 #include <cmath>
 #include <limits>
+#include <vector>
 #include <thrust/fill.h>
+#include <thrust/iterator/counting_iterator.h>
+#include <thrust/iterator/permutation_iterator.h>
+#include <thrust/iterator/transform_iterator.h>
 #include "../include/cuda_utils.h"
 
 namespace h2o4gpu {
@@ -639,6 +643,12 @@ MatrixDense<T>::~MatrixDense() {
   checkwDev(_wDev);
   CUDACHECK(cudaSetDevice(_wDev));
 
+  if(_datacopy){
+    cudaFree(_datacopy);
+    _datacopy = 0;
+    DEBUG_CUDA_CHECK_ERR();
+  }
+
   if(0){
     GpuData<T> *info = reinterpret_cast<GpuData<T>*>(this->_info);
     GpuData<T> *infoy = reinterpret_cast<GpuData<T>*>(this->_infoy);
@@ -1425,6 +1435,17 @@ int MatrixDense<T>::svd1(void) {
   return 0;
 }
 
+template <typename T>
+int MatrixDense<T>::CopyData() {
+  if(_datacopy || !_data)
+    return 0;
+  CUDACHECK(cudaSetDevice(_wDev));
+  CUDACHECK(cudaMalloc(&_datacopy, this->_m * this->_n * sizeof(T)));
+  CUDACHECK(cudaMemcpy(_datacopy, _data, this->_m * this->_n * sizeof(T), cudaMemcpyDeviceToDevice));
+  _data = _datacopy;
+  return 0;
+}
+
 // Equilibration (precondition) matrix using Sinkhorn Knopp method wrapped to allow any norm
 // See https://arxiv.org/pdf/1610.03871.pdf for more information
 template <typename T>
@@ -1620,6 +1641,10 @@ struct summary_stats_binary_op
                                    const summary_stats_data<T>&,
                                    summary_stats_data<T> >
 {
+  bool moments; // also accumulate M3 and M4 (for skewness and kurtosis)
+
+  summary_stats_binary_op(bool moments = true) : moments(moments) {}
+
   __host__ __device__
   summary_stats_data<T> operator()(const summary_stats_data<T>& x, const summary_stats_data <T>& y) const
   {
@@ -1645,6 +1670,11 @@ struct summary_stats_binary_op
     result.M2  = x.M2 + y.M2;
     result.M2 += delta2 * x.n * y.n / n;
 
+    if (!moments) {
+      result.M3 = result.M4 = 0;
+      return result;
+    }
+
     result.M3  = x.M3 + y.M3;
     result.M3 += delta3 * x.n * y.n * (x.n - y.n) / n2;
     result.M3 += (T) 3.0 * delta * (x.n * y.M2 - y.n * x.M2) / n;
@@ -1686,7 +1716,8 @@ struct isnan_test {
 
 // check properties of input data
 template <typename T>
-int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd, T *skew, T *kurt, T &lambda_max0)
+int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd, T *skew, T *kurt, T &lambda_max0, const T *penalty,
+                          bool moments)
 {
   CUDACHECK(cudaSetDevice(_wDev));
 
@@ -1746,7 +1777,7 @@ int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd,
 
   // setup arguments
   summary_stats_unary_op<T>  unary_op;
-  summary_stats_binary_op<T> binary_op;
+  summary_stats_binary_op<T> binary_op(moments);
   summary_stats_data<T>      init;
   
   init.initialize();
@@ -1766,8 +1797,8 @@ int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd,
   mean[0]=resulty.mean;
   var[0]=resulty.variance();
   sd[0]=std::sqrt(resulty.variance_n());
-  skew[0]=resulty.skewness();
-  kurt[0]=resulty.kurtosis();
+  skew[0]=(moments ? resulty.skewness() : 0);
+  kurt[0]=(moments ? resulty.kurtosis() : 0);
 
 #ifdef DEBUG
   std::cout <<"******Summary Statistics of Response Train*****"<<std::endl;
@@ -1796,8 +1827,8 @@ int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd,
   mean[1]=vresulty.mean;
   var[1]=vresulty.variance();
   sd[1]=std::sqrt(vresulty.variance_n());
-  skew[1]=vresulty.skewness();
-  kurt[1]=vresulty.kurtosis();
+  skew[1]=(moments ? vresulty.skewness() : 0);
+  kurt[1]=(moments ? vresulty.kurtosis() : 0);
 
 #ifdef DEBUG
   std::cout <<"******Summary Statistics of Response Valid*****"<<std::endl;
@@ -1841,13 +1872,22 @@ int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd,
       cml::blas_gemv(hdl, CUBLAS_OP_T, static_cast<T>(1.), &A, &ytemp, static_cast<T>(0.), &xtemp); // A.ytemp -> xtemp
     }
 
-    thrust::device_ptr<T> dev_ptr = thrust::device_pointer_cast(&xtemp.data[0]);
+    if(penalty!=NULL){ // few enough to scale on the host
+      std::vector<T> u(this->_n);
+      cml::vector_memcpy(&u[0], &xtemp);
+      lambda_max0 = static_cast<T>(0.0);
+      for (size_t j = 0; j < this->_n-intercept; ++j)
+        lambda_max0 = std::max(lambda_max0, static_cast<T>(std::abs(u[j] / penalty[j])));
+    }
+    else{
+      thrust::device_ptr<T> dev_ptr = thrust::device_pointer_cast(&xtemp.data[0]);
 
-    lambda_max0 = thrust::transform_reduce(thrust::device,
-                                           dev_ptr, dev_ptr + this->_n-intercept,
-                                           absolute_value<T>(),
-                                           static_cast<T>(0.0),
-                                           thrust::maximum<T>());
+      lambda_max0 = thrust::transform_reduce(thrust::device,
+                                             dev_ptr, dev_ptr + this->_n-intercept,
+                                             absolute_value<T>(),
+                                             static_cast<T>(0.0),
+                                             thrust::maximum<T>());
+    }
   }
   else{
     lambda_max0 = 7000; // test
@@ -1857,6 +1897,51 @@ int MatrixDense<T>::Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd,
   return 0;
 }
 
+// Weighted standard deviation of each column, one thread per column
+template <typename T>
+__global__ void __ColSd(size_t m, size_t n, int rowmajor, int intercept, T sumw,
+                        const T *data, const T *weight, T *colsd) {
+  size_t j = blockIdx.x * blockDim.x + threadIdx.x;
+  if (j >= n) return;
+  T mean = 0, var = 0;
+  if (intercept) {
+    for (size_t i = 0; i < m; ++i)
+      mean += (weight != NULL ? weight[i] : 1) * (rowmajor ? data[i * n + j] : data[j * m + i]);
+    mean /= sumw;
+  }
+  for (size_t i = 0; i < m; ++i) {
+    T x = (rowmajor ? data[i * n + j] : data[j * m + i]) - mean;
+    var += (weight != NULL ? weight[i] : 1) * x * x;
+  }
+  var /= sumw;
+  colsd[j] = (var > 0 ? sqrt(var) : static_cast<T>(1));
+}
+
+template <typename T>
+int MatrixDense<T>::ColSd(int intercept, T *colsd) const
+{
+  CUDACHECK(cudaSetDevice(_wDev));
+
+  T sumw = static_cast<T>(this->_m);
+  if(_weight!=NULL){
+    thrust::device_ptr<T> dev_ptr = thrust::device_pointer_cast(_weight);
+    sumw = thrust::reduce(dev_ptr, dev_ptr + this->_m);
+  }
+  if(sumw <= 0) sumw = 1;
+
+  T *dcolsd;
+  CUDACHECK(cudaMalloc(&dcolsd, this->_n * sizeof(T)));
+  size_t grid_dim = cml::calc_grid_dim(this->_n, cml::kBlockSize);
+  __ColSd<<<grid_dim, cml::kBlockSize>>>(this->_m, this->_n, _ord == ROW, intercept, sumw,
+                                         _data, _weight, dcolsd);
+  CUDA_CHECK_ERR();
+  CUDACHECK(cudaMemcpy(colsd, dcolsd, this->_n * sizeof(T), cudaMemcpyDeviceToHost));
+  CUDACHECK(cudaFree(dcolsd));
+  if(intercept) colsd[this->_n - 1] = static_cast<T>(1);
+
+  return 0;
+}
+
   
 
 ////////////////////////////////////////////////////////////////////////////////
@@ -1930,10 +2015,28 @@ template class MatrixDense<float>;
 
 
 
+// Copy an m x n host matrix to an m x (n+intercept) device one, setting the extra last column to ones
+template <typename T>
+static void copyAppendOnes(char ord, size_t m, size_t n, int intercept, const T *src, T *dst){
+  if(!intercept){
+    CUDACHECK(cudaMemcpy(dst, src, m * n * sizeof(T), cudaMemcpyHostToDevice));
+  }
+  else if(ord == 'r'){
+    CUDACHECK(cudaMemcpy2D(dst, (n + 1) * sizeof(T), src, n * sizeof(T), n * sizeof(T), m, cudaMemcpyHostToDevice));
+    std::vector<T> ones(m, static_cast<T>(1));
+    CUDACHECK(cudaMemcpy2D(dst + n, (n + 1) * sizeof(T), &ones[0], sizeof(T), sizeof(T), m, cudaMemcpyHostToDevice));
+  }
+  else{
+    CUDACHECK(cudaMemcpy(dst, src, m * n * sizeof(T), cudaMemcpyHostToDevice));
+    thrust::device_ptr<T> dev_ptr = thrust::device_pointer_cast(dst + m * n);
+    thrust::fill(dev_ptr, dev_ptr + m, static_cast<T>(1));
+  }
+}
+
   // upload data function.  Uploads to a single GPU.
   // mimics otherwise similar MatrixDense constructor, but has no destruction of uploaded data pointers
 template <typename T>
-int makePtr_dense(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, const char ord, const T *data, const T *datay, const T *vdata, const T *vdatay, const T *weight, T **_data, T **_datay, T **_vdata, T **_vdatay, T **_weight){
+int makePtr_dense(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, const char ord, int intercept, const T *data, const T *datay, const T *vdata, const T *vdatay, const T *weight, T **_data, T **_datay, T **_vdata, T **_vdatay, T **_weight){
     checkwDev(wDev);
     CUDACHECK(cudaSetDevice(wDev));
 
@@ -1950,9 +2053,10 @@ int makePtr_dense(int sharedA, int me, int wDev, size_t m, size_t n, size_t mVal
     double t0 = timer<double>();
     PUSH_RANGE("MDsendsource",MDsendsource,1);
 
+    // With intercept, data and vdata have n columns and the GPU copies get an extra column of ones, so the caller never has to build one.
     if(data){
-      CUDACHECK(cudaMalloc(_data, m * n * sizeof(T))); // allocate on GPU
-      CUDACHECK(cudaMemcpy(*_data, data, m * n * sizeof(T),cudaMemcpyHostToDevice)); // copy from orig CPU data to GPU
+      CUDACHECK(cudaMalloc(_data, m * (n + (intercept ? 1 : 0)) * sizeof(T))); // allocate on GPU
+      copyAppendOnes(ord, m, n, intercept, data, *_data); // copy from orig CPU data to GPU
       //      fprintf(stderr,"_data: %p\n",(void*)*_data); fflush(stderr);
     }
     else *_data=NULL;
@@ -1965,8 +2069,8 @@ int makePtr_dense(int sharedA, int me, int wDev, size_t m, size_t n, size_t mVal
     else *_datay=NULL;
 
     if(vdata){
-      CUDACHECK(cudaMalloc(_vdata, mValid * n * sizeof(T))); // allocate on GPU
-      CUDACHECK(cudaMemcpy(*_vdata, vdata, mValid * n * sizeof(T),cudaMemcpyHostToDevice)); // copy from orig CPU data to GPU
+      CUDACHECK(cudaMalloc(_vdata, mValid * (n + (intercept ? 1 : 0)) * sizeof(T))); // allocate on GPU
+      copyAppendOnes(ord, mValid, n, intercept, vdata, *_vdata); // copy from orig CPU data to GPU
       //      fprintf(stderr,"_vdata: %p\n",(void*)*_vdata); fflush(stderr);
     }
     else *_vdata=NULL;
@@ -2003,16 +2107,21 @@ int makePtr_dense(int sharedA, int me, int wDev, size_t m, size_t n, size_t mVal
     DEBUG_FPRINTF(stderr,"pointer vdaty  %p\n",(void*)*_vdatay);
     DEBUG_FPRINTF(stderr,"pointer weight %p\n",(void*)*_weight);
 
+    registerUpload(*_data);
+    registerUpload(*_datay);
+    registerUpload(*_vdata);
+    registerUpload(*_vdatay);
+    registerUpload(*_weight);
 
     return(0);
 }
 
   
 
-  template int makePtr_dense<double>(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, const char ord,
+  template int makePtr_dense<double>(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, const char ord, int intercept,
                                      const double *data, const double *datay, const double *vdata, const double *vdatay, const double *weight,
                                      double **_data, double **_datay, double **_vdata, double **_vdatay, double **_weight);
-  template int makePtr_dense<float>(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, const char ord,
+  template int makePtr_dense<float>(int sharedA, int me, int wDev, size_t m, size_t n, size_t mValid, const char ord, int intercept,
                                     const float *data, const float *datay, const float *vdata, const float *vdatay, const float *weight,
                                     float **_data, float **_datay, float **_vdata, float **_vdatay, float **_weight);
 
@@ -2022,9 +2131,10 @@ template <typename T>
 int modelFree1(T *aptr){
 
   if(aptr!=NULL){
-    // for now, freed during ~
-    //cudaFree(aptr);
-    //CUDA_CHECK_ERR();
+    // from makePtr_dense, not freed during ~
+    unregisterUpload(aptr);
+    cudaFree(aptr);
+    CUDA_CHECK_ERR();
   }
   return(0);
 }
@@ -2043,15 +2153,15 @@ int modelfree1_float(float *aptr){
 }
 
 
-    int make_ptr_double(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord,
+    int make_ptr_double(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord, int intercept,
                         const double* trainX, const double* trainY, const double* validX, const double* validY, const double *weight,
                         double**a, double**b, double**c, double**d, double **e) {
-      return h2o4gpu::makePtr_dense<double>(sharedA, sourceme, sourceDev, mTrain, n, mValid, ord, trainX, trainY, validX, validY, weight, a, b, c, d, e);
+      return h2o4gpu::makePtr_dense<double>(sharedA, sourceme, sourceDev, mTrain, n, mValid, ord, intercept, trainX, trainY, validX, validY, weight, a, b, c, d, e);
     }
-    int make_ptr_float(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord,
+    int make_ptr_float(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord, int intercept,
                        const float* trainX, const float* trainY, const float* validX, const float* validY, const float *weight,
                        float**a, float**b, float**c, float**d, float **e) {
-      return h2o4gpu::makePtr_dense<float>(sharedA, sourceme, sourceDev, mTrain, n, mValid, ord, trainX, trainY, validX, validY, weight, a, b, c, d, e);
+      return h2o4gpu::makePtr_dense<float>(sharedA, sourceme, sourceDev, mTrain, n, mValid, ord, intercept, trainX, trainY, validX, validY, weight, a, b, c, d, e);
     }
 
 
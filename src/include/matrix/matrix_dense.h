@@ -32,6 +32,7 @@ class MatrixDense : public Matrix<T> {
   // Get rid of assignment operator.
   MatrixDense<T>& operator=(const MatrixDense<T>& A);
   Ord _ord;
+  T *_datacopy = 0; // _data if CopyData made it, freed when destroyed
 
  public:
   // Constructor (only sets variables)
@@ -59,12 +60,18 @@ class MatrixDense : public Matrix<T> {
   // Method to equilibrate.
   int Equil(bool equillocal);
 
+  // Point _data at a copy this matrix owns (freed when destroyed), so Equil scales that and not the buffer
+  // _data wrapped (the caller's, with sharedA)
+  int CopyData();
+
   // Method for SVD #1
   int svd1(void);
   
   // Method to multiply by A and A^T.
   int Mul(char trans, T alpha, const T *x, T beta, T *y) const;
   int Mulvalid(char trans, T alpha, const T *x, T beta, T *y) const;
+  // Mul for k vectors at once (x_j at x + j*ldx, y_j at y + j*ldy), one matrix-matrix product streaming A once
+  int MulBlock(char trans, T alpha, const T *x, size_t ldx, T beta, T *y, size_t ldy, size_t k) const;
 
   int GetTrainX(int datatype, size_t size, T**data) const;
   int GetTrainY(int datatype, size_t size, T**data) const;
@@ -72,7 +79,14 @@ class MatrixDense : public Matrix<T> {
   int GetValidY(int datatype, size_t size, T**data) const;
   int GetWeight(int datatype, size_t size, T**data) const;
 
-  int Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd, T *skew, T *kurt, T&lambda_max0);
+  // lambda_max0 is max_j |a_j^T W (y - intercept*mean)| / penalty[j] (penalty NULL: all ones); skew and kurt are
+  // only computed if moments (else 0)
+  int Stats(int intercept, T *min, T *max, T *mean, T *var, T *sd, T *skew, T *kurt, T&lambda_max0, const T *penalty = NULL,
+            bool moments = true);
+
+  // Host array of n weighted column standard deviations (about the weighted column mean if intercept, about zero
+  // otherwise), 1 for the intercept column and for constant columns
+  int ColSd(int intercept, T *colsd) const;
 
   // Getters
   const T* Data() const { return _data; }
@@ -92,6 +106,13 @@ class MatrixDense : public Matrix<T> {
 
 
 
+// Buffers made by makePtr_dense are numbered as they are uploaded, so the data stats cache (see
+// elastic_net_ptr.cpp) can tell them from a later upload that reuses the address.  uploadGeneration is 0 for a
+// pointer that wasn't uploaded or was already freed with modelfree1.
+void registerUpload(const void *ptr);
+void unregisterUpload(const void *ptr);
+size_t uploadGeneration(const void *ptr);
+
 }  // namespace h2o4gpu
 
 #endif  // MATRIX_MATRIX_DENSE_H_
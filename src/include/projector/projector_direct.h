@@ -29,6 +29,10 @@ class ProjectorDirect : Projector<T, M> {
   int Init();
 
   int Project(const T *x0, const T *y0, T s, T *x, T *y, T tol);
+
+  // Project k pairs at once, pair j at (x0 + j*ld, y0 + j*ld) to (x + j*ld, y + j*ld), with one
+  // matrix-matrix product per product with A and one triangular solve with k right-hand sides per solve
+  int ProjectBlock(const T *x0, const T *y0, T s, T *x, T *y, size_t k, size_t ld);
 };
 
 }  // namespace h2o4gpu
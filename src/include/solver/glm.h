@@ -76,6 +76,7 @@ const int num_colors = sizeof(colors)/sizeof(uint32_t);
 #ifndef H2O4GPU_H_
 #define H2O4GPU_H_
 
+#include <algorithm>
 #include <cstring>
 #include <string>
 #include <vector>
@@ -99,6 +100,7 @@ const unsigned int kVerbose = 1u;   // 0...4
 const unsigned int kMaxIter = 2500u;
 const unsigned int kInitIter = 10u;
 const bool kAdaptiveRho = true;
+const unsigned int kAndersonMem = 0u; // no Anderson acceleration
 const bool kEquil = true;
 const bool kGapStop = false;
 const int knDev = 1;
@@ -114,13 +116,18 @@ enum H2O4GPUStatus {
 	H2O4GPU_UNBOUNDED,  // Problem likely unbounded
 	H2O4GPU_MAX_ITER,   // Reached max iter.
 	H2O4GPU_NAN_FOUND,  // Encountered nan.
-	H2O4GPU_ERROR
+	H2O4GPU_ERROR,
+	H2O4GPU_TIME_LIMIT  // Reached the deadline.
 };
 // Generic error, check logs.
 
+template<typename T> class MatrixDense;
+template<typename T> class H2O4GPUBlock;
+
 // Proximal Operator Graph Solver.
 template<typename T, typename M, typename P>
 class H2O4GPU {
+	template<typename U> friend class H2O4GPUBlock;
 private:
 	// Data
 	M _A;
@@ -138,12 +145,16 @@ private:
 	T _trainmean, _validmean;
 	T _trainstddev, _validstddev;
 	unsigned int _final_iter;
+	// primal and dual residuals Solve stopped at
+	T _nrm_r, _nrm_s;
 
 	// Parameters.
 	T _abs_tol, _rel_tol;
-	unsigned int _max_iter, _stop_early, _init_iter, _verbose;
+	unsigned int _max_iter, _stop_early, _init_iter, _verbose, _anderson_mem;
 	bool _adaptive_rho, _equil, _gap_stop, _init_x, _init_lambda;
 	double _stop_early_error_fraction;
+	// timer<double>() past which Solve stops where it is, none if 0
+	double _deadline;
 	// cuda number of devices and which device(s) to use
 	int _nDev, _wDev;
 	// NCCL communicator
@@ -183,6 +194,12 @@ public:
 	T GetOptval() const {
 		return _optval;
 	}
+	T GetPrimalResidual() const {
+		return _nrm_r;
+	}
+	T GetDualResidual() const {
+		return _nrm_s;
+	}
 	const T* GettrainPreds() const {
 		return _trainPreds;
 	}
@@ -204,6 +221,9 @@ public:
 	unsigned int GetMaxIter() const {
 		return _max_iter;
 	}
+	double GetDeadline() const {
+		return _deadline;
+	}
 	unsigned int GetStopEarly() const {
 		return _stop_early;
 	}
@@ -219,6 +239,9 @@ public:
 	bool GetAdaptiveRho() const {
 		return _adaptive_rho;
 	}
+	unsigned int GetAndersonMem() const {
+		return _anderson_mem;
+	}
 	bool GetEquil() const {
 		return _equil;
 	}
@@ -253,6 +276,7 @@ public:
 		os << "init_iter: " << _init_iter << sep;
 		os << "verbose: " << _verbose << sep;
 		os << "adaptive_rho: " << _adaptive_rho << sep;
+		os << "anderson_mem: " << _anderson_mem << sep;
 		os << "equil: " << _equil << sep;
 		os << "gap_stop: " << _gap_stop << sep;
 		os << "nDev: " << _nDev << sep;
@@ -279,6 +303,9 @@ public:
 	void SetMaxIter(unsigned int max_iter) {
 		_max_iter = max_iter;
 	}
+	void SetDeadline(double deadline) {
+		_deadline = deadline;
+	}
 	void SetStopEarly(unsigned int stop_early) {
 		_stop_early = stop_early;
 	}
@@ -294,6 +321,11 @@ public:
 	void SetAdaptiveRho(bool adaptive_rho) {
 		_adaptive_rho = adaptive_rho;
 	}
+	// Anderson acceleration of the ADMM iterations over the last anderson_mem
+	// steps, none if 0
+	void SetAndersonMem(unsigned int anderson_mem) {
+		_anderson_mem = anderson_mem;
+	}
 	void SetEquil(bool equil) {
 		_equil = equil;
 	}
@@ -323,6 +355,104 @@ using H2O4GPUDirect = H2O4GPU<T, M, ProjectorDirect<T, M> >;
 
 template <typename T, typename M>
 using H2O4GPUIndirect = H2O4GPU<T, M, ProjectorCgls<T, M> >;
+
+// Several ADMM chains ("lanes") over one dense direct solver's matrix, e.g.
+// the same fit for several alphas, advanced in lock step: the lanes' iterates
+// are the columns of one block, so every product with A (and every
+// projection) streams A once for all of them as a matrix-matrix product
+// instead of once per lane.  A lane leaves the block as soon as it has
+// converged.  Each lane keeps its state between calls to Solve, as the solver
+// does, and the solver's own state is left alone.  CPU only.
+template <typename T>
+class H2O4GPUBlock {
+public:
+	typedef H2O4GPUDirect<T, MatrixDense<T> > Solver;
+
+private:
+	Solver &_solver;
+	size_t _lanes, _m, _mvalid, _n;
+	// lane j's (z, zt) at j*(m+n), x at j*n, lambda and trainPreds at j*m, validPreds at j*mvalid
+	std::vector<T> _z, _zt;
+	std::vector<T> _x, _lambda, _trainPreds, _validPreds;
+	std::vector<T> _rho, _abs_tol, _rel_tol;
+	std::vector<unsigned int> _final_iter;
+	std::vector<T> _nrm_r, _nrm_s;
+	std::vector<char> _init_x, _init_lambda;
+
+	void _InitLane(size_t lane, const std::vector<FunctionObj<T> > &f,
+			const std::vector<FunctionObj<T> > &g, T *z, T *zt);
+
+public:
+	// Lanes start like a new solver; solver must outlive this and keep its settings
+	H2O4GPUBlock(Solver &solver, size_t lanes);
+
+	// Solve lane lanes[j] for objective f[j], g[j] (as Solve(*f[j], *g[j]) on
+	// a solver with that lane's state), for all j together
+	H2O4GPUStatus Solve(const std::vector<size_t> &lanes,
+			const std::vector<const std::vector<FunctionObj<T> > *> &f,
+			const std::vector<const std::vector<FunctionObj<T> > *> &g);
+	void ResetX(size_t lane) {
+		std::fill(_z.begin() + lane * (_m + _n), _z.begin() + (lane + 1) * (_m + _n),
+				static_cast<T>(0.));
+		std::fill(_zt.begin() + lane * (_m + _n), _zt.begin() + (lane + 1) * (_m + _n),
+				static_cast<T>(0.));
+	}
+
+	size_t Lanes() const {
+		return _lanes;
+	}
+	const T* GetX(size_t lane) const {
+		return &_x[lane * _n];
+	}
+	const T* GetLambda(size_t lane) const {
+		return &_lambda[lane * _m];
+	}
+	const T* GettrainPreds(size_t lane) const {
+		return &_trainPreds[lane * _m];
+	}
+	const T* GetvalidPreds(size_t lane) const {
+		return _validPreds.empty() ? NULL : &_validPreds[lane * _mvalid];
+	}
+	unsigned int GetFinalIter(size_t lane) const {
+		return _final_iter[lane];
+	}
+	T GetPrimalResidual(size_t lane) const {
+		return _nrm_r[lane];
+	}
+	T GetDualResidual(size_t lane) const {
+		return _nrm_s[lane];
+	}
+	T GetRho(size_t lane) const {
+		return _rho[lane];
+	}
+	T GetRelTol(size_t lane) const {
+		return _rel_tol[lane];
+	}
+	T GetAbsTol(size_t lane) const {
+		return _abs_tol[lane];
+	}
+	unsigned int GetMaxIter() const {
+		return _solver._max_iter;
+	}
+
+	void SetRho(size_t lane, T rho) {
+		_rho[lane] = rho;
+	}
+	void SetRelTol(size_t lane, T rel_tol) {
+		_rel_tol[lane] = rel_tol;
+	}
+	void SetAbsTol(size_t lane, T abs_tol) {
+		_abs_tol[lane] = abs_tol;
+	}
+	void SetInitX(size_t lane, const T *x) {
+		memcpy(&_x[lane * _n], x, _n * sizeof(T));
+		_init_x[lane] = 1;
+	}
+	void SetInitLambda(size_t lane, const T *lambda) {
+		memcpy(&_lambda[lane * _m], lambda, _m * sizeof(T));
+		_init_lambda[lane] = 1;
+	}
+};
 #endif
 
 // String version of status message.
@@ -338,6 +468,8 @@ inline std::string H2O4GPUStatusString(H2O4GPUStatus status) {
 		return "Reached max iter";
 	case H2O4GPU_NAN_FOUND:
 		return "Encountered NaN";
+	case H2O4GPU_TIME_LIMIT:
+		return "Reached time limit";
 	case H2O4GPU_ERROR:
 	default:
 		return "Error";
@@ -125,6 +125,7 @@ void H2O4GPURun(h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixDense<T> > &h2o4gpu_dat
   h2o4gpu_data.SetMaxIter(settings->max_iters);
   h2o4gpu_data.SetVerbose(settings->verbose);
   h2o4gpu_data.SetAdaptiveRho(static_cast<bool>(settings->adaptive_rho));
+  h2o4gpu_data.SetAndersonMem(settings->anderson_mem);
   h2o4gpu_data.SetEquil(static_cast<bool>(settings->equil));
   h2o4gpu_data.SetGapStop(static_cast<bool>(settings->gap_stop));
   h2o4gpu_data.SetnDev(static_cast<int>(settings->nDev));
@@ -168,6 +169,7 @@ void H2O4GPURun(h2o4gpu::H2O4GPUDirect<T, h2o4gpu::MatrixSparse<T> > &h2o4gpu_da
   h2o4gpu_data.SetMaxIter(settings->max_iters);
   h2o4gpu_data.SetVerbose(settings->verbose);
   h2o4gpu_data.SetAdaptiveRho(static_cast<bool>(settings->adaptive_rho));
+  h2o4gpu_data.SetAndersonMem(settings->anderson_mem);
   h2o4gpu_data.SetEquil(static_cast<bool>(settings->equil));
   h2o4gpu_data.SetGapStop(static_cast<bool>(settings->gap_stop));
   h2o4gpu_data.SetnDev(static_cast<int>(settings->nDev));
@@ -211,6 +213,7 @@ void H2O4GPURun(h2o4gpu::H2O4GPUIndirect<T, h2o4gpu::MatrixDense<T> > &h2o4gpu_d
   h2o4gpu_data.SetMaxIter(settings->max_iters);
   h2o4gpu_data.SetVerbose(settings->verbose);
   h2o4gpu_data.SetAdaptiveRho(static_cast<bool>(settings->adaptive_rho));
+  h2o4gpu_data.SetAndersonMem(settings->anderson_mem);
   h2o4gpu_data.SetEquil(static_cast<bool>(settings->equil));
   h2o4gpu_data.SetGapStop(static_cast<bool>(settings->gap_stop));
   h2o4gpu_data.SetnDev(static_cast<int>(settings->nDev));
@@ -254,6 +257,7 @@ void H2O4GPURun(h2o4gpu::H2O4GPUIndirect<T, h2o4gpu::MatrixSparse<T> > &h2o4gpu_
   h2o4gpu_data.SetMaxIter(settings->max_iters);
   h2o4gpu_data.SetVerbose(settings->verbose);
   h2o4gpu_data.SetAdaptiveRho(static_cast<bool>(settings->adaptive_rho));
+  h2o4gpu_data.SetAndersonMem(settings->anderson_mem);
   h2o4gpu_data.SetEquil(static_cast<bool>(settings->equil));
   h2o4gpu_data.SetGapStop(static_cast<bool>(settings->gap_stop));
   h2o4gpu_data.SetnDev(static_cast<int>(settings->nDev));
@@ -42,6 +42,7 @@
 // - int gap_stop      : Additionally use the gap as a stopping criteria.
 // - int nDev          : Choose number of cuda devices
 // - int wDev          : Choose which cuda device(s)
+// - uint anderson_mem : Steps Anderson acceleration combines, none if 0.
 //
 // Output arguments (real_t is either double or float)
 // - real_t *x         : Array for solution vector x.
@@ -35,7 +35,8 @@ enum STATUS { H2O4GPU_SUCCESS,    // Converged succesfully.
       H2O4GPU_UNBOUNDED,  // Problem likely unbounded
       H2O4GPU_MAX_ITER,   // Reached max iter.
       H2O4GPU_NAN_FOUND,  // Encountered nan.
-      H2O4GPU_ERROR };    // Generic error, check logs.
+      H2O4GPU_ERROR,      // Generic error, check logs.
+      H2O4GPU_TIME_LIMIT }; // Reached the deadline.
 
 template <typename T>
 struct H2O4GPUSettings{
@@ -43,6 +44,7 @@ struct H2O4GPUSettings{
   unsigned int max_iters, verbose;
   int adaptive_rho, equil, gap_stop, warm_start;
   int nDev,wDev;
+  unsigned int anderson_mem;
 };
 
 struct H2O4GPUSettingsS{
@@ -50,6 +52,7 @@ struct H2O4GPUSettingsS{
   unsigned int max_iters, verbose;
   int adaptive_rho, equil, gap_stop, warm_start;
   int nDev,wDev;
+  unsigned int anderson_mem;
 };
 
 struct H2O4GPUSettingsD{
@@ -57,6 +60,7 @@ struct H2O4GPUSettingsD{
   unsigned int max_iters, verbose;
   int adaptive_rho, equil, gap_stop, warm_start;
   int nDev,wDev;
+  unsigned int anderson_mem;
 };
 
 template <typename T>
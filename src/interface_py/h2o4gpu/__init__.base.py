@@ -22,6 +22,7 @@ from .types import FunctionVector
 from .solvers.pogs import Pogs
 from .solvers.elastic_net import ElasticNet
 from .solvers.elastic_net import ElasticNetH2O
+from .solvers.elastic_net import GLMData
 from .solvers.logistic import LogisticRegression
 from .solvers.linear_regression import LinearRegression
 from .solvers.lasso import Lasso
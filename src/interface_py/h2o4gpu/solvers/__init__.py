@@ -6,6 +6,7 @@
 
 from ..solvers.pogs import Pogs
 from ..solvers.elastic_net import ElasticNetH2O
+from ..solvers.elastic_net import GLMData
 from ..solvers.elastic_net import ElasticNet
 from ..solvers.logistic import LogisticRegression
 from ..solvers.linear_regression import LinearRegression
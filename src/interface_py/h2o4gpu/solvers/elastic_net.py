@@ -7,16 +7,160 @@
 import sys
 import time
 import warnings
+import weakref
 
-from ctypes import c_float, c_double, cast, POINTER
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from tabulate import tabulate
 from h2o4gpu.linear_model import coordinate_descent as sk
 from ..solvers.utils import _setter
 
 from ..libs.lib_utils import get_lib
-from ..solvers.utils import prepare_and_upload_data, free_data, free_sols
+from ..solvers.utils import prepare_and_upload_data, free_data, free_sols, \
+    _as_owned_array, _to_np
+
+
+def _targets(data):
+    """The (rows, targets) array of a response with more than one column,
+    else None
+    """
+    if data is None or sparse.issparse(data):
+        return None
+    if isinstance(data, pd.DataFrame):
+        data = data.values
+    data = np.asarray(data)
+    if data.ndim != 2 or data.shape[1] <= 1:
+        return None
+    return data
+
+
+def _to_labels(data):
+    """The 1-D array of the labels in data"""
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        data = data.values
+    return np.asarray(data).reshape(-1)
+
+
+def _softmax(eta, axis):
+    """The class probabilities of the linear predictors eta, whose classes
+    are along axis
+    """
+    prob = np.exp(eta - np.max(eta, axis=axis, keepdims=True))
+    prob /= np.sum(prob, axis=axis, keepdims=True)
+    return prob
+
+
+#fields of the backend's telemetry records, in its order
+_TELEMETRY_DTYPE = np.dtype([('fold', np.int32), ('alpha_index', np.int32),
+                             ('lambda_index', np.int32), ('refit', np.bool_),
+                             ('alpha', np.float64), ('lambda', np.float64),
+                             ('iterations', np.int32), ('rho', np.float64),
+                             ('primal_residual', np.float64),
+                             ('dual_residual', np.float64),
+                             ('time', np.float64), ('dof', np.int32)])
+
+
+def _telemetry_records(model, ptr, count):
+    """The telemetry buffer returned by the C backend as a record array
+    (the buffer itself is freed once copied)
+    """
+    values = _as_owned_array(model, ptr, count, np.float64)
+    values = np.reshape(values, (-1, len(_TELEMETRY_DTYPE)))
+    return np.rec.fromarrays(values.T, dtype=_TELEMETRY_DTYPE)
+
+
+def _free_glm_data(lib, double_precision, ptrs):
+    """Free the buffers of a collected GLMData
+    """
+    if double_precision == 1:
+        c_free = lib.modelfree1_double
+    else:
+        c_free = lib.modelfree1_float
+    for ptr in ptrs:
+        c_free(ptr)
+
+
+class GLMData(object):
+    """Data uploaded once through the backend and shared by GLM estimators
+
+       Converts, checks and copies the data (adding the intercept column if
+       fit_intercept) once, the same way ElasticNetH2O.fit does, and can then
+       be passed as train_x to fit (or as valid_x to predict and
+       predict_proba) of any number of ElasticNetH2O, ElasticNet, Lasso,
+       Ridge, LinearRegression and LogisticRegression models using the
+       h2o4gpu backend.  The responses, validation data and weights are part
+       of the handle, so they can't also be passed with it.
+
+       The estimators keep a reference to the handle while they use its
+       data (until their input data would otherwise have been freed), and
+       the backend's copies are freed with modelfree1 once the handle is
+       collected.
+
+       Parameters
+       ----------
+       train_x, train_y, valid_x, valid_y, sample_weight :
+           As for ElasticNetH2O.fit, dense only.  Whether sample_weight
+           was all ones is kept as unit_weights.
+
+       fit_intercept : bool, (default=True)
+           Append the intercept column.  Must match the estimators'
+           fit_intercept.
+
+       n_gpus : int, (Default=-1)
+           Number of gpu's, to pick the same (CPU or GPU) backend as the
+           estimators.
+
+       order : string, (Default=None)
+           'r' or 'c' to copy the data row or column major.  Default is None,
+           and taken from the data.
+
+       verbose : int, (Default=0)
+           Print verbose information to the console if set to > 0.
+       """
+
+    def __init__(self,
+                 train_x=None,
+                 train_y=None,
+                 valid_x=None,
+                 valid_y=None,
+                 sample_weight=None,
+                 fit_intercept=True,
+                 n_gpus=-1,
+                 order=None,
+                 verbose=0):
+        if sparse.issparse(train_x) or sparse.issparse(valid_x):
+            raise ValueError('GLMData does not support sparse input')
+
+        self.fit_intercept = 1 if fit_intercept else 0
+        self.ord = order
+        self.dtype = None
+        self.double_precision = None
+        self.verbose = verbose
+        self.uploaded_data = 0
+        self.source_me = 0
+        self._shared_a = 0  # the backend always copies, so sharing is up to each fit
+        self.unit_weights = sample_weight is None or \
+            bool(np.all(np.asarray(sample_weight) == 1))
+
+        from ..util.gpu import device_count
+        (n_gpus, devices) = device_count(n_gpus)
+        self.lib = get_lib(n_gpus, devices)
+
+        prepare_and_upload_data(
+            self,
+            train_x=train_x,
+            train_y=train_y,
+            valid_x=valid_x,
+            valid_y=valid_y,
+            sample_weight=sample_weight,
+            source_dev=0)
+        self.source_dev = 0
+
+        self._finalizer = weakref.finalize(
+            self, _free_glm_data, self.lib, self.double_precision,
+            (self.a, self.b, self.c, self.d, self.e))
+
 
 class ElasticNetH2O(object):
     """H2O Elastic Net Solver for GPUs
@@ -27,6 +171,15 @@ class ElasticNetH2O(object):
            Number of threads to use in the gpu.
            Each thread is an independent model builder.
 
+       blas_threads : int, (Default=None)
+           Number of threads each of the n_threads model builders may use
+           for its BLAS calls (set through MKL's or OpenBLAS's API,
+           whichever the library is linked with) and its parallel loops.
+           Default is None, which splits the cores evenly between the
+           model builders (at least one each), so that n_threads x
+           blas_threads does not oversubscribe the machine.  Ignored with
+           sparse train_x.
+
        gpu_id : int, optional, (default=0)
            ID of the GPU on which the algorithm should run.
 
@@ -48,7 +201,11 @@ class ElasticNetH2O(object):
            Number of lambdas to be used in a search.
 
        n_folds : int,  (Default=1)
-           Number of cross validation folds.
+           Number of cross validation folds, contiguous blocks of the
+           training rows.  On CPU each thread fits its current fold on its
+           own copy of that fold's training rows, on top of the one copy of
+           train_x all threads share, so peak memory grows by up to
+           n_threads times the size of train_x (not with shared_a).
 
        n_alphas : int, (Default=5)
            Number of alphas to be used in a search.
@@ -76,19 +233,48 @@ class ElasticNetH2O(object):
        max_iter : int, (Default=5000)
            Maximum number of iterations.
 
+       max_runtime_secs : float, (Default=None)
+           Wall clock time budget for fit in seconds, none if None or 0.
+           Once it is spent no further lambdas are started and the solves
+           under way stop where they are, and fit returns with timed_out
+           set.  Each alpha's X_best is then the best solution (by the
+           validation or fold error) found so far, or, if it ran out of
+           time before its first lambda, zeros with NaN errors, lambda and
+           tolerance (such alphas are never picked as the best one).
+           The lambda paths start at lambda_max and the first fold's paths
+           run first, so even a short budget leaves usable models, with
+           the fixed-lambda fits of the other folds refining them if there
+           is time.  Ignored with sparse train_x.
+
        verbose : int, (Default=0)
            Print verbose information to the console if set to > 0.
 
        family : string, (Default="elasticnet")
            "logistic" for classification with logistic regression.
+           "multinomial" for classification of several classes with
+           multinomial (softmax) logistic regression, fit by coordinate
+           descent whatever the solver (on the CPU also in GPU builds),
+           see fit.
            Defaults to "elasticnet" for regression.
-           Must be "logistic" or "elasticnet".
+           Must be "logistic", "multinomial" or "elasticnet".
 
        store_full_path: int, (Default=0)
            Whether to store full solution for all alphas
            and lambdas.  If 1, then during predict will compute best
            and full predictions.
 
+       store_telemetry : bool, (Default=True)
+           Whether fit records each solve it makes in telemetry, a NumPy
+           record array with one record per fold, alpha and lambda solved
+           (and per fixed-lambda refit of a fold), in that order.  Its
+           fields are fold, alpha_index (as in X_full), lambda_index,
+           refit, alpha, lambda, iterations, rho and primal_residual and
+           dual_residual (where ADMM stopped, NaN for coordinate descent),
+           time (seconds, shared by alphas solved together in lockstep)
+           and dof (nonzero coefficients, intercept not counted).  If
+           False nothing is recorded and telemetry is None.  Ignored with
+           sparse train_x.
+
        lambda_max : int, (Default=None)
            Maximum Lambda value to use.
            Default is None, and then internally compute standard maximum
@@ -113,6 +299,111 @@ class ElasticNetH2O(object):
            Order of data. Default is None, and internally
            determined (unless using _ptr methods) whether
            row 'r' or column 'c' major order.
+
+       shared_a : bool, (Default=False)
+           If True, all CPU threads read one copy of the training matrix
+           (made and equilibrated by the fit) instead of each making its
+           own, so n_threads is not limited by memory.  Cross validation
+           folds are then fit by down-weighting held-out rows rather than
+           on row subsets.  Ignored on GPU.
+
+       screening : string, (Default=None)
+           'strong' to solve each lambda only on the columns kept by the
+           sequential strong rule, adding back any discarded column that
+           fails the KKT check, or None to always solve on all columns.
+           Gives the same path, much faster when few of many columns are
+           active.  Ignored on GPU.
+
+       solver : string, (Default='admm')
+           'admm' to fit each model with ADMM, or 'cd' to fit it with
+           cyclic coordinate descent, warm started along the lambda path
+           and cycling over the active set, as glmnet does.  Solves the
+           same problem and returns the same results, usually much faster
+           on CPU.  screening is not needed (and ignored) with 'cd'.
+           'direct' is 'cd', except that models with alpha 0 (ridge, or
+           least squares at lambda 0) of family 'elasticnet' are solved
+           exactly: from the weighted Gram matrix, built once per fold,
+           by Cholesky, or for a lambda path from one eigendecomposition
+           of it, so every further lambda costs O(n^2).  Singular
+           problems get the minimum norm solution.  As these are the
+           normal equations, an ill-conditioned train_x loses about twice
+           the digits a QR or SVD of it would.  Needs n^2 memory per
+           thread.  On GPU and with sparse train_x 'direct' fits with
+           ADMM.
+
+       lockstep : int, (Default=0)
+           If above 1, each CPU thread fits up to this many alphas at once,
+           advancing their ADMM iterations together so every product with
+           the training matrix is a matrix-matrix product (read once for
+           all of them) rather than one matrix-vector product per alpha.
+           Same results to within tol; faster when the BLAS is much
+           faster per vector on several vectors at once.  Ignored with
+           screening='strong', solver='cd' and on GPU.
+
+       anderson_mem : int, (Default=0)
+           If above 0, apply Anderson acceleration to the ADMM iterations,
+           extrapolating each step from the last anderson_mem steps, with
+           a safeguard falling back to the plain step whenever the
+           extrapolation does worse.  Often needs far fewer iterations on
+           ill-conditioned problems that otherwise run to max_iter; 5 to
+           10 is a good start.  Ignored with solver='cd' and on GPU.
+
+       lambda_search : str, (Default='grid')
+           'grid' fits every lambda on the path.  'adaptive' first fits
+           about every sqrt(n_lambdas)-th lambda, then for each fold and
+           alpha refines only between the coarse neighbours of its best
+           validation error, so most of the path is never solved.  Finds
+           the same best lambda as 'grid' when the validation error has a
+           single minimum along the path.  X_best is then the best
+           solution found rather than the last one.  Lambdas never fitted
+           are left zero in X_full, as with lambda_stop_early.  Ignored
+           with screening='strong' and with sparse train_x.
+
+       alpha_race_margin : float, (Default=None)
+           If set, race the alphas: fit the lambda path a segment at a
+           time (to a quarter of the way along, then half way, then the
+           rest) over all folds and alphas, and after each segment stop
+           fitting the alphas whose fold-averaged validation error so far
+           is worse than the best alpha's by more than this fraction, so
+           their threads move on to the remaining alphas.  0.01 is a good
+           start; larger is safer, as an alpha that is behind early on
+           can still come out best.  X_best is then the best solution
+           found rather than the last one, and dropped alphas keep the
+           best model they reached.  Needs a validation set or n_folds >
+           1.  Ignored with screening='strong', lambda_search='adaptive'
+           and with sparse train_x.
+
+       path_callback : callable, (Default=None)
+           If set, called as path_callback(fold, alpha_index,
+           lambda_index, x, error, lambda_, alpha) with each solution of
+           the lambda path as soon as fit finds it, for every fold (fold
+           0 is the one X_full holds) and in no particular order when
+           n_threads > 1.  x are the coefficients, with the
+           intercept last if fit_intercept, and error the train, hold-out
+           and validation errors, as in X_full and error_full.  With
+           several responses alpha_index runs over n_targets * n_alphas,
+           response by response.  With store_full_path=0 the path can so
+           be inspected or written out without being kept in memory.
+           The first exception the callback raises is raised by fit once
+           the fit is done; later points are not passed on.  Ignored with
+           sparse train_x.
+
+       warm_start : bool, (Default=False)
+           If True, keep each alpha's solution at the start of its lambda
+           path (and the ADMM rho it was found with) at the end of fit,
+           and start the next fit's path for that alpha from it.  Refits
+           on slightly changed data or lambda_max then need fewer
+           iterations.  The state is dropped if the number of alphas or
+           columns changes.
+
+       standardize : bool, (Default=False)
+           If True, fit as if each column were standardized (centered, if
+           fit_intercept, and scaled to unit weighted standard deviation)
+           so the penalty treats all columns alike.  The data is not
+           copied or changed: each coefficient's penalty is weighted by its
+           column's standard deviation instead, so coefficients and
+           intercept are on the scale of the input.  Not supported with
+           sparse input.
        """
 
     class info:
@@ -145,10 +436,47 @@ class ElasticNetH2O(object):
                  alphas=None,
                  lambdas=None,
                  double_precision=None,
-                 order=None):
-        assert family in ['logistic',
+                 order=None,
+                 shared_a=False,
+                 screening=None,
+                 solver='admm',
+                 lockstep=0,
+                 anderson_mem=0,
+                 lambda_search='grid',
+                 alpha_race_margin=None,
+                 path_callback=None,
+                 warm_start=False,
+                 standardize=False,
+                 blas_threads=None,
+                 max_runtime_secs=None,
+                 store_telemetry=True):
+        assert family in ['logistic', 'multinomial',
                           'elasticnet'], \
-            "family should be 'logistic' or 'elasticnet' but got " + family
+            "family should be 'logistic', 'multinomial' or 'elasticnet' " \
+            "but got " + family
+        assert screening in [None, 'strong'], \
+            "screening should be None or 'strong' but got " + str(screening)
+        assert solver in ['admm', 'cd', 'direct'], \
+            "solver should be 'admm', 'cd' or 'direct' but got " + str(solver)
+        assert lockstep >= 0, \
+            "lockstep should be 0 or more but got " + str(lockstep)
+        assert blas_threads is None or blas_threads >= 1, \
+            "blas_threads should be None or 1 or more but got " + \
+            str(blas_threads)
+        assert anderson_mem >= 0, \
+            "anderson_mem should be 0 or more but got " + str(anderson_mem)
+        assert max_runtime_secs is None or max_runtime_secs >= 0, \
+            "max_runtime_secs should be None or 0 or more but got " + \
+            str(max_runtime_secs)
+        assert lambda_search in ['grid', 'adaptive'], \
+            "lambda_search should be 'grid' or 'adaptive' but got " + \
+            str(lambda_search)
+        assert alpha_race_margin is None or alpha_race_margin >= 0, \
+            "alpha_race_margin should be None or 0 or more but got " + \
+            str(alpha_race_margin)
+        assert path_callback is None or callable(path_callback), \
+            "path_callback should be None or callable but got " + \
+            str(path_callback)
 
         self.double_precision = double_precision
 
@@ -182,6 +510,13 @@ class ElasticNetH2O(object):
         self.n_folds = n_folds
         self.n_alphas = n_alphas
         self.uploaded_data = 0
+        self._glm_data = None  # GLMData whose buffers a..e are, if any
+        # responses fit at once, (n_targets, rows) if more than one
+        self._n_targets = 1
+        self._target_y = None
+        self._target_valid_y = None
+        # labels of the classes of a multinomial fit, one per target
+        self.classes_ = None
         self.did_fit_ptr = 0
         self.did_predict = 0
         self.tol = tol
@@ -196,10 +531,27 @@ class ElasticNetH2O(object):
             self.glm_stop_early = 0
         self.glm_stop_early_error_fraction = glm_stop_early_error_fraction
         self.max_iter = max_iter
+        self.max_runtime_secs = max_runtime_secs
+        #whether the last fit ran out of max_runtime_secs
+        self.timed_out = False
         self.verbose = verbose
+        self.screening = screening
+        self.solver = solver
+        self.lockstep = lockstep
+        self.anderson_mem = anderson_mem
+        self.lambda_search = lambda_search
+        self.alpha_race_margin = alpha_race_margin
+        self.path_callback = path_callback
+        self.warm_start = warm_start
+        # per-alpha solution and rho the backend starts from and updates
+        self._warm_x = None
+        self._warm_rho = None
         self._family_str = family  # Hold string value for family
         self._family = family.split()[0][0]
         self.store_full_path = store_full_path
+        self.store_telemetry = store_telemetry
+        #record array of the last fit's solves, if store_telemetry
+        self.telemetry = None
         if lambda_max is None:
             self.lambda_max = -1.0  # to trigger C code to compute
         else:
@@ -227,14 +579,13 @@ class ElasticNetH2O(object):
         self._tols = None
         self.intercept2_ = None
 
-        #Experimental features
-        #TODO _shared_a and _standardize do not work currently.
-        #TODO Always need to set to 0.
-        self._shared_a = 0
-        self._standardize = 0
+        self._standardize = 1 if standardize else 0
 
         from ..util.gpu import device_count
         (self.n_gpus, devices) = device_count(n_gpus)
+
+        # only the CPU backend shares the training matrix across threads
+        self._shared_a = 1 if shared_a and self.n_gpus == 0 else 0
         gpu_id = gpu_id % devices if devices != 0 else 0
         self._gpu_id = gpu_id
         self._total_n_gpus = devices
@@ -246,6 +597,7 @@ class ElasticNetH2O(object):
             n_threads = (1 if self.n_gpus == 0 else self.n_gpus)
 
         self.n_threads = n_threads
+        self.blas_threads = blas_threads
 
         self.lib = get_lib(self.n_gpus, devices)
 
@@ -268,9 +620,32 @@ class ElasticNetH2O(object):
             free_input_data=1):
         """Train a GLM
 
+        train_x (and valid_x) may also be a scipy.sparse matrix, in which
+        case the nonzeros are passed to the backend in CSR (or CSC, if given
+        as CSC) form and the data is never densified, see _fit_sparse.
+
+        train_x may also be a GLMData, whose already uploaded data is then
+        fit without copying it again.  free_input_data=1 then only drops
+        this model's reference to it.
+
+        train_y (and valid_y) may also have several columns, one response
+        (target) each, which are all fit against the same train_x in one
+        backend call that sets the matrix up and factors it only once per
+        thread.  The solution, error, lambda, alpha and tol arrays (and
+        predictions) then have a target axis just before the alpha axis,
+        e.g. X_best[which target][which alpha].
+
+        With family 'multinomial' train_y (and valid_y) are the class
+        labels, whose sorted unique values are kept as classes_, or a
+        (rows, classes) array of class indicators (or probabilities).
+        The classes are then the targets above, fit together as one
+        model: each target's coefficients are its class's, and the
+        errors are those of the whole model (the same for every class).
+
         :param ndarray train_x : Training features array
 
-        :param ndarray train_ y : Training response array
+        :param ndarray train_ y : Training response array, or
+            (rows, targets) array of several responses
 
         :param ndarray valid_x : Validation features
 
@@ -282,9 +657,53 @@ class ElasticNetH2O(object):
             at the end of fit(). Default is 1.
         """
 
+        if self._family == 'm':
+            if sparse.issparse(train_x):
+                raise ValueError('The multinomial family is only supported '
+                                 'for dense train_x')
+            if isinstance(train_x, GLMData):
+                raise ValueError('The multinomial family needs the class '
+                                 'labels, so cannot fit a GLMData')
+            if train_y is not None:
+                train_y, valid_y = self._class_targets(train_y, valid_y)
+        targets = _targets(train_y)
+        if sparse.issparse(train_x):
+            if targets is not None:
+                raise ValueError('Several responses are only supported for '
+                                 'dense train_x')
+            self._n_targets = 1
+            return self._fit_sparse(train_x, train_y, valid_x, valid_y,
+                                    sample_weight)
+
         source_dev = 0
-        if not (train_x is None and train_y is None and valid_x is None and
-                valid_y is None and sample_weight is None):
+        if isinstance(train_x, GLMData):
+            if not (train_y is None and valid_x is None and valid_y is None and
+                    sample_weight is None):
+                raise ValueError(
+                    'train_y, valid_x, valid_y and sample_weight are part of '
+                    'the GLMData and cannot also be passed with it')
+            self._n_targets = 1
+            self._use_glm_data(train_x)
+            source_dev = train_x.source_dev
+        elif not (train_x is None and train_y is None and valid_x is None and
+                  valid_y is None and sample_weight is None):
+
+            self._n_targets = 1
+            if targets is not None:
+                if self.warm_start:
+                    raise ValueError('warm_start is not supported for '
+                                     'several responses')
+                valid_targets = _targets(valid_y)
+                if valid_x is not None and (
+                        valid_targets is None or
+                        valid_targets.shape[1] != targets.shape[1]):
+                    raise ValueError('valid_y must have the same %d columns '
+                                     'as train_y' % targets.shape[1])
+                # the first response is uploaded with train_x as usual (and
+                # gives the stats of the data), all are passed to the fit
+                train_y = np.ascontiguousarray(targets[:, 0])
+                if valid_targets is not None:
+                    valid_y = np.ascontiguousarray(valid_targets[:, 0])
 
             self.prepare_and_upload_data = prepare_and_upload_data(
                 self,
@@ -295,6 +714,13 @@ class ElasticNetH2O(object):
                 sample_weight=sample_weight,
                 source_dev=source_dev)
 
+            if targets is not None:
+                self._n_targets = targets.shape[1]
+                self._target_y = np.ascontiguousarray(targets.T,
+                                                      dtype=self.dtype)
+                self._target_valid_y = None if valid_x is None else \
+                    np.ascontiguousarray(valid_targets.T, dtype=self.dtype)
+
         else:
             #if all None, just assume fitting with new parameters
             #and all else uses self.
@@ -315,6 +741,216 @@ class ElasticNetH2O(object):
             source_dev=source_dev)
         return self
 
+    def _class_targets(self, train_y, valid_y):
+        """Set classes_ from the labels train_y of a multinomial fit and
+        return the class indicators of train_y and valid_y"""
+        indicators = _targets(train_y)
+        if indicators is None:
+            self.classes_ = np.unique(_to_labels(train_y))
+        else:
+            self.classes_ = np.arange(indicators.shape[1])
+        if len(self.classes_) < 2:
+            raise ValueError('The multinomial family needs at least 2 '
+                             'classes but got %d' % len(self.classes_))
+        return (self._class_indicators(train_y),
+                None if valid_y is None else self._class_indicators(valid_y))
+
+    def _class_indicators(self, y):
+        """The (rows, classes) indicators of the labels y in classes_, or y
+        itself if it has a column per class"""
+        indicators = _targets(y)
+        if indicators is not None:
+            return indicators
+        return (_to_labels(y)[:, None] == self.classes_).astype(np.float64)
+
+    def _use_glm_data(self, data):
+        """Take the uploaded data of a GLMData instead of uploading any
+
+        :param GLMData data : Handle from the same backend, with the same
+            fit_intercept
+        """
+        if data.lib is not self.lib:
+            raise ValueError('GLMData was uploaded through a different '
+                             '(CPU or GPU) backend than this model uses')
+        if data.fit_intercept != self.fit_intercept:
+            raise ValueError('GLMData fit_intercept=%d but model '
+                             'fit_intercept=%d' % (data.fit_intercept,
+                                                   self.fit_intercept))
+        free_data(self)
+        # holding the handle keeps its buffers alive while they are in use
+        self._glm_data = data
+        self.uploaded_data = 1
+        self.m_train = data.m_train
+        self.n = data.n
+        self.m_valid = data.m_valid
+        self.double_precision = data.double_precision
+        self.dtype = data.dtype
+        self.ord = data.ord
+        self.a = data.a
+        self.b = data.b
+        self.c = data.c
+        self.d = data.d
+        self.e = data.e
+        self.time_prepare = 0
+        self.time_upload_data = 0
+
+    def _fit_sparse(self,
+                    train_x,
+                    train_y,
+                    valid_x=None,
+                    valid_y=None,
+                    sample_weight=None):
+        """Train a GLM on scipy.sparse features.
+
+        The backend builds a MatrixSparse from the CSR/CSC arrays and solves
+        with the indirect (CGLS) projector.  Folds are formed by
+        down-weighting the held-out rows rather than by slicing the data.
+        The intercept column is appended as a sparse column of ones.
+
+        :param scipy.sparse train_x : Training features
+
+        :param ndarray train_ y : Training response array
+
+        :param scipy.sparse valid_x : Validation features
+
+        :param ndarray valid_ y : Validation response
+
+        :param ndarray weight : Observation weights
+        """
+        if self.screening == 'strong' or self.solver == 'cd' or \
+                self.warm_start or self._standardize:
+            raise ValueError(
+                "screening='strong', solver='cd', warm_start and standardize "
+                "are not supported with sparse train_x")
+        if train_y is None:
+            raise ValueError("train_y is required with sparse train_x")
+
+        self.ord = 'c' if sparse.isspmatrix_csc(train_x) else 'r'
+        fmt = 'csc' if self.ord == 'c' else 'csr'
+        self.dtype = train_x.dtype
+        if self.dtype != np.float32 and self.dtype != np.float64:
+            self.dtype = np.float32
+        self.double_precision = 1 if self.dtype == np.float64 else 0
+
+        def _as_sparse(data):
+            data = sparse.csr_matrix(data) if fmt == 'csr' \
+                else sparse.csc_matrix(data)
+            if self.fit_intercept == 1:
+                data = sparse.hstack(
+                    [data, np.ones((data.shape[0], 1), dtype=self.dtype)],
+                    format=fmt)
+            data = data.astype(self.dtype, copy=False)
+            return (data.shape, data.nnz, data.data,
+                    data.indices.astype(np.int32, copy=False),
+                    data.indptr.astype(np.int32, copy=False))
+
+        train_shape, train_nnz, train_data, train_indices, train_indptr = \
+            _as_sparse(train_x)
+        self.m_train, self.n = train_shape
+        c_train_y, _, _ = _to_np(train_y, dtype=self.dtype)
+        c_train_y = np.ascontiguousarray(c_train_y.reshape(-1))
+
+        self.m_valid = 0
+        valid_nnz, valid_data, valid_indices, valid_indptr, c_valid_y = \
+            0, None, None, None, None
+        if valid_x is not None and valid_y is not None:
+            valid_shape, valid_nnz, valid_data, valid_indices, valid_indptr = \
+                _as_sparse(valid_x)
+            if valid_shape[1] != self.n:
+                raise ValueError(
+                    'valid_x must have the same number of columns as '
+                    'train_x, but got %d instead of %d' %
+                    (valid_shape[1] - self.fit_intercept,
+                     self.n - self.fit_intercept))
+            self.m_valid = valid_shape[0]
+            c_valid_y, _, _ = _to_np(valid_y, dtype=self.dtype)
+            c_valid_y = np.ascontiguousarray(c_valid_y.reshape(-1))
+        if sample_weight is not None:
+            c_weight, _, _ = _to_np(sample_weight, dtype=self.dtype)
+            c_weight = np.ascontiguousarray(c_weight.reshape(-1))
+        else:
+            c_weight = None
+
+        if self.double_precision == 1:
+            c_elastic_net = self.lib.elastic_net_sparse_ptr_double
+        else:
+            c_elastic_net = self.lib.elastic_net_sparse_ptr_float
+        if self.alphas_list is not None:
+            c_alphas = (self.alphas_list.astype(self.dtype, copy=False))
+        else:
+            c_alphas = None
+        if self.lambdas_list is not None:
+            c_lambdas = (self.lambdas_list.astype(self.dtype, copy=False))
+        else:
+            c_lambdas = None
+
+        time_fit0 = time.time()
+        if self.did_fit_ptr == 1:
+            free_sols(self)
+        self.did_fit_ptr = 1
+        self.x_vs_alpha_lambda = None
+        self.x_vs_alpha = None
+
+        _, x_vs_alpha_lambda, x_vs_alpha, \
+        count_full, count_short, count_more = c_elastic_net(
+            self._family,
+            self.n_threads,
+            self._gpu_id,
+            self.n_gpus,
+            self._total_n_gpus,
+            self.ord,
+            self.m_train,
+            self.n,
+            self.m_valid,
+            self.fit_intercept,
+            self.lambda_max,
+            self.lambda_min_ratio,
+            self.n_lambdas,
+            self.n_folds,
+            self.n_alphas,
+            self.alpha_min,
+            self.alpha_max,
+            c_alphas,
+            c_lambdas,
+            self.tol,
+            self.tol_seek_factor,
+            self.lambda_stop_early,
+            self.glm_stop_early,
+            self.glm_stop_early_error_fraction,
+            self.max_iter,
+            self.verbose,
+            train_nnz,
+            train_data,
+            train_indices,
+            train_indptr,
+            c_train_y,
+            valid_nnz,
+            valid_data,
+            valid_indices,
+            valid_indptr,
+            c_valid_y,
+            c_weight,
+            self.store_full_path,
+            self.x_vs_alpha_lambda,
+            self.x_vs_alpha,
+            0,
+            0,
+            0
+        )
+        self.x_vs_alpha_lambda = x_vs_alpha_lambda
+        self.x_vs_alpha = x_vs_alpha
+        self.count_full = count_full
+        self.count_short = count_short
+        self.count_more = count_more
+        #no time limit or telemetry for sparse data
+        self.timed_out = False
+        self.telemetry = None
+
+        self._store_solution(self.n, self.m_valid, count_full, count_short,
+                             count_more, 0)
+        self.time_fitonly = time.time() - time_fit0
+        return self
+
     #TODO Add typechecking
     def predict(self,
                 valid_x=None,
@@ -322,7 +958,9 @@ class ElasticNetH2O(object):
                 sample_weight=None,
                 free_input_data=1):
         """Predict on a fitted GLM and get back class predictions for binomial models
-        for classification and predicted values for regression.
+        for classification and predicted values for regression.  A
+        multinomial model predicts the label in classes_ of the most
+        probable class.
 
         :param ndarray valid_x : Validation features
 
@@ -337,6 +975,8 @@ class ElasticNetH2O(object):
         if self.family == "logistic":
             res[res < 0.5] = 0
             res[res > 0.5] = 1
+        elif self.family == "multinomial":
+            res = self.classes_[np.argmax(res, axis=-3)]
         return res
 
     def predict_proba(self,
@@ -346,6 +986,15 @@ class ElasticNetH2O(object):
                       free_input_data=1):
         """Predict on a fitted GLM and get back uncalibrated probabilities for classification models
 
+        A multinomial model's have the class axis where the target axis is
+        (see fit), and sum to 1 over it.
+
+        When valid_x is given, scoring is done in-process from the stored
+        coefficients only (see _score), so no data is uploaded and the
+        training data does not need to be kept around.  Otherwise the data
+        previously uploaded (e.g. with upload_data) is scored by the backend,
+        as is the validation data of valid_x if it is a GLMData.
+
         :param ndarray valid_x : Validation features
 
         :param ndarray valid_y : Validation response
@@ -357,7 +1006,17 @@ class ElasticNetH2O(object):
         """
 
         source_dev = 0
-        if not (valid_x is None and valid_y is None and sample_weight is None):
+        if isinstance(valid_x, GLMData):
+            if valid_x.m_valid <= 0:
+                raise ValueError('GLMData has no validation data to predict')
+            if self.did_fit_ptr == 1 and valid_x.n != self.n:
+                raise ValueError('GLMData has %d columns but the model was '
+                                 'fit on %d' % (valid_x.n, self.n))
+            self._use_glm_data(valid_x)
+            source_dev = valid_x.source_dev
+        elif valid_x is not None:
+            return self._score(valid_x, valid_y, sample_weight)
+        elif not (valid_y is None and sample_weight is None):
             prepare_and_upload_data(
                 self,
                 train_x=None,
@@ -388,7 +1047,7 @@ class ElasticNetH2O(object):
                 self.d,
                 self.e,
                 do_predict=1,
-                free_input_data=free_input_data)
+                free_input_data=0)
 
         self.store_full_path = 0
         self._fitorpredict_ptr(
@@ -409,6 +1068,124 @@ class ElasticNetH2O(object):
         #restore variable
         self.store_full_path = oldstorefullpath
         return self.valid_pred_vs_alphapure  # something like valid_y
+
+    def _score(self, valid_x, valid_y=None, sample_weight=None):
+        """Score valid_x with the stored coefficients.
+
+        All alphas (and all alpha x lambda path points if store_full_path=1)
+        are scored with a single (dense or scipy.sparse) matrix product,
+        followed by the inverse logit for the logistic family (softmax over
+        the classes for the multinomial one).  If valid_y
+        is given, the validation error is stored the same way the backend
+        does on predict.
+
+        :param ndarray valid_x : Validation features
+
+        :param ndarray valid_y : Validation response
+
+        :param ndarray weight : Observation weights used for the error
+        """
+        if self.x_vs_alphapure is None:
+            raise ValueError("Model has not been fitted yet, call fit() first")
+
+        if sparse.issparse(valid_x):
+            valid_x_np = sparse.csr_matrix(valid_x).astype(self.dtype,
+                                                           copy=False)
+        else:
+            valid_x_np, _, _ = _to_np(valid_x, ismatrix=True,
+                                      dtype=self.dtype)
+        n = self.x_vs_alphapure.shape[-1]
+        n_features = n - self.fit_intercept
+        if valid_x_np.shape[1] != n_features:
+            raise ValueError(
+                'valid_x must have the same number of columns as the '
+                'training data, but got %d instead of %d' %
+                (valid_x_np.shape[1], n_features))
+        m_valid = valid_x_np.shape[0]
+
+        def _predict(coefs):
+            #coefs is (number of models, n) with intercept as last column
+            if sparse.issparse(valid_x_np):
+                #as X.w so sparse valid_x is multiplied without densifying
+                preds = np.ascontiguousarray(
+                    valid_x_np.dot(coefs[:, 0:n_features].T).T)
+            else:
+                #as w.X^T, which is already laid out (models, rows)
+                preds = np.dot(coefs[:, 0:n_features], valid_x_np.T)
+            if self.fit_intercept == 1:
+                preds += coefs[:, n_features:n]
+            if self._family == 'l':
+                np.negative(preds, out=preds)
+                np.exp(preds, out=preds)
+                preds += 1
+                np.reciprocal(preds, out=preds)
+            return preds
+
+        self.m_valid = m_valid
+        models = self._models_shape()
+        self.valid_pred_vs_alphanew = np.reshape(
+            _predict(np.reshape(self.x_vs_alphapure, (-1, n))),
+            models + (m_valid,))
+        if self._family == 'm':
+            self.valid_pred_vs_alphanew = _softmax(
+                self.valid_pred_vs_alphanew, -3)
+        self.valid_pred_vs_alphapure = self.valid_pred_vs_alphanew
+        if valid_y is not None:
+            self.error_vs_alpha[..., 2] = self._valid_error(
+                self.valid_pred_vs_alphapure, valid_y, sample_weight)
+
+        if self.store_full_path == 1 and \
+                self.x_vs_alpha_lambdapure is not None:
+            self.valid_pred_vs_alpha_lambdanew = np.reshape(
+                _predict(np.reshape(self.x_vs_alpha_lambdapure, (-1, n))),
+                (self.n_lambdas,) + models + (m_valid,))
+            if self._family == 'm':
+                self.valid_pred_vs_alpha_lambdanew = _softmax(
+                    self.valid_pred_vs_alpha_lambdanew, -3)
+            self.valid_pred_vs_alpha_lambdapure = \
+                self.valid_pred_vs_alpha_lambdanew
+            if valid_y is not None:
+                self.error_vs_alpha_lambda[..., 2] = self._valid_error(
+                    self.valid_pred_vs_alpha_lambdapure, valid_y,
+                    sample_weight)
+
+        return self.valid_pred_vs_alphapure  # something like valid_y
+
+    def _valid_error(self, preds, valid_y, sample_weight=None):
+        """RMSE (elasticnet) or logloss (logistic) of preds along the last
+        axis, as computed by getError in the backend.  A multinomial
+        model's logloss is over all its classes, and so the same for each
+        class."""
+        if self._family == 'm':
+            # the class axis is just before the alpha axis
+            valid_y_np = self._class_indicators(valid_y).T[:, None, :]
+        else:
+            valid_y_np, _, _ = _to_np(valid_y, dtype=self.dtype)
+            if self._n_targets > 1:
+                # each target's response against its preds, which have the
+                # target axis just before the alpha axis
+                valid_y_np = np.reshape(valid_y_np,
+                                        (-1, self._n_targets)).T[:, None, :]
+            else:
+                valid_y_np = valid_y_np.reshape(-1)
+        if sample_weight is None:
+            weight = np.ones(valid_y_np.shape[-1], dtype=self.dtype)
+        else:
+            weight, _, _ = _to_np(sample_weight, dtype=self.dtype)
+            weight = weight.reshape(-1)
+        if self._family == 'l':
+            clipped = np.clip(preds, 1E-15, 1 - 1E-15)
+            loss = -(valid_y_np * np.log(clipped) +
+                     (1 - valid_y_np) * np.log(1 - clipped))
+            loss[preds == valid_y_np] = 0
+            return np.dot(loss, weight) / np.sum(weight)
+        if self._family == 'm':
+            loss = -np.sum(valid_y_np * np.log(np.maximum(preds, 1E-15)),
+                           axis=-3)
+            return np.expand_dims(np.dot(loss, weight) / np.sum(weight), -2)
+        return np.sqrt(
+            np.dot((preds - valid_y_np)**2, weight) / np.sum(weight))
+
     #TODO Add type checking
     #source_dev here because generally want to take in any pointer,
     #not just from our test code
@@ -535,6 +1312,12 @@ class ElasticNetH2O(object):
             the end of fit(). Default is 1.
         """
 
+        if (c if do_predict == 1 else a) is None:
+            raise ValueError('No data to %s: it was freed at the end of the '
+                             'last call (see free_input_data), so pass it '
+                             'again' % ('predict' if do_predict == 1 else
+                                        'fit'))
+
         #store some things for later call to predict_ptr()
 
         self.source_dev = source_dev
@@ -593,14 +1376,12 @@ class ElasticNetH2O(object):
         if which_precision == 1:
             c_elastic_net = self.lib.elastic_net_ptr_double
             self.dtype = np.float64
-            c_type = c_double
             if self.verbose > 0:
                 print('double precision fit')
                 sys.stdout.flush()
         else:
             c_elastic_net = self.lib.elastic_net_ptr_float
             self.dtype = np.float32
-            c_type = c_float
             if self.verbose > 0:
                 print('single precision fit')
                 sys.stdout.flush()
@@ -614,21 +1395,69 @@ class ElasticNetH2O(object):
             c_lambdas = (self.lambdas_list.astype(self.dtype, copy=False))
         else:
             c_lambdas = None
+        if self.warm_start and do_predict == 0:
+            if self._warm_x is None or self._warm_x.dtype != self.dtype \
+                    or self._warm_x.shape[0] != self.n_alphas * n:
+                self._warm_x = np.zeros(self.n_alphas * n, dtype=self.dtype)
+                self._warm_rho = np.zeros(self.n_alphas, dtype=self.dtype)
+            c_warm_x = self._warm_x
+            c_warm_rho = self._warm_rho
+        else:
+            c_warm_x = np.zeros(0, dtype=self.dtype)
+            c_warm_rho = np.zeros(0, dtype=self.dtype)
+        #a fit of several responses returns them as n_targets times as many
+        #alphas, which predict then scores as such
+        c_n_alphas = self.n_alphas
+        c_n_targets = 1
+        c_target_y = None
+        c_target_valid_y = None
+        if self._n_targets > 1:
+            if do_predict == 0:
+                if self._target_y.shape[1] != m_train:
+                    raise ValueError('The %d responses have %d rows but '
+                                     'm_train=%d' % (self._n_targets,
+                                                     self._target_y.shape[1],
+                                                     m_train))
+                c_n_targets = self._n_targets
+                c_target_y = self._target_y.astype(
+                    self.dtype, copy=False).ravel()
+                if self._target_valid_y is not None:
+                    c_target_valid_y = self._target_valid_y.astype(
+                        self.dtype, copy=False).ravel()
+            else:
+                c_n_alphas = self.n_alphas * self._n_targets
+
+        #the backend passes x and the errors, lambda, alpha and tol after
+        #them; keep the first error the callback raises for after the fit
+        c_path_callback = None
+        path_errors = []
+        if self.path_callback is not None and do_predict == 0:
+
+            def c_path_callback(fold, alpha_index, lambda_index, x, more):
+                if path_errors:
+                    return
+                try:
+                    self.path_callback(fold, alpha_index, lambda_index, x,
+                                       more[0:3], more[3], more[4])
+                except Exception as err:  # pylint: disable=broad-except
+                    path_errors.append(err)
 
         #call elastic net in C backend
         _, x_vs_alpha_lambda, x_vs_alpha, \
         valid_pred_vs_alpha_lambda, valid_pred_vs_alpha, \
-        count_full, count_short, count_more = c_elastic_net(
+        count_full, count_short, count_more, timed_out, \
+        telemetry, count_telemetry = c_elastic_net(
             self._family,
             do_predict,
             source_dev,
             1,
             self._shared_a,
             self.n_threads,
+            0 if self.blas_threads is None else int(self.blas_threads),
             self._gpu_id,
             self.n_gpus,
             self._total_n_gpus,
-            self.ord, # 10
+            self.ord, # 11
             m_train,
             n,
             m_valid,
@@ -638,7 +1467,7 @@ class ElasticNetH2O(object):
             self.lambda_min_ratio,
             self.n_lambdas,
             self.n_folds,
-            self.n_alphas, #20
+            c_n_alphas, #20
             self.alpha_min,
             self.alpha_max,
             c_alphas,
@@ -648,21 +1477,40 @@ class ElasticNetH2O(object):
             self.lambda_stop_early,
             self.glm_stop_early,
             self.glm_stop_early_error_fraction,
-            self.max_iter, # 30
+            self.max_iter, # 31
+            0.0 if self.max_runtime_secs is None else
+            float(self.max_runtime_secs),
             self.verbose,
+            1 if self.screening == 'strong' else 0,
+            {'admm': 0, 'cd': 1, 'direct': 2}[self.solver],
+            int(self.lockstep),
+            int(self.anderson_mem),
+            1 if self.lambda_search == 'adaptive' else 0,
+            -1.0 if self.alpha_race_margin is None else
+            float(self.alpha_race_margin),
+            1 if self.warm_start and do_predict == 0 else 0,
+            c_warm_x,
+            c_warm_rho,
+            c_n_targets,
+            c_target_y,
+            c_target_valid_y,
             int(a) if a is not None else -1,
             int(b) if b is not None else -1,
             int(c) if c is not None else -1,
-            int(d) if d is not None else -1,
+            int(d) if d is not None else -1, # 42
             int(e) if e is not None else -1,
             self.store_full_path,
+            1 if self.store_telemetry and do_predict == 0 else 0,
+            c_path_callback,
             self.x_vs_alpha_lambda,
             self.x_vs_alpha,
-            self.valid_pred_vs_alpha_lambda, # 40
+            self.valid_pred_vs_alpha_lambda,
             self.valid_pred_vs_alpha,
             count_full,
             count_short,
-            count_more
+            count_more,
+            None,
+            0
         )
         #if should or user wanted to save or free data,
         #do that now that we are done using a, b, c, d, e
@@ -677,18 +1525,47 @@ class ElasticNetH2O(object):
         self.count_full = count_full
         self.count_short = count_short
         self.count_more = count_more
+        if do_predict == 1:
+            self.did_predict = 1
+        else:
+            self.timed_out = bool(timed_out)
+            self.telemetry = _telemetry_records(
+                self, telemetry, count_telemetry) \
+                if self.store_telemetry else None
 
         if free_input_data == 1:
             free_data(self)
 
-        # ####################################
-        #PROCESS OUTPUT
-        #save pointers
+        self._store_solution(n, m_valid, count_full, count_short, count_more,
+                             do_predict)
+        if path_errors:
+            raise path_errors[0]
+        return self
+
+    def _store_solution(self, n, m_valid, count_full, count_short,
+                        count_more, do_predict):
+        """Unpack the buffers returned by the C backend (solutions, errors,
+        lambdas, alphas and tols, or predictions) into the model arrays.
 
+        :param n Number of columns in the training set, intercept included
+
+        :param m_valid Number of rows in the validation set
+
+        :param count_full Elements in the alpha x lambda buffer
+
+        :param count_short Elements in the per-alpha buffer
+
+        :param count_more Elements in the extra buffer
+
+        :param int do_predict : Whether the buffers hold predictions
+        """
+
+        models = self._models_shape()
+        n_models = int(np.prod(models))
         if self.store_full_path == 1:
-            num_all = int(count_full / (self.n_alphas * self.n_lambdas))
+            num_all = int(count_full / (n_models * self.n_lambdas))
         else:
-            num_all = int(count_short / self.n_alphas)
+            num_all = int(count_short / n_models)
 
         num_all_other = num_all - n
         num_error = 3  # should be consistent w/ src/common/elastic_net_ptr.cpp
@@ -711,67 +1588,66 @@ class ElasticNetH2O(object):
             #x_vs_alpha_lambda contains solution(and other data)
             #for all lambda and alpha
 
-            self.x_vs_alpha_lambdanew = \
-                np.fromiter(cast(self.x_vs_alpha_lambda.__int__(), POINTER(c_type)),
-                            dtype=self.dtype,
-                            count=count_full)
+            self.x_vs_alpha_lambdanew = _as_owned_array(
+                self, self.x_vs_alpha_lambda, count_full, self.dtype)
 
             self.x_vs_alpha_lambdanew = \
-                np.reshape(self.x_vs_alpha_lambdanew, (self.n_lambdas,
-                                                       self.n_alphas, num_all))
+                np.reshape(self.x_vs_alpha_lambdanew,
+                           (self.n_lambdas,) + models + (num_all,))
 
             self.x_vs_alpha_lambdapure = \
-                self.x_vs_alpha_lambdanew[:, :, 0:n]
+                self.x_vs_alpha_lambdanew[..., 0:n]
 
             self.error_vs_alpha_lambda = \
-                self.x_vs_alpha_lambdanew[:, :, n:n + num_error]
+                self.x_vs_alpha_lambdanew[..., n:n + num_error]
 
             self._lambdas = \
-                self.x_vs_alpha_lambdanew[:, :, n + num_error:n + num_error + 1]
+                self.x_vs_alpha_lambdanew[..., n + num_error:n + num_error + 1]
 
-            self._alphas = self.x_vs_alpha_lambdanew[:, :, n + num_error + 1:
+            self._alphas = self.x_vs_alpha_lambdanew[..., n + num_error + 1:
                                                      n + num_error + 2]
 
-            self._tols = self.x_vs_alpha_lambdanew[:, :, n + num_error + 2:
+            self._tols = self.x_vs_alpha_lambdanew[..., n + num_error + 2:
                                                    n + num_error + 3]
 
             if self.fit_intercept == 1:
-                self.intercept_ = self.x_vs_alpha_lambdapure[:, :, -1]
+                self.intercept_ = self.x_vs_alpha_lambdapure[..., -1]
             else:
                 self.intercept_ = None
 
         if self.store_full_path == 1 and do_predict == 1:
             thecount = int(count_full / (n + num_all_other) * m_valid)
 
-            self.valid_pred_vs_alpha_lambdanew = \
-                np.fromiter(cast(self.valid_pred_vs_alpha_lambda.__int__(), POINTER(c_type)),
-                            dtype=self.dtype,
-                            count=thecount)
+            self.valid_pred_vs_alpha_lambdanew = _as_owned_array(
+                self, self.valid_pred_vs_alpha_lambda, thecount, self.dtype)
             self.valid_pred_vs_alpha_lambdanew = \
                 np.reshape(self.valid_pred_vs_alpha_lambdanew,
-                           (self.n_lambdas, self.n_alphas, m_valid))
+                           (self.n_lambdas,) + models + (m_valid,))
             self.valid_pred_vs_alpha_lambdapure = \
-                self.valid_pred_vs_alpha_lambdanew[:, :, 0:m_valid]
+                self.valid_pred_vs_alpha_lambdanew[..., 0:m_valid]
+            #the per-alpha buffer is allocated as well, take ownership of it
+            #so it is released with the arrays instead of leaking
+            self.valid_pred_vs_alphanew = _as_owned_array(
+                self, self.valid_pred_vs_alpha,
+                int(count_short / (n + num_all_other) * m_valid), self.dtype)
 
         if do_predict == 0:  # store_full_path==0 or 1
             #x_vs_alpha contains only best of all lambda for each alpha
-            self.x_vs_alphanew = np.fromiter(
-                cast(self.x_vs_alpha.__int__(), POINTER(c_type)),
-                dtype=self.dtype,
-                count=count_short)
+            self.x_vs_alphanew = _as_owned_array(self, self.x_vs_alpha,
+                                                 count_short, self.dtype)
             self.x_vs_alphanew = np.reshape(self.x_vs_alphanew,
-                                            (self.n_alphas, num_all))
-            self.x_vs_alphapure = self.x_vs_alphanew[:, 0:n]
-            self.error_vs_alpha = self.x_vs_alphanew[:, n:n + num_error]
-            self._lambdas2 = self.x_vs_alphanew[:, n + num_error:
+                                            models + (num_all,))
+            self.x_vs_alphapure = self.x_vs_alphanew[..., 0:n]
+            self.error_vs_alpha = self.x_vs_alphanew[..., n:n + num_error]
+            self._lambdas2 = self.x_vs_alphanew[..., n + num_error:
                                                 n + num_error + 1]
-            self._alphas2 = self.x_vs_alphanew[:, n + num_error + 1:
+            self._alphas2 = self.x_vs_alphanew[..., n + num_error + 1:
                                                n + num_error + 2]
-            self._tols2 = self.x_vs_alphanew[:, n + num_error + 2:
+            self._tols2 = self.x_vs_alphanew[..., n + num_error + 2:
                                              n + num_error + 3]
 
             if self.fit_intercept == 1:
-                self.intercept2_ = self.x_vs_alphapure[:, -1]
+                self.intercept2_ = self.x_vs_alphapure[..., -1]
             else:
                 self.intercept2_ = None
 
@@ -792,18 +1668,32 @@ class ElasticNetH2O(object):
                           m_valid,
                       ))
                 sys.stdout.flush()
+            self.valid_pred_vs_alphanew = _as_owned_array(
+                self, self.valid_pred_vs_alpha, thecount, self.dtype)
             self.valid_pred_vs_alphanew = \
-                np.fromiter(cast(self.valid_pred_vs_alpha.__int__(), POINTER(c_type)),
-                            dtype=self.dtype,
-                            count=thecount)
-            self.valid_pred_vs_alphanew = \
-                np.reshape(self.valid_pred_vs_alphanew, (self.n_alphas,
-                                                         m_valid))
+                np.reshape(self.valid_pred_vs_alphanew, models + (m_valid,))
             self.valid_pred_vs_alphapure = \
-                self.valid_pred_vs_alphanew[:, 0:m_valid]
+                self.valid_pred_vs_alphanew[..., 0:m_valid]
+
+        #the backend predicts a multinomial model's linear predictors
+        if self._family == 'm' and do_predict == 1:
+            if self.store_full_path == 1:
+                self.valid_pred_vs_alpha_lambdapure = _softmax(
+                    self.valid_pred_vs_alpha_lambdapure, -3)
+            else:
+                self.valid_pred_vs_alphapure = _softmax(
+                    self.valid_pred_vs_alphapure, -3)
 
         return self
 
+    def _models_shape(self):
+        """Shape of the axes the solutions are stored along (besides the
+        lambda axis of the full path): (n_alphas,), or (n_targets, n_alphas)
+        if several responses were fit."""
+        if self._n_targets > 1:
+            return (self._n_targets, self.n_alphas)
+        return (self.n_alphas,)
+
     # pylint: disable=unused-argument
     def predict_ptr(self,
                     valid_xptr=None,
@@ -847,7 +1737,7 @@ class ElasticNetH2O(object):
                 valid_yptr,
                 self.e,
                 do_predict=1,
-                free_input_data=free_input_data,
+                free_input_data=0,
             )
         self.store_full_path = 0
         self._fitorpredict_ptr(
@@ -863,6 +1753,7 @@ class ElasticNetH2O(object):
             valid_yptr,
             self.e,
             do_predict=1,
+            free_input_data=free_input_data,
         )
         #restore global variable
         self.store_full_path = oldstorefullpath
@@ -1028,15 +1919,27 @@ class ElasticNetH2O(object):
         Error is logloss for classification and
         RMSE (Root Mean Squared Error) for regression.
         """
-        error_train = pd.DataFrame(self.error_best, index=self.alphas)
-        if self.family == "logistic":
-            print("Logloss per alpha value (-1.00 = missing)\n")
+        # a multinomial model's classes have the same errors
+        several = self._n_targets > 1 and self._family != 'm'
+        if several:
+            errors, alphas = self.error_best, self.alphas
+        elif self._n_targets > 1:
+            errors, alphas = [self.error_best[0]], [self.alphas[0]]
         else:
-            print("RMSE per alpha value (-1.00 = missing)\n")
-        headers = ["Alphas", "Train", "CV", "Valid"]
-        print(
-            tabulate(
-                error_train, headers=headers, tablefmt="pipe", floatfmt=".2f"))
+            errors, alphas = [self.error_best], [self.alphas]
+        for target, (error, alpha) in enumerate(zip(errors, alphas)):
+            error_train = pd.DataFrame(error, index=alpha)
+            if several:
+                print("Target %d" % target)
+            if self.family in ("logistic", "multinomial"):
+                print("Logloss per alpha value (-1.00 = missing)\n")
+            else:
+                print("RMSE per alpha value (-1.00 = missing)\n")
+            headers = ["Alphas", "Train", "CV", "Valid"]
+            print(
+                tabulate(
+                    error_train, headers=headers, tablefmt="pipe",
+                    floatfmt=".2f"))
 
     # ################## #Properties and setters of properties
 
@@ -1068,8 +1971,7 @@ class ElasticNetH2O(object):
 
     @shared_a.setter
     def shared_a(self, value):
-        #add check
-        self.__shared_a = value
+        self._shared_a = 1 if value and self.n_gpus == 0 else 0
 
     @property
     def standardize(self):
@@ -1077,9 +1979,7 @@ class ElasticNetH2O(object):
 
     @standardize.setter
     def standardize(self, value):
-
-        #add check
-        self._standardize = value
+        self._standardize = 1 if value else 0
 
     @property
     def coef_(self):
@@ -1421,8 +2321,10 @@ class ElasticNet(object):
 
     family : string, (Default="elasticnet")
         "logistic" for classification with logistic regression.
+        "multinomial" for classification of several classes with
+        multinomial (softmax) logistic regression.
         Defaults to "elasticnet" for regression.
-        Must be "logistic" or "elasticnet".
+        Must be "logistic", "multinomial" or "elasticnet".
 
     store_full_path: int, (Default=0)
         Whether to store full solution for all alphas
@@ -1454,6 +2356,18 @@ class ElasticNet(object):
         determined (unless using _ptr methods) whether
         row 'r' or column 'c' major order.
 
+    shared_a : bool, (Default=False)
+        If True, all CPU threads read one copy of the training matrix.
+        Ignored on GPU.
+
+    screening : string, (Default=None)
+        'strong' to screen columns along the lambda path with the
+        sequential strong rule and KKT checks.  Ignored on GPU.
+
+    solver : string, (Default='admm')
+        'admm', 'cd' (cyclic coordinate descent) or 'direct' (as 'cd', but
+        exact for l1_ratio=0) to fit each model.  Ignored on GPU.
+
     backend : string, (Default="auto")
         Which backend to use.
         Options are 'auto', 'sklearn', 'h2o4gpu'.
@@ -1495,6 +2409,9 @@ class ElasticNet(object):
             lambdas=None, #h2o4gpu
             double_precision=None, #h2o4gpu
             order=None, #h2o4gpu
+            shared_a=False, #h2o4gpu
+            screening=None, #h2o4gpu
+            solver='admm', #h2o4gpu
             backend='auto'):  # h2o4gpu
 
         import os
@@ -1510,14 +2427,14 @@ class ElasticNet(object):
 
             params_string = ['alpha', 'l1_ratio', 'normalize', 'precompute',
                              'max_iter', 'copy_X',
-                             'warm_start', 'positive',
+                             'positive',
                              'random_state', 'selection']
             params = [alpha, l1_ratio, normalize, precompute,
                       max_iter, copy_X,
-                      warm_start, positive,
+                      positive,
                       random_state, selection]
             params_default = [1.0, 0.5, False, False, 5000, True,
-                              False, False, None, 'cyclic']
+                              False, None, 'cyclic']
 
             i = 0
             for param in params:
@@ -1577,7 +2494,11 @@ class ElasticNet(object):
             alpha_min=alpha_min,
             alphas=alphas,
             lambdas=lambdas,
-            order=order)
+            order=order,
+            shared_a=shared_a,
+            screening=screening,
+            solver=solver,
+            warm_start=warm_start)
 
         if self.do_sklearn:
             if verbose:
@@ -88,6 +88,10 @@ class Lasso(object):
     verbose : int, (Default=0)
        Print verbose information to the console if set to > 0.
 
+    solver : string, (Default='admm')
+        'admm' or 'cd' (cyclic coordinate descent) to fit the model.
+        Ignored on GPU.
+
     backend : string, (Default="auto")
         Which backend to use.
         Options are 'auto', 'sklearn', 'h2o4gpu'.
@@ -112,6 +116,7 @@ class Lasso(object):
             glm_stop_early=True,  # h2o4gpu
             glm_stop_early_error_fraction=1.0,  #h2o4gpu
             verbose=False,
+            solver='admm',  # h2o4gpu
             backend='auto'):  # h2o4gpu
 
         import os
@@ -194,7 +199,9 @@ class Lasso(object):
             alpha_min=alpha_min,
             alphas=alphas,
             lambdas=lambdas,
-            order=None)
+            order=None,
+            solver=solver,
+            warm_start=warm_start)
 
         if self.do_sklearn:
             if verbose:
@@ -214,6 +221,21 @@ class Lasso(object):
             res = self.model.fit(X, y, check_input)
             self.set_attributes()
             return res
+        if isinstance(X, elastic_net.GLMData):
+            # the handle's weights were fixed when it was uploaded, so
+            # instead of weighting rows by 1/(2m) scale the penalty by 2m,
+            # which only has the same solution for unit weights
+            if not X.unit_weights:
+                raise ValueError('Lasso weights the rows by 1/(2m) itself, '
+                                 'so cannot fit a GLMData with sample_weight')
+            lambda_max = self.model.lambda_max
+            self.model.lambda_max = lambda_max * 2.0 * X.m_train
+            try:
+                res = self.model.fit(X)
+            finally:
+                self.model.lambda_max = lambda_max
+            self.set_attributes()
+            return res
         import numpy as np
         # FIXME: only works if numpy input
         if len(X.shape) == 2:
@@ -37,7 +37,12 @@ class LinearRegression(object):
         n_targets > 1 and sufficient large problems.
 
     tol : float, (Default=1E-2)
-       Relative tolerance.
+       Relative tolerance.  Only used on GPU: on CPU the h2o4gpu backend
+       solves the least squares problem exactly (by Cholesky, or the
+       minimum norm solution if it is singular).  It does so from the
+       normal equations X^T X, whose condition number is that of X
+       squared, so an ill-conditioned X loses about twice as many
+       digits as with a QR or SVD based solver such as sklearn's.
 
     n_gpus : int
         Number of gpu's to use in RandomForestRegressor solver. Default is -1.
@@ -177,7 +182,8 @@ class LinearRegression(object):
             lambdas=lambdas,
             tol_seek_factor=tol_seek_factor,
             family=family,
-            order=None)
+            order=None,
+            solver='direct')
 
         if self.do_sklearn:
             if verbose:
@@ -200,7 +206,7 @@ class LinearRegression(object):
         elif self.do_daal:
             res = self.model.fit(X, y)
         else:
-            res = self.model.fit(X, y)
+            res = self.model.fit(X, y, sample_weight=sample_weight)
             self.set_attributes()
         return res
 
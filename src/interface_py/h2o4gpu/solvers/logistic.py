@@ -107,6 +107,13 @@ class LogisticRegression(object):
         the entire probability distribution. Does not work for liblinear
         solver.
 
+        With the h2o4gpu backend either is fit in one call for all classes,
+        which share the uploaded data and its setup: 'ovr' as one binary
+        logistic response per class, 'multinomial' by the multinomial
+        family of ElasticNetH2O.  predict_proba then returns the
+        (n_samples, n_classes) class probabilities (normalized over the
+        classes for 'ovr') and predict the labels.
+
         .. versionadded:: 0.18
            Stochastic Average Gradient descent solver for 'multinomial' case.
 
@@ -173,11 +180,9 @@ class LogisticRegression(object):
         # Can remove if fully implement sklearn functionality
         self.do_sklearn = False
         if backend == 'auto':
-            params_string = [
-                'intercept_scaling', 'class_weight', 'solver', 'multi_class'
-            ]
-            params = [intercept_scaling, class_weight, solver, multi_class]
-            params_default = [1.0, None, 'liblinear', 'ovr']
+            params_string = ['intercept_scaling', 'class_weight', 'solver']
+            params = [intercept_scaling, class_weight, solver]
+            params_default = [1.0, None, 'liblinear']
 
             i = 0
             for param in params:
@@ -252,7 +257,8 @@ class LogisticRegression(object):
             glm_stop_early_error_fraction=glm_stop_early_error_fraction,
             max_iter=max_iter,
             verbose=verbose,
-            family='logistic',
+            family=('multinomial'
+                    if multi_class == 'multinomial' else 'logistic'),
             store_full_path=store_full_path,
             lambda_max=lambda_max,
             alpha_max=alpha_max,
@@ -270,8 +276,27 @@ class LogisticRegression(object):
                 print("Running h2o4gpu Logistic Regression")
             self.model = self.model_h2o4gpu
         self.verbose = verbose
+        self.multi_class = multi_class
+        # labels of the classes of a multiclass h2o4gpu fit, else None
+        self.classes_ = None
 
     def fit(self, X, y=None, sample_weight=None):
+        self.classes_ = None
+        if not self.do_sklearn and y is not None:
+            classes = np.unique(np.asarray(y).reshape(-1))
+            if self.multi_class == 'multinomial':
+                res = self.model.fit(X, y, sample_weight=sample_weight)
+                self.classes_ = self.model.classes_
+                self.set_attributes()
+                return res
+            if len(classes) > 2:
+                # one vs rest: a binary response per class, all fit at once
+                self.classes_ = classes
+                targets = (np.asarray(y).reshape(-1)[:, None] ==
+                           classes).astype(np.float64)
+                res = self.model.fit(X, targets, sample_weight=sample_weight)
+                self.set_attributes()
+                return res
         res = self.model.fit(X, y, sample_weight)
         self.set_attributes()
         return res
@@ -281,8 +306,13 @@ class LogisticRegression(object):
             res = self.model.predict_proba(X)
             self.set_attributes()
             return res
-        res = self.model.predict(X)
+        res = self.model.predict_proba(X)
         self.set_attributes()
+        if self.classes_ is not None:
+            # (classes, 1 alpha, rows) to (rows, classes)
+            res = np.reshape(res, (len(self.classes_), -1)).T
+            if self.multi_class != 'multinomial':
+                res = res / np.sum(res, axis=1, keepdims=True)
         return res
 
     def decision_function(self, X):
@@ -303,6 +333,8 @@ class LogisticRegression(object):
             res = self.model.predict(X)
             self.set_attributes()
             return res
+        if self.classes_ is not None:
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
         res = self.model.predict(X)
         res[res < 0.5] = 0
         res[res > 0.5] = 1
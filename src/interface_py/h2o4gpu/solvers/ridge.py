@@ -46,7 +46,11 @@ class Ridge(object):
         by scipy.sparse.linalg. For 'sag' solver, the default value is 1000.
 
     tol : float
-        Precision of the solution.
+        Precision of the solution.  Only used on GPU: on CPU the h2o4gpu
+        backend solves the ridge problem exactly (by Cholesky).  It does
+        so from the normal equations X^T X + alpha I, so for a small alpha
+        an ill-conditioned X loses about twice as many digits as with
+        solver 'svd'.
 
     solver : {'auto', 'svd', 'cholesky', 'lsqr', 'sparse_cg', 'sag', 'saga'}
         Solver to use in the computational routines:
@@ -231,7 +235,8 @@ class Ridge(object):
             alpha_min=alpha_min,
             alphas=alphas,
             lambdas=lambdas,
-            order=None)
+            order=None,
+            solver='direct')
 
         if self.do_sklearn:
             if verbose:
@@ -252,7 +257,7 @@ class Ridge(object):
             res = self.model.fit(X, y, sample_weight)
             self.set_attributes()
             return res
-        res = self.model.fit(X, y)
+        res = self.model.fit(X, y, sample_weight=sample_weight)
         self.set_attributes()
         return res
 
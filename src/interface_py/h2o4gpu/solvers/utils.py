@@ -5,6 +5,8 @@
 """
 import sys
 import time
+import weakref
+from ctypes import c_float, c_double
 import numpy as np
 
 # Data utils
@@ -77,24 +79,7 @@ def _to_np(data, ismatrix=False, dtype=None, order=None):
     return outdata, selford, dtype
 
 
-def munge(data_as_np, fit_intercept=False):
-    """Munge Data
-    """
-    # If True, then append intercept term to
-    # train_x array and valid_x array(if available)
-    #
-    # Not this is really munging as adds to columns
-    # and changes expected size of outputted solution
-    if (fit_intercept or fit_intercept == 1) and len(data_as_np.shape) == 2:
-        data_as_np = np.hstack([
-            data_as_np,
-            np.ones((data_as_np.shape[0], 1), dtype=data_as_np.dtype)
-        ])
-    return data_as_np
-
-
-def _get_data(data, ismatrix=False, fit_intercept=False, order=None,
-              dtype=None):
+def _get_data(data, ismatrix=False, order=None, dtype=None):
     """Transforms data to numpy and gather basic info about it.
 
     :param data: array_like
@@ -110,7 +95,6 @@ def _get_data(data, ismatrix=False, fit_intercept=False, order=None,
     if data is not None:
         data_as_np, order, dtype = _to_np(
             data, ismatrix=ismatrix, dtype=dtype, order=order)
-        data_as_np = munge(data_as_np, fit_intercept=fit_intercept)
         fortran = not data_as_np.flags.c_contiguous
         shape_x = np.shape(data_as_np)
         m = shape_x[0]
@@ -201,20 +185,14 @@ def prepare_and_upload_data(self,
     """ Prepare data and then upload data
     """
     time_prepare0 = time.time()
+    # the intercept column is appended by the backend while it copies the
+    # data in upload_data, so train_x and valid_x are passed on as they are
     train_x_np, m_train, n1, fortran1, self.ord, self.dtype = _get_data(
-        train_x,
-        ismatrix=True,
-        fit_intercept=self.fit_intercept,
-        order=self.ord,
-        dtype=self.dtype)
+        train_x, ismatrix=True, order=self.ord, dtype=self.dtype)
     train_y_np, m_y, _, fortran2, self.ord, self.dtype = _get_data(
         train_y, order=self.ord, dtype=self.dtype)
     valid_x_np, m_valid, n2, fortran3, self.ord, self.dtype = _get_data(
-        valid_x,
-        ismatrix=True,
-        fit_intercept=self.fit_intercept,
-        order=self.ord,
-        dtype=self.dtype)
+        valid_x, ismatrix=True, order=self.ord, dtype=self.dtype)
     valid_y_np, m_valid_y, _, fortran4, self.ord, self.dtype = \
         _get_data(valid_y, order=self.ord, dtype=self.dtype)
     weight_np, _, _, fortran5, self.ord, self.dtype = _get_data(
@@ -270,7 +248,11 @@ def upload_data(self,
                 valid_y=None,
                 sample_weight=None,
                 source_dev=0):
-    """Upload the data through the backend library"""
+    """Upload the data through the backend library
+
+    If self.fit_intercept, the backend copies of train_x and valid_x get an
+    extra last column of ones and self.n counts it.
+    """
     if self.uploaded_data == 1:
         free_data(self)
     self.uploaded_data = 1
@@ -331,7 +313,8 @@ def upload_data(self,
         n = n1
     elif n2 >= 0:
         n = n2
-    self.n = n
+    intercept = 1 if self.fit_intercept and n >= 0 else 0
+    self.n = n + intercept
 
     # ############## #
 
@@ -378,6 +361,7 @@ def upload_data(self,
         n,
         m_valid,
         self.ord,
+        intercept,
         A,
         B,
         C,
@@ -404,8 +388,14 @@ def upload_data(self,
 def free_data(self):
     """Free Data
     """
-    # NOTE : For now, these are automatically freed
-    # when done with fit-- ok, since not used again
+    # the pointers are dropped too, so nothing uses the buffers once freed
+
+    # a GLMData's buffers are freed by the handle once nothing refers to it
+    if getattr(self, '_glm_data', None) is not None:
+        self._glm_data = None
+        self.uploaded_data = 0
+        self.a = self.b = self.c = self.d = self.e = None
+        return
 
     if self.uploaded_data == 1:
         self.uploaded_data = 0
@@ -421,27 +411,59 @@ def free_data(self):
             self.lib.modelfree1_float(self.c)
             self.lib.modelfree1_float(self.d)
             self.lib.modelfree1_float(self.e)
+        self.a = self.b = self.c = self.d = self.e = None
 
 def free_sols(self):
+    """Release the solution buffers returned by the C backend.
+
+    The buffers are owned by the numpy arrays wrapping them (see
+    _as_owned_array), so only the raw pointers are dropped here and the
+    memory is returned once the last array viewing it is collected.
+    """
     if self.did_fit_ptr == 1:
         self.did_fit_ptr = 0
-        if self.double_precision == 1:
-            self.lib.modelfree2_double(self.x_vs_alpha_lambda)
-            self.lib.modelfree2_double(self.x_vs_alpha)
-        else:
-            self.lib.modelfree2_float(self.x_vs_alpha_lambda)
-            self.lib.modelfree2_float(self.x_vs_alpha)
+        self.x_vs_alpha_lambda = None
+        self.x_vs_alpha = None
 
 
 def free_preds(self):
+    """Release the prediction buffers returned by the C backend.
+    """
     if self.did_predict == 1:
         self.did_predict = 0
-        if self.double_precision == 1:
-            self.lib.modelfree2_double(self.valid_pred_vs_alpha_lambda)
-            self.lib.modelfree2_double(self.valid_pred_vs_alpha)
-        else:
-            self.lib.modelfree2_float(self.valid_pred_vs_alpha_lambda)
-            self.lib.modelfree2_float(self.valid_pred_vs_alpha)
+        self.valid_pred_vs_alpha_lambda = None
+        self.valid_pred_vs_alpha = None
+
+
+def _as_owned_array(self, ptr, count, dtype):
+    """Wrap a buffer allocated by the C backend as a 1D numpy array.
+
+    No copy is made: the array is built on top of the buffer through the
+    buffer protocol and takes ownership of it, calling modelfree2 once the
+    array and every view of it have been garbage collected.
+
+    :param ptr: SWIG pointer returned by elastic_net_ptr_*
+    :param count: Number of elements in the buffer
+    :param dtype: np.float32 or np.float64
+    :return: ndarray
+    """
+    if dtype == np.float64:
+        c_type = c_double
+        c_free = self.lib.modelfree2_double
+    else:
+        c_type = c_float
+        c_free = self.lib.modelfree2_float
+
+    if ptr is None or int(ptr) == 0:
+        return np.empty(0, dtype=dtype)
+    if count == 0:
+        c_free(ptr)
+        return np.empty(0, dtype=dtype)
+
+    buf = (c_type * int(count)).from_address(int(ptr))
+    weakref.finalize(buf, c_free, ptr)
+    return np.frombuffer(buf, dtype=dtype)
+
 
 def finish(self):
     free_data(self)
@@ -34,6 +34,7 @@ class H2OSolverDefault(object):
     WARM_START = 0  # warm_start = False
     N_DEV = 1  # number of cuda devices =1
     W_DEV = 0  # which cuda devices (0)
+    ANDERSON_MEM = 0  # anderson_mem = 0, no Anderson acceleration
 
 #H2O4GPU types
 class Solution(object):
@@ -62,6 +63,8 @@ def change_settings(settings, **kwargs):
     if 'adaptive_rho' in kwargs: settings.adaptive_rho = kwargs['adaptive_rho']
     if 'equil' in kwargs: settings.equil = kwargs['equil']
     if 'gap_stop' in kwargs: settings.gap_stop = kwargs['gap_stop']
+    if 'anderson_mem' in kwargs:
+        settings.anderson_mem = kwargs['anderson_mem']
 
     #warm_start must be specified each time it is desired
     if 'warm_start' in kwargs:
@@ -103,6 +106,8 @@ def make_settings(double_precision=False, **kwargs):
         kwargs.keys()) else H2OSolverDefault.N_DEV
     settings.wdev = kwargs['wDev'] if 'wDev' in list(
         kwargs.keys()) else H2OSolverDefault.W_DEV
+    settings.anderson_mem = kwargs['anderson_mem'] if 'anderson_mem' in list(
+        kwargs.keys()) else H2OSolverDefault.ANDERSON_MEM
     return settings
 
 def change_solution(py_solution, **kwargs):
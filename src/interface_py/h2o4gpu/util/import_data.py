@@ -56,18 +56,22 @@ def import_data(data_path,
         data = feather.read_dataframe(data_file)
     print(data.shape)
     import numpy as np
-    data_x = np.array(
-        data.iloc[:, :data.shape[1] - 1],
+    #Allocate room for the intercept column up front and fill the features
+    #in place, rather than copying them again with np.hstack afterwards
+    norig = data.shape[1] - 1
+    data_x = np.empty(
+        (data.shape[0], norig + (1 if intercept else 0)),
         dtype='float32',
-        order='C',
-        copy=False)
+        order='C')
+    data_x[:, :norig] = data.iloc[:, :norig].values
+    if intercept:
+        data_x[:, norig] = 1
     data_y = np.array(
         data.iloc[:, data.shape[1] - 1], dtype='float32', order='C', copy=False)
 
     #Setup train / validation set split
     #(assuming form of mxn where m = row count and n = col count)
     morig = data_x.shape[0]
-    norig = data_x.shape[1]
     print("Original m=%d n=%d" % (morig, norig))
     import sys
     sys.stdout.flush()
@@ -92,13 +96,7 @@ def import_data(data_path,
 
 #Using intercept
     if intercept:
-        train_x = np.hstack(
-            [train_x,
-             np.ones((train_x.shape[0], 1), dtype=train_x.dtype)])
         if valid_fraction > 0:
-            valid_x = np.hstack(
-                [valid_x,
-                 np.ones((valid_x.shape[0], 1), dtype=valid_x.dtype)])
             print("Size of Train cols=%d & valid cols=%d after adding "
                   "intercept column" % (train_x.shape[1], valid_x.shape[1]))
         else:
@@ -2,13 +2,43 @@
 %{
 #include "../../common/elastic_net_ptr.h"
 
-extern int make_ptr_double(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord,
+extern int make_ptr_double(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord, int intercept,
                         const double* trainX, const double* trainY, const double* validX, const double* validY, const double *weight,
                         double** a, double** b, double** c, double** d, double** e);
-extern int make_ptr_float(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord,
+extern int make_ptr_float(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord, int intercept,
                        const float* trainX, const float* trainY, const float* validX, const float* validY, const float *weight,
                        float** a, float** b, float** c, float** d, float** e);
 
+// Hands a solution of the lambda path to the Python callable in data.  Called
+// from the fit's OpenMP threads, which hold no GIL, so take it here.
+template<typename T>
+static void path_callback_py(void *data, int fold, int a, int i, const T *x, size_t n,
+                             const T *more, size_t nmore) {
+    PyGILState_STATE gstate = PyGILState_Ensure();
+    const int typenum = sizeof(T) == sizeof(double) ? NPY_DOUBLE : NPY_FLOAT;
+    npy_intp dimx = n, dimmore = nmore;
+    PyObject *px = PyArray_SimpleNew(1, &dimx, typenum);
+    PyObject *pmore = PyArray_SimpleNew(1, &dimmore, typenum);
+    if (px != NULL && pmore != NULL) {
+        memcpy(PyArray_DATA((PyArrayObject *)px), x, n * sizeof(T));
+        memcpy(PyArray_DATA((PyArrayObject *)pmore), more, nmore * sizeof(T));
+        PyObject *result = PyObject_CallFunction((PyObject *)data, (char *)"iiiOO", fold, a, i, px, pmore);
+        Py_XDECREF(result);
+    }
+    if (PyErr_Occurred()) {
+        PyErr_WriteUnraisable((PyObject *)data);
+    }
+    Py_XDECREF(px);
+    Py_XDECREF(pmore);
+    PyGILState_Release(gstate);
+}
+
+%}
+
+%init %{
+#if PY_VERSION_HEX < 0x03070000
+    PyEval_InitThreads();
+#endif
 %}
 
 %typemap(in) float** (float* tmp) {
@@ -55,16 +85,63 @@ extern int make_ptr_float(int sharedA, int sourceme, int sourceDev, size_t mTrai
     }
 }
 
-%apply (float *IN_ARRAY1) {float *alphas, float *lambdas, float* trainX, float* trainY, float* validX, float* validY, float *weight};
-%apply (double *IN_ARRAY1) {double *alphas, double *lambdas, double* trainX, double* trainY, double* validX, double* validY, double *weight};
+%apply (float *IN_ARRAY1) {float *alphas, float *lambdas, float *targetY, float *targetValidY, float* trainX, float* trainY, float* validX, float* validY, float *weight};
+%apply (double *IN_ARRAY1) {double *alphas, double *lambdas, double *targetY, double *targetValidY, double* trainX, double* trainY, double* validX, double* validY, double *weight};
+
+%apply (float *IN_ARRAY1) {float *trainXdata, float *validXdata};
+%apply (double *IN_ARRAY1) {double *trainXdata, double *validXdata};
+%apply (int *IN_ARRAY1) {int *trainXindices, int *trainXindptr, int *validXindices, int *validXindptr};
+
+%apply (float *INPLACE_ARRAY1) {float *warmX, float *warmRho};
+%apply (double *INPLACE_ARRAY1) {double *warmX, double *warmRho};
+
+%apply size_t *INOUT {size_t *countfull, size_t *countshort, size_t *countmore, size_t *counttelemetry}
+%apply int *OUTPUT {int *timedout}
+
+%typemap(in) (path_callback_float pathcallback, void *pathdata) {
+    if ($input == Py_None) {
+        $1 = NULL;
+        $2 = NULL;
+    } else if (PyCallable_Check($input)) {
+        $1 = path_callback_py<float>;
+        $2 = (void *)$input;
+    } else {
+        PyErr_SetString(PyExc_TypeError, "path callback must be callable or None");
+        SWIG_fail;
+    }
+}
+
+%typemap(in) (path_callback_double pathcallback, void *pathdata) {
+    if ($input == Py_None) {
+        $1 = NULL;
+        $2 = NULL;
+    } else if (PyCallable_Check($input)) {
+        $1 = path_callback_py<double>;
+        $2 = (void *)$input;
+    } else {
+        PyErr_SetString(PyExc_TypeError, "path callback must be callable or None");
+        SWIG_fail;
+    }
+}
+
+// fits run without the GIL, so a path callback can take it from any thread
+%exception h2o4gpu::elastic_net_ptr_float {
+    Py_BEGIN_ALLOW_THREADS
+    $action
+    Py_END_ALLOW_THREADS
+}
 
-%apply size_t *INOUT {size_t *countfull, size_t *countshort, size_t *countmore}
+%exception h2o4gpu::elastic_net_ptr_double {
+    Py_BEGIN_ALLOW_THREADS
+    $action
+    Py_END_ALLOW_THREADS
+}
 
 %include "../../common/elastic_net_ptr.h"
 
-extern int make_ptr_double(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord,
+extern int make_ptr_double(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord, int intercept,
                         const double* trainX, const double* trainY, const double* validX, const double* validY, const double *weight,
                         double** a, double** b, double** c, double** d, double** e);
-extern int make_ptr_float(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord,
+extern int make_ptr_float(int sharedA, int sourceme, int sourceDev, size_t mTrain, size_t n, size_t mValid, const char ord, int intercept,
                        const float* trainX, const float* trainY, const float* validX, const float* validY, const float *weight,
                        float** a, float** b, float** c, float** d, float** e);
\ No newline at end of file
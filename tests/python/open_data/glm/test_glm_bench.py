@@ -0,0 +1,158 @@
+# -*- encoding: utf-8 -*-
+"""
+ElasticNetH2O timings for the CPU speedups that must not change the fit:
+Anderson accelerated ADMM iterations against plain ones, threads sharing
+one factorization of the training matrix (shared_a) against each factoring
+its own copy, and splits of the cores between model builder threads and
+their BLAS threads against every builder using all cores.  The speedups
+are only asserted with CHECKPERFORMANCE set, and the inputs shrunk
+without it.
+
+:copyright: 2017-2018 H2O.ai, Inc.
+:license:   Apache License Version 2.0 (see LICENSE for details)
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+import numpy as np
+import pytest
+from h2o4gpu.solvers.elastic_net import ElasticNetH2O
+
+
+def shape(m, n):
+    if os.getenv("CHECKPERFORMANCE") is None:
+        # reduce run time for basic tests
+        return int(m / 4), int(n / 4)
+    return m, n
+
+
+def timed_fits(models, *args):
+    """Fit each model on args, with the seconds each fit took"""
+    times = []
+    for lm in models:
+        start_time = time.time()
+        lm.fit(*args)
+        times.append(time.time() - start_time)
+    return times
+
+
+@pytest.mark.parametrize('m, n, cond', [
+    (20000, 200, 1.0),
+    (20000, 200, 1000.0),
+    (2000, 4000, 100.0),
+])
+def test_anderson_bench(m, n, cond, tol=1e-4):
+    m, n = shape(m, n)
+    np.random.seed(1234)
+    scales = np.logspace(0, np.log10(cond), n)
+    X = np.random.randn(m, n) * scales
+    Xv = np.random.randn(m // 4, n) * scales
+    beta = np.random.randn(n) * (np.random.rand(n) < 0.3) / scales
+    y = (np.random.rand(m) < 1 / (1 + np.exp(-X.dot(beta)))).astype(
+        np.float64)
+    yv = (np.random.rand(m // 4) < 1 / (1 + np.exp(-Xv.dot(beta)))).astype(
+        np.float64)
+
+    lms = [ElasticNetH2O(n_gpus=0, n_threads=1, n_folds=1, n_alphas=3,
+                         n_lambdas=20, lambda_stop_early=False,
+                         family='logistic', tol=1e-4,
+                         anderson_mem=anderson_mem)
+           for anderson_mem in [0, 5, 10]]
+    times = timed_fits(lms, X, y, Xv, yv)
+    print("%d x %d, cond %g: plain %g sec, anderson_mem=5 %g sec,"
+          " anderson_mem=10 %g sec" % (m, n, cond, times[0], times[1],
+                                       times[2]))
+
+    for lm in lms[1:]:
+        assert np.allclose(lm.error_best, lms[0].error_best,
+                           rtol=tol, atol=tol)
+    if os.getenv("CHECKPERFORMANCE") is not None:
+        assert min(times[1:]) <= times[0], \
+            "Anderson acceleration is not faster for m = %s and n = %s" % (m,
+                                                                           n)
+
+
+@pytest.mark.parametrize('m, n', [(20000, 2000), (2000, 20000), (4000, 4000)])
+def test_shared_factorization_bench(m, n, n_threads=4, tol=1e-4):
+    m, n = shape(m, n)
+    np.random.seed(1234)
+    X = np.random.randn(m, n)
+    y = X.dot(np.random.randn(n)) + 1.0 + 0.1 * np.random.randn(m)
+
+    lms = [ElasticNetH2O(n_gpus=0, n_threads=n_threads, n_folds=1,
+                         n_alphas=n_threads, n_lambdas=5, shared_a=shared_a)
+           for shared_a in [False, True]]
+    times = timed_fits(lms, X, y)
+    print("%d x %d, %d threads: own factorization %g sec,"
+          " shared factorization %g sec" % (m, n, n_threads,
+                                             times[0], times[1]))
+
+    assert np.allclose(lms[0].error_best, lms[1].error_best,
+                       rtol=tol, atol=tol)
+    if os.getenv("CHECKPERFORMANCE") is not None:
+        assert times[1] <= times[0], \
+            "shared factorization is not faster for m = %s and n = %s" % (m, n)
+
+
+@pytest.mark.parametrize('m, n', [(20000, 500), (2000, 5000)])
+def test_threads_bench(m, n, tol=1e-4):
+    m, n = shape(m, n)
+    np.random.seed(1234)
+    X = np.random.randn(m, n)
+    y = X.dot(np.random.randn(n)) + 1.0 + 0.1 * np.random.randn(m)
+
+    cores = os.cpu_count() or 1
+    splits = [(n_threads, cores // n_threads)
+              for n_threads in range(1, cores + 1) if cores % n_threads == 0]
+    # every builder with all the cores, as without blas_threads before
+    splits.append((cores, cores))
+
+    lms = [ElasticNetH2O(n_gpus=0, n_threads=n_threads,
+                         blas_threads=blas_threads, n_folds=1,
+                         n_alphas=max(cores, 4), n_lambdas=10)
+           for n_threads, blas_threads in splits]
+    times = timed_fits(lms, X, y)
+    for (n_threads, blas_threads), seconds in zip(splits, times):
+        print("%d x %d, %d threads x %d BLAS threads: %g sec" %
+              (m, n, n_threads, blas_threads, seconds))
+
+    for lm in lms[1:]:
+        assert np.allclose(lm.error_best, lms[0].error_best, rtol=tol,
+                           atol=tol)
+    if os.getenv("CHECKPERFORMANCE") is not None:
+        assert min(times[:-1]) <= times[-1], \
+            "no split of the cores is faster than oversubscribing them " \
+            "for m = %s and n = %s" % (m, n)
+
+
+def blas_threads_of_fit(lm, X, y):
+    """The BLAS threads per builder a verbose fit reports on stdout"""
+    with tempfile.TemporaryFile() as out:
+        sys.stdout.flush()
+        saved = os.dup(1)
+        os.dup2(out.fileno(), 1)
+        try:
+            lm.fit(X, y)
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+        out.seek(0)
+        found = re.findall(rb"BLAS threads per thread=(\d+)", out.read())
+    assert found, "verbose fit didn't report its BLAS threads"
+    return int(found[-1])
+
+
+def test_threads_budget_repeat():
+    np.random.seed(1234)
+    X = np.random.randn(1000, 20)
+    y = X.dot(np.random.randn(20)) + 1.0
+    # a fit's thread settings mustn't shrink the budget of the next
+    budgets = [blas_threads_of_fit(ElasticNetH2O(n_gpus=0, n_threads=2,
+                                                 n_folds=1, n_alphas=2,
+                                                 n_lambdas=5, verbose=1),
+                                   X, y) for _ in range(2)]
+    assert budgets[0] == budgets[1], \
+        "BLAS threads per builder went from %d to %d" % tuple(budgets)
@@ -0,0 +1,99 @@
+# -*- encoding: utf-8 -*-
+"""
+ElasticNetH2O tests for cross-validation folds being fitted on their own
+training rows, against fold fits done by hand and against the weighting
+scheme (held-out rows weighted zero) the shared_a fits still use.
+
+:copyright: 2017-2018 H2O.ai, Inc.
+:license:   Apache License Version 2.0 (see LICENSE for details)
+"""
+import numpy as np
+import pytest
+from h2o4gpu.solvers.elastic_net import ElasticNetH2O
+
+
+@pytest.mark.parametrize('family, n_folds',
+                         [('elasticnet', 5), ('logistic', 5),
+                          ('elasticnet', 2)])
+def test_cv_folds(family, n_folds):
+    np.random.seed(1234)
+    X = np.random.randn(2000, 20)
+    y = X.dot(np.random.randn(20)) + 1.0 + 0.1 * np.random.randn(2000)
+    if family == 'logistic':
+        y = (y > 1.0).astype(np.float64)
+
+    def model(**kwargs):
+        return ElasticNetH2O(n_gpus=0, n_alphas=3, n_lambdas=10,
+                             family=family, tol=1e-4, **kwargs)
+
+    # one thread, so the folds finish in order (see X_best below)
+    lm = model(n_folds=n_folds, n_threads=1)
+    lm.fit(X, y)
+    lm1 = model(n_folds=1)
+    lm1.fit(X, y)
+    lmw = model(n_folds=n_folds, n_threads=1, shared_a=True)
+    lmw.fit(X, y)
+
+    error = np.array(lm.error_best)
+    assert np.all(np.isfinite(error[:, 0]))
+    assert np.all(np.isfinite(error[:, 1]))
+    # held-out error is measured on unseen rows and so is no better than
+    # the training error of the full fit by more than noise
+    assert np.all(error[:, 1] >= 0.9 * np.array(lm1.error_best)[:, 0])
+    # the same per-alpha CV errors and lambdas as weighting the rows
+    assert np.allclose(error, lmw.error_best, rtol=1e-4, atol=1e-5)
+    assert np.allclose(lm.lambdas_best, lmw.lambdas_best)
+    # every fold's refit writes the reported coefficients, so they are
+    # the last fold's to finish: with one thread, the last fold's,
+    # refit on its training rows
+    if family == 'elasticnet':
+        assert np.allclose(lm.X_best, lm1.X_best, rtol=5e-2, atol=5e-2)
+
+
+@pytest.mark.parametrize('family, n_folds',
+                         [('elasticnet', 5), ('logistic', 5),
+                          ('elasticnet', 3)])
+def test_cv_folds_by_hand(family, n_folds):
+    np.random.seed(1234)
+    X = np.random.randn(2000, 20)
+    y = X.dot(np.random.randn(20)) + 1.0 + 0.1 * np.random.randn(2000)
+    if family == 'logistic':
+        y = (y > 1.0).astype(np.float64)
+        lambda_max, lambda_min_ratio = 20.0, 0.1
+    else:
+        lambda_max, lambda_min_ratio = 5.0, 0.01
+
+    def model(**kwargs):
+        return ElasticNetH2O(n_gpus=0, n_threads=1, family=family, tol=1e-6,
+                             **kwargs)
+
+    # the same lambdas for every fold and for the fits by hand
+    path = dict(n_lambdas=5, lambda_max=lambda_max,
+                lambda_min_ratio=lambda_min_ratio)
+    lm = model(n_folds=n_folds, n_alphas=3, **path)
+    lm.fit(X, y)
+
+    # the folds are contiguous blocks of rows, each held out once
+    m = X.shape[0]
+    best = []
+    for fi in range(n_folds):
+        hold = np.zeros(m, dtype=bool)
+        hold[fi * m // n_folds:(fi + 1) * m // n_folds] = True
+        lmf = model(n_folds=1, n_alphas=3, **path)
+        lmf.fit(X[~hold], y[~hold], X[hold], y[hold])
+        best.append(np.reshape(lmf.lambdas_best, -1))
+    # each alpha's lambda is the average of the folds' best ones
+    lambdas = np.reshape(lm.lambdas_best, -1)
+    assert np.allclose(lambdas, np.mean(best, axis=0))
+
+    # and the model reported is the last fold's refit at it, with that
+    # fold's held-out error
+    error = np.array(lm.error_best)
+    X_best = np.array(lm.X_best)
+    for a, alpha in enumerate(np.reshape(lm.alphas_best, -1)):
+        lmr = model(n_folds=1, alphas=[alpha], n_lambdas=1,
+                    lambda_max=lambdas[a], lambda_min_ratio=1.0)
+        lmr.fit(X[~hold], y[~hold], X[hold], y[hold])
+        assert np.isclose(error[a, 1], np.array(lmr.error_best)[0, 2],
+                          rtol=1e-5)
+        assert np.allclose(X_best[a], np.array(lmr.X_best)[0], atol=1e-3)
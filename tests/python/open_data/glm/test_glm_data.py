@@ -0,0 +1,299 @@
+# -*- encoding: utf-8 -*-
+"""
+GLM tests for where the fit's data lives and how long: several models fit
+from one GLMData upload (with its stats reused across refits) against
+fitting each from the arrays, CPU threads sharing one copy of the training
+matrix, the backend's solution and prediction buffers wrapped without
+copies, in-process scoring against scoring through the backend, and
+training sets too big for per-row work space on a thread stack.
+
+:copyright: 2017-2018 H2O.ai, Inc.
+:license:   Apache License Version 2.0 (see LICENSE for details)
+"""
+import gc
+import os
+import numpy as np
+import pytest
+import h2o4gpu
+from h2o4gpu.solvers.elastic_net import ElasticNetH2O, GLMData
+from h2o4gpu.solvers.utils import prepare_and_upload_data
+
+
+@pytest.mark.parametrize('family, order', [
+    ('elasticnet', 'r'),
+    ('elasticnet', 'c'),
+    ('logistic', 'r'),
+])
+def test_glm_data(family, order):
+    np.random.seed(1234)
+    m, n = 1000, 20
+    X = np.random.randn(m, n)
+    Xv = np.random.randn(m // 4, n)
+    beta = np.random.randn(n)
+    y = X.dot(beta) + 1.0 + 0.1 * np.random.randn(m)
+    yv = Xv.dot(beta) + 1.0 + 0.1 * np.random.randn(m // 4)
+    if family == 'logistic':
+        y = (y > 1.0).astype(np.float64)
+        yv = (yv > 1.0).astype(np.float64)
+    if order == 'c':
+        X, Xv = np.asfortranarray(X), np.asfortranarray(Xv)
+
+    data = GLMData(X, y, Xv, yv, n_gpus=0)
+    assert data.n == n + 1
+
+    def model(**kwargs):
+        return ElasticNetH2O(n_gpus=0, n_folds=1, n_alphas=3, n_lambdas=10,
+                             family=family, tol=1e-4, **kwargs)
+
+    lm = model()
+    lm.fit(X, y, Xv, yv)
+    preds = lm.predict_proba(Xv)
+    for shared_a in [False, True]:
+        lmd = model(shared_a=shared_a)
+        lmd.fit(data)
+        assert np.allclose(lmd.error_best, lm.error_best)
+        assert np.allclose(lmd.X_best, lm.X_best)
+        assert np.allclose(lmd.predict_proba(data), preds, rtol=1e-4,
+                           atol=1e-4)
+
+    # the models hold on to the handle while they use its data
+    lmd = model()
+    lmd.fit(data, free_input_data=0)
+    del data
+    gc.collect()
+    assert np.allclose(lmd.predict_proba(), preds, rtol=1e-4, atol=1e-4)
+
+
+def test_glm_data_wrappers():
+    np.random.seed(1234)
+    m, n = 1000, 20
+    X = np.random.randn(m, n)
+    y = X.dot(np.random.randn(n)) + 1.0 + 0.1 * np.random.randn(m)
+    data = GLMData(X, y, n_gpus=0)
+
+    for cls, kwargs in [(h2o4gpu.Ridge, {}), (h2o4gpu.Lasso, {'alpha': 0.1}),
+                        (h2o4gpu.LinearRegression, {})]:
+        lm = cls(n_gpus=0, backend='h2o4gpu', **kwargs)
+        lm.fit(X, y)
+        lmd = cls(n_gpus=0, backend='h2o4gpu', **kwargs)
+        lmd.fit(data)
+        assert np.allclose(lmd.coef_, lm.coef_, rtol=1e-3, atol=1e-3), cls
+        assert np.allclose(lmd.intercept_, lm.intercept_, rtol=1e-3,
+                           atol=1e-3), cls
+
+    # Lasso can't apply its own row weights to a weighted handle
+    weighted = GLMData(X, y, sample_weight=np.random.rand(m), n_gpus=0)
+    assert not weighted.unit_weights
+    with pytest.raises(ValueError):
+        h2o4gpu.Lasso(n_gpus=0, backend='h2o4gpu', alpha=0.1).fit(weighted)
+    assert GLMData(X, y, sample_weight=np.ones(m), n_gpus=0).unit_weights
+
+
+def rss():
+    """Resident memory of this process in bytes (Linux only)"""
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def test_glm_data_free():
+    np.random.seed(1234)
+    # big enough for the copy to be its own mapping, returned when freed
+    m, n = 2000, 5000
+    X = np.random.randn(m, n)
+    y = X[:, 0] + 1.0
+    size = X.nbytes
+
+    data = GLMData(X, y, n_gpus=0)
+    finalizer = data._finalizer
+    lm = ElasticNetH2O(n_gpus=0, n_folds=1, n_alphas=1, n_lambdas=2)
+    lm.fit(data, free_input_data=0)
+    del data
+    gc.collect()
+    assert finalizer.alive, "the handle was freed while a model used it"
+
+    before = rss() if os.path.exists('/proc/self/statm') else None
+    del lm
+    gc.collect()
+    assert not finalizer.alive, "the handle wasn't freed once unused"
+    if before is not None:
+        assert before - rss() > size / 2, \
+            "freeing the handle returned %d of its %d bytes" % \
+            (before - rss(), size)
+
+
+@pytest.mark.parametrize('family, standardize', [
+    ('elasticnet', False),
+    ('logistic', False),
+    ('elasticnet', True),
+])
+def test_stats_cache(family, standardize):
+    """Refits of the same upload, whose stats and lambda_max the backend
+    reuses, against fits of freshly uploaded copies, and new uploads (maybe
+    at a freed one's address) not reusing them"""
+    np.random.seed(1234)
+    m, n = 1000, 50
+    X = np.random.randn(m, n) * np.exp(np.random.randn(n))
+    beta = np.zeros(n)
+    beta[:10] = np.random.randn(10)
+    y = X.dot(beta) + 1.0 + 0.1 * np.random.randn(m)
+    if family == 'logistic':
+        y = (y > np.median(y)).astype(np.float64)
+
+    data = GLMData(X, y, n_gpus=0)
+    for alpha in [0.2, 0.5, 1.0, 0.5]:
+        def model():
+            return ElasticNetH2O(n_gpus=0, n_folds=1, alphas=[alpha],
+                                 n_lambdas=10, family=family, tol=1e-4,
+                                 store_full_path=1, standardize=standardize)
+
+        lm = model()
+        lm.fit(X, y)
+        lmd = model()
+        lmd.fit(data, free_input_data=0)
+        assert np.allclose(lmd.lambdas_full, lm.lambdas_full)
+        assert np.allclose(lmd.X_best, lm.X_best)
+
+    # the same shapes uploaded again after freeing, with other values
+    for scale in [2.0, 0.5]:
+        del data, lmd
+        gc.collect()
+        X *= scale
+        if family != 'logistic':
+            y *= scale
+        data = GLMData(X, y, n_gpus=0)
+        lm = model()
+        lm.fit(X, y)
+        lmd = model()
+        lmd.fit(data, free_input_data=0)
+        assert np.allclose(lmd.lambdas_full, lm.lambdas_full)
+        assert np.allclose(lmd.X_best, lm.X_best)
+
+
+# folds are fit on row subsets unless shared_a, so only close
+@pytest.mark.parametrize('family, n_folds, tol', [
+    ('elasticnet', 1, 1e-4),
+    ('logistic', 1, 1e-4),
+    ('elasticnet', 3, 1e-2),
+])
+def test_shared_a(family, n_folds, tol):
+    np.random.seed(1234)
+    X = np.random.randn(2000, 20)
+    y = X.dot(np.random.randn(20)) + 1.0 + 0.1 * np.random.randn(2000)
+    if family == 'logistic':
+        y = (y > 1.0).astype(np.float64)
+    X_orig = X.copy()
+
+    def model(shared_a):
+        # with folds, X_best is the last fold's to finish, so one thread
+        return ElasticNetH2O(n_gpus=0, n_threads=4 if n_folds == 1 else 1,
+                             n_folds=n_folds, n_alphas=4, n_lambdas=10,
+                             family=family, shared_a=shared_a)
+
+    lms = []
+    for shared_a in [False, True]:
+        lm = model(shared_a)
+        assert lm.shared_a == int(shared_a)
+        lm.fit(X, y)
+        lms.append(lm)
+
+    # the shared matrix is equilibrated in the backend's copy, not in X
+    assert np.array_equal(X, X_orig)
+    assert np.allclose(lms[0].X_best, lms[1].X_best, rtol=tol, atol=tol)
+    assert np.allclose(lms[0].error_best, lms[1].error_best,
+                       rtol=tol, atol=tol)
+    assert np.allclose(lms[0].predict(X), lms[1].predict(X),
+                       rtol=tol, atol=tol)
+
+    # refits on the same uploaded buffers see them unscaled
+    lm = model(True)
+    lm.fit(X, y, free_input_data=0)
+    for _ in range(2):
+        lm.fit(free_input_data=0)
+        assert np.allclose(lm.X_best, lms[1].X_best, rtol=1e-6, atol=1e-6)
+        assert np.allclose(lm.error_best, lms[1].error_best,
+                           rtol=1e-6, atol=1e-6)
+
+
+def _base(arr):
+    while arr.base is not None and isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr
+
+
+@pytest.mark.parametrize('store_full_path', [0, 1])
+def test_zero_copy(store_full_path):
+    np.random.seed(1234)
+    X = np.random.randn(500, 10)
+    y = X.dot(np.arange(10.0)) + 3.0
+
+    lm = ElasticNetH2O(n_gpus=0, n_folds=1, n_alphas=2, n_lambdas=5,
+                       store_full_path=store_full_path)
+    lm.fit(X, y, X, y, free_input_data=0)
+
+    # views into the C buffer, not copies
+    assert not _base(lm.X_best).flags.owndata
+    if store_full_path == 1:
+        assert not _base(lm.X_full).flags.owndata
+
+    # the backend's predictions on the uploaded data (predict(X) scores
+    # in-process instead, into the one array its matrix product makes)
+    preds = lm.predict_proba()
+    assert not _base(preds).flags.owndata
+
+    # arrays keep the buffer alive after the model refits and drops it
+    coefs = lm.X_best
+    coefs_copy = np.array(coefs)
+    lm.fit(X, 2.0 * y)
+    gc.collect()
+    assert np.array_equal(coefs, coefs_copy)
+
+
+@pytest.mark.parametrize('family, store_full_path', [
+    ('elasticnet', 0),
+    ('logistic', 0),
+    ('elasticnet', 1),
+])
+def test_native_score(family, store_full_path):
+    np.random.seed(1234)
+    X = np.random.randn(1000, 20)
+    y = X.dot(np.random.randn(20)) + 1.0
+    if family == 'logistic':
+        y = (y > 1.0).astype(np.float64)
+
+    lm = ElasticNetH2O(n_gpus=0, n_folds=1, n_alphas=3, n_lambdas=10,
+                       family=family, store_full_path=store_full_path)
+    lm.fit(X, y, free_input_data=1)
+
+    # scored without uploading anything
+    preds = np.array(lm.predict_proba(X, y))
+    errors = np.array(lm.error_best)
+    if store_full_path == 1:
+        preds_full = np.array(lm.validPreds_full)
+
+    # scored by the backend
+    prepare_and_upload_data(lm, valid_x=X, valid_y=y)
+    preds_ptr = lm.predict_proba(free_input_data=1)
+
+    assert preds.shape == preds_ptr.shape == (3, 1000)
+    assert np.allclose(preds, preds_ptr, rtol=1e-5, atol=1e-5)
+    assert np.allclose(errors[:, 2], lm.error_best[:, 2], rtol=1e-4)
+    if store_full_path == 1:
+        assert preds_full.shape == (10, 3, 1000)
+        assert np.allclose(preds_full, lm.validPreds_full,
+                           rtol=1e-5, atol=1e-5)
+
+
+def test_many_rows(m=10500000):
+    """More rows than per-row work space on a thread stack can hold
+    (regression test for stack overflow)"""
+    np.random.seed(1234)
+    X = np.random.randn(m, 2).astype(np.float32)
+    y = (X.dot(np.array([1.5, -2.0], dtype=np.float32)) + 1.0 +
+         0.1 * np.random.randn(m).astype(np.float32))
+
+    lm = ElasticNetH2O(n_gpus=0, n_threads=1, n_folds=1, n_alphas=1,
+                       n_lambdas=2, max_iter=50)
+    lm.fit(X, y)
+
+    assert np.all(np.isfinite(lm.X_best))
+    assert np.allclose(lm.X_best[0][:2], [1.5, -2.0], atol=0.1)
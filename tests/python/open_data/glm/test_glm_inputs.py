@@ -0,0 +1,146 @@
+# -*- encoding: utf-8 -*-
+"""
+ElasticNetH2O tests for what the backend does to the inputs instead of the
+caller: the intercept column added when it copies the data rather than by
+stacking a copy of the input, standardize=True against fitting columns
+standardized beforehand, and scipy.sparse CSR/CSC input against the same
+data given dense.
+
+:copyright: 2017-2018 H2O.ai, Inc.
+:license:   Apache License Version 2.0 (see LICENSE for details)
+"""
+import numpy as np
+import pytest
+from scipy import sparse
+from h2o4gpu.solvers.elastic_net import ElasticNetH2O
+
+
+@pytest.mark.parametrize('order, family', [
+    ('r', 'elasticnet'),
+    ('c', 'elasticnet'),
+    ('r', 'logistic'),
+])
+def test_intercept(order, family):
+    np.random.seed(1234)
+    m, n = 1000, 20
+    X = np.random.randn(m, n)
+    Xv = np.random.randn(m // 4, n)
+    beta = np.random.randn(n)
+    y = X.dot(beta) + 3.0 + 0.1 * np.random.randn(m)
+    yv = Xv.dot(beta) + 3.0 + 0.1 * np.random.randn(m // 4)
+    if family == 'logistic':
+        y = (y > 3.0).astype(np.float64)
+        yv = (yv > 3.0).astype(np.float64)
+    if order == 'c':
+        X = np.asfortranarray(X)
+        Xv = np.asfortranarray(Xv)
+    X_orig = X.copy()
+
+    lm = ElasticNetH2O(n_gpus=0, n_folds=1, n_alphas=2, n_lambdas=10,
+                       family=family, order=order)
+    lm.fit(X, y, Xv, yv)
+
+    # the caller's arrays are used as they are
+    assert np.array_equal(X, X_orig)
+    assert lm.n == n + 1
+    assert lm.X_best.shape == (2, n + 1)
+
+    # the intercept is the last coefficient
+    preds = lm.predict_proba(Xv)
+    linear = Xv.dot(lm.X_best[:, :n].T).T + lm.X_best[:, n:]
+    if family == 'logistic':
+        linear = 1 / (1 + np.exp(-linear))
+    assert np.allclose(preds, linear)
+    if family != 'logistic':
+        assert np.allclose(lm.intercept_best, 3.0, atol=0.1)
+
+
+@pytest.mark.parametrize('family, n_folds, solver, order', [
+    ('elasticnet', 1, 'admm', 'r'),
+    ('elasticnet', 1, 'admm', 'c'),
+    ('logistic', 1, 'admm', 'r'),
+    ('elasticnet', 3, 'admm', 'r'),
+    ('elasticnet', 1, 'cd', 'r'),
+    ('logistic', 1, 'cd', 'r'),
+])
+def test_standardize(family, n_folds, solver, order):
+    np.random.seed(1234)
+    m, n = 1000, 20
+    scales = np.exp(1.5 * np.random.randn(n))
+    offsets = 3 * np.random.randn(n)
+    X = np.random.randn(m, n) * scales + offsets
+    Xv = np.random.randn(m // 4, n) * scales + offsets
+    beta = np.zeros(n)
+    beta[:5] = np.random.randn(5) / scales[:5]
+    y = X.dot(beta) + 1.0 + 0.1 * np.random.randn(m)
+    yv = Xv.dot(beta) + 1.0 + 0.1 * np.random.randn(m // 4)
+    if family == 'logistic':
+        med = np.median(y)
+        y = (y + np.std(y) * np.random.randn(m) > med).astype(np.float64)
+        yv = (yv + np.std(y) * np.random.randn(m // 4) > med).astype(np.float64)
+    mu, sd = X.mean(axis=0), X.std(axis=0)
+    Xs, Xvs = (X - mu) / sd, (Xv - mu) / sd
+    if order == 'c':
+        X, Xv = np.asfortranarray(X), np.asfortranarray(Xv)
+    X_orig = X.copy()
+
+    def fit(train_x, valid_x, standardize):
+        lm = ElasticNetH2O(n_gpus=0, n_folds=n_folds, n_alphas=2,
+                           alpha_min=0.3, alpha_max=0.9, n_lambdas=20,
+                           lambda_min_ratio=1e-2, lambda_stop_early=False,
+                           family=family, tol=1e-6, solver=solver,
+                           order=order, standardize=standardize)
+        lm.fit(train_x, y, valid_x, yv)
+        return lm
+
+    lm = fit(X, Xv, True)
+    lms = fit(Xs, Xvs, False)
+
+    # nothing is scaled in place
+    assert np.array_equal(X, X_orig)
+    assert np.allclose(lm.error_best, lms.error_best, rtol=1e-2, atol=1e-3)
+    coefs = lms.X_best.copy()
+    coefs[:, :n] /= sd
+    coefs[:, n] -= coefs[:, :n].dot(mu)
+    assert np.allclose(lm.X_best, coefs, rtol=1e-2, atol=1e-2)
+    assert np.allclose(lm.predict_proba(Xv), lms.predict_proba(Xvs),
+                       rtol=1e-2, atol=1e-2)
+
+
+@pytest.mark.parametrize('family, n_folds, fmt', [
+    ('elasticnet', 1, 'csr'),
+    ('elasticnet', 1, 'csc'),
+    ('logistic', 1, 'csr'),
+    ('logistic', 1, 'csc'),
+    ('elasticnet', 3, 'csr'),
+])
+def test_sparse(family, n_folds, fmt, m=1000, n=100, density=0.1):
+    np.random.seed(1234)
+    X = sparse.random(m, n, density=density, format=fmt,
+                      data_rvs=np.random.randn)
+    Xv = sparse.random(m // 4, n, density=density, format=fmt,
+                       data_rvs=np.random.randn)
+    beta = np.zeros(n)
+    beta[np.random.choice(n, 10, replace=False)] = 2 * np.random.randn(10)
+    y = X.dot(beta) + 1.0 + 0.1 * np.random.randn(m)
+    yv = Xv.dot(beta) + 1.0 + 0.1 * np.random.randn(m // 4)
+    if family == 'logistic':
+        y = (y > 1.0).astype(np.float64)
+        yv = (yv > 1.0).astype(np.float64)
+
+    def fit(train_x, valid_x):
+        lm = ElasticNetH2O(n_gpus=0, n_folds=n_folds, n_alphas=3,
+                           alpha_min=0.2, alpha_max=1.0, n_lambdas=20,
+                           lambda_min_ratio=1e-2, lambda_stop_early=False,
+                           family=family, tol=1e-4)
+        lm.fit(train_x, y, valid_x, yv)
+        return lm
+
+    lm = fit(X.toarray(), Xv.toarray())
+    lms = fit(X, Xv)
+
+    assert np.allclose(lms.error_best, lm.error_best, rtol=1e-2, atol=1e-2)
+    assert np.allclose(lms.X_best, lm.X_best, rtol=1e-2, atol=1e-2)
+    # sparse valid_x is scored without densifying it
+    assert np.allclose(lms.predict_proba(Xv), lm.predict_proba(Xv.toarray()),
+                       rtol=1e-2, atol=1e-2)
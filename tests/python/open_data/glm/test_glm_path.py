@@ -0,0 +1,350 @@
+# -*- encoding: utf-8 -*-
+"""
+ElasticNetH2O tests for the ways through the alpha and lambda search: the
+adaptive lambda search and alpha racing against fitting every alpha's
+whole grid, warm starts from a previous fit, the wall clock budget
+(max_runtime_secs), and the path as streamed to a callback and recorded
+in the telemetry against the stored full path.
+
+:copyright: 2017-2018 H2O.ai, Inc.
+:license:   Apache License Version 2.0 (see LICENSE for details)
+"""
+import os
+import time
+import numpy as np
+import pytest
+from h2o4gpu.solvers.elastic_net import ElasticNetH2O
+
+
+def assert_same_best(lm, lmo, n_folds):
+    """lmo found the lambdas and models of lm, which fitted the whole grid"""
+    lambdas = np.reshape(lm.lambdas_best, -1)
+    assert np.allclose(np.reshape(lmo.lambdas_best, -1), lambdas)
+    assert np.allclose(lmo.error_best, lm.error_best, rtol=1e-3, atol=1e-4)
+    if n_folds > 1:
+        # both refit every alpha at its cross-validated lambda
+        assert np.allclose(lmo.X_best, lm.X_best, rtol=1e-3, atol=1e-4)
+    else:
+        # X_best is the best solution, which the grid has in its full path
+        for a, lambda_best in enumerate(lambdas):
+            i = np.argmin(np.abs(lm.lambdas_full[:, a] - lambda_best))
+            assert np.allclose(lmo.X_best[a], lm.X_full[i, a], rtol=1e-3,
+                               atol=1e-4)
+
+
+SEARCHES = [
+    ('elasticnet', 1, 'admm', 0),
+    ('logistic', 1, 'admm', 0),
+    ('elasticnet', 3, 'admm', 0),
+    ('elasticnet', 1, 'cd', 0),
+    ('elasticnet', 1, 'admm', 3),
+]
+
+
+@pytest.mark.parametrize('family, n_folds, solver, lockstep', SEARCHES)
+def test_lambda_search(family, n_folds, solver, lockstep):
+    np.random.seed(1234)
+    m, n = 1000, 30
+    X = np.random.randn(m, n)
+    Xv = np.random.randn(m // 4, n)
+    beta = np.random.randn(n) * (np.random.rand(n) < 0.3)
+    y = X.dot(beta) + 1.0 + 2.0 * np.random.randn(m)
+    yv = Xv.dot(beta) + 1.0 + 2.0 * np.random.randn(m // 4)
+    if family == 'logistic':
+        med = np.median(y)
+        y, yv = (y > med).astype(np.float64), (yv > med).astype(np.float64)
+
+    def model(lambda_search):
+        return ElasticNetH2O(n_gpus=0, n_threads=1, n_folds=n_folds,
+                             n_alphas=3, n_lambdas=50, lambda_stop_early=False,
+                             family=family, tol=1e-6, solver=solver,
+                             lockstep=lockstep, lambda_search=lambda_search,
+                             store_full_path=1)
+
+    lm = model('grid')
+    lm.fit(X, y, Xv, yv)
+    lma = model('adaptive')
+    lma.fit(X, y, Xv, yv)
+    assert_same_best(lm, lma, n_folds)
+
+
+@pytest.mark.parametrize('family, n_folds, solver, lockstep', SEARCHES)
+def test_alpha_racing(family, n_folds, solver, lockstep):
+    np.random.seed(1234)
+    m, n = 2000, 40
+    X = np.random.randn(m, n)
+    X[:, 1:15] += 0.8 * X[:, :14]
+    Xv = np.random.randn(m // 4, n)
+    Xv[:, 1:15] += 0.8 * Xv[:, :14]
+    beta = np.random.randn(n) * (np.random.rand(n) < 0.2)
+    y = X.dot(beta) + 2.0 * np.random.randn(m)
+    yv = Xv.dot(beta) + 2.0 * np.random.randn(m // 4)
+    if family == 'logistic':
+        med = np.median(y)
+        y, yv = (y > med).astype(np.float64), (yv > med).astype(np.float64)
+
+    def model(alpha_race_margin):
+        return ElasticNetH2O(n_gpus=0, n_threads=1, n_folds=n_folds,
+                             n_alphas=6, n_lambdas=40, lambda_stop_early=False,
+                             family=family, tol=1e-6, solver=solver,
+                             lockstep=lockstep,
+                             alpha_race_margin=alpha_race_margin,
+                             store_full_path=1)
+
+    lm = model(None)
+    lm.fit(X, y, Xv, yv)
+
+    # nothing dropped: the paths resumed segment by segment end the same
+    lmr = model(np.inf)
+    lmr.fit(X, y, Xv, yv)
+    assert_same_best(lm, lmr, n_folds)
+
+    # alphas dropped along the way: the best of the rest is about as good
+    lmr = model(0.001)
+    lmr.fit(X, y, Xv, yv)
+    assert np.min(lmr.error_best[..., 2]) <= \
+        np.min(lm.error_best[..., 2]) * 1.01
+
+
+@pytest.mark.parametrize('family, n_folds', [
+    ('elasticnet', 1),
+    ('logistic', 1),
+    ('elasticnet', 3),
+])
+def test_warm_start(family, n_folds):
+    np.random.seed(1234)
+    m, n = 1000, 100
+    X = np.random.randn(m, n)
+    beta = np.zeros(n)
+    beta[np.random.choice(n, 10, replace=False)] = 2 * np.random.randn(10)
+    y = X.dot(beta) + 1.0 + 0.1 * np.random.randn(m)
+    y2 = y + 0.01 * np.random.randn(m)
+    if family == 'logistic':
+        y = (y > 1.0).astype(np.float64)
+        y2 = (y2 > 1.0).astype(np.float64)
+
+    def model(warm_start):
+        return ElasticNetH2O(n_gpus=0, n_folds=n_folds, n_alphas=3,
+                             alpha_min=0.2, alpha_max=1.0, n_lambdas=20,
+                             lambda_min_ratio=1e-2, family=family, tol=1e-4,
+                             warm_start=warm_start)
+
+    lm = model(False)
+    lm.fit(X, y2)
+
+    lmw = model(True)
+    lmw.fit(X, y)
+    assert np.all(lmw._warm_rho > 0)
+    # refit on changed data starts each alpha from the previous fit
+    lmw.fit(X, y2)
+
+    assert np.allclose(lmw.error_best, lm.error_best, rtol=1e-2, atol=1e-3)
+    assert np.allclose(lmw.X_best, lm.X_best, rtol=1e-2, atol=1e-2)
+
+
+@pytest.mark.parametrize('solver, n_folds, family', [
+    ('admm', 1, 'elasticnet'),
+    ('cd', 1, 'elasticnet'),
+    ('admm', 3, 'elasticnet'),
+    ('cd', 1, 'logistic'),
+])
+def test_max_runtime(solver, n_folds, family):
+    np.random.seed(1234)
+    m, n = 4000, 100
+    X = np.random.randn(m, n)
+    Xv = np.random.randn(m // 4, n)
+    beta = np.random.randn(n)
+    y = X.dot(beta) + 1.0 + np.random.randn(m)
+    yv = Xv.dot(beta) + 1.0 + np.random.randn(m // 4)
+    if family == 'logistic':
+        y = (y > 1.0).astype(np.float64)
+        yv = (yv > 1.0).astype(np.float64)
+
+    def model(max_runtime_secs):
+        return ElasticNetH2O(n_gpus=0, n_threads=1, n_folds=n_folds,
+                             family=family, solver=solver, n_alphas=3,
+                             n_lambdas=30, lambda_min_ratio=1e-4,
+                             lambda_stop_early=False, glm_stop_early=False,
+                             tol=1e-6, max_runtime_secs=max_runtime_secs)
+
+    start_time = time.time()
+    lm = model(None)
+    lm.fit(X, y, Xv, yv)
+    full_time = time.time() - start_time
+    assert not lm.timed_out
+
+    # a twentieth of the time the full search of 3 x 30 lambdas takes, far too
+    # little to finish it
+    budget = full_time / 20
+    start_time = time.time()
+    lmt = model(budget)
+    lmt.fit(X, y, Xv, yv)
+    print("%s %s folds=%d: %g sec, limited to %g sec: %g sec" %
+          (family, solver, n_folds, full_time, budget,
+           time.time() - start_time))
+    assert lmt.timed_out
+    if os.getenv("CHECKPERFORMANCE") is not None:
+        assert time.time() - start_time < full_time / 4, \
+            "a fit limited to %g sec took %g sec" % \
+            (budget, time.time() - start_time)
+
+    # each alpha's model is the best it found, or none at all
+    X_best = np.reshape(lmt.X_best, (3, n + 1))
+    error_best = np.reshape(lmt.error_best, (3, 3))
+    lambdas_best = np.reshape(lmt.lambdas_best, -1)
+    if os.getenv("CHECKPERFORMANCE") is not None:
+        assert not np.all(np.isnan(lambdas_best))
+    for x, error, lam in zip(X_best, error_best, lambdas_best):
+        if np.isnan(lam):
+            assert np.all(np.isnan(error))
+            assert np.all(x == 0)
+        elif n_folds < 2:
+            pred = Xv.dot(x[:n]) + x[n]
+            if family == 'logistic':
+                p = np.clip(1 / (1 + np.exp(-pred)), 1e-15, 1 - 1e-15)
+                expected = -np.mean(yv * np.log(p) + (1 - yv) * np.log(1 - p))
+            else:
+                expected = np.sqrt(np.mean((pred - yv) ** 2))
+            assert np.isclose(error[2], expected, rtol=1e-4)
+
+    # no time at all: nothing fitted, but a clean return
+    lmz = model(1e-6)
+    lmz.fit(X, y, Xv, yv)
+    assert lmz.timed_out
+    assert np.all(np.isnan(lmz.lambdas_best))
+    assert np.all(np.isnan(lmz.error_best))
+    assert np.all(np.reshape(lmz.X_best, -1) == 0)
+
+
+@pytest.mark.parametrize('family, n_folds, n_threads, n_targets', [
+    ('elasticnet', 1, 1, 1),
+    ('logistic', 1, 1, 1),
+    ('elasticnet', 3, 2, 1),
+    ('elasticnet', 1, 1, 2),
+])
+def test_path_callback(family, n_folds, n_threads, n_targets):
+    np.random.seed(1234)
+    m, n = 1000, 20
+    X = np.random.randn(m, n)
+    Xv = np.random.randn(m // 4, n)
+    beta = np.random.randn(n, n_targets)
+    y = X.dot(beta) + 1.0 + np.random.randn(m, n_targets)
+    yv = Xv.dot(beta) + 1.0 + np.random.randn(m // 4, n_targets)
+    if family == 'logistic':
+        med = np.median(y, axis=0)
+        y, yv = (y > med).astype(np.float64), (yv > med).astype(np.float64)
+    if n_targets == 1:
+        y, yv = y[:, 0], yv[:, 0]
+
+    points = {}
+
+    def callback(fold, alpha_index, lambda_index, x, error, lambda_, alpha):
+        points[(fold, alpha_index, lambda_index)] = (x, error, lambda_, alpha)
+
+    def model(path_callback, store_full_path):
+        return ElasticNetH2O(n_gpus=0, n_threads=n_threads, n_folds=n_folds,
+                             n_alphas=3, n_lambdas=20, lambda_stop_early=False,
+                             family=family, tol=1e-6,
+                             path_callback=path_callback,
+                             store_full_path=store_full_path)
+
+    lm = model(callback, 1)
+    lm.fit(X, y, Xv, yv)
+    n_alphas = 3 * n_targets
+    assert len(points) == n_folds * n_alphas * 20
+    X_full = np.reshape(lm.X_full, (20, n_alphas, -1))
+    error_full = np.reshape(lm.error_full, (20, n_alphas, -1))
+    lambdas_full = np.reshape(lm.lambdas_full, (20, n_alphas))
+    for a in range(n_alphas):
+        for i in range(20):
+            x, error, lambda_, alpha = points[(0, a, i)]
+            assert np.allclose(x, X_full[i, a])
+            assert np.allclose(error, error_full[i, a])
+            assert np.isclose(lambda_, lambdas_full[i, a])
+
+    # the same points without storing the path
+    streamed = dict(points)
+    points.clear()
+    lm = model(callback, 0)
+    lm.fit(X, y, Xv, yv)
+    assert sorted(points) == sorted(streamed)
+    for key, (x, error, _, _) in points.items():
+        assert np.allclose(x, streamed[key][0], rtol=1e-5, atol=1e-6)
+
+    # an error in the callback surfaces from fit
+    def failing(*args):
+        raise RuntimeError('stop')
+
+    with pytest.raises(RuntimeError):
+        model(failing, 0).fit(X, y, Xv, yv)
+
+
+@pytest.mark.parametrize('solver, n_folds, lockstep', [
+    ('admm', 1, 0),
+    ('cd', 1, 0),
+    ('admm', 1, 3),
+    ('admm', 3, 0),
+])
+def test_telemetry(solver, n_folds, lockstep):
+    np.random.seed(1234)
+    m, n = 1000, 20
+    n_alphas, n_lambdas = 3, 10
+    X = np.random.randn(m, n)
+    Xv = np.random.randn(m // 4, n)
+    beta = np.random.randn(n) * (np.random.rand(n) > 0.5)
+    y = X.dot(beta) + 1.0 + np.random.randn(m)
+    yv = Xv.dot(beta) + 1.0 + np.random.randn(m // 4)
+
+    def model(store_telemetry=True):
+        return ElasticNetH2O(n_gpus=0, n_threads=1, n_folds=n_folds,
+                             solver=solver, lockstep=lockstep,
+                             n_alphas=n_alphas, n_lambdas=n_lambdas,
+                             lambda_stop_early=False, tol=1e-6,
+                             store_full_path=1,
+                             store_telemetry=store_telemetry)
+
+    lm = model()
+    lm.fit(X, y, Xv, yv)
+    tel = lm.telemetry
+    assert tel.dtype.names == ('fold', 'alpha_index', 'lambda_index',
+                               'refit', 'alpha', 'lambda', 'iterations',
+                               'rho', 'primal_residual', 'dual_residual',
+                               'time', 'dof')
+
+    # each solve once, sorted
+    keys = [(r.refit, r.fold, r.alpha_index, r.lambda_index) for r in tel]
+    assert keys == sorted(set(keys))
+    path = tel[~tel.refit]
+    assert 0 < len(path) <= n_folds * n_alphas * n_lambdas
+    assert np.all((path.fold >= 0) & (path.fold < n_folds))
+    if n_folds > 1:
+        refit = tel[tel.refit]
+        assert len(refit) == n_folds * n_alphas
+        assert np.all(refit.lambda_index == 0)
+
+    assert np.all(tel.iterations >= 0)
+    assert np.all(tel.time >= 0)
+    if solver == 'admm':
+        assert np.all(tel.rho > 0)
+        assert np.all(np.isfinite(tel.primal_residual))
+        assert np.all(np.isfinite(tel.dual_residual))
+    else:
+        assert np.all(np.isnan(tel.rho))
+        assert np.all(np.isnan(tel.primal_residual))
+
+    # the first fold's path solves are those stored in the full path
+    X_full = np.reshape(lm.X_full, (n_lambdas, n_alphas, n + 1))
+    lambdas_full = np.reshape(lm.lambdas_full, (n_lambdas, n_alphas))
+    alphas_full = np.reshape(lm.alphas_full, (n_lambdas, n_alphas))
+    for r in path[path.fold == 0]:
+        assert np.isclose(r['lambda'],
+                          lambdas_full[r.lambda_index, r.alpha_index])
+        assert np.isclose(r.alpha, alphas_full[r.lambda_index, r.alpha_index])
+        x = X_full[r.lambda_index, r.alpha_index, :n]
+        assert r.dof == np.sum(np.abs(x) > 1e-8)
+
+    # switched off, nothing is recorded
+    lmo = model(store_telemetry=False)
+    lmo.fit(X, y, Xv, yv)
+    assert lmo.telemetry is None
+    assert np.allclose(lmo.X_full, lm.X_full)
@@ -0,0 +1,199 @@
+# -*- encoding: utf-8 -*-
+"""
+ElasticNetH2O tests for the CPU solvers and the ways of running them:
+coordinate descent and strong-rule screening against ADMM, blocks of
+alphas in lock step against one alpha at a time, and solver='direct' (with
+the Ridge and LinearRegression wrappers built on it) against the closed
+form ridge and least squares solutions.
+
+:copyright: 2017-2018 H2O.ai, Inc.
+:license:   Apache License Version 2.0 (see LICENSE for details)
+"""
+import numpy as np
+import pytest
+import h2o4gpu
+from h2o4gpu.solvers.elastic_net import ElasticNetH2O
+
+
+def sparse_problem(m, n, family):
+    np.random.seed(1234)
+    X = np.random.randn(m, n)
+    beta = np.zeros(n)
+    beta[np.random.choice(n, 10, replace=False)] = 2 * np.random.randn(10)
+    y = X.dot(beta) + 1.0 + 0.1 * np.random.randn(m)
+    if family == 'logistic':
+        y = (y > 1.0).astype(np.float64)
+    return X, y
+
+
+def assert_same_path(lm, lmo):
+    """Same models along the whole path, not just at the best lambda"""
+    assert np.allclose(lmo.error_best, lm.error_best, rtol=1e-2, atol=1e-3)
+    assert np.allclose(lmo.X_best, lm.X_best, rtol=1e-2, atol=1e-2)
+    # lambdas skipped after a 0-iteration solve are left as zeros in either
+    solved = (np.any(lmo.X_full != 0, axis=-1) &
+              np.any(lm.X_full != 0, axis=-1))
+    assert np.allclose(lmo.X_full[solved], lm.X_full[solved],
+                       rtol=1e-2, atol=1e-2)
+
+
+# n=50 updates the gradient from cached Gram columns, n=1000 the residual
+@pytest.mark.parametrize('n, family, n_folds', [
+    (50, 'elasticnet', 1),
+    (1000, 'elasticnet', 1),
+    (50, 'logistic', 1),
+    (50, 'elasticnet', 3),
+])
+def test_cd(n, family, n_folds):
+    X, y = sparse_problem(500, n, family)
+
+    def fit(solver):
+        lm = ElasticNetH2O(n_gpus=0, n_folds=n_folds, n_alphas=3,
+                           alpha_min=0.2, alpha_max=1.0, n_lambdas=20,
+                           lambda_min_ratio=1e-2, lambda_stop_early=False,
+                           family=family, tol=1e-4, store_full_path=1,
+                           solver=solver)
+        lm.fit(X, y)
+        return lm
+
+    assert_same_path(fit('admm'), fit('cd'))
+
+
+@pytest.mark.parametrize('family, n_folds', [
+    ('elasticnet', 1),
+    ('logistic', 1),
+    ('elasticnet', 3),
+])
+def test_screening(family, n_folds):
+    X, y = sparse_problem(500, 2000, family)
+
+    def fit(screening):
+        lm = ElasticNetH2O(n_gpus=0, n_folds=n_folds, n_alphas=2,
+                           alpha_min=0.5, alpha_max=1.0, n_lambdas=20,
+                           lambda_min_ratio=5e-2, lambda_stop_early=False,
+                           family=family, tol=1e-4, store_full_path=1,
+                           screening=screening)
+        lm.fit(X, y)
+        return lm
+
+    assert_same_path(fit(None), fit('strong'))
+
+
+@pytest.mark.parametrize('family, n_folds, lockstep, order, standardize,'
+                         ' targets', [
+                             ('elasticnet', 1, 3, 'r', False, 1),
+                             ('logistic', 1, 3, 'r', False, 1),
+                             ('elasticnet', 3, 2, 'r', False, 1),
+                             ('elasticnet', 1, 5, 'c', False, 1),
+                             ('elasticnet', 1, 3, 'r', True, 1),
+                             ('elasticnet', 1, 4, 'r', False, 2),
+                         ])
+def test_lockstep(family, n_folds, lockstep, order, standardize, targets):
+    np.random.seed(1234)
+    m, n = 1000, 30
+    X = np.random.randn(m, n) * np.exp(np.random.randn(n))
+    Xv = np.random.randn(m // 4, n) * np.exp(np.random.randn(n))
+    beta = np.random.randn(n, targets) * (np.random.rand(n, targets) < 0.4)
+    y = X.dot(beta) + 1.0 + 0.3 * np.random.randn(m, targets)
+    yv = Xv.dot(beta) + 1.0 + 0.3 * np.random.randn(m // 4, targets)
+    if family == 'logistic':
+        med = np.median(y, axis=0)
+        y, yv = (y > med).astype(np.float64), (yv > med).astype(np.float64)
+    if targets == 1:
+        y, yv = y[:, 0], yv[:, 0]
+    if order == 'c':
+        X, Xv = np.asfortranarray(X), np.asfortranarray(Xv)
+
+    def model(lockstep):
+        return ElasticNetH2O(n_gpus=0, n_threads=1, n_folds=n_folds,
+                             n_alphas=5, n_lambdas=10, lambda_stop_early=False,
+                             family=family, tol=1e-6, order=order,
+                             standardize=standardize, lockstep=lockstep,
+                             store_full_path=1)
+
+    lm = model(0)
+    lm.fit(X, y, Xv, yv)
+    lml = model(lockstep)
+    lml.fit(X, y, Xv, yv)
+    assert np.allclose(lml.X_best, lm.X_best, rtol=1e-3, atol=1e-4)
+    assert np.allclose(lml.error_best, lm.error_best, rtol=1e-3, atol=1e-4)
+    assert np.allclose(lml.alphas_full, lm.alphas_full)
+    assert np.allclose(lml.predict_proba(Xv), lm.predict_proba(Xv),
+                       rtol=1e-3, atol=1e-4)
+
+
+def closed_form(X, y, lam, w=None, fit_intercept=True):
+    w = np.ones(X.shape[0]) if w is None else w
+    xm = w.dot(X) / w.sum() if fit_intercept else np.zeros(X.shape[1])
+    ym = w.dot(y) / w.sum() if fit_intercept else 0.0
+    Xc, yc = X - xm, y - ym
+    G = Xc.T.dot(w[:, None] * Xc) + lam * np.eye(X.shape[1])
+    coef = np.linalg.lstsq(G, Xc.T.dot(w * yc), rcond=None)[0]
+    return coef, ym - xm.dot(coef)
+
+
+@pytest.mark.parametrize('weighted, fit_intercept, n_folds, singular', [
+    (False, True, 1, False),
+    (True, True, 1, False),
+    (False, False, 1, False),
+    (False, True, 3, False),
+    (False, True, 1, True),
+])
+def test_direct(weighted, fit_intercept, n_folds, singular):
+    np.random.seed(1234)
+    m, n = 1000, 25
+    X = np.random.randn(m, n)
+    X[:, 1] += 0.9 * X[:, 0]
+    if singular:
+        X[:, -1] = X[:, 0]
+    Xv = np.random.randn(m // 4, n)
+    beta = np.random.randn(n)
+    y = X.dot(beta) + 1.0 + np.random.randn(m)
+    yv = Xv.dot(beta) + 1.0 + np.random.randn(m // 4)
+    w = np.random.rand(m) + 0.5 if weighted else None
+
+    # one eigendecomposition serves the whole path
+    lambdas = np.logspace(2, -2, 10)
+
+    def model(solver):
+        lm = ElasticNetH2O(n_gpus=0, n_threads=1, n_folds=n_folds,
+                           alpha_min=0, alpha_max=0, n_alphas=1,
+                           lambdas=lambdas, lambda_stop_early=False,
+                           fit_intercept=fit_intercept, tol=1e-10,
+                           solver=solver, store_full_path=1)
+        lm.fit(X, y, Xv, yv, sample_weight=w)
+        return lm
+
+    lm = model('direct')
+    if n_folds > 1:
+        # the folds hold out rows, so compare with a converged descent
+        lmc = model('cd')
+        assert np.allclose(lm.X_best, lmc.X_best, rtol=1e-6, atol=1e-6)
+        assert np.allclose(lm.X_full, lmc.X_full, rtol=1e-6, atol=1e-6)
+    else:
+        X_full = np.reshape(lm.X_full, (len(lambdas), -1))
+        lambdas_full = np.reshape(lm.lambdas_full, -1)
+        for x, lam in zip(X_full, lambdas_full):
+            if lam == 0:
+                continue  # not fitted
+            coef, intercept = closed_form(X, y, lam, w, fit_intercept)
+            assert np.allclose(x[:n], coef, rtol=1e-6, atol=1e-6)
+            if fit_intercept:
+                assert np.isclose(x[n], intercept, rtol=1e-6, atol=1e-6)
+
+    # the wrappers solve exactly
+    lr = h2o4gpu.Ridge(alpha=3.0, n_gpus=0, backend='h2o4gpu',
+                       fit_intercept=fit_intercept)
+    lr.fit(X, y, sample_weight=w)
+    coef, intercept = closed_form(X, y, 3.0, w, fit_intercept)
+    assert np.allclose(np.reshape(lr.coef_, -1)[:n], coef, rtol=1e-6,
+                       atol=1e-6)
+
+    ll = h2o4gpu.LinearRegression(n_gpus=0, backend='h2o4gpu',
+                                  fit_intercept=fit_intercept)
+    ll.fit(X, y, sample_weight=w)
+    coef, intercept = closed_form(X, y, 0.0, w, fit_intercept)
+    assert np.allclose(np.reshape(ll.coef_, -1)[:n], coef, rtol=1e-6,
+                       atol=1e-6)
+    if fit_intercept:
+        assert np.allclose(ll.intercept_, intercept, rtol=1e-6, atol=1e-6)
@@ -0,0 +1,188 @@
+# -*- encoding: utf-8 -*-
+"""
+GLM tests for fitting several targets against one matrix in one fit:
+several response columns against fitting each column on its own, the
+multinomial family against its optimality conditions, and
+LogisticRegression fitting all classes at once (multinomial and one vs
+rest) against per-class binary fits.
+
+:copyright: 2017-2018 H2O.ai, Inc.
+:license:   Apache License Version 2.0 (see LICENSE for details)
+"""
+import numpy as np
+import pytest
+import h2o4gpu
+from h2o4gpu.solvers.elastic_net import ElasticNetH2O
+
+
+@pytest.mark.parametrize('family, n_folds, solver, standardize', [
+    ('elasticnet', 1, 'admm', False),
+    ('logistic', 1, 'admm', False),
+    ('elasticnet', 3, 'admm', False),
+    ('elasticnet', 1, 'cd', False),
+    ('elasticnet', 1, 'admm', True),
+])
+def test_multi_target(family, n_folds, solver, standardize):
+    np.random.seed(1234)
+    m, n, k = 1000, 20, 4
+    X = np.random.randn(m, n) * np.exp(np.random.randn(n))
+    Xv = np.random.randn(m // 4, n) * np.exp(np.random.randn(n))
+    beta = np.random.randn(n, k) * (np.random.rand(n, k) < 0.4)
+    offsets = 2 * np.random.randn(k)
+    Y = X.dot(beta) + offsets + 0.3 * np.random.randn(m, k)
+    Yv = Xv.dot(beta) + offsets + 0.3 * np.random.randn(m // 4, k)
+    if family == 'logistic':
+        med = np.median(Y, axis=0)
+        Y, Yv = (Y > med).astype(np.float64), (Yv > med).astype(np.float64)
+
+    def model():
+        return ElasticNetH2O(n_gpus=0, n_folds=n_folds, n_alphas=3,
+                             alpha_min=0.2, alpha_max=1.0, n_lambdas=10,
+                             lambda_stop_early=False, family=family, tol=1e-6,
+                             solver=solver, standardize=standardize,
+                             store_full_path=1)
+
+    lm = model()
+    lm.fit(X, Y, Xv, Yv)
+    assert lm.X_best.shape == (k, 3, n + 1)
+    assert lm.X_full.shape == (10, k, 3, n + 1)
+    preds = lm.predict_proba(Xv)
+    assert preds.shape == (k, 3, m // 4)
+    for t in range(k):
+        lmt = model()
+        lmt.fit(X, Y[:, t], Xv, Yv[:, t])
+        assert np.allclose(lm.X_best[t], lmt.X_best, rtol=1e-3, atol=1e-4)
+        assert np.allclose(lm.error_best[t], lmt.error_best, rtol=1e-3,
+                           atol=1e-4)
+        assert np.allclose(lm.lambdas_full[:, t], lmt.lambdas_full)
+        assert np.allclose(preds[t], lmt.predict_proba(Xv), rtol=1e-3,
+                           atol=1e-4)
+
+
+def softmax(eta):
+    prob = np.exp(eta - np.max(eta, axis=1, keepdims=True))
+    return prob / np.sum(prob, axis=1, keepdims=True)
+
+
+def data(m, n, K):
+    X = np.random.randn(m, n)
+    beta = np.random.randn(n, K)
+    prob = softmax(X.dot(beta) + np.random.randn(K))
+    # labels 1..K, so classes_ is not just the column index
+    y = np.array([np.random.choice(K, p=p) for p in prob]) + 1
+    return X, y
+
+
+def logloss(prob, y, classes):
+    Y = (y[:, None] == classes).astype(np.float64)
+    return -np.mean(np.sum(Y * np.log(prob), axis=1))
+
+
+@pytest.mark.parametrize('alpha, n_folds, weighted', [
+    (0.0, 1, False),
+    (0.5, 1, False),
+    (1.0, 1, True),
+    (0.5, 3, False),
+])
+def test_multinomial(alpha, n_folds, weighted):
+    np.random.seed(1234)
+    m, n, K = 600, 8, 4
+    X, y = data(m, n, K)
+    Xv, yv = data(m // 3, n, K)
+    w = np.random.rand(m) + 0.5 if weighted else np.ones(m)
+
+    lm = ElasticNetH2O(n_gpus=0, n_threads=1, n_folds=n_folds,
+                       family='multinomial', alpha_min=alpha,
+                       alpha_max=alpha, n_alphas=1, n_lambdas=10,
+                       lambda_min_ratio=1e-2, lambda_stop_early=False,
+                       tol=1e-8, store_full_path=1)
+    lm.fit(X, y, Xv, yv, sample_weight=w if weighted else None)
+    assert np.array_equal(lm.classes_, np.arange(1, K + 1))
+
+    # the classes are the targets: (lambda, class, alpha, n + 1)
+    X_full = np.reshape(lm.X_full, (10, K, n + 1))
+    lambdas_full = np.reshape(lm.lambdas_full, (10, K))
+    error_full = np.reshape(lm.error_full, (10, K, 3))
+    assert np.allclose(lambdas_full, lambdas_full[:, :1])
+    assert np.allclose(error_full, error_full[:, :1])
+    Y = (y[:, None] == lm.classes_).astype(np.float64)
+    for x, lam, error in zip(X_full, lambdas_full[:, 0], error_full[:, 0]):
+        # the validation logloss is that of all classes' probabilities
+        prob = softmax(Xv.dot(x[:, :n].T) + x[:, n])
+        assert np.isclose(error[2], logloss(prob, yv, lm.classes_),
+                          rtol=1e-6)
+        if n_folds > 1:
+            continue  # fit on a fold's rows
+        # zero gradient on the active coefficients and the intercepts
+        beta = x[:, :n].T
+        r = w[:, None] * (softmax(X.dot(beta) + x[:, n]) - Y)
+        grad = X.T.dot(r) + lam * (1 - alpha) * beta
+        violation = np.where(beta != 0,
+                             np.abs(grad + lam * alpha * np.sign(beta)),
+                             np.maximum(np.abs(grad) - lam * alpha, 0))
+        assert np.max(violation) <= 1e-3 * lam
+        assert np.allclose(np.sum(r, axis=0), 0, atol=1e-3)
+        assert np.isclose(np.sum(x[:, n]), 0, atol=1e-6)
+
+    # the class probabilities of the best models, and their labels
+    prob = lm.predict_proba(Xv)
+    assert prob.shape == (K, 1, Xv.shape[0])
+    assert np.allclose(np.sum(prob, axis=0), 1)
+    X_best = np.reshape(lm.X_best, (K, n + 1))
+    expected = softmax(Xv.dot(X_best[:, :n].T) + X_best[:, n])
+    assert np.allclose(prob[:, 0].T, expected)
+    assert np.array_equal(lm.predict(Xv)[0],
+                          lm.classes_[np.argmax(expected, axis=1)])
+    lm.predict_proba(Xv, yv)
+    assert np.allclose(lm.error_best[..., 2],
+                       logloss(expected, yv, lm.classes_))
+
+    # several columns are taken as the class indicators
+    lmi = ElasticNetH2O(n_gpus=0, n_threads=1, n_folds=n_folds,
+                        family='multinomial', alpha_min=alpha,
+                        alpha_max=alpha, n_alphas=1, n_lambdas=10,
+                        lambda_min_ratio=1e-2, lambda_stop_early=False,
+                        tol=1e-8, store_full_path=1)
+    lmi.fit(X, Y, sample_weight=w if weighted else None)
+    assert np.allclose(lmi.X_full, lm.X_full, rtol=1e-6, atol=1e-6)
+
+    # fewer than two classes
+    with pytest.raises(ValueError):
+        ElasticNetH2O(n_gpus=0, family='multinomial').fit(X, np.ones(m))
+
+
+@pytest.mark.parametrize('multi_class', ['multinomial', 'ovr'])
+def test_logistic_multi_class(multi_class):
+    np.random.seed(1234)
+    m, n, K = 600, 8, 4
+    X, y = data(m, n, K)
+
+    def model():
+        return h2o4gpu.LogisticRegression(n_gpus=0, backend='h2o4gpu',
+                                          multi_class=multi_class, C=0.1,
+                                          tol=1e-6)
+
+    lr = model()
+    lr.fit(X, y)
+    assert np.array_equal(lr.classes_, np.arange(1, K + 1))
+    prob = lr.predict_proba(X)
+    assert prob.shape == (m, K)
+    assert np.allclose(np.sum(prob, axis=1), 1)
+    pred = lr.predict(X)
+    assert np.array_equal(pred, lr.classes_[np.argmax(prob, axis=1)])
+    assert np.mean(pred == y) > 1.0 / K
+
+    coef = np.reshape(lr.coef_, (K, n + 1))
+    eta = X.dot(coef[:, :n].T) + coef[:, n]
+    if multi_class == 'multinomial':
+        assert np.allclose(prob, softmax(eta), rtol=1e-6, atol=1e-8)
+    else:
+        # each class is the binary fit of it against the rest
+        for k, label in enumerate(lr.classes_):
+            lb = model()
+            lb.fit(X, (y == label).astype(np.float64))
+            assert np.allclose(coef[k], np.reshape(lb.coef_, -1),
+                               rtol=1e-3, atol=1e-3)
+        p = 1 / (1 + np.exp(-eta))
+        assert np.allclose(prob, p / np.sum(p, axis=1, keepdims=True),
+                           rtol=1e-6, atol=1e-8)